@@ -0,0 +1,78 @@
+"""
+インポート時間のベンチマーク (python -X importtime)
+
+各モジュールを新しいインタープリターでインポートし、累積のインポート時間と
+読み込まれた重いライブラリ (Selenium, pytz, tweepy, requests) を表示する。
+テキスト処理だけのサブコマンド (split / merge / tweet) が重いライブラリを読み込んでいないかの確認に使う。
+
+使用法: python -m benchmarks.bench_import [モジュール ...] [--repeat 5] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# テキスト処理だけのサブコマンドで読み込まれてはいけないライブラリ
+HEAVY_MODULES = ("selenium", "pytz", "tweepy", "requests", "urllib3", "oauthlib")
+
+DEFAULT_MODULES = ("main", "split_text", "merge_text", "tweet", "common.constants", "common.text_utils")
+
+
+def measure_import(module: str) -> dict:
+    """
+    module を新しいインタープリターでインポートし、
+    {module, total_ms, modules: {インポートされたモジュール名: 累積マイクロ秒}} を返す
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        # "import time:      2806 |      15452 | split_text"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative.isdigit():
+            modules[name.strip()] = int(cumulative)
+    return {"module": module, "total_ms": modules.get(module, 0) / 1000, "modules": modules}
+
+
+def heavy_imports(measurement: dict) -> list[str]:
+    """measurement で読み込まれた重いライブラリ (トップレベルのパッケージ名) を返す"""
+    return sorted({name.split(".")[0] for name in measurement["modules"]
+                   if name.split(".")[0] in HEAVY_MODULES})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="インポート時間のベンチマーク")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES), help="計測するモジュール")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の回数 (中央値を表示)")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        measurements = [measure_import(module) for _ in range(args.repeat)]
+        results.append({
+            "module": module,
+            "median_ms": statistics.median(m["total_ms"] for m in measurements),
+            "heavy": heavy_imports(measurements[0]),
+        })
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    for r in results:
+        heavy = ", ".join(r["heavy"]) or "なし"
+        print(f"{r['module']:<20} {r['median_ms']:8.1f} ms  重いライブラリ: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
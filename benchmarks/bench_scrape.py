@@ -0,0 +1,192 @@
+"""
+スクレイピング全体のベンチマーク (ワーカー数・番組数に対するスケーリング)
+
+benchmarks/scrape_replay.py で記録した日をオフラインで再生し、ワーカー数 (1, 2, 4, 6, 8, 12) と
+番組数 (実際の設定 27 番組と、NHK の番組を複製した 100 / 300 番組) の組み合わせごとに scraping_news.main を動かす。
+組み合わせごとに、スループット (番組/分)、番組ごとの処理時間の p50 / p95、全体の所要時間 (makespan)、
+番組あたりの WebDriver コマンド数、ワーカーと Chrome を含めたピークメモリを計測し、JSON に出力する。
+--compare に以前の結果を渡すと、組み合わせごとのスループットと所要時間の変化を表示する。
+
+--fake を付けると Chrome の代わりに偽の WebDriver (common/fake_webdriver.py) で再生し、スクレイピングの処理だけを計測する。
+
+使用法: python -m benchmarks.bench_scrape 20251003 [--workers 1,2,4,6,8,12] [--programs 27,100,300]
+                                                  [--latency 0.02] [--fake] [--output bench.json]
+                                                  [--compare before.json] [--json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.scrape_replay import CONFIG_FILES, DEFAULT_CORPUS_DIR, replay
+from common.utils import parse_programs_config
+
+WORKER_COUNTS = (1, 2, 4, 6, 8, 12)
+PROGRAM_COUNTS = (27, 100, 300)
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def count_programs(config_dir: str) -> tuple[int, int]:
+    """(NHK の番組数, テレビ東京の番組数)。テレビ東京は同じ番組名の URL を1つのタスクにまとめる"""
+    nhk = parse_programs_config(os.path.join(config_dir, "nhk_config.ini")) or {}
+    tvtokyo = parse_programs_config(os.path.join(config_dir, "tvtokyo_config.ini")) or {}
+    return len(nhk), len(tvtokyo)
+
+
+def inflate_configs(src_dir: str, dst_dir: str, total: int) -> int:
+    """
+    NHK の番組を名前を変えて (「番組名 #2」など) 複製し、全体で total 番組になる設定を dst_dir に書く。
+    テレビ東京は番組名で URL を判定するため複製しない。実際の番組数が total 以上の場合はそのまま写す。
+    実際に書いた番組数を返す
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    for name in CONFIG_FILES:
+        Path(dst_dir, name).write_text(Path(src_dir, name).read_text(encoding="utf-8"), encoding="utf-8")
+
+    nhk_count, tvtokyo_count = count_programs(src_dir)
+    extra = total - nhk_count - tvtokyo_count
+    if extra <= 0 or nhk_count == 0:
+        return nhk_count + tvtokyo_count
+
+    programs = list(parse_programs_config(os.path.join(src_dir, "nhk_config.ini"), target_year="{year}").values())
+    sections = []
+    for i in range(extra):
+        program = programs[i % len(programs)]
+        sections.append(f"\n[program_synthetic_{i + 1}]\n"
+                        f"name = {program['name']} #{i // len(programs) + 2}\n"
+                        f"url = {program['url']}\n"
+                        f"channel = {program['channel']}\n")
+    with open(os.path.join(dst_dir, "nhk_config.ini"), "a", encoding="utf-8") as f:
+        f.write("".join(sections))
+    return total
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """最近傍順位法によるパーセンタイル"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize_run(perf: dict, seconds: float) -> dict:
+    """scraping_news.main が記録した計測値から、1つの組み合わせの結果をまとめる"""
+    programs = perf.get("programs", {})
+    latencies = [m["seconds"] for m in programs.values() if "seconds" in m]
+    makespan = perf.get("stages", {}).get("scrape", seconds)
+    count = len(programs)
+    return {
+        "programs": count,
+        "succeeded": sum(1 for m in programs.values() if m.get("status") == "SUCCESS"),
+        "seconds": round(seconds, 2),
+        "makespan_seconds": round(makespan, 2),
+        "programs_per_minute": round(count / makespan * 60, 2) if makespan else None,
+        "p50_task_seconds": percentile(latencies, 50),
+        "p95_task_seconds": percentile(latencies, 95),
+        "webdriver_commands_per_program": round(perf.get("webdriver_commands", 0) / count, 1) if count else None,
+        "peak_total_rss_mb": perf.get("memory", {}).get("peak_total_rss_mb"),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(date: str, worker_counts, program_counts, corpus_dir: Path = DEFAULT_CORPUS_DIR,
+              config_dir: str = "ini", latency: float = 0.0, fake: bool = False) -> dict:
+    """番組数 × ワーカー数の組み合わせごとにオフラインでスクレイピングする"""
+    runs = []
+    for total in program_counts:
+        with tempfile.TemporaryDirectory() as inflated_dir:
+            actual = inflate_configs(config_dir, inflated_dir, total)
+            for workers in worker_counts:
+                result = replay(date, corpus_dir, inflated_dir, latency, workers=workers, fake=fake)
+                summary = summarize_run(result["perf"], result["seconds"])
+                summary.update(requested_programs=total, config_programs=actual, workers=workers,
+                               success=result["success"])
+                runs.append(summary)
+    return {
+        "date": date,
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "latency": latency,
+        "fake_webdriver": fake,
+        "runs": runs,
+    }
+
+
+def compare(current: dict, previous: dict) -> list[dict]:
+    """同じ (番組数, ワーカー数) の組み合わせについて、以前の結果からの変化を返す"""
+    before = {(r["requested_programs"], r["workers"]): r for r in previous.get("runs", [])}
+    changes = []
+    for run in current["runs"]:
+        old = before.get((run["requested_programs"], run["workers"]))
+        if not old or not old.get("makespan_seconds") or not old.get("programs_per_minute"):
+            continue
+        changes.append({
+            "requested_programs": run["requested_programs"],
+            "workers": run["workers"],
+            "makespan_ratio": round(run["makespan_seconds"] / old["makespan_seconds"], 3),
+            "throughput_ratio": round((run["programs_per_minute"] or 0) / old["programs_per_minute"], 3),
+        })
+    return changes
+
+
+def _format(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="スクレイピング全体のベンチマーク (オフライン再生)")
+    parser.add_argument("date", help="記録した日付 (YYYYMMDD)")
+    parser.add_argument("--workers", type=_int_list, default=list(WORKER_COUNTS), help="ワーカー数 (カンマ区切り)")
+    parser.add_argument("--programs", type=_int_list, default=list(PROGRAM_COUNTS), help="番組数 (カンマ区切り)")
+    parser.add_argument("--corpus-dir", type=Path, default=DEFAULT_CORPUS_DIR, help="記録の保存先")
+    parser.add_argument("--config-dir", default="ini", help="元の設定ファイルのディレクトリ")
+    parser.add_argument("--latency", type=float, default=0.0, help="リプレイサーバーの応答遅延 (秒)")
+    parser.add_argument("--fake", action="store_true", help="Chrome の代わりに偽の WebDriver を使う")
+    parser.add_argument("--output", help="結果の JSON を書き出すファイル")
+    parser.add_argument("--compare", help="比較する以前の結果の JSON")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args()
+
+    result = run_suite(args.date, args.workers, args.programs, args.corpus_dir, args.config_dir, args.latency,
+                       args.fake)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            result["comparison"] = compare(result, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'番組':>5} {'ワーカー':>5} {'番組/分':>8} {'p50':>6} {'p95':>6} {'所要':>7} {'cmd/番組':>8} {'ピークMB':>8}")
+    for run in result["runs"]:
+        print(f"{run['config_programs']:>5} {run['workers']:>5} {_format(run['programs_per_minute'], '8.1f')} "
+              f"{_format(run['p50_task_seconds'], '6.1f')} {_format(run['p95_task_seconds'], '6.1f')} "
+              f"{run['makespan_seconds']:>7.1f} {_format(run['webdriver_commands_per_program'], '8.1f')} "
+              f"{_format(run['peak_total_rss_mb'], '8.0f')}")
+    for change in result.get("comparison", []):
+        print(f"{change['requested_programs']} 番組 / {change['workers']} ワーカー: "
+              f"所要時間 {change['makespan_ratio']:.2f}倍, スループット {change['throughput_ratio']:.2f}倍")
+
+
+if __name__ == "__main__":
+    main()
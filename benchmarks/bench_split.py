@@ -0,0 +1,99 @@
+"""
+分割アルゴリズムのベンチマーク
+
+output/ 以下にある実データ (*_before-split.txt) を使って、
+従来の貪欲法 (split_program_greedy) と最適分割 (split_program) を比較する。
+
+使用法: python -m benchmarks.bench_split [--output-dir output] [--json]
+"""
+import argparse
+import json
+import logging
+import re
+import time
+from pathlib import Path
+
+from common.constants import TWEET_MAX_LENGTH, get_header_length
+from common.text_utils import count_tweet_length
+from split_text import split_by_program, split_programs, split_program, split_program_greedy
+
+SPLITTERS = {
+    "greedy": split_program_greedy,
+    "optimal": split_program,
+}
+
+# ファイル名先頭の日付 (YYYYMMDD)
+DATE_PATTERN = re.compile(r'^(\d{8})_before-split\.txt$')
+
+
+def find_before_split_files(output_dir: Path) -> list[Path]:
+    """output_dir 以下の *_before-split.txt を日付順に返す"""
+    return sorted(
+        (p for p in output_dir.rglob('*_before-split.txt') if DATE_PATTERN.match(p.name)),
+        key=lambda p: p.name,
+    )
+
+
+def _lone_tweet_count(tweets: list[str]) -> int:
+    """制限の 1/4 未満しか使っていないツイート (アイテムが1つだけ取り残されたもの) の数"""
+    return sum(1 for t in tweets if count_tweet_length(t) < TWEET_MAX_LENGTH // 4)
+
+
+def bench_file(path: Path) -> dict:
+    """1ファイル分を各アルゴリズムで分割し、結果を比較する"""
+    target_date = DATE_PATTERN.match(path.name).group(1)
+    header_length = get_header_length(target_date)
+    programs = split_by_program(path.read_text(encoding='utf-8'))
+
+    result = {"file": str(path), "programs": len(programs)}
+    for name, splitter in SPLITTERS.items():
+        start = time.perf_counter()
+        tweets = split_programs(programs, header_length, splitter=splitter)
+        elapsed = time.perf_counter() - start
+        result[name] = {
+            "tweets": len(tweets),
+            "lone_tweets": _lone_tweet_count(tweets),
+            "max_length": max((count_tweet_length(t) for t in tweets), default=0),
+            "seconds": elapsed,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分割アルゴリズムのベンチマーク")
+    parser.add_argument('--output-dir', default='output', help="実データを探すディレクトリ")
+    parser.add_argument('--json', action='store_true', help="結果を JSON で出力")
+    args = parser.parse_args()
+
+    # 分割処理の INFO ログはベンチマークの邪魔になるので抑制
+    logging.disable(logging.WARNING)
+
+    files = find_before_split_files(Path(args.output_dir))
+    results = [bench_file(p) for p in files]
+
+    totals = {
+        name: {
+            "tweets": sum(r[name]["tweets"] for r in results),
+            "lone_tweets": sum(r[name]["lone_tweets"] for r in results),
+            "seconds": sum(r[name]["seconds"] for r in results),
+        }
+        for name in SPLITTERS
+    }
+
+    if args.json:
+        print(json.dumps({"files": results, "totals": totals}, ensure_ascii=False, indent=2))
+        return
+
+    print(f"対象ファイル: {len(results)}件")
+    for r in results:
+        g, o = r["greedy"], r["optimal"]
+        mark = " *" if o["tweets"] != g["tweets"] or o["lone_tweets"] != g["lone_tweets"] else ""
+        print(f"{Path(r['file']).name}: ツイート数 {g['tweets']} -> {o['tweets']}, "
+              f"孤立ツイート {g['lone_tweets']} -> {o['lone_tweets']}{mark}")
+    for name, t in totals.items():
+        print(f"[{name}] ツイート数合計: {t['tweets']}, 孤立ツイート合計: {t['lone_tweets']}, "
+              f"処理時間: {t['seconds'] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+テキスト処理のマイクロベンチマーク
+
+output/ 以下の実データ (YYYYMMDD.txt, _tweet.txt, _before-merge.txt, _before-split.txt) を使い、
+分割・マージ・ソート・文字数カウント・ツイート整形の各関数を、アーカイブ全体と、
+1日分の番組ブロックを 10倍・100倍に水増しした日に対して実行する。
+関数ごとに処理時間と、tracemalloc で計測したメモリ割り当て (ピークと、割り当てたまま残ったブロック数) を表示する。
+
+処理時間はマシンの速さに左右されないよう、同じプロセスで測った基準の処理 (calibrate) の何倍かでも記録する。
+--check は決まった条件 (CHECK_PROFILE) で計測し、benchmarks/bench_text_baseline.json と比べて
+遅くなった・メモリが増えた関数があれば終了コード 1 を返す (tests/test_bench_text.py でも同じ比較をする)。
+--update-baseline で基準を作り直す。
+カバレッジ・プロファイラ・デバッガなどのトレーサーは計測する関数だけを遅くし、基準の処理との比が変わってしまうため、
+トレーサーが動いている間は --check / --update-baseline を行わない。
+
+使用法: python -m benchmarks.bench_text [--output-dir output] [--factors 1,10,100] [--limit 50] [--json]
+        python -m benchmarks.bench_text --check
+        python -m benchmarks.bench_text --update-baseline
+"""
+import argparse
+import json
+import logging
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from common.constants import get_header_length
+from common.text_utils import count_tweet_length, extract_time_from_block, sort_blocks_by_time
+from get_tweet import format_tweet_data
+from merge_text import sort_and_merge_text
+from split_text import split_by_program, split_program
+
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "bench_text_baseline.json"
+FACTORS = (1, 10, 100)
+# --check と基準の作成で使う条件 (4種類のファイルがそろった日を古い順に limit 日分。新しい日が増えても対象は変わらない)
+CHECK_PROFILE = {"limit": 30, "factors": (1, 10), "repeat": 5, "complete": True}
+# --check で遅くなった関数が見つかった場合に計測し直す回数 (毎回遅い関数だけを報告する)
+CHECK_ATTEMPTS = 3
+# 基準の何倍で遅くなった (メモリが増えた) とみなすか
+TIME_RATIO = 2.0
+MEMORY_RATIO = 1.5
+# これより短い処理時間・小さいピークの差は計測の誤差として無視する
+MIN_SECONDS = 0.002
+MIN_PEAK_KB = 64
+
+DATE_FILE = re.compile(r"^(\d{8})(|_tweet|_before-merge|_before-split)\.txt$")
+KINDS = {"": "text", "_tweet": "tweet", "_before-merge": "before_merge", "_before-split": "before_split"}
+
+
+def load_days(output_dir: Path, limit: int | None = None, complete: bool = False) -> list[dict]:
+    """
+    output_dir 以下の日ごとのファイルを {"date", "text", "tweet", "before_merge", "before_split"} にまとめ、古い順に返す。
+    complete の場合は4種類のファイルがそろった日だけを返す
+    """
+    days: dict[str, dict] = {}
+    for path in output_dir.rglob("*.txt"):
+        match = DATE_FILE.match(path.name)
+        if match:
+            days.setdefault(match.group(1), {"date": match.group(1)})[KINDS[match.group(2)]] = \
+                path.read_text(encoding="utf-8")
+    ordered = [days[date] for date in sorted(days) if not complete or len(days[date]) == len(KINDS) + 1]
+    return ordered[:limit] if limit else ordered
+
+
+def inflate_day(day: dict, factor: int) -> dict:
+    """番組ブロックを factor 回繰り返し、番組数が factor 倍の日を作る"""
+    if factor == 1:
+        return day
+    inflated = {"date": day["date"]}
+    for key, text in day.items():
+        if key != "date":
+            inflated[key] = "\n\n".join([text.strip()] * factor) + "\n"
+    return inflated
+
+
+def _blocks(text: str) -> list[str]:
+    return [block.strip() for block in text.split("\n\n") if block.strip()]
+
+
+def tweets_from_blocks(blocks: list[str], date: str) -> list[dict]:
+    """_tweet.txt のブロック (整形後) から、format_tweet_data に渡す検索結果のツイート (整形前) を作り直す"""
+    tweets = []
+    for block in blocks:
+        lines = block.splitlines()
+        match = re.match(r"●(.+?)\((NHK \S+) (\d{1,2}:\d{2})-\)", lines[0])
+        if not match or len(lines) < 3:
+            continue
+        name, channel, start = match.groups()
+        tweets.append({"text": f"{channel} {_tweet_time(date, start)} {name}\n{name}▽{lines[1].lstrip('・')}\n{lines[-1]}"})
+    return tweets
+
+
+def _tweet_time(date: str, start: str) -> str:
+    """21:00 -> 「1月5日(月) 午後9:00」 (24時以降は深夜表記) のような番組告知ツイートの時刻表記"""
+    day = datetime.strptime(date, "%Y%m%d")
+    hour, minute = map(int, start.split(":"))
+    late_night = "(深夜)" if hour >= 24 else ""
+    hour %= 24
+    ampm = "午前" if hour < 12 else "午後"
+    return f"{day.month}月{day.day}日({'月火水木金土日'[day.weekday()]}) {ampm}{hour % 12 or 12}:{minute:02d}{late_night}"
+
+
+def build_cases(days: list[dict], work_dir: Path) -> dict:
+    """関数名 -> 引数なしで呼び出せる計測対象 (days 全体を処理する)"""
+    day_blocks = [block for day in days for block in _blocks(day.get("text", ""))]
+    split_inputs = [(day["before_split"], get_header_length(day["date"])) for day in days if "before_split" in day]
+    programs = [(program, header_length) for text, header_length in split_inputs for program in split_by_program(text)]
+    tweet_blocks = [(day["date"], _blocks(day["tweet"])) for day in days if "tweet" in day]
+    tweet_data = [tweets_from_blocks(blocks, date) for date, blocks in tweet_blocks]
+
+    merge_inputs = []
+    for day in days:
+        scraped = day.get("before_merge")
+        if scraped is None or "tweet" not in day:
+            continue
+        # マージは放送時間順のファイルを前提にする (get_tweet / scraping_news の出力と同じ)
+        scraped_path = work_dir / f"{day['date']}.txt"
+        tweet_path = work_dir / f"{day['date']}_tweet.txt"
+        scraped_path.write_text("\n\n".join(sort_blocks_by_time(_blocks(scraped))) + "\n", encoding="utf-8")
+        tweet_path.write_text("\n\n".join(sort_blocks_by_time(_blocks(day["tweet"]))) + "\n", encoding="utf-8")
+        merge_inputs.append((str(tweet_path), str(scraped_path), str(work_dir / f"{day['date']}_merged.txt")))
+
+    return {
+        "count_tweet_length": lambda: [count_tweet_length(block) for block in day_blocks],
+        "extract_time_from_block": lambda: [extract_time_from_block(block, starts_with="●") for block in day_blocks],
+        "sort_blocks_by_time": lambda: [sort_blocks_by_time(_blocks(day.get("text", ""))) for day in days],
+        "split_by_program": lambda: [split_by_program(text) for text, _ in split_inputs],
+        "split_program": lambda: [split_program(program, header_length=header_length)
+                                  for program, header_length in programs],
+        "sort_and_merge_text": lambda: [sort_and_merge_text(tweet, scraped, merged, "")
+                                        for tweet, scraped, merged in merge_inputs],
+        "format_tweet_data": lambda: [format_tweet_data(tweets) for tweets in tweet_data if tweets],
+    }
+
+
+def calibrate(repeat: int = 5) -> float:
+    """マシンの速さの基準にする、文字列処理の決まった処理の時間 (秒)"""
+    words = [f"●番組{i}(NHK BS {i % 24}:{i % 60:02d}-)" for i in range(20000)]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sorted(re.search(r"(\d{1,2}):(\d{2})", w).groups() for w in words)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(func, repeat: int) -> dict:
+    """処理時間 (repeat 回の最小値) と、別に1回実行して計測したメモリ割り当て"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return {"seconds": best, "peak_kb": round((peak - base) / 1024, 1), "retained_blocks": blocks}
+
+
+def active_tracer() -> str | None:
+    """計測を歪めるトレーサー (カバレッジ・プロファイラ・デバッガ) が動いていれば、その種類を返す"""
+    if sys.gettrace() is not None:
+        return "sys.settrace (カバレッジ・デバッガなど)"
+    if sys.getprofile() is not None:
+        return "sys.setprofile (プロファイラなど)"
+    monitoring = getattr(sys, "monitoring", None)  # Python 3.12 以降
+    if monitoring is not None:
+        for tool_id in range(6):
+            name = monitoring.get_tool(tool_id)
+            if name:
+                return f"sys.monitoring ({name})"
+    return None
+
+
+def _tracer_message(tracer: str) -> str:
+    return (f"トレーサー {tracer} が動いているため、基準と比べられません "
+            "(計測する関数だけが遅くなり、基準の処理との比が変わるため)。"
+            "カバレッジやプロファイラを外して実行してください (pytest なら --no-cov)")
+
+
+def _require_no_tracer() -> None:
+    tracer = active_tracer()
+    if tracer:
+        raise RuntimeError(_tracer_message(tracer))
+
+
+def run_suite(output_dir: Path, factors=FACTORS, limit: int | None = None, repeat: int = 3,
+              complete: bool = False) -> dict:
+    """関数 × 水増しの倍率ごとに計測する。結果のキーは "関数名@倍率x" """
+    # 各関数の INFO / WARNING ログはベンチマークの邪魔になるので抑制
+    logging.disable(logging.WARNING)
+    try:
+        days = load_days(output_dir, limit, complete)
+        unit = calibrate()
+        results = {}
+        for factor in factors:
+            inflated = [inflate_day(day, factor) for day in days]
+            with tempfile.TemporaryDirectory() as work_dir:
+                for name, func in build_cases(inflated, Path(work_dir)).items():
+                    measured = measure(func, repeat)
+                    measured["relative"] = round(measured["seconds"] / unit, 3)
+                    results[f"{name}@{factor}x"] = measured
+    finally:
+        logging.disable(logging.NOTSET)
+    return {"days": len(days), "factors": list(factors), "calibration_seconds": unit, "results": results}
+
+
+def find_regressions(current: dict, baseline: dict, time_ratio: float = TIME_RATIO,
+                     memory_ratio: float = MEMORY_RATIO) -> list[str]:
+    """基準より time_ratio 倍以上遅い、または memory_ratio 倍以上メモリを使う関数を返す"""
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        if result["seconds"] >= MIN_SECONDS and result["relative"] >= base["relative"] * time_ratio:
+            regressions.append(f"{key}: 処理時間 {result['relative']:.2f} (基準 {base['relative']:.2f}, "
+                               f"{result['relative'] / base['relative']:.1f}倍)")
+        if result["peak_kb"] - base["peak_kb"] >= MIN_PEAK_KB and result["peak_kb"] >= base["peak_kb"] * memory_ratio:
+            regressions.append(f"{key}: ピークメモリ {result['peak_kb']:.0f}KB (基準 {base['peak_kb']:.0f}KB)")
+    return regressions
+
+
+def run_check(output_dir: Path, baseline_path: Path = DEFAULT_BASELINE_PATH) -> tuple[dict, list[str]]:
+    """
+    CHECK_PROFILE の条件で計測し、基準と比べる。トレーサーが動いている場合は RuntimeError。
+    一時的な負荷による誤検知を避けるため、遅くなった関数があれば CHECK_ATTEMPTS 回まで計測し直し、
+    毎回遅かった関数だけを返す
+    """
+    _require_no_tracer()
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressed = None
+    for _ in range(CHECK_ATTEMPTS):
+        current = run_suite(output_dir, **CHECK_PROFILE)
+        regressions = find_regressions(current, baseline)
+        keys = {line.split(":", 1)[0] for line in regressions}
+        regressed = keys if regressed is None else regressed & keys
+        if not regressed:
+            return current, []
+    return current, [line for line in regressions if line.split(":", 1)[0] in regressed]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="テキスト処理のマイクロベンチマーク")
+    parser.add_argument("--output-dir", type=Path, default=Path("output"), help="実データを探すディレクトリ")
+    parser.add_argument("--factors", default=",".join(map(str, FACTORS)), help="水増しの倍率 (カンマ区切り)")
+    parser.add_argument("--limit", type=int, help="古い順に使う日数 (省略時はすべて)")
+    parser.add_argument("--repeat", type=int, default=3, help="処理時間を測る回数 (最小値を使う)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH, help="基準の JSON")
+    parser.add_argument("--check", action="store_true", help="基準と比べ、遅くなった関数があれば終了コード 1")
+    parser.add_argument("--update-baseline", action="store_true", help="基準を計測し直して保存する")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力")
+    args = parser.parse_args()
+
+    tracer = active_tracer()
+    if tracer and (args.check or args.update_baseline):
+        print(_tracer_message(tracer), file=sys.stderr)
+        sys.exit(2)
+
+    if args.update_baseline:
+        result = run_suite(args.output_dir, **CHECK_PROFILE)
+        result["recorded_at"] = datetime.now().isoformat(timespec="seconds")
+        args.baseline.write_text(json.dumps(result, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+        print(f"基準を {args.baseline} に保存しました ({len(result['results'])} 件)")
+        return
+
+    regressions = []
+    if args.check:
+        result, regressions = run_check(args.output_dir, args.baseline)
+    else:
+        factors = [int(f) for f in args.factors.split(",") if f.strip()]
+        result = run_suite(args.output_dir, factors, args.limit, args.repeat)
+
+    if args.json:
+        print(json.dumps({**result, "regressions": regressions}, ensure_ascii=False, indent=2))
+    else:
+        print(f"対象: {result['days']}日分, 基準の処理 {result['calibration_seconds'] * 1000:.1f}ms")
+        for key, r in result["results"].items():
+            print(f"{key:<32} {r['seconds'] * 1000:>10.2f}ms ({r['relative']:>8.2f}) "
+                  f"ピーク {r['peak_kb']:>9.1f}KB 残ったブロック {r['retained_blocks']}")
+        for line in regressions:
+            print(f"遅くなった関数: {line}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+X API スタンドインサーバーを使ったエンドツーエンドのベンチマーク
+
+ローカルの benchmarks/x_api_server.py に対して tweet.py / get_tweet.py を実際に動かし、
+スレッド投稿にかかる時間とツイート検索のスループットを計測する。
+
+使用法: python -m benchmarks.bench_x_api [--file output/2601/20260108.txt] [--latency 0.05] [--searches 20] [--json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks.x_api_server import XApiServer, XApiState
+
+# tweet.py / get_tweet.py はインポート時に認証情報を読むため、ダミーの値を入れておく
+DUMMY_CREDENTIALS = {
+    "API_KEY": "bench_api_key",
+    "API_SECRET": "bench_api_secret",
+    "ACCESS_TOKEN": "bench_access_token",
+    "ACCESS_SECRET": "bench_access_secret",
+    "BEARER_TOKEN": "bench_bearer_token",
+}
+
+
+def find_latest_tweet_file(output_dir: Path) -> Path | None:
+    """output_dir 以下で最新の YYYYMMDD.txt を返す"""
+    files = [p for p in output_dir.rglob("*.txt") if len(p.stem) == 8 and p.stem.isdigit()]
+    return max(files, key=lambda p: p.stem) if files else None
+
+
+def bench_thread_posting(source: Path, work_dir: Path) -> dict:
+    """source のツイートをスレッドとして投稿し、かかった時間を計測する"""
+    import tweet
+
+    date = source.stem
+    shutil.copy(source, work_dir / f"{date}.txt")
+    start = time.perf_counter()
+    result = tweet.main(date=date, output_dir=str(work_dir))
+    elapsed = time.perf_counter() - start
+    journal = json.loads((work_dir / f"{date}_posted.json").read_text(encoding="utf-8"))
+    return {"date": date, "result": result, "posted": len(journal["tweets"]), "seconds": elapsed}
+
+
+def bench_search(state: XApiState, target_date: str, searches: int, work_dir: Path) -> dict:
+    """get_tweet.search_tweets を繰り返し呼び、スループットを計測する"""
+    import get_tweet
+    from common.rate_limiter import RateLimitLedger, LEDGER_FILENAME
+
+    get_tweet.rate_ledger = RateLimitLedger(str(work_dir / LEDGER_FILENAME))
+
+    # 検索対象日 (放送日の前日, JST) にツイートを投入しておく
+    search_day = datetime.strptime(target_date, "%Y%m%d").replace(tzinfo=timezone(timedelta(hours=9))) - timedelta(days=1)
+    for i, name in enumerate(get_tweet.PROGRAM_NAMES * 5):
+        state.add_tweet(f"NHK BS {search_day:%m/%d} 23:{i:02d}～ {name}\n第{i}回\nhttps://t.co/bench{i}",
+                        created_at=search_day.replace(hour=12, minute=i))
+
+    found = 0
+    start = time.perf_counter()
+    # search_tweets は検索クエリを print するので、計測中は標準出力を捨てる
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(searches):
+            tweets = get_tweet.search_tweets(target_date, state.username, 20)
+            found += len(tweets or [])
+    elapsed = time.perf_counter() - start
+    return {"searches": searches, "tweets_found": found, "seconds": elapsed,
+            "searches_per_second": searches / elapsed if elapsed else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X API スタンドインサーバーを使ったベンチマーク")
+    parser.add_argument("--file", help="投稿するツイートファイル (省略時は output/ 以下の最新の YYYYMMDD.txt)")
+    parser.add_argument("--latency", type=float, default=0.05, help="サーバーの応答遅延 (秒)")
+    parser.add_argument("--tweet-limit", type=int, default=100, help="投稿のレート制限 (ウィンドウあたり)")
+    parser.add_argument("--window", type=float, default=900.0, help="レート制限のウィンドウ (秒)")
+    parser.add_argument("--searches", type=int, default=20, help="検索の実行回数")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力")
+    args = parser.parse_args()
+
+    source = Path(args.file) if args.file else find_latest_tweet_file(Path("output"))
+    if source is None or not source.exists():
+        parser.error("投稿するツイートファイルが見つかりません。--file で指定してください。")
+
+    state = XApiState(latency=args.latency, tweet_limit=args.tweet_limit, window=args.window)
+    with XApiServer(state) as server:
+        os.environ.update(DUMMY_CREDENTIALS)
+        os.environ["X_API_BASE_URL"] = server.base_url
+        work_dir = Path(tempfile.mkdtemp(prefix="bench_x_api_"))
+        try:
+            # 投稿・検索の INFO ログはベンチマークの邪魔になるので抑制
+            logging.disable(logging.WARNING)
+            posting = bench_thread_posting(source, work_dir)
+            search = bench_search(state, source.stem, args.searches, work_dir)
+        finally:
+            logging.disable(logging.NOTSET)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {"source": str(source), "latency": args.latency, "thread_posting": posting, "search": search}
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"対象ファイル: {source} (遅延 {args.latency}秒)")
+    print(f"スレッド投稿: {posting['posted']} 件 / {posting['seconds']:.2f} 秒 "
+          f"(1件あたり {posting['seconds'] / max(posting['posted'], 1):.2f} 秒)")
+    print(f"検索: {search['searches']} 回 / {search['seconds']:.2f} 秒 "
+          f"({search['searches_per_second']:.1f} 回/秒, 取得 {search['tweets_found']} 件)")
+
+
+if __name__ == "__main__":
+    main()
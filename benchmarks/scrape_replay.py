@@ -0,0 +1,517 @@
+"""
+スクレイピングの記録・再生 (オフラインのベンチマーク用)
+
+record: 実際のサイトに対して scraping_news.main を動かし、ワーカーのブラウザが開いた一覧・詳細ページを
+        描画後の DOM のまま保存する (JavaScript で描画されるページのため、HTML と JS を取っておくのではなく
+        スクリプトを取り除いた描画結果を保存し、JSON-LD だけは残す)。アイキャッチのリダイレクト先と、
+        その日の出力 (expected.txt) も合わせて benchmarks/scrape_corpus/{日付}/ に保存する。
+replay: 保存したページをローカルの HTTP サーバーから返し、ini の URL をサーバーに向けた設定で
+        scraping_news.main を動かす。ネットワークに接続せずに、同じ日のスクレイピングを何度でも計測できる。
+        --fake を付けると Chrome もサーバーも使わず、保存したページを偽の WebDriver (common/fake_webdriver.py) で
+        直接スクレイピングする (ブラウザの起動と待機を除いた、スクレイピングの処理だけを計測できる)。
+
+URL は https://www.web.nhk/tv/... -> http://127.0.0.1:{port}/https/www.web.nhk/tv/... のように
+パスを残したまま書き換えるため、番組ごとの URL パターンの判定はそのまま動く。
+
+使用法: python -m benchmarks.scrape_replay record 20251003
+        python -m benchmarks.scrape_replay replay 20251003 [--latency 0.02] [--workers 6] [--fake] [--json]
+        python -m benchmarks.scrape_replay serve 20251003 [--port 8766]
+"""
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS_DIR = Path(__file__).resolve().parent / "scrape_corpus"
+CONFIG_FILES = ("nhk_config.ini", "tvtokyo_config.ini")
+MANIFEST_FILENAME = "manifest.json"
+EXPECTED_FILENAME = "expected.txt"
+
+# 描画後の DOM を保存する前に、相対 URL を絶対 URL にし、実行されるスクリプトを取り除く (JSON-LD は残す)
+SNAPSHOT_SCRIPT = """
+document.querySelectorAll('[href]').forEach(function (e) {
+    if (typeof e.href === 'string' && e.href) { e.setAttribute('href', e.href); }
+});
+document.querySelectorAll('[src]').forEach(function (e) {
+    if (typeof e.src === 'string' && e.src) { e.setAttribute('src', e.src); }
+});
+document.querySelectorAll('script:not([type="application/ld+json"]), noscript').forEach(function (e) {
+    e.remove();
+});
+return '<!DOCTYPE html>\\n' + document.documentElement.outerHTML;
+"""
+
+_ABSOLUTE_URL = re.compile(r"\b(https?)://")
+
+
+def _key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+
+def rewrite_url(url: str, base_url: str) -> str:
+    """https://host/path を {base_url}/https/host/path に書き換える"""
+    return _ABSOLUTE_URL.sub(lambda m: f"{base_url}/{m.group(1)}/", url, count=1)
+
+
+def rewrite_text(text: str, base_url: str) -> str:
+    """HTML・設定ファイル中の絶対 URL をすべてリプレイサーバーに向ける"""
+    return _ABSOLUTE_URL.sub(lambda m: f"{base_url}/{m.group(1)}/", text)
+
+
+def restore_text(text: str, base_url: str) -> str:
+    """rewrite_text() で書き換えた URL を元に戻す (出力を記録時と比べるため)"""
+    return re.sub(re.escape(base_url) + r"/(https?)/", r"\1://", text)
+
+
+def original_url(path: str) -> str | None:
+    """リプレイサーバーへのリクエストのパス (/https/host/path?query) から元の URL を返す"""
+    scheme, _, rest = path.lstrip("/").partition("/")
+    if scheme not in ("http", "https") or not rest:
+        return None
+    return f"{scheme}://{rest}"
+
+
+class Corpus:
+    """
+    1日分の記録。ページはワーカーごとに別ファイル (entries/{URL のハッシュ}.json と pages/*.html.gz) に書き、
+    記録の最後に write_manifest() で manifest.json にまとめる
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.pages: dict[str, dict] = {}
+        self.redirects: dict[str, str] = {}
+
+    def clear(self) -> None:
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+        (self.directory / "pages").mkdir(parents=True)
+        (self.directory / "entries").mkdir()
+
+    def save_page(self, url: str, html: str, final_url: str | None = None) -> None:
+        key = _key(url)
+        with gzip.open(self.directory / "pages" / f"{key}.html.gz", "wt", encoding="utf-8") as f:
+            f.write(html)
+        entry = {"type": "page", "url": url, "file": f"pages/{key}.html.gz", "final_url": final_url or url}
+        (self.directory / "entries" / f"{key}.json").write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+
+    def save_redirect(self, url: str, final_url: str) -> None:
+        entry = {"type": "redirect", "url": url, "final_url": final_url}
+        (self.directory / "entries" / f"r{_key(url)}.json").write_text(json.dumps(entry, ensure_ascii=False),
+                                                                       encoding="utf-8")
+
+    def write_manifest(self, date: str) -> dict:
+        """entries/ を manifest.json にまとめて削除する"""
+        pages, redirects = {}, {}
+        for path in sorted((self.directory / "entries").glob("*.json")):
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            if entry["type"] == "page":
+                pages[entry["url"]] = {"file": entry["file"], "final_url": entry["final_url"]}
+            else:
+                redirects[entry["url"]] = entry["final_url"]
+        manifest = {"date": date, "recorded_at": datetime.now().isoformat(timespec="seconds"),
+                    "pages": pages, "redirects": redirects}
+        (self.directory / MANIFEST_FILENAME).write_text(json.dumps(manifest, ensure_ascii=False, indent=1),
+                                                         encoding="utf-8")
+        shutil.rmtree(self.directory / "entries")
+        self.pages, self.redirects = pages, redirects
+        return manifest
+
+    def load(self) -> "Corpus":
+        manifest = json.loads((self.directory / MANIFEST_FILENAME).read_text(encoding="utf-8"))
+        self.pages, self.redirects = manifest["pages"], manifest["redirects"]
+        return self
+
+    def page_html(self, url: str) -> str:
+        with gzip.open(self.directory / self.pages[url]["file"], "rt", encoding="utf-8") as f:
+            return f.read()
+
+
+# --- 記録 ---
+
+def install_recorder(driver, corpus: Corpus):
+    """
+    driver.get を、移動する前に今のページの DOM を保存するラッパーに置き換える。
+    最後に開いたページを保存するための関数を返す
+    """
+    state = {"url": None}
+    get = driver.get
+
+    def snapshot():
+        url, state["url"] = state["url"], None
+        if url is None:
+            return
+        try:
+            corpus.save_page(url, driver.execute_script(SNAPSHOT_SCRIPT), driver.current_url)
+        except Exception as e:
+            logger.warning("ページを保存できませんでした: %s (%s)", url, e)
+
+    def recording_get(url):
+        snapshot()
+        state["url"] = url
+        return get(url)
+
+    driver.get = recording_get
+    return snapshot
+
+
+# 記録中のワーカーの状態 (fork で引き継ぐ)
+_recording = {"corpus": None, "snapshot": None, "fetch": None}
+
+
+def _recording_manager():
+    import scraping_news
+
+    class RecordingWebDriverManager(scraping_news.WebDriverManager):
+        def __enter__(self):
+            driver = super().__enter__()
+            _recording["snapshot"] = install_recorder(driver, _recording["corpus"])
+            return driver
+
+    return RecordingWebDriverManager
+
+
+def _recording_fetch(args):
+    """番組の処理が終わるたびに、最後に開いたページを保存する"""
+    try:
+        return _recording["fetch"](args)
+    finally:
+        if _recording["snapshot"] is not None:
+            _recording["snapshot"]()
+
+
+def _recording_resolver_factory(corpus: Corpus):
+    from common.url_resolver import UrlResolver
+
+    class RecordingResolver(UrlResolver):
+        def resolve(self, url):
+            final_url = super().resolve(url)
+            if final_url:
+                corpus.save_redirect(url, final_url)
+            return final_url
+
+    resolvers = {}
+
+    def default_resolver():
+        # 既定のリゾルバーと同じく、プロセスごとに作る
+        if os.getpid() not in resolvers:
+            resolvers[os.getpid()] = RecordingResolver()
+        return resolvers[os.getpid()]
+
+    return default_resolver
+
+
+@contextlib.contextmanager
+def _patched(module, **attrs):
+    originals = {name: getattr(module, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(module, name, value)
+
+
+def _run_scrape(date: str, config_dir: str, output_dir: str, workers: int | None = None) -> bool:
+    import scraping_news
+    try:
+        scraping_news.main(target_date=date, config_dir=config_dir, output_dir=output_dir,
+                           workers=workers or scraping_news.NUM_WORKERS)
+    except SystemExit as e:
+        return not e.code
+    return True
+
+
+def record(date: str, corpus_dir: Path = DEFAULT_CORPUS_DIR, config_dir: str = "ini") -> dict:
+    """実際のサイトに対してスクレイピングし、corpus_dir/{date}/ に記録する"""
+    import scraping_news
+
+    corpus = Corpus(Path(corpus_dir) / date)
+    corpus.clear()
+    _recording.update(corpus=corpus, snapshot=None, fetch=scraping_news.fetch_single_program)
+    with tempfile.TemporaryDirectory() as output_dir, \
+            _patched(scraping_news, WebDriverManager=_recording_manager(), fetch_single_program=_recording_fetch,
+                     default_resolver=_recording_resolver_factory(corpus)):
+        start = time.perf_counter()
+        success = _run_scrape(date, config_dir, output_dir)
+        elapsed = time.perf_counter() - start
+        output = Path(output_dir) / f"{date}.txt"
+        if output.exists():
+            shutil.copy(output, corpus.directory / EXPECTED_FILENAME)
+    manifest = corpus.write_manifest(date)
+    return {"date": date, "success": success, "seconds": round(elapsed, 2),
+            "pages": len(manifest["pages"]), "redirects": len(manifest["redirects"]),
+            "corpus": str(corpus.directory)}
+
+
+# --- 再生 ---
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """記録したページとリダイレクトを返すリクエストハンドラ"""
+
+    server_version = "ScrapeReplay/1.0"
+
+    def log_message(self, format, *args):
+        # ベンチマークの出力を汚さないようにアクセスログは出さない
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: dict | None = None, head: bool = False):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _serve(self, head: bool):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        url = original_url(self.path)
+        corpus = server.corpus
+        server.count()
+        if url in corpus.pages:
+            final_url = corpus.pages[url]["final_url"]
+            if final_url != url and final_url in corpus.pages:
+                self._send(302, headers={"Location": rewrite_url(final_url, server.base_url)}, head=head)
+            else:
+                body = rewrite_text(corpus.page_html(url), server.base_url).encode("utf-8")
+                self._send(200, body, head=head)
+        elif url in corpus.redirects:
+            self._send(302, headers={"Location": rewrite_url(corpus.redirects[url], server.base_url)}, head=head)
+        elif url in server.redirect_targets:
+            self._send(200, b"<!DOCTYPE html><html><body></body></html>", head=head)
+        else:
+            server.missing.add(url or self.path)
+            self._send(404, head=head)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """リプレイサーバー本体。start() でバックグラウンドスレッドで起動する"""
+
+    daemon_threads = True
+
+    def __init__(self, corpus: Corpus, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), ReplayHandler)
+        self.corpus = corpus
+        self.latency = latency
+        self.redirect_targets = set(corpus.redirects.values())
+        self.requests = 0
+        self.missing: set[str] = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def rewrite_configs(src_dir: str, dst_dir: str, base_url: str) -> None:
+    """設定ファイルの URL をリプレイサーバーに向けて dst_dir に書き出す (ファイル名は放送局の判定に使うため変えない)"""
+    os.makedirs(dst_dir, exist_ok=True)
+    for name in CONFIG_FILES:
+        text = Path(src_dir, name).read_text(encoding="utf-8")
+        Path(dst_dir, name).write_text(rewrite_text(text, base_url), encoding="utf-8")
+
+
+_replay_resolvers = {}
+
+
+def _replay_resolver():
+    """リダイレクトの結果をキャッシュしないリゾルバー (ポートが毎回変わるため)"""
+    from common.url_resolver import UrlResolver
+    if os.getpid() not in _replay_resolvers:
+        _replay_resolvers[os.getpid()] = UrlResolver(cache_path=None)
+    return _replay_resolvers[os.getpid()]
+
+
+def _fake_driver_manager(corpus: Corpus):
+    """保存したページを開く偽の WebDriver を返す WebDriverManager の代わり"""
+    from common.fake_webdriver import FakeWebDriver
+
+    redirects = {url: page["final_url"] for url, page in corpus.pages.items() if page["final_url"] != url}
+    redirects.update(corpus.redirects)
+    # ページは開いた URL で記録しているため、リダイレクト先の URL からも引けるようにする
+    recorded_urls = {page["final_url"]: url for url, page in corpus.pages.items()}
+    recorded_urls.update({url: url for url in corpus.pages})
+
+    def load(url):
+        return corpus.page_html(recorded_urls[url]) if url in recorded_urls else None
+
+    class FakeWebDriverManager:
+        def __init__(self, options=None):
+            self.driver = None
+
+        def __enter__(self):
+            self.driver = FakeWebDriver(load, redirects)
+            return self.driver
+
+        def __exit__(self, *exc):
+            self.driver.quit()
+            return False
+
+    return FakeWebDriverManager
+
+
+def _fake_resolver_factory(corpus: Corpus):
+    """記録したリダイレクト先を返すリゾルバー (HTTP で調べない)"""
+    from common.url_resolver import UrlResolver
+
+    class RecordedResolver(UrlResolver):
+        def resolve(self, url):
+            final_url = corpus.redirects.get(url)
+            self.stats["hits" if final_url else "misses"] += 1
+            return final_url
+
+    resolvers = {}
+
+    def default_resolver():
+        if os.getpid() not in resolvers:
+            resolvers[os.getpid()] = RecordedResolver(cache_path=None)
+        return resolvers[os.getpid()]
+
+    return default_resolver
+
+
+def replay(date: str, corpus_dir: Path = DEFAULT_CORPUS_DIR, config_dir: str = "ini", latency: float = 0.0,
+           workers: int | None = None, fake: bool = False) -> dict:
+    """
+    記録した日のスクレイピングをオフラインで実行し、かかった時間と記録時の出力との一致、
+    処理時間の履歴に記録された計測値 (perf) を返す。
+    fake=True の場合は Chrome とリプレイサーバーの代わりに偽の WebDriver を使い、待機は条件を1回だけ評価する
+    """
+    import scraping_news
+    from common import episode_processor
+
+    corpus = Corpus(Path(corpus_dir) / date).load()
+    server = None
+    with contextlib.ExitStack() as stack:
+        work_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        output_dir = os.path.join(work_dir, "output")
+        if fake:
+            from common.fake_webdriver import StaticWait
+            stack.enter_context(_patched(scraping_news, WebDriverManager=_fake_driver_manager(corpus),
+                                         WebDriverWait=StaticWait, default_resolver=_fake_resolver_factory(corpus)))
+            stack.enter_context(_patched(episode_processor, WebDriverWait=StaticWait))
+            replay_config_dir = config_dir
+        else:
+            server = stack.enter_context(ReplayServer(corpus, latency))
+            stack.enter_context(_patched(scraping_news, default_resolver=_replay_resolver))
+            replay_config_dir = os.path.join(work_dir, "ini")
+            rewrite_configs(config_dir, replay_config_dir, server.base_url)
+        start = time.perf_counter()
+        success = _run_scrape(date, replay_config_dir, output_dir, workers)
+        elapsed = time.perf_counter() - start
+        output = Path(output_dir) / f"{date}.txt"
+        text = output.read_text(encoding="utf-8") if output.exists() else ""
+        if server is not None:
+            text = restore_text(text, server.base_url)
+        history = Path(output_dir) / "perf_history.jsonl"
+        perf = json.loads(history.read_text(encoding="utf-8").splitlines()[-1]) if history.exists() else {}
+
+    expected = corpus.directory / EXPECTED_FILENAME
+    return {
+        "date": date,
+        "success": success,
+        "seconds": round(elapsed, 2),
+        "stages": perf.get("stages", {}),
+        # 偽の WebDriver はワーカーの中でページを開くため、リクエストは数えない
+        "requests": server.requests if server is not None else None,
+        "missing": sorted(server.missing) if server is not None else [],
+        "output_lines": len(text.splitlines()),
+        "matches_recording": expected.exists() and expected.read_text(encoding="utf-8") == text,
+        "perf": perf,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="スクレイピングの記録・再生 (オフラインのベンチマーク)")
+    parser.add_argument("mode", choices=["record", "replay", "serve"])
+    parser.add_argument("date", help="対象日付 (YYYYMMDD)")
+    parser.add_argument("--corpus-dir", type=Path, default=DEFAULT_CORPUS_DIR, help="記録の保存先")
+    parser.add_argument("--config-dir", default="ini", help="元の設定ファイルのディレクトリ")
+    parser.add_argument("--latency", type=float, default=0.0, help="replay / serve: 各レスポンスの遅延 (秒)")
+    parser.add_argument("--port", type=int, default=8766, help="serve: 待ち受けるポート")
+    parser.add_argument("--workers", type=int, help="replay: ワーカーの数 (省略時は scraping_news.NUM_WORKERS)")
+    parser.add_argument("--fake", action="store_true", help="replay: Chrome の代わりに偽の WebDriver を使う")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        corpus = Corpus(args.corpus_dir / args.date).load()
+        server = ReplayServer(corpus, args.latency, port=args.port)
+        print(f"リプレイサーバーを起動しました: {server.base_url} ({len(corpus.pages)} ページ)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    if args.mode == "record":
+        result = record(args.date, args.corpus_dir, args.config_dir)
+    else:
+        result = replay(args.date, args.corpus_dir, args.config_dir, args.latency, args.workers, args.fake)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.mode == "record":
+        print(f"{result['date']}: {result['pages']} ページ, {result['redirects']} リダイレクトを記録しました "
+              f"({result['seconds']:.1f}秒) -> {result['corpus']}")
+    else:
+        requests_text = "偽の WebDriver" if result["requests"] is None else f"リクエスト {result['requests']} 件"
+        print(f"{result['date']}: {result['seconds']:.1f}秒, {requests_text}, "
+              f"出力 {result['output_lines']} 行, 記録時の出力と{'一致' if result['matches_recording'] else '不一致'}")
+        for stage, seconds in result["stages"].items():
+            print(f"  {stage}: {seconds:.2f}秒")
+        for url in result["missing"]:
+            print(f"  記録にない URL: {url}")
+
+
+if __name__ == "__main__":
+    main()
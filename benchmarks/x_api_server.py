@@ -0,0 +1,311 @@
+"""
+X API v2 のローカルスタンドインサーバー
+
+ツイート投稿 (POST /2/tweets)、最近のツイート検索 (GET /2/tweets/search/recent)、
+認証ユーザー取得 (GET /2/users/me) をエミュレートする。
+環境変数 X_API_BASE_URL にこのサーバーのURLを設定すると、tweet.py / get_tweet.py のリクエスト先が切り替わる。
+
+- レスポンスの遅延 (latency)
+- エンドポイントごとのレート制限と x-rate-limit-* ヘッダー
+- 指定したリクエスト番号での 429 / 403 の注入
+- 同じ本文のツイートの重複検知 (403)
+
+使用法: python -m benchmarks.x_api_server [--port 8765] [--latency 0.05] [--tweet-limit 100] ...
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+TWEET_ENDPOINT = "create_tweet"
+SEARCH_ENDPOINT = "search_recent_tweets"
+ME_ENDPOINT = "get_me"
+
+DUPLICATE_DETAIL = "You are not allowed to create a Tweet with duplicate content."
+
+
+def _isoformat(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class RateLimitWindow:
+    """エンドポイントごとの固定ウィンドウ方式のレート制限"""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset = time.time() + window
+
+    def consume(self) -> bool:
+        """1回分を消費する。残りがなければ False"""
+        now = time.time()
+        if now >= self.reset:
+            self.remaining = self.limit
+            self.reset = now + self.window
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def headers(self) -> dict:
+        return {
+            "x-rate-limit-limit": str(self.limit),
+            "x-rate-limit-remaining": str(self.remaining),
+            "x-rate-limit-reset": str(int(self.reset)),
+        }
+
+
+class XApiState:
+    """スタンドインサーバーの状態 (投稿済みツイート、レート制限、障害注入の設定)"""
+
+    def __init__(self, latency: float = 0.0, tweet_limit: int = 100, search_limit: int = 180,
+                 window: float = 900.0, fail_429: set[int] | None = None, fail_403: set[int] | None = None,
+                 username: str = "nhk_docudocu"):
+        self.latency = latency
+        self.username = username
+        self.limits = {
+            TWEET_ENDPOINT: RateLimitWindow(tweet_limit, window),
+            SEARCH_ENDPOINT: RateLimitWindow(search_limit, window),
+            ME_ENDPOINT: RateLimitWindow(75, window),
+        }
+        # 何番目のリクエスト (1始まり、全エンドポイント通し) で障害を起こすか
+        self.fail_429 = set(fail_429 or ())
+        self.fail_403 = set(fail_403 or ())
+        self.request_count = 0
+        self.tweets = []  # 新しい順
+        self._next_id = 1_900_000_000_000_000_000
+        self._user_ids = {username: 1}  # ユーザー名 -> 数値のユーザーID
+        self._lock = threading.Lock()
+
+    def add_tweet(self, text: str, created_at: datetime | None = None, author: str | None = None,
+                  expanded_urls: dict[str, str] | None = None) -> dict:
+        """
+        ツイートを追加する (検索用データの投入にも使う)。author はユーザー名。
+        expanded_urls (本文中の t.co URL -> 展開先) を指定すると entities.urls を付ける
+        """
+        with self._lock:
+            self._next_id += 1
+            tweet = {
+                "id": str(self._next_id),
+                "text": text,
+                "author_id": str(self._user_ids.setdefault(author or self.username, len(self._user_ids) + 1)),
+                "created_at": _isoformat(created_at or datetime.now(timezone.utc)),
+                "edit_history_tweet_ids": [str(self._next_id)],
+                "_username": author or self.username,
+            }
+            if expanded_urls:
+                tweet["entities"] = {"urls": [
+                    {"start": text.index(url), "end": text.index(url) + len(url), "url": url,
+                     "expanded_url": expanded, "display_url": expanded.split("://", 1)[-1][:26]}
+                    for url, expanded in expanded_urls.items() if url in text
+                ]}
+            self.tweets.insert(0, tweet)
+            self.tweets.sort(key=lambda t: t["created_at"], reverse=True)
+            return tweet
+
+    def next_request(self) -> int:
+        with self._lock:
+            self.request_count += 1
+            return self.request_count
+
+    def search(self, query: str, start_time: str | None, end_time: str | None,
+               since_id: str | None = None) -> list[dict]:
+        """from:ユーザー と (A OR B ...) の簡易クエリで検索する。since_id より古いツイートは除く"""
+        user = None
+        body = query
+        if body.startswith("from:"):
+            user, _, body = body.partition(" ")
+            user = user[len("from:"):]
+        body = body.strip()
+        if body.startswith("(") and body.endswith(")"):
+            body = body[1:-1]
+        keywords = [k.strip().strip('"') for k in body.split(" OR ") if k.strip()]
+
+        start = _parse_time(start_time) if start_time else None
+        end = _parse_time(end_time) if end_time else None
+        results = []
+        with self._lock:
+            for tweet in self.tweets:
+                created_at = _parse_time(tweet["created_at"])
+                if user and tweet["_username"] != user:
+                    continue
+                if keywords and not any(k in tweet["text"] for k in keywords):
+                    continue
+                if start and created_at < start:
+                    continue
+                if end and created_at > end:
+                    continue
+                if since_id and int(tweet["id"]) <= int(since_id):
+                    continue
+                results.append({k: v for k, v in tweet.items() if not k.startswith("_")})
+        return results
+
+
+class XApiHandler(BaseHTTPRequestHandler):
+    """X API v2 の一部を返すリクエストハンドラ"""
+
+    server_version = "XApiStandIn/1.0"
+
+    @property
+    def state(self) -> XApiState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        # ベンチマークの出力を汚さないようにアクセスログは出さない
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _begin(self, endpoint: str):
+        """遅延・障害注入・レート制限を適用する。続行できる場合はレート制限ヘッダーを、できない場合は応答済みで None を返す"""
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        number = self.state.next_request()
+        limit = self.state.limits[endpoint]
+        if number in self.state.fail_429 or not limit.consume():
+            headers = limit.headers()
+            headers["x-rate-limit-remaining"] = "0"
+            self._send_json(429, {"title": "Too Many Requests", "detail": "Too Many Requests", "status": 429}, headers)
+            return None
+        if number in self.state.fail_403:
+            self._send_json(403, {"title": "Forbidden", "detail": "Injected failure.", "status": 403}, limit.headers())
+            return None
+        return limit.headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/2/users/me":
+            headers = self._begin(ME_ENDPOINT)
+            if headers is not None:
+                self._send_json(200, {"data": {"id": "1", "name": "stand-in", "username": self.state.username}}, headers)
+        elif url.path == "/2/tweets/search/recent":
+            headers = self._begin(SEARCH_ENDPOINT)
+            if headers is None:
+                return
+            matched = self.state.search(params.get("query", ""), params.get("start_time"), params.get("end_time"),
+                                        params.get("since_id"))
+            max_results = int(params.get("max_results", 10))
+            offset = int(params.get("next_token", 0) or 0)
+            page = matched[offset:offset + max_results]
+            # entities は tweet.fields で指定された場合のみ返す
+            if "entities" not in params.get("tweet.fields", "").split(","):
+                page = [{k: v for k, v in tweet.items() if k != "entities"} for tweet in page]
+            meta = {"result_count": len(page)}
+            if page:
+                meta["newest_id"] = page[0]["id"]
+                meta["oldest_id"] = page[-1]["id"]
+            if offset + max_results < len(matched):
+                meta["next_token"] = str(offset + max_results)
+            body = {"meta": meta}
+            if page:
+                body["data"] = page
+            self._send_json(200, body, headers)
+        else:
+            self._send_json(404, {"title": "Not Found", "detail": f"{url.path} is not emulated.", "status": 404})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/2/tweets":
+            self._send_json(404, {"title": "Not Found", "detail": f"{url.path} is not emulated.", "status": 404})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        headers = self._begin(TWEET_ENDPOINT)
+        if headers is None:
+            return
+        text = request.get("text", "")
+        if any(t["text"] == text and t["_username"] == self.state.username for t in self.state.tweets):
+            self._send_json(403, {"title": "Forbidden", "detail": DUPLICATE_DETAIL, "status": 403}, headers)
+            return
+        tweet = self.state.add_tweet(text)
+        self._send_json(201, {"data": {"id": tweet["id"], "text": text}}, headers)
+
+
+class XApiServer(ThreadingHTTPServer):
+    """スタンドインサーバー本体。start() でバックグラウンドスレッドで起動する"""
+
+    daemon_threads = True
+
+    def __init__(self, state: XApiState | None = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), XApiHandler)
+        self.state = state or XApiState()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "XApiServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _int_set(value: str) -> set[int]:
+    return {int(v) for v in value.split(",") if v.strip()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X API v2 のローカルスタンドインサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="各レスポンスの遅延 (秒)")
+    parser.add_argument("--tweet-limit", type=int, default=100, help="投稿のレート制限 (ウィンドウあたり)")
+    parser.add_argument("--search-limit", type=int, default=180, help="検索のレート制限 (ウィンドウあたり)")
+    parser.add_argument("--window", type=float, default=900.0, help="レート制限のウィンドウ (秒)")
+    parser.add_argument("--fail-429", type=_int_set, default=set(), help="429 を返すリクエスト番号 (カンマ区切り)")
+    parser.add_argument("--fail-403", type=_int_set, default=set(), help="403 を返すリクエスト番号 (カンマ区切り)")
+    parser.add_argument("--seed", help="検索用に投入するツイートの JSON ファイル ([{text, created_at, username}, ...])")
+    args = parser.parse_args()
+
+    state = XApiState(latency=args.latency, tweet_limit=args.tweet_limit, search_limit=args.search_limit,
+                      window=args.window, fail_429=args.fail_429, fail_403=args.fail_403)
+    if args.seed:
+        with open(args.seed, encoding="utf-8") as f:
+            for tweet in json.load(f):
+                created_at = _parse_time(tweet["created_at"]) if tweet.get("created_at") else None
+                state.add_tweet(tweet["text"], created_at, tweet.get("username"))
+
+    server = XApiServer(state, args.host, args.port)
+    print(f"X API スタンドインサーバーを起動しました: {server.base_url}")
+    print(f"export X_API_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+投稿前のリンクチェック
+
+output/YYYYMMDD.txt のすべての URL を同時に調べ、投稿前に次のものを検出する。
+- 4xx / 5xx を返すリンク
+- リダイレクトがループしているリンク、接続できないリンク
+- URL のプレースホルダー ((URL不明) など) と URL のないアイテム
+
+使用法: python check_links.py YYYYMMDD
+"""
+import os
+import re
+import sys
+import time
+import logging
+from common.utils import setup_logger, Constants
+from common.url_resolver import UrlResolver
+
+logger = logging.getLogger(__name__)
+
+# スクレイピング・ツイート取得・分割で URL の代わりに入る文字列
+PLACEHOLDERS = ("(URL不明)", "(URLなし)", "URLの抽出に失敗", "URL抽出失敗")
+
+URL_PATTERN = re.compile(r'https?://[^\s"\'<>]+')
+
+# 同時に調べる URL の最大数
+MAX_CHECK_WORKERS = 16
+
+
+def _iter_lines(text: str):
+    """(行番号, 番組ヘッダー, 行) を返す"""
+    program = ""
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if line.startswith("●"):
+            program = line
+        yield line_no, program, line
+
+
+def extract_links(text: str) -> list[dict]:
+    """テキスト中の URL を {line, program, url} のリストで返す"""
+    links = []
+    for line_no, program, line in _iter_lines(text):
+        for url in URL_PATTERN.findall(line):
+            links.append({"line": line_no, "program": program, "url": url.rstrip('。、」)')})
+    return links
+
+
+def find_placeholders(text: str) -> list[dict]:
+    """URL のプレースホルダーと、URL の行が続かないアイテム (・で始まる行) を返す"""
+    problems = []
+    lines = list(_iter_lines(text))
+    for i, (line_no, program, line) in enumerate(lines):
+        placeholder = next((p for p in PLACEHOLDERS if p in line), None)
+        if placeholder:
+            problems.append({"line": line_no, "program": program, "url": None,
+                             "reason": f"URLのプレースホルダー: {placeholder}"})
+        elif line.startswith("・"):
+            next_line = lines[i + 1][2] if i + 1 < len(lines) else ""
+            if not URL_PATTERN.match(next_line) and not any(p in next_line for p in PLACEHOLDERS):
+                problems.append({"line": line_no, "program": program, "url": None,
+                                 "reason": "URLがありません"})
+    return problems
+
+
+def check_links(text: str, resolver: UrlResolver | None = None) -> list[dict]:
+    """
+    テキスト中のリンクを同時に調べ、問題のあるものを {line, program, url, reason} のリストで返す。
+    投稿前のチェックなので、リダイレクト先のキャッシュは使わずに毎回調べる。
+    """
+    resolver = resolver or UrlResolver(cache_path=None, timeout=Constants.Time.LINK_CHECK_TIMEOUT,
+                                       max_workers=MAX_CHECK_WORKERS)
+    links = extract_links(text)
+    results = resolver.resolve_many_detail(link["url"] for link in links)
+
+    problems = find_placeholders(text)
+    for link in links:
+        result = results[link["url"]]
+        if result["error"]:
+            reason = result["error"]
+        elif result["status"] >= 400:
+            reason = f"HTTP {result['status']}"
+        else:
+            continue
+        problems.append({**link, "reason": reason})
+    return sorted(problems, key=lambda p: p["line"])
+
+
+def main(date: str, output_dir: str = "output") -> int:
+    """
+    output_dir/YYYYMMDD.txt のリンクをチェックする。
+
+    Returns:
+        int: 問題がなければ 0、問題のあるリンクがある・ファイルがない場合は 1
+    """
+    file_path = os.path.join(output_dir, f"{date}.txt")
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        logger.error(f"ファイル {file_path} が見つかりません。")
+        return 1
+
+    start = time.perf_counter()
+    links = extract_links(text)
+    problems = check_links(text)
+    elapsed = time.perf_counter() - start
+
+    logger.info(f"{file_path}: {len({link['url'] for link in links})} 件のURLを {elapsed:.1f} 秒でチェックしました。")
+    if not problems:
+        logger.info("問題のあるリンクはありませんでした。")
+        return 0
+
+    logger.error(f"問題のあるリンクが {len(problems)} 件あります:")
+    for problem in problems:
+        logger.error(f"  {file_path}:{problem['line']} {problem['program']} "
+                     f"{problem['url'] or ''} -> {problem['reason']}")
+    return 1
+
+
+if __name__ == "__main__":
+    setup_logger(level=logging.INFO)
+    if len(sys.argv) < 2:
+        print("使用方法: python check_links.py YYYYMMDD")
+        sys.exit(1)
+    sys.exit(main(sys.argv[1]))
@@ -5,6 +5,7 @@ from typing import TypeVar, Callable, Any, Optional, Union, List, Tuple
 import time
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
 from common.utils import WebDriverManager
+from common import tracing
 
 T = TypeVar('T')
 
@@ -18,7 +19,7 @@ class BaseScraper(ABC):
         self.config = config
         # クラス固有のロガーを取得
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.logger.debug(f"{self.__class__.__name__} を初期化しました。")
+        self.logger.debug("%s を初期化しました。", self.__class__.__name__)
 
     # --- デコレータを修正 ---
     # @staticmethod ではなく、メソッド内で self.logger を使えるようにする
@@ -35,9 +36,9 @@ class BaseScraper(ABC):
                 return func(*args, **kwargs)
             except (TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException) as e:
                 # より具体的にエラーログを出力
-                instance_self.logger.warning(f"{func.__name__} でSeleniumエラー: {e.__class__.__name__} - 引数: {args[1:]}, {kwargs}")
+                instance_self.logger.warning("%s でSeleniumエラー: %s - 引数: %s, %s", func.__name__, e.__class__.__name__, args[1:], kwargs)
             except Exception as e:
-                instance_self.logger.error(f"{func.__name__} で予期せぬエラー: {e} - 引数: {args[1:]}, {kwargs}", exc_info=True)
+                instance_self.logger.error("%s で予期せぬエラー: %s - 引数: %s, %s", func.__name__, e, args[1:], kwargs, exc_info=True)
             return None
         return wrapper
 
@@ -48,7 +49,7 @@ class BaseScraper(ABC):
             def wrapper(*args, **kwargs) -> T: # self は wrapper の引数に含まれる
                 # self は args[0] になる想定
                 instance_self = args[0]
-                instance_self.logger.info(f"[{operation_name}] 開始: {args[1:] if len(args) > 1 else ''} {kwargs if kwargs else ''}")
+                instance_self.logger.info("[%s] 開始: %s %s", operation_name, args[1:] if len(args) > 1 else '', kwargs if kwargs else '')
                 start_time = time.time() # time をインポートする必要あり
                 result = func(*args, **kwargs)
                 end_time = time.time()
@@ -56,9 +57,9 @@ class BaseScraper(ABC):
                 if result is not None:
                     # 結果がリストの場合、件数を表示
                     count_str = f" ({len(result)}件)" if isinstance(result, list) else ""
-                    instance_self.logger.info(f"[{operation_name}] 完了{count_str} ({duration:.2f}秒)")
+                    instance_self.logger.info("[%s] 完了%s (%.2f秒)", operation_name, count_str, duration)
                 else:
-                    instance_self.logger.warning(f"[{operation_name}] 失敗または結果なし ({duration:.2f}秒)")
+                    instance_self.logger.warning("[%s] 失敗または結果なし (%.2f秒)", operation_name, duration)
                 return result
             return wrapper
         return decorator
@@ -79,9 +80,9 @@ class BaseScraper(ABC):
             try:
                 return func(self, *args, **kwargs)
             except (TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException) as e:
-                logger.warning(f"{func.__name__} でSeleniumエラー: {e.__class__.__name__} - 引数: {args}, {kwargs}")
+                logger.warning("%s でSeleniumエラー: %s - 引数: %s, %s", func.__name__, e.__class__.__name__, args, kwargs)
             except Exception as e:
-                logger.error(f"{func.__name__} で予期せぬエラー: {e} - 引数: {args}, {kwargs}", exc_info=True)
+                logger.error("%s で予期せぬエラー: %s - 引数: %s, %s", func.__name__, e, args, kwargs, exc_info=True)
             return None
         return wrapper
 
@@ -96,20 +97,21 @@ class BaseScraper(ABC):
             def wrapper(self, *args, **kwargs) -> ScrapeResult: # 戻り値の型を ScrapeResult に
                 logger = getattr(self, 'logger', logging.getLogger(func.__module__))
                 log_args = args[0] if args else "" # 最初の引数をログに出力する例
-                logger.info(f"[{operation_name}] 開始: {log_args}")
+                logger.info("[%s] 開始: %s", operation_name, log_args)
                 start_time = time.time()
                 try:
                     # 元の関数を実行し、結果タプル (status, data_or_msg) を受け取る
-                    status, data_or_msg = func(self, *args, **kwargs)
+                    with tracing.span(operation_name, "scrape", target=log_args):
+                        status, data_or_msg = func(self, *args, **kwargs)
                     end_time = time.time()
                     duration = end_time - start_time
                     # 処理時間を DEBUG レベルでログ出力（任意）
-                    logger.debug(f"[{operation_name}] 処理完了: {log_args} ({duration:.2f}秒) - Status: {status}")
+                    logger.debug("[%s] 処理完了: %s (%.2f秒) - Status: %s", operation_name, log_args, duration, status)
                     # 結果タプルをそのまま返す
                     return status, data_or_msg
                 except Exception as e:
                     # get_program_info 内でキャッチされずにデコレータまで来た例外
-                    logger.error(f"[{operation_name}] 実行中に予期せぬエラー: {log_args} - {e}", exc_info=True)
+                    logger.error("[%s] 実行中に予期せぬエラー: %s - %s", operation_name, log_args, e, exc_info=True)
                     # エラー発生時は failure タプルを返す
                     return "failure", f"予期せぬエラー: {e}"
             return wrapper
@@ -131,12 +133,12 @@ class BaseScraper(ABC):
             return False
         if program_name not in self.config:
             # ログレベルを warning に変更し、処理は継続させる場合もある
-            self.logger.warning(f"{program_name} の設定情報が見つかりません")
+            self.logger.warning("%s の設定情報が見つかりません", program_name)
             return False
         # 必要であれば、urlなどの必須キーの存在チェックも追加
         program_data = self.config[program_name]
         if not isinstance(program_data, dict):
-            self.logger.error(f"{program_name} の設定データが辞書ではありません。")
+            self.logger.error("%s の設定データが辞書ではありません。", program_name)
             return False
         return True
 
@@ -148,7 +150,7 @@ class BaseScraper(ABC):
                 return operation(driver)
             except Exception as e:
                 # ログを簡潔にし、詳細は再スロー先に任せる
-                self.logger.error(f"[{self.__class__.__name__}] WebDriver操作中にエラー: {e}")
+                self.logger.error("[%s] WebDriver操作中にエラー: %s", self.__class__.__name__, e)
                 raise e
 
     def execute_with_existing_driver(self, driver, operation: Callable[[Any], T]) -> T | None:
@@ -156,23 +158,23 @@ class BaseScraper(ABC):
         try:
             return operation(driver)
         except Exception as e:
-            self.logger.error(f"[{self.__class__.__name__}] WebDriver操作中にエラー: {e}")
+            self.logger.error("[%s] WebDriver操作中にエラー: %s", self.__class__.__name__, e)
             raise e
 
     def _format_program_output(self, program_title: str, program_time: str | None, episode_title: str, url_to_display: str) -> str:
         """番組情報の出力をフォーマットする共通関数"""
         if not program_time: # program_time が None や空文字列の場合
             program_time = "(放送時間不明)"
-            self.logger.warning(f"放送時間が不明です。デフォルト値を設定: {program_title} - {episode_title}")
+            self.logger.warning("放送時間が不明です。デフォルト値を設定: %s - %s", program_title, episode_title)
 
         # タイトルが空の場合の対処
         if not episode_title:
             episode_title = "(タイトル不明)"
-            self.logger.warning(f"エピソードタイトルが不明です: {program_title}")
+            self.logger.warning("エピソードタイトルが不明です: %s", program_title)
 
         # URLが空の場合の対処
         if not url_to_display:
             url_to_display = "(URL不明)"
-            self.logger.warning(f"表示URLが不明です: {program_title} - {episode_title}")
+            self.logger.warning("表示URLが不明です: %s - %s", program_title, episode_title)
 
         return f"●{program_title}{program_time}\n・{episode_title}\n{url_to_display}\n"
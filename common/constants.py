@@ -1,8 +1,9 @@
 from datetime import datetime
-from common.utils import count_characters  # 文字カウント関数をインポート
+from common.utils import Constants
+from common.text_utils import count_tweet_length  # 文字カウント関数をインポート
 
-# Twitterの文字数制限 (本来は280文字だが、少なめに-10にして設定)
-TWEET_MAX_LENGTH = 270
+# Twitterの文字数制限 (count_tweet_length は X と同じ重み付きカウントなので上限いっぱいまで使う)
+TWEET_MAX_LENGTH = Constants.Character.MAX_WEIGHTED_TWEET_LENGTH
 
 # ヘッダーテキストのフォーマット文字列
 HEADER_TEXT_FORMAT = "{date}({weekday})のニュース・ドキュメンタリー番組など\n\n"
@@ -22,4 +23,4 @@ def get_header_text(date_str: str) -> str:
 def get_header_length(date_str: str) -> int:
     """日付文字列からヘッダーテキストの長さを計算する"""
     header_text = get_header_text(date_str)
-    return count_characters(header_text)  # 文字カウント関数を使用
+    return count_tweet_length(header_text)  # 文字カウント関数を使用
@@ -6,6 +6,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from common.utils import Constants
 from common.CustomExpectedConditions import CustomExpectedConditions
+from common import tracing
 
 class EpisodeProcessor:
     """エピソード情報を処理するクラス"""
@@ -63,10 +64,10 @@ class EpisodeProcessor:
             episode_url_element = episode.find_element(By.CSS_SELECTOR, Constants.CSSSelector.EPISODE_URL_TAG)
             episode_url = episode_url_element.get_attribute("href")
             if episode_url:
-                self.logger.debug(f"エピソード情報を抽出しました: {program_title} - {episode_url}")
+                self.logger.debug("エピソード情報を抽出しました: %s - %s", program_title, episode_url)
                 return episode_url
         except NoSuchElementException:
-            self.logger.warning(f"エピソードURLの取得に失敗しました: {program_title}")
+            self.logger.warning("エピソードURLの取得に失敗しました: %s", program_title)
             return None
 
         return None
@@ -83,10 +84,10 @@ class EpisodeProcessor:
                 )
                 episode_title = title_element.text.strip().encode('utf-8', 'ignore').decode('utf-8', 'replace')
                 if episode_title:
-                    self.logger.debug(f"エピソードタイトルを抽出しました: {program_title} - {episode_title}")
+                    self.logger.debug("エピソードタイトルを抽出しました: %s - %s", program_title, episode_title)
                     return episode_title
             except (TimeoutException, NoSuchElementException) as e:
-                self.logger.warning(f"エピソードタイトルの取得に失敗しました: {e}")
+                self.logger.warning("エピソードタイトルの取得に失敗しました: %s", e)
                 return None
         else:
             # エピソード要素からタイトルを抽出
@@ -95,19 +96,20 @@ class EpisodeProcessor:
                 title_element = episode.find_element(By.CSS_SELECTOR, 'strong')
                 episode_title = title_element.text.strip()
                 if episode_title:
-                    self.logger.debug(f"エピソードタイトルを抽出しました: {program_title} - {episode_title}")
+                    self.logger.debug("エピソードタイトルを抽出しました: %s - %s", program_title, episode_title)
                     return episode_title
             except NoSuchElementException:
-                self.logger.info(f"一覧ページからのタイトル取得をスキップ（詳細ページで取得を試みます）: {program_title}")
+                self.logger.info("一覧ページからのタイトル取得をスキップ（詳細ページで取得を試みます）: %s", program_title)
                 return None
 
         return None
 
     def get_episode_detail_page(self, driver, episode_url: str):
         """エピソード詳細ページに遷移し、ページの準備完了を待つ"""
-        driver.get(episode_url)
-        # 詳細ページも重いため、NHK_ELEMENT_TIMEOUTを使用
-        WebDriverWait(driver, Constants.Time.NHK_ELEMENT_TIMEOUT).until(CustomExpectedConditions.page_is_ready())
+        with tracing.span("driver.get", "browser", url=episode_url):
+            driver.get(episode_url)
+            # 詳細ページも重いため、NHK_ELEMENT_TIMEOUTを使用
+            WebDriverWait(driver, Constants.Time.NHK_ELEMENT_TIMEOUT).until(CustomExpectedConditions.page_is_ready())
 
     def find_episode_elements(self, driver, program_title: str, timeout: int = None):
         """エピソード要素リストを取得する"""
@@ -118,7 +120,7 @@ class EpisodeProcessor:
             try:
                 WebDriverWait(driver, Constants.Time.DEFAULT_TIMEOUT).until(CustomExpectedConditions.page_is_ready())
             except TimeoutException:
-                self.logger.debug(f"ページ読み込み待機がタイムアウトしました: {program_title}")
+                self.logger.debug("ページ読み込み待機がタイムアウトしました: %s", program_title)
 
             # 実際の構造ではli要素から検索し、その中のarticle要素を取得
             try:
@@ -127,10 +129,10 @@ class EpisodeProcessor:
                 )
             except TimeoutException:
                 # 放送がない番組などは here に来る
-                self.logger.debug(f"[{program_title}] エピソード要素が見つかりませんでした (timeout={timeout}s)")
+                self.logger.debug("[%s] エピソード要素が見つかりませんでした (timeout=%ss)", program_title, timeout)
                 return []
                 
             return li_elements
         except Exception as e:
-            self.logger.error(f"[{program_title}] エピソード要素の取得中に予期せぬエラー: {e}")
+            self.logger.error("[%s] エピソード要素の取得中に予期せぬエラー: %s", program_title, e)
             return []
@@ -0,0 +1,725 @@
+"""
+メモリ上の HTML に対して動く、軽量な偽の WebDriver
+
+NHKScraper / TVTokyoScraper / EpisodeProcessor が使う WebDriver の API の一部を、html.parser で組み立てた DOM の上で実装する。
+ブラウザを起動しないため、保存したページ (benchmarks/scrape_replay.py の記録など) を数ミリ秒でスクレイピングできる。
+
+- driver: get / current_url / page_source / title / find_element(s) / execute_script (readyState とスクロールのみ) /
+          implicitly_wait / quit
+- 要素: find_element(s) / get_attribute / text / tag_name / is_displayed
+- 探索: By.CSS_SELECTOR (タグ・#id・.class・[属性] (= *= ^= $= ~= |=)・:not()・子孫/子/兄弟の結合子・カンマ区切り)、
+        By.XPATH (/ と // の経路、@属性・text()・contains()・starts-with()・位置の述語)、By.ID / CLASS_NAME / TAG_NAME / NAME /
+        LINK_TEXT / PARTIAL_LINK_TEXT
+
+JavaScript は実行しないため、ページは描画後の DOM (記録したスナップショット) を渡す前提。
+静的なページでは待っても結果が変わらないので、WebDriverWait の代わりに条件を1回だけ評価する StaticWait を使うと、
+要素がない場合のタイムアウト待ちも省ける。
+"""
+import html
+import re
+from html.parser import HTMLParser
+from typing import Callable, Mapping
+from urllib.parse import urljoin
+
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException, TimeoutException
+
+BLANK_PAGE = "<html><head></head><body></body></html>"
+
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+                       "source", "track", "wbr"))
+RAW_TEXT_TAGS = frozenset(("script", "style"))
+# 表示されない (text に含めない) 要素
+HIDDEN_TAGS = frozenset(("head", "script", "style", "template", "noscript", "title", "meta", "link"))
+# text で前後に改行を入れる要素
+BLOCK_TAGS = frozenset(("address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+                        "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+                        "nav", "ol", "p", "pre", "section", "table", "tr", "ul"))
+# get_attribute で絶対 URL を返す属性 (ブラウザの href / src プロパティと同じ)
+URL_ATTRIBUTES = frozenset(("href", "src"))
+
+_COLLAPSIBLE_SPACE = re.compile(r"[ \t\r\n\f]+")
+
+
+# --- DOM ---
+
+class Node:
+    """DOM の要素 (tag が "#document" のものは文書全体)。children には Node とテキスト (str) が入る"""
+
+    __slots__ = ("tag", "attrs", "parent", "children", "index")
+
+    def __init__(self, tag: str, attrs: dict[str, str] | None = None, parent: "Node | None" = None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.parent = parent
+        self.children: list = []
+        self.index = 0  # 文書内の順番
+
+    def elements(self) -> list["Node"]:
+        return [child for child in self.children if isinstance(child, Node)]
+
+    def iter_descendants(self):
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.iter_descendants()
+
+    def classes(self) -> list[str]:
+        return self.attrs.get("class", "").split()
+
+    def direct_text(self) -> str:
+        return "".join(child for child in self.children if isinstance(child, str))
+
+    def text_content(self) -> str:
+        return "".join(child if isinstance(child, str) else child.text_content() for child in self.children)
+
+    def inner_html(self) -> str:
+        raw = self.tag in RAW_TEXT_TAGS
+        return "".join((child if raw else html.escape(child, quote=False)) if isinstance(child, str)
+                       else child.outer_html() for child in self.children)
+
+    def outer_html(self) -> str:
+        if self.tag == "#document":
+            return self.inner_html()
+        attrs = "".join(f' {name}="{html.escape(value)}"' for name, value in self.attrs.items())
+        if self.tag in VOID_TAGS:
+            return f"<{self.tag}{attrs}>"
+        return f"<{self.tag}{attrs}>{self.inner_html()}</{self.tag}>"
+
+    def is_hidden(self) -> bool:
+        node = self
+        while node is not None and node.tag != "#document":
+            if node.tag in HIDDEN_TAGS or "hidden" in node.attrs:
+                return True
+            if re.search(r"display\s*:\s*none", node.attrs.get("style", "")):
+                return True
+            node = node.parent
+        return False
+
+    def rendered_text(self) -> str:
+        """ブラウザの表示テキストの近似 (非表示の要素を除き、ブロック要素の前後で改行し、連続する空白をまとめる)"""
+        if self.is_hidden():
+            return ""
+        parts: list[str] = []
+
+        def walk(node: Node):
+            for child in node.children:
+                if isinstance(child, str):
+                    parts.append(child)
+                elif child.tag == "br":
+                    parts.append("\n")
+                elif child.tag not in HIDDEN_TAGS and "hidden" not in child.attrs:
+                    block = child.tag in BLOCK_TAGS
+                    if block:
+                        parts.append("\n")
+                    walk(child)
+                    if block:
+                        parts.append("\n")
+
+        walk(self)
+        lines = (_COLLAPSIBLE_SPACE.sub(" ", line).strip() for line in "".join(parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.document = Node("#document")
+        self.stack = [self.document]
+        self.count = 0
+
+    def _append(self, tag: str, attrs) -> Node:
+        self.count += 1
+        node = Node(tag, {name: value if value is not None else "" for name, value in attrs}, self.stack[-1])
+        node.index = self.count
+        self.stack[-1].children.append(node)
+        return node
+
+    def handle_starttag(self, tag, attrs):
+        node = self._append(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._append(tag, attrs)
+
+    def handle_endtag(self, tag):
+        # 閉じていない要素があっても、対応する開始タグまで戻る (対応するものがなければ無視する)
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def parse_html(source: str) -> Node:
+    """HTML を DOM (文書のノード) にする"""
+    builder = _TreeBuilder()
+    builder.feed(source)
+    builder.close()
+    return builder.document
+
+
+# --- CSS セレクタ ---
+
+class _Compound:
+    """結合子を含まない1つのセレクタ (例: div[role="presentation"].itemHover:not(.ad))"""
+
+    def __init__(self):
+        self.tag = None
+        self.ids: list[str] = []
+        self.classes: list[str] = []
+        self.attrs: list[tuple[str, str | None, str | None]] = []
+        self.nots: list[list[list[tuple[str, "_Compound"]]]] = []
+
+    def matches(self, node: Node) -> bool:
+        if self.tag and self.tag != "*" and node.tag != self.tag:
+            return False
+        if any(node.attrs.get("id") != id_ for id_ in self.ids):
+            return False
+        classes = node.classes()
+        if any(cls not in classes for cls in self.classes):
+            return False
+        for name, op, value in self.attrs:
+            if not _attribute_matches(node.attrs.get(name), op, value):
+                return False
+        return not any(_matches_group(node, group) for group in self.nots)
+
+
+def _attribute_matches(actual: str | None, op: str | None, value: str | None) -> bool:
+    if actual is None:
+        return False
+    if op is None:
+        return True
+    if op == "=":
+        return actual == value
+    if not value:
+        return False
+    if op == "*=":
+        return value in actual
+    if op == "^=":
+        return actual.startswith(value)
+    if op == "$=":
+        return actual.endswith(value)
+    if op == "~=":
+        return value in actual.split()
+    if op == "|=":
+        return actual == value or actual.startswith(value + "-")
+    raise InvalidSelectorException(f"未対応の属性セレクタ: {op}")
+
+
+class _CssParser:
+    _IDENT = re.compile(r"-?[_a-zA-Z\u0080-￿][-\w\u0080-￿]*")
+
+    def __init__(self, selector: str):
+        self.selector = selector
+        self.pos = 0
+
+    def error(self, message: str):
+        return InvalidSelectorException(f"{message}: {self.selector!r} (位置 {self.pos})")
+
+    def peek(self) -> str:
+        return self.selector[self.pos:self.pos + 1]
+
+    def skip_spaces(self) -> bool:
+        start = self.pos
+        while self.peek().isspace():
+            self.pos += 1
+        return self.pos > start
+
+    def ident(self) -> str:
+        match = self._IDENT.match(self.selector, self.pos)
+        if not match:
+            raise self.error("識別子がありません")
+        self.pos = match.end()
+        return match.group()
+
+    def value(self) -> str:
+        quote = self.peek()
+        if quote in ("'", '"'):
+            end = self.selector.find(quote, self.pos + 1)
+            if end < 0:
+                raise self.error("引用符が閉じていません")
+            text = self.selector[self.pos + 1:end]
+            self.pos = end + 1
+            return text
+        return self.ident()
+
+    def parse_group(self, closing: str = "") -> list[list[tuple[str, _Compound]]]:
+        """カンマ区切りのセレクタのリスト。各セレクタは (直前の結合子, セレクタ) のリスト"""
+        group = []
+        while True:
+            group.append(self.parse_selector(closing))
+            if self.peek() != ",":
+                return group
+            self.pos += 1
+
+    def parse_selector(self, closing: str) -> list[tuple[str, _Compound]]:
+        steps = []
+        combinator = ""
+        self.skip_spaces()
+        while True:
+            steps.append((combinator, self.parse_compound()))
+            spaced = self.skip_spaces()
+            char = self.peek()
+            if char in (">", "+", "~"):
+                combinator = char
+                self.pos += 1
+                self.skip_spaces()
+            elif char in ("", ",") or char == closing:
+                return steps
+            elif spaced:
+                combinator = " "
+            else:
+                raise self.error("解釈できない文字があります")
+
+    def parse_compound(self) -> _Compound:
+        compound = _Compound()
+        start = self.pos
+        if self.peek() == "*":
+            compound.tag = "*"
+            self.pos += 1
+        elif self._IDENT.match(self.selector, self.pos):
+            compound.tag = self.ident().lower()
+        while True:
+            char = self.peek()
+            if char == "#":
+                self.pos += 1
+                compound.ids.append(self.ident())
+            elif char == ".":
+                self.pos += 1
+                compound.classes.append(self.ident())
+            elif char == "[":
+                self.pos += 1
+                self.skip_spaces()
+                name = self.ident().lower()
+                self.skip_spaces()
+                match = re.compile(r"[*^$~|]?=").match(self.selector, self.pos)
+                op = value = None
+                if match:
+                    op = match.group()
+                    self.pos = match.end()
+                    self.skip_spaces()
+                    value = self.value()
+                    self.skip_spaces()
+                    if self.peek() in ("i", "s"):  # 大文字・小文字の指定は無視する
+                        self.pos += 1
+                        self.skip_spaces()
+                if self.peek() != "]":
+                    raise self.error("属性セレクタが閉じていません")
+                self.pos += 1
+                compound.attrs.append((name, op, value))
+            elif self.selector.startswith(":not(", self.pos):
+                self.pos += len(":not(")
+                compound.nots.append(self.parse_group(closing=")"))
+                if self.peek() != ")":
+                    raise self.error(":not() が閉じていません")
+                self.pos += 1
+            elif char == ":":
+                raise self.error("未対応の疑似クラスです")
+            else:
+                break
+        if self.pos == start:
+            raise self.error("セレクタがありません")
+        return compound
+
+
+def _matches_steps(node: Node, steps: list[tuple[str, _Compound]], i: int) -> bool:
+    combinator, compound = steps[i]
+    if not compound.matches(node):
+        return False
+    if i == 0:
+        return True
+    if combinator in (" ", ">"):
+        parent = node.parent
+        while parent is not None and parent.tag != "#document":
+            if _matches_steps(parent, steps, i - 1):
+                return True
+            if combinator == ">":
+                return False
+            parent = parent.parent
+        return False
+    siblings = node.parent.elements()
+    previous = siblings[:siblings.index(node)]
+    if combinator == "+":
+        return bool(previous) and _matches_steps(previous[-1], steps, i - 1)
+    return any(_matches_steps(sibling, steps, i - 1) for sibling in previous)
+
+
+def _matches_group(node: Node, group) -> bool:
+    return any(_matches_steps(node, steps, len(steps) - 1) for steps in group)
+
+
+_css_cache: dict[str, list] = {}
+
+
+def select_css(scope: Node, selector: str) -> list[Node]:
+    """scope の子孫のうち selector に一致する要素を文書の順に返す"""
+    group = _css_cache.get(selector)
+    if group is None:
+        parser = _CssParser(selector)
+        group = parser.parse_group()
+        if parser.pos != len(selector):
+            raise parser.error("解釈できない文字があります")
+        _css_cache[selector] = group
+    return [node for node in scope.iter_descendants() if _matches_group(node, group)]
+
+
+# --- XPath ---
+
+def _split_top_level(text: str, separator: str) -> list[str]:
+    """引用符・括弧の外にある separator で分割する"""
+    parts, depth, quote, start, i = [], 0, None, 0, 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif depth == 0 and text.startswith(separator, i):
+            parts.append(text[start:i])
+            i += len(separator)
+            start = i
+            continue
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _closing_bracket(expr: str, start: int) -> int:
+    """expr[start] の "[" に対応する "]" の位置"""
+    depth, quote = 0, None
+    for i in range(start, len(expr)):
+        char = expr[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise InvalidSelectorException(f"XPath の述語が閉じていません: {expr!r}")
+
+
+def _xpath_steps(expr: str) -> list[tuple[str, str, list[str]]]:
+    """経路を (軸 "/" か "//", ノードテスト, 述語のリスト) に分ける"""
+    steps, i = [], 0
+    while i < len(expr):
+        if expr.startswith("//", i):
+            axis, i = "//", i + 2
+        elif expr[i] == "/":
+            axis, i = "/", i + 1
+        elif not steps:
+            axis = "/"
+        else:
+            raise InvalidSelectorException(f"解釈できない XPath: {expr!r}")
+        match = re.compile(r"\*|\.\.|\.|[\w-]+").match(expr, i)
+        if not match:
+            raise InvalidSelectorException(f"解釈できない XPath: {expr!r}")
+        test, i = match.group(), match.end()
+        predicates = []
+        while i < len(expr) and expr[i] == "[":
+            end = _closing_bracket(expr, i)
+            predicates.append(expr[i + 1:end].strip())
+            i = end + 1
+        steps.append((axis, test, predicates))
+    return steps
+
+
+def _xpath_string(node: Node, arg: str) -> str | None:
+    arg = arg.strip()
+    if arg.startswith("@"):
+        return node.attrs.get(arg[1:])
+    if arg == "text()":
+        return node.direct_text()
+    if arg in (".", "string()", "string(.)"):
+        return node.text_content()
+    if arg in ("normalize-space()", "normalize-space(.)"):
+        return " ".join(node.text_content().split())
+    if arg[:1] in ("'", '"') and arg[-1:] == arg[:1]:
+        return arg[1:-1]
+    raise InvalidSelectorException(f"未対応の XPath の式: {arg!r}")
+
+
+def _xpath_test(node: Node, expr: str) -> bool:
+    expr = expr.strip()
+    alternatives = _split_top_level(expr, " or ")
+    if len(alternatives) > 1:
+        return any(_xpath_test(node, alt) for alt in alternatives)
+    terms = _split_top_level(expr, " and ")
+    if len(terms) > 1:
+        return all(_xpath_test(node, term) for term in terms)
+    function = re.fullmatch(r"(not|contains|starts-with)\((.*)\)", expr, re.DOTALL)
+    if function:
+        name, args = function.group(1), function.group(2)
+        if name == "not":
+            return not _xpath_test(node, args)
+        haystack, needle = (_xpath_string(node, arg) for arg in _split_top_level(args, ","))
+        if haystack is None:
+            return False
+        return needle in haystack if name == "contains" else haystack.startswith(needle)
+    comparison = _split_top_level(expr, "!=")
+    if len(comparison) == 2:
+        left, right = (_xpath_string(node, side) for side in comparison)
+        return left is not None and left != right
+    comparison = _split_top_level(expr, "=")
+    if len(comparison) == 2:
+        left, right = (_xpath_string(node, side) for side in comparison)
+        return left is not None and left == right
+    return _xpath_string(node, expr) is not None
+
+
+def select_xpath(context: Node, document: Node, expr: str) -> list[Node]:
+    """XPath (経路と述語の一部) に一致する要素を文書の順に返す"""
+    expr = expr.strip()
+    if expr.startswith("(") or len(_split_top_level(expr, "|")) > 1:
+        raise InvalidSelectorException(f"未対応の XPath: {expr!r}")
+    # "/" で始まる経路は文書から、それ以外 ("." や "a" など) は context から辿る
+    current = [document] if expr.startswith("/") else [context]
+    for axis, test, predicates in _xpath_steps(expr):
+        found: dict[int, Node] = {}
+        for node in current:
+            bases = [node] + list(node.iter_descendants()) if axis == "//" else [node]
+            for base in bases:
+                if test == ".":
+                    candidates = [base]
+                elif test == "..":
+                    candidates = [base.parent] if base.parent is not None else []
+                else:
+                    candidates = [child for child in base.elements() if test == "*" or child.tag == test]
+                for predicate in predicates:
+                    if predicate.isdigit():
+                        position = int(predicate)
+                        candidates = candidates[position - 1:position]
+                    elif predicate == "last()":
+                        candidates = candidates[-1:]
+                    else:
+                        candidates = [c for c in candidates if _xpath_test(c, predicate)]
+                for candidate in candidates:
+                    found[candidate.index] = candidate
+        current = [found[index] for index in sorted(found)]
+    return [node for node in current if node.tag != "#document"]
+
+
+# --- WebDriver / WebElement ---
+
+def _find(driver: "FakeWebDriver", scope: Node, by: str, value: str) -> list[Node]:
+    # Selenium と同じく ID / CLASS_NAME / NAME / TAG_NAME は CSS セレクタに置き換えて探す
+    if by == "id":
+        by, value = "css selector", f'[id="{value}"]'
+    elif by == "class name":
+        by, value = "css selector", f".{value}"
+    elif by == "name":
+        by, value = "css selector", f'[name="{value}"]'
+    elif by == "tag name":
+        by = "css selector"
+    if by == "css selector":
+        return select_css(scope, value)
+    if by == "xpath":
+        return select_xpath(scope, driver.document, value)
+    if by in ("link text", "partial link text"):
+        links = (node for node in scope.iter_descendants() if node.tag == "a")
+        if by == "link text":
+            return [node for node in links if node.rendered_text() == value]
+        return [node for node in links if value in node.rendered_text()]
+    raise InvalidSelectorException(f"未対応の探索方法: {by}")
+
+
+class FakeWebElement:
+    """DOM の要素を WebElement と同じ API で扱う (操作は親の driver.execute を通る)"""
+
+    def __init__(self, parent: "FakeWebDriver", node: Node):
+        self.parent = parent
+        self.node = node
+
+    @property
+    def id(self) -> str:
+        return f"fake-element-{self.node.index}"
+
+    @property
+    def tag_name(self) -> str:
+        return self.node.tag
+
+    @property
+    def text(self) -> str:
+        self.parent.execute("getElementText", {"id": self.id})
+        return self.node.rendered_text()
+
+    def get_attribute(self, name: str) -> str | None:
+        """ブラウザと同じく、href / src は絶対 URL、innerHTML などはプロパティの値を返す"""
+        self.parent.execute("getElementAttribute", {"id": self.id, "name": name})
+        if name == "innerHTML":
+            return self.node.inner_html()
+        if name == "outerHTML":
+            return self.node.outer_html()
+        if name in ("textContent", "innerText"):
+            return self.node.text_content() if name == "textContent" else self.node.rendered_text()
+        value = self.node.attrs.get(name)
+        if value is not None and name in URL_ATTRIBUTES:
+            return urljoin(self.parent.current_url, value)
+        return value
+
+    def get_dom_attribute(self, name: str) -> str | None:
+        return self.node.attrs.get(name)
+
+    def get_property(self, name: str):
+        return self.get_attribute(name)
+
+    def is_displayed(self) -> bool:
+        return not self.node.is_hidden()
+
+    def is_enabled(self) -> bool:
+        return "disabled" not in self.node.attrs
+
+    def find_elements(self, by: str = "id", value: str | None = None) -> list["FakeWebElement"]:
+        self.parent.execute("findChildElements", {"id": self.id, "using": by, "value": value})
+        return [FakeWebElement(self.parent, node) for node in _find(self.parent, self.node, by, value)]
+
+    def find_element(self, by: str = "id", value: str | None = None) -> "FakeWebElement":
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"要素が見つかりません: {by}={value}")
+        return elements[0]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FakeWebElement) and other.node is self.node
+
+    def __hash__(self) -> int:
+        return hash(self.node.index)
+
+    def __repr__(self) -> str:
+        return f"<FakeWebElement {self.node.tag} #{self.node.index}>"
+
+
+class FakeWebDriver:
+    """
+    pages (URL -> HTML の dict、または URL を受け取って HTML か None を返す関数) を開く偽の WebDriver。
+    redirects (URL -> 移動先) を渡すと、get() 後の current_url が移動先になる。
+    ページがない URL は空のページとして開く。各操作は execute() を通るため、コマンド数を数えるラッパーもそのまま使える
+    """
+
+    def __init__(self, pages: Mapping[str, str] | Callable[[str], str | None] | None = None,
+                 redirects: Mapping[str, str] | None = None):
+        self.pages = pages if pages is not None else {}
+        self.redirects = dict(redirects or {})
+        self.session_id = "fake"
+        self.visited: list[str] = []
+        # 実行しなかった (対応していない) スクリプト
+        self.unsupported_scripts: list[str] = []
+        self.document = parse_html(BLANK_PAGE)
+        self._current_url = "about:blank"
+
+    def execute(self, driver_command: str, params: dict | None = None) -> dict:
+        return {"value": None}
+
+    def _load(self, url: str) -> str | None:
+        if callable(self.pages):
+            return self.pages(url)
+        return self.pages.get(url)
+
+    def get(self, url: str) -> None:
+        self.execute("get", {"url": url})
+        final_url = self.redirects.get(url, url)
+        source = self._load(final_url)
+        self.visited.append(url)
+        self._current_url = final_url
+        self.document = parse_html(source if source is not None else BLANK_PAGE)
+
+    @property
+    def current_url(self) -> str:
+        self.execute("getCurrentUrl")
+        return self._current_url
+
+    @property
+    def page_source(self) -> str:
+        self.execute("getPageSource")
+        return "<!DOCTYPE html>\n" + self.document.outer_html()
+
+    @property
+    def title(self) -> str:
+        self.execute("getTitle")
+        titles = select_css(self.document, "title")
+        return titles[0].text_content().strip() if titles else ""
+
+    def find_elements(self, by: str = "id", value: str | None = None) -> list[FakeWebElement]:
+        self.execute("findElements", {"using": by, "value": value})
+        return [FakeWebElement(self, node) for node in _find(self, self.document, by, value)]
+
+    def find_element(self, by: str = "id", value: str | None = None) -> FakeWebElement:
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"要素が見つかりません: {by}={value}")
+        return elements[0]
+
+    def execute_script(self, script: str, *args):
+        """document.readyState (常に complete)、スクロール、タイトル、HTML の取得のみに応答する。それ以外は None"""
+        self.execute("executeScript", {"script": script, "args": list(args)})
+        normalized = " ".join(script.split()).lower()
+        if "document.readystate" in normalized:
+            return "complete"
+        if "scrollto" in normalized or "scrollby" in normalized:
+            return None
+        if normalized in ("return document.title", "return document.title;"):
+            return self.title
+        if normalized.startswith("return document.documentelement.outerhtml"):
+            return self.document.outer_html()
+        self.unsupported_scripts.append(script)
+        return None
+
+    def implicitly_wait(self, time_to_wait: float) -> None:
+        self.execute("setTimeouts", {"implicit": time_to_wait})
+
+    def set_page_load_timeout(self, time_to_wait: float) -> None:
+        self.execute("setTimeouts", {"pageLoad": time_to_wait})
+
+    def set_script_timeout(self, time_to_wait: float) -> None:
+        self.execute("setTimeouts", {"script": time_to_wait})
+
+    def close(self) -> None:
+        self.execute("closeWindow")
+
+    def quit(self) -> None:
+        self.execute("quit")
+
+
+class StaticWait:
+    """
+    WebDriverWait と同じ呼び方で、条件を1回だけ評価する (静的なページでは待っても結果が変わらないため)。
+    条件を満たさない場合は WebDriverWait と同じく TimeoutException を送出する
+    """
+
+    def __init__(self, driver, timeout: float = 0, poll_frequency: float = 0.5, ignored_exceptions=None):
+        self._driver = driver
+        self._timeout = timeout
+        ignored = [NoSuchElementException]
+        if ignored_exceptions is not None:
+            ignored.extend(ignored_exceptions if isinstance(ignored_exceptions, (list, tuple)) else [ignored_exceptions])
+        self._ignored = tuple(ignored)
+
+    def until(self, method, message: str = ""):
+        try:
+            value = method(self._driver)
+            if value:
+                return value
+        except self._ignored:
+            pass
+        raise TimeoutException(message)
+
+    def until_not(self, method, message: str = ""):
+        try:
+            value = method(self._driver)
+            if not value:
+                return value
+        except self._ignored:
+            return True
+        raise TimeoutException(message)
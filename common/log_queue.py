@@ -0,0 +1,66 @@
+"""
+ワーカープロセスのログを親プロセスに集めるためのキュー (QueueHandler / QueueListener)
+
+ワーカーはログレコードをキューに送るだけで、出力は親プロセスのリスナーが1か所で行う。
+各レコードには処理中のタスクの情報 (番組名とワーカーの PID) が付く。
+"""
+import contextlib
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import sys
+
+WORKER_LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - [pid=%(worker_pid)s %(program)s] %(message)s"
+
+# ワーカーで処理中のタスクの情報 (ワーカーは1度に1タスクしか処理しない)
+_task_context = {"program": "-"}
+
+
+class TaskContextFilter(logging.Filter):
+    """ログレコードに番組名と PID を付けるフィルタ"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.program = _task_context["program"]
+        record.worker_pid = os.getpid()
+        return True
+
+
+@contextlib.contextmanager
+def task_context(program: str):
+    """with ブロック内のログに番組名を付ける"""
+    previous = dict(_task_context)
+    _task_context.update(program=program)
+    try:
+        yield
+    finally:
+        _task_context.update(previous)
+
+
+def start_log_listener(level: int = logging.INFO) -> tuple[multiprocessing.Queue, logging.handlers.QueueListener]:
+    """
+    親プロセスでキューとリスナーを作成して開始する。
+    キューは Pool の initargs でワーカーに渡し、終了時は listener.stop() を呼ぶ。
+    """
+    log_queue = multiprocessing.Queue()
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter(WORKER_LOG_FORMAT))
+    handler.setLevel(level)
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return log_queue, listener
+
+
+def configure_worker_logging(log_queue, level: int = logging.INFO) -> logging.Logger:
+    """
+    ワーカープロセスのルートロガーをキューに送るだけの設定にする。
+    fork で引き継いだ親のハンドラは外し、レベル未満のログはワーカー内で捨てる (文字列化もしない)。
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(TaskContextFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    return root
@@ -0,0 +1,168 @@
+"""
+メモリ使用量の計測
+
+- プロセスとその子孫 (ワーカーの chromedriver / Chrome) の RSS を一定間隔でサンプリングする RssSampler
+- マージ・分割などのステージの Python オブジェクトの割り当てを tracemalloc で計測する track_allocations
+
+RSS は psutil があればそれを使い、なければ Linux の /proc から読む。どちらも使えない環境では計測しない (None)。
+"""
+import contextlib
+import os
+import threading
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:  # psutil は任意 (なければ /proc を読む)
+    psutil = None
+
+MB = 1024 * 1024
+# RSS をサンプリングする間隔 (秒)
+SAMPLE_INTERVAL = 0.5
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def process_rss(pid: int) -> int | None:
+    """プロセスの RSS (バイト)。取得できない場合は None"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def descendant_pids(pid: int) -> list[int]:
+    """子孫プロセスの PID のリスト (ワーカーなら chromedriver と Chrome の各プロセス)"""
+    if psutil is not None:
+        try:
+            return [p.pid for p in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    children: dict[int, list[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 2番目の項目 (コマンド名) は空白や括弧を含みうるので、最後の ')' の後ろを読む
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1:
+            children.setdefault(int(fields[1]), []).append(int(entry))
+    result, stack = [], list(children.get(pid, []))
+    while stack:
+        child = stack.pop()
+        result.append(child)
+        stack.extend(children.get(child, []))
+    return result
+
+
+def tree_rss(pid: int) -> tuple[int | None, int]:
+    """(プロセス自身の RSS, 子孫プロセスの RSS の合計) をバイトで返す"""
+    own = process_rss(pid)
+    children = sum(rss for rss in map(process_rss, descendant_pids(pid)) if rss)
+    return own, children
+
+
+class RssSampler:
+    """
+    with RssSampler() as sampler: の間、バックグラウンドのスレッドで pid とその子孫の RSS を記録し、
+    終了後に summary() でピークと平均 (MB) を返す
+    """
+
+    def __init__(self, pid: int | None = None, interval: float = SAMPLE_INTERVAL, include_children: bool = True):
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.include_children = include_children
+        self.samples: list[tuple[int, int]] = []  # (自身, 子孫)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self) -> None:
+        if self.include_children:
+            own, children = tree_rss(self.pid)
+        else:
+            own, children = process_rss(self.pid), 0
+        if own is not None:
+            self.samples.append((own, children))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> "RssSampler":
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.sample()
+
+    def __enter__(self) -> "RssSampler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def summary(self) -> dict:
+        """ピークと平均の RSS (MB)。計測できなかった場合は空の dict"""
+        if not self.samples:
+            return {}
+        own = [s[0] for s in self.samples]
+        result = {"peak_rss_mb": round(max(own) / MB, 1), "avg_rss_mb": round(sum(own) / len(own) / MB, 1)}
+        if self.include_children:
+            children = [s[1] for s in self.samples]
+            total = [s[0] + s[1] for s in self.samples]
+            result.update({
+                "peak_children_rss_mb": round(max(children) / MB, 1),
+                "avg_children_rss_mb": round(sum(children) / len(children) / MB, 1),
+                "peak_total_rss_mb": round(max(total) / MB, 1),
+            })
+        return result
+
+
+@contextlib.contextmanager
+def track_allocations(name: str, results: dict, top: int = 3):
+    """
+    with ブロック内の Python オブジェクトの割り当てを tracemalloc で計測し、
+    results[name] にピーク・増加量 (KB) と、増加の大きい上位 top 件の行を入れる
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    # スナップショット自体の割り当てをピークに含めないよう、取得後にリセットする
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    try:
+        yield
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        if started:
+            tracemalloc.stop()
+        diff = after.compare_to(before, "lineno")
+        results[name] = {
+            "peak_kb": round((peak - base) / 1024, 1),
+            "net_kb": round((current - base) / 1024, 1),
+            "top": [f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size_diff / 1024:+.1f}KB"
+                    for stat in diff[:top] if stat.size_diff],
+        }
@@ -0,0 +1,161 @@
+"""
+実行ごとの処理時間の履歴と、直近の実行の遅延 (リグレッション) の検出
+
+scraping_news.py と main.py all は実行のたびに output/perf_history.jsonl に1行追記する。
+レコードにはステージごとの時間、番組ごとの時間・ステータス・RSS、ワーカー数、キャッシュのヒット数、
+WebDriver コマンド数、メモリ使用量が入る。main.py perf-report で最新の実行を過去数回の中央値と比べる。
+"""
+import contextlib
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join("output", "perf_history.jsonl")
+# 最新の実行と比べる過去の実行の数
+BASELINE_WINDOW = 5
+# 基準 (中央値) の何倍以上かかったら遅くなったとみなすか
+SLOWDOWN_RATIO = 1.5
+# 短い処理のばらつきで誤検知しないよう、この秒数以上遅くなった場合のみ報告する
+MIN_SLOWDOWN_SECONDS = 2.0
+
+
+class StageTimer:
+    """with timer.stage("scrape"): のようにステージごとの経過時間を記録する"""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """with ブロックで囲めない区間の秒数を加える"""
+        self.stages[name] = round(self.stages.get(name, 0.0) + seconds, 3)
+
+    @property
+    def total(self) -> float:
+        return round(time.perf_counter() - self._start, 3)
+
+
+class PerfHistory:
+    """実行ごとのレコードを JSON Lines で追記・読み込みする"""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        self.path = path
+
+    def append(self, record: dict) -> dict:
+        """レコードに記録日時を付けて追記する。書き込みに失敗しても処理は止めない"""
+        record = {"recorded_at": datetime.now().isoformat(timespec="seconds"), **record}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning("処理時間の履歴を書き込めませんでした: %s (%s)", self.path, e)
+        return record
+
+    def load(self, kind: str | None = None) -> list[dict]:
+        """古い順にレコードを返す。kind を指定するとその種類 (scrape / all) だけを返す"""
+        if not os.path.exists(self.path):
+            return []
+        runs = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    run = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if kind is None or run.get("kind") == kind:
+                    runs.append(run)
+        return runs
+
+
+def _series(runs: list[dict]) -> dict[tuple[str, str], list[float]]:
+    """(区分, 名前) -> 各実行の秒数 を返す。区分は total / stage / program"""
+    series: dict[tuple[str, str], list[float]] = {}
+    for run in runs:
+        values = {("total", "total"): run.get("total_seconds")}
+        values.update({("stage", name): sec for name, sec in (run.get("stages") or {}).items()})
+        values.update({("program", name): p.get("seconds") for name, p in (run.get("programs") or {}).items()})
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                series.setdefault(key, []).append(float(value))
+    return series
+
+
+def find_regressions(runs: list[dict], window: int = BASELINE_WINDOW, ratio: float = SLOWDOWN_RATIO,
+                     min_seconds: float = MIN_SLOWDOWN_SECONDS) -> list[dict]:
+    """
+    最新の実行 (runs[-1]) を直前の window 回の中央値と比べ、遅くなったステージ・番組を返す。
+    戻り値は {kind, name, latest, baseline, ratio} のリスト (遅くなった比率の大きい順)
+    """
+    if len(runs) < 2:
+        return []
+    latest = _series(runs[-1:])
+    baseline = _series(runs[-(window + 1):-1])
+    regressions = []
+    for key, (value,) in latest.items():
+        history = baseline.get(key)
+        if not history:
+            continue
+        median = statistics.median(history)
+        if value >= median * ratio and value - median >= min_seconds:
+            regressions.append({"kind": key[0], "name": key[1], "latest": value, "baseline": median,
+                                "ratio": value / median if median else float("inf")})
+    return sorted(regressions, key=lambda r: r["ratio"], reverse=True)
+
+
+def format_report(runs: list[dict], regressions: list[dict], window: int = BASELINE_WINDOW) -> str:
+    """perf-report の表示用テキストを作る"""
+    if not runs:
+        return "処理時間の履歴がありません。"
+    latest = runs[-1]
+    baseline_count = len(runs[-(window + 1):-1])
+    lines = [
+        f"最新の実行: {latest.get('recorded_at')} (種類: {latest.get('kind')}, 対象日付: {latest.get('date')}, "
+        f"総経過時間: {latest.get('total_seconds', 0):.1f}秒)",
+        f"比較対象: 直前の {baseline_count} 回の中央値",
+    ]
+    stages = latest.get("stages") or {}
+    if stages:
+        lines.append("ステージ: " + ", ".join(f"{name} {sec:.1f}秒" for name, sec in stages.items()))
+    if latest.get("num_workers"):
+        lines.append(f"ワーカー数: {latest['num_workers']}")
+    if latest.get("webdriver_commands") is not None:
+        lines.append(f"WebDriver コマンド数: {latest['webdriver_commands']}")
+    for name, stats in (latest.get("cache") or {}).items():
+        lines.append(f"キャッシュ ({name}): ヒット {stats.get('hits', 0)} / ミス {stats.get('misses', 0)}")
+    memory = latest.get("memory") or {}
+    if memory.get("peak_total_rss_mb") is not None:
+        lines.append(f"メモリ (ピーク): 親プロセス {memory['peak_rss_mb']:.0f}MB / "
+                     f"ワーカーと Chrome を含めた合計 {memory['peak_total_rss_mb']:.0f}MB")
+    heavy = sorted(((name, p["peak_total_rss_mb"]) for name, p in (latest.get("programs") or {}).items()
+                    if p.get("peak_total_rss_mb") is not None), key=lambda x: x[1], reverse=True)[:3]
+    if heavy:
+        lines.append("メモリの多い番組: " + ", ".join(f"{name} {mb:.0f}MB" for name, mb in heavy))
+    for stage, stats in (latest.get("allocations") or {}).items():
+        lines.append(f"割り当て ({stage}): ピーク {stats.get('peak_kb', 0):.0f}KB")
+    if baseline_count == 0:
+        lines.append("比較できる過去の実行がありません。")
+    elif not regressions:
+        lines.append("✅ 遅くなったステージ・番組はありません。")
+    else:
+        lines.append(f"⚠️ 遅くなったステージ・番組: {len(regressions)} 件")
+        labels = {"total": "全体", "stage": "ステージ", "program": "番組"}
+        for r in regressions:
+            lines.append(f"  [{labels[r['kind']]}] {r['name']}: {r['latest']:.1f}秒 "
+                         f"(基準 {r['baseline']:.1f}秒, {r['ratio']:.1f}倍)")
+    return "\n".join(lines)
@@ -0,0 +1,92 @@
+"""
+親プロセスとスクレイピングのワーカープロセスをまとめて cProfile で計測する
+
+環境変数 SCRAPING_NEWS_PROFILE_DIR にディレクトリを設定すると、@profiled を付けた関数の実行中の
+CPU プロファイルをプロセスごとに {pid}.prof に保存する (ワーカーは1タスクごとに上書き保存するため、
+Pool の終了時に強制終了されても計測結果は残る)。最後に merge_profiles() で1つの pstats ファイルにまとめる。
+"""
+import cProfile
+import functools
+import glob
+import io
+import os
+import pstats
+
+PROFILE_DIR_ENV = "SCRAPING_NEWS_PROFILE_DIR"
+
+# このプロセスのプロファイラ (fork した子プロセスでは作り直す)
+_state = {"pid": None, "profiler": None, "active": False}
+
+
+def profile_dir() -> str | None:
+    """保存先のディレクトリ (無効な場合は None)"""
+    return os.environ.get(PROFILE_DIR_ENV) or None
+
+
+def enable_profiling(directory: str) -> str:
+    """このプロセスと、これ以降に起動する子プロセスで計測を有効にする"""
+    os.makedirs(directory, exist_ok=True)
+    os.environ[PROFILE_DIR_ENV] = directory
+    return directory
+
+
+def disable_profiling() -> None:
+    os.environ.pop(PROFILE_DIR_ENV, None)
+    _state.update(pid=None, profiler=None, active=False)
+
+
+def _profiler() -> cProfile.Profile:
+    pid = os.getpid()
+    if _state["pid"] != pid:
+        inherited = _state["profiler"]
+        if inherited is not None and _state["active"]:
+            # fork 時に親で計測中だったプロファイラは子プロセスでは止めて使わない
+            try:
+                inherited.disable()
+            except ValueError:
+                pass
+        _state.update(pid=pid, profiler=cProfile.Profile(), active=False)
+    return _state["profiler"]
+
+
+def profiled(func):
+    """
+    計測が有効なときだけ、関数の実行中をこのプロセスのプロファイラで計測するデコレータ。
+    入れ子で呼ばれた場合は外側の計測に含める
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        directory = profile_dir()
+        if directory is None or (_state["active"] and _state["pid"] == os.getpid()):
+            return func(*args, **kwargs)
+        profiler = _profiler()
+        _state["active"] = True
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            _state["active"] = False
+            profiler.dump_stats(os.path.join(directory, f"{os.getpid()}.prof"))
+    return wrapper
+
+
+def merge_profiles(directory: str, output_path: str) -> pstats.Stats | None:
+    """directory 内の全プロセスの計測結果を1つの pstats ファイルにまとめる。結果がなければ None"""
+    paths = sorted(glob.glob(os.path.join(directory, "*.prof")))
+    if not paths:
+        return None
+    stats = pstats.Stats(paths[0])
+    for path in paths[1:]:
+        stats.add(path)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    stats.dump_stats(output_path)
+    return stats
+
+
+def summarize(stats: pstats.Stats, limit: int = 15, sort: str = "cumulative") -> str:
+    """上位 limit 件の関数を pstats の表形式の文字列で返す"""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,265 @@
+"""
+X API のレート制限に合わせてリクエスト間隔を調整するペーサーと、
+プロセス間で共有するレート制限の台帳
+"""
+import os
+import time
+import logging
+import sqlite3
+from datetime import datetime
+from common.utils import Constants
+from common import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketPacer:
+    """
+    x-rate-limit-* ヘッダーの値をトークンバケットとして扱い、次のリクエストまでの待機時間を決める。
+
+    - 残りトークンで投稿予定の件数をまかなえる間は、最小間隔で投稿する
+    - 足りない場合は、リセット時刻までの残り時間を残りトークン数で割った間隔に均す
+    - トークンが0の場合は、リセット時刻 (+マージン) まで待つ
+    """
+
+    def __init__(self, min_interval: float = Constants.Time.TWEET_MIN_INTERVAL,
+                 reset_margin: float = Constants.Time.RATE_LIMIT_RESET_MARGIN,
+                 clock=None, sleep=None):
+        self.min_interval = min_interval
+        self.reset_margin = reset_margin
+        # テストで差し替えられるよう、未指定時は呼び出し時点の time.time / time.sleep を使う
+        self._clock = clock
+        self._sleep = sleep
+        self.remaining = None
+        self.limit = None
+        self.reset = None
+        self._last_request = None
+
+    def _now(self) -> float:
+        return self._clock() if self._clock else time.time()
+
+    def update(self, remaining: int, reset: int, limit: int | None = None) -> None:
+        """レート制限情報を更新する"""
+        self.remaining = remaining
+        self.reset = reset
+        if limit is not None:
+            self.limit = limit
+        logger.info(f"レート制限情報更新: 残り={remaining}, 上限={self.limit if self.limit is not None else 'N/A'}, "
+                    f"リセット={datetime.fromtimestamp(reset)}")
+
+    def update_from_headers(self, headers) -> bool:
+        """x-rate-limit-* ヘッダーからレート制限情報を更新する。更新できた場合は True"""
+        remaining = headers.get('x-rate-limit-remaining')
+        reset = headers.get('x-rate-limit-reset')
+        limit = headers.get('x-rate-limit-limit')
+        if remaining is None or reset is None:
+            logger.debug("レスポンスヘッダーにレート制限情報 (x-rate-limit-*) が見つかりませんでした。")
+            return False
+        try:
+            self.update(int(remaining), int(reset), int(limit) if limit is not None else None)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"レート制限ヘッダーの解析に失敗: {e}")
+            return False
+        return True
+
+    def on_rate_limited(self, reset: int | None = None, fallback_delay: float = Constants.Time.RATE_LIMIT_FALLBACK_DELAY) -> None:
+        """429 を受けたときに呼ぶ。リセット時刻が不明な場合は fallback_delay 秒後をリセット時刻とみなす"""
+        self.remaining = 0
+        self.reset = reset if reset is not None else self._now() + fallback_delay
+
+    def delay(self, pending: int = 1) -> float:
+        """
+        次のリクエストまでに待つべき秒数を返す。
+
+        Args:
+            pending: 今後送信する予定のリクエスト数 (今回の分を含む)
+        """
+        now = self._now()
+
+        # リセット時刻を過ぎていればバケットは満タンに戻っている
+        if self.reset is not None and now >= self.reset:
+            self.remaining = self.limit
+            self.reset = None
+
+        wait = 0.0
+        if self._last_request is not None:
+            wait = max(0.0, self.min_interval - (now - self._last_request))
+
+        if self.remaining is None or self.reset is None:
+            return wait
+
+        until_reset = self.reset - now
+        if self.remaining <= 0:
+            return max(wait, until_reset + self.reset_margin)
+        if pending > self.remaining:
+            # 残りトークンでは足りないので、リセットまでの時間に均等に割り振る
+            spread = until_reset / self.remaining
+            if self._last_request is not None:
+                spread -= now - self._last_request
+            return max(wait, spread)
+        return wait
+
+    def wait(self, pending: int = 1) -> float:
+        """必要な時間だけ待機し、待機した秒数を返す"""
+        seconds = self.delay(pending)
+        if seconds > 0:
+            logger.info(f"⏳ レート制限に合わせて {seconds:.1f} 秒待機します (残り={self.remaining}, 投稿予定={pending})")
+            with tracing.span("rate_limit_wait", "sleep", seconds=seconds):
+                (self._sleep or time.sleep)(seconds)
+        return seconds
+
+    def record_request(self) -> None:
+        """リクエストを送信したことを記録する (ヘッダーで更新されるまでは手元で1つ減らしておく)"""
+        self._last_request = self._now()
+        if self.remaining is not None and self.remaining > 0:
+            self.remaining -= 1
+
+
+# エンドポイントごとのレート制限を記録する SQLite ファイル (プロセス間・実行間で共有)
+LEDGER_FILENAME = "rate_limits.sqlite3"
+DEFAULT_LEDGER_PATH = os.path.join("output", LEDGER_FILENAME)
+TWEET_ENDPOINT = "create_tweet"
+SEARCH_ENDPOINT = "search_recent_tweets"
+
+
+class RateLimitLedger:
+    """
+    X API のエンドポイントごとの残り回数とリセット時刻を SQLite に記録する台帳。
+
+    API を呼ぶ前に acquire() で1回分を確保し、残りが0ならリセット時刻まで待つ。
+    確保は BEGIN IMMEDIATE のトランザクション内で行うため、
+    複数のプロセス (連続した main.py の実行や日付のバックフィル) から同時に使っても残り回数がずれない。
+    リセット後に回復した分を使い切った場合は、次のレスポンスのヘッダーで記録が更新されるまで待つ
+    (ヘッダーが届かない場合は、最後の確保から fallback_delay 秒ごとに1回分だけ確保する)。
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH,
+                 reset_margin: float = Constants.Time.RATE_LIMIT_RESET_MARGIN,
+                 fallback_delay: float = Constants.Time.RATE_LIMIT_FALLBACK_DELAY,
+                 clock=None, sleep=None):
+        self.path = path
+        self.reset_margin = reset_margin
+        self.fallback_delay = fallback_delay
+        self._clock = clock
+        self._sleep = sleep
+
+    def _now(self) -> float:
+        return self._clock() if self._clock else time.time()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 自動コミットにして、トランザクションは BEGIN IMMEDIATE で明示的に開始する
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " endpoint TEXT PRIMARY KEY,"
+            " remaining INTEGER,"
+            " rate_limit INTEGER,"
+            " reset INTEGER,"
+            " updated_at REAL)"
+        )
+        return conn
+
+    def get(self, endpoint: str) -> dict | None:
+        """エンドポイントの記録を返す。記録がない場合は None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT remaining, rate_limit, reset FROM rate_limits WHERE endpoint = ?", (endpoint,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {"remaining": row[0], "limit": row[1], "reset": row[2]}
+
+    def record(self, endpoint: str, remaining: int, reset: int, limit: int | None = None) -> None:
+        """API のレスポンスで得たレート制限情報を記録する"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO rate_limits (endpoint, remaining, rate_limit, reset, updated_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(endpoint) DO UPDATE SET remaining = excluded.remaining,"
+                " rate_limit = COALESCE(excluded.rate_limit, rate_limit), reset = excluded.reset,"
+                " updated_at = excluded.updated_at",
+                (endpoint, remaining, limit, reset, self._now()),
+            )
+        finally:
+            conn.close()
+
+    def record_headers(self, endpoint: str, headers) -> bool:
+        """x-rate-limit-* ヘッダーを記録する。記録できた場合は True"""
+        remaining = headers.get('x-rate-limit-remaining')
+        reset = headers.get('x-rate-limit-reset')
+        limit = headers.get('x-rate-limit-limit')
+        if remaining is None or reset is None:
+            return False
+        try:
+            self.record(endpoint, int(remaining), int(reset), int(limit) if limit is not None else None)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"レート制限ヘッダーの解析に失敗 ({endpoint}): {e}")
+            return False
+        return True
+
+    def on_rate_limited(self, endpoint: str, reset: int | None = None,
+                        fallback_delay: float = Constants.Time.RATE_LIMIT_FALLBACK_DELAY) -> None:
+        """429 を受けたときに呼ぶ。以降の呼び出しはリセット時刻まで待たされる"""
+        if reset is None:
+            reset = int(self._now() + fallback_delay)
+        self.record(endpoint, 0, reset)
+
+    def reserve(self, endpoint: str) -> float:
+        """
+        1回分の呼び出しを確保する。
+        確保できた場合は 0 を、残りが0の場合は確保せずにリセットまでの待機秒数を返す。
+        """
+        now = self._now()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT remaining, rate_limit, reset, updated_at FROM rate_limits WHERE endpoint = ?", (endpoint,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return 0.0
+            remaining, limit, reset, updated_at = row
+            # リセット時刻を過ぎていれば上限まで回復している (上限が不明なら次のレスポンスまで制限なし)
+            if reset is not None and now >= reset:
+                remaining, reset = limit, None
+            if remaining is not None and remaining <= 0:
+                if reset is not None:
+                    conn.execute("COMMIT")
+                    return max(0.0, reset - now) + self.reset_margin
+                # 回復した分を使い切り、次のリセット時刻はまだ分からない: ヘッダーで更新されるまで待つ
+                retry_at = (updated_at or now) + self.fallback_delay
+                if now < retry_at:
+                    conn.execute("COMMIT")
+                    return retry_at - now
+                remaining = 1
+            conn.execute(
+                "UPDATE rate_limits SET remaining = ?, reset = ?, updated_at = ? WHERE endpoint = ?",
+                (remaining - 1 if remaining is not None else None, reset, now, endpoint),
+            )
+            conn.execute("COMMIT")
+            return 0.0
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, endpoint: str) -> float:
+        """1回分を確保できるまで待機し、待機した合計秒数を返す"""
+        waited = 0.0
+        while True:
+            seconds = self.reserve(endpoint)
+            if seconds <= 0:
+                return waited
+            logger.info(f"⏳ {endpoint} のレート制限が残っていないため、リセットまで {seconds:.1f} 秒待機します")
+            with tracing.span("rate_limit_wait", "sleep", seconds=seconds):
+                (self._sleep or time.sleep)(seconds)
+            waited += seconds
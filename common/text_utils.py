@@ -0,0 +1,219 @@
+"""
+テキスト処理の共通関数 (番組ブロックの時刻抽出・ソート、ツイートの文字数カウント、日付変換)
+
+Selenium などの重いライブラリに依存しないため、split / merge / tweet からはこのモジュールを直接使う。
+(common.utils からも同じ名前でインポートできる)
+"""
+import logging
+import re
+import unicodedata
+from datetime import datetime
+from common.utils import Constants
+
+logger = logging.getLogger(__name__)
+
+def extract_time_from_block(block: str, starts_with: str = "") -> tuple[int, int]:
+    lines = block.split('\n')
+    for line in lines:
+        if starts_with and not line.startswith(starts_with):
+            continue
+        time_match = re.search(r'\(.*?(\d{1,2}:\d{2})', line)
+        if not time_match:
+            time_match = re.search(r'(\d{1,2}:\d{2})', line)
+
+        if time_match:
+            time_str = time_match.group(1)
+            try:
+                hour, minute = map(int, time_str.split(':'))
+                return hour, minute
+            except ValueError:
+                logger.warning(f"時間文字列のパースに失敗: {time_str} in '{line[:30]}...'")
+                continue
+    return Constants.Time.DEFAULT_HOUR, Constants.Time.DEFAULT_MINUTE
+
+def sort_blocks_by_time(blocks: list[str]) -> list[str]:
+    def get_sort_key(block: str) -> tuple[int, int]:
+        return extract_time_from_block(block, starts_with='●')
+    try:
+        return sorted(blocks, key=get_sort_key)
+    except Exception as e:
+        logger.error(f"ブロックのソート中にエラーが発生しました: {e}", exc_info=True)
+        return blocks
+
+# 絵文字の基底文字として扱うコードポイント範囲（Extended_Pictographic の近似）
+_EMOJI_BASE_RANGES = (
+    (0x1F000, 0x1FAFF),  # 麻雀牌, 囲み英数字補助, 絵記号, 顔文字, 交通・地図記号 など
+    (0x2190, 0x21FF),  # 矢印
+    (0x2300, 0x23FF),  # その他の技術用記号 (⌚ ⏳ など)
+    (0x2600, 0x27BF),  # その他の記号, 装飾記号
+    (0x2934, 0x2935),
+    (0x2B00, 0x2BFF),  # ⬛ ⭐ ⭕ など
+    (0x3030, 0x3030),
+    (0x303D, 0x303D),
+    (0x3297, 0x3297),
+    (0x3299, 0x3299),
+)
+# 異体字セレクタ (U+FE0F) が付いたときだけ絵文字表示になる文字 (© ® ‼ ⁉ ™ ℹ)
+_EMOJI_TEXT_DEFAULT = frozenset((0x00A9, 0x00AE, 0x203C, 0x2049, 0x2122, 0x2139))
+_KEYCAP_BASES = frozenset("0123456789#*")
+_ZWJ = '\u200d'
+_URL_PATTERN = re.compile(r'https?://[\x21-\x7e]+')
+
+def _in_ranges(cp: int, ranges) -> bool:
+    for low, high in ranges:
+        if low <= cp <= high:
+            return True
+    return False
+
+def _is_emoji_modifier(cp: int) -> bool:
+    """絵文字の直後に続いてシーケンスを構成する修飾子かどうか"""
+    return (cp in (0xFE0E, 0xFE0F, 0x20E3)
+            or 0x1F3FB <= cp <= 0x1F3FF  # 肌の色
+            or 0xE0020 <= cp <= 0xE007F)  # タグ (地域旗)
+
+def _is_emoji_base(text: str, i: int) -> bool:
+    cp = ord(text[i])
+    if _in_ranges(cp, _EMOJI_BASE_RANGES):
+        return True
+    return cp in _EMOJI_TEXT_DEFAULT and text[i + 1:i + 2] == '\ufe0f'
+
+def _match_emoji(text: str, i: int) -> int:
+    """
+    text[i] から始まる絵文字シーケンスの長さ（文字数）を返す。絵文字でなければ 0。
+    ZWJ 結合, 肌の色, 異体字セレクタ, キーキャップ, 国旗（リージョナルインジケータ対）に対応する。
+    """
+    n = len(text)
+    ch = text[i]
+
+    # キーキャップ (例: 1️⃣)
+    if ch in _KEYCAP_BASES:
+        if text[i + 1:i + 2] == '\u20e3':
+            return 2
+        if text[i + 1:i + 3] == '\ufe0f\u20e3':
+            return 3
+        return 0
+
+    cp = ord(ch)
+    # 国旗 (リージョナルインジケータ2つで1つの絵文字)
+    if 0x1F1E6 <= cp <= 0x1F1FF:
+        if i + 1 < n and 0x1F1E6 <= ord(text[i + 1]) <= 0x1F1FF:
+            return 2
+        return 1
+
+    if not _is_emoji_base(text, i):
+        return 0
+
+    j = i + 1
+    while True:
+        while j < n and _is_emoji_modifier(ord(text[j])):
+            j += 1
+        # ZWJ で次の絵文字と結合されている場合はシーケンスを継続
+        if j + 1 < n and text[j] == _ZWJ and _is_emoji_base(text, j + 1):
+            j += 2
+            continue
+        return j - i
+
+def count_characters(text: str) -> int:
+    """X の weightedRanges に従って URL 以外のテキストの重み付き文字数を数える"""
+    count = 0
+    i = 0
+    n = len(text)
+    while i < n:
+        emoji_length = _match_emoji(text, i)
+        if emoji_length:
+            count += Constants.Character.EMOJI_CHAR_WEIGHT
+            i += emoji_length
+            continue
+        if _in_ranges(ord(text[i]), Constants.Character.HALF_WIDTH_RANGES):
+            count += Constants.Character.HALF_WIDTH_CHAR_WEIGHT
+        else:
+            count += Constants.Character.FULL_WIDTH_CHAR_WEIGHT
+        i += 1
+    return count
+
+def count_tweet_length(text: str) -> int:
+    """
+    X (twitter-text v3) と同じ方法でツイートの重み付き文字数を数える。
+    NFC 正規化後、URL は長さに関係なく t.co 短縮後の 23 文字として扱う。
+    """
+    text = unicodedata.normalize('NFC', text)
+    urls = _URL_PATTERN.findall(text)
+    text_without_urls = _URL_PATTERN.sub('', text)
+    text_length = count_characters(text_without_urls)
+    url_length = Constants.Character.URL_CHAR_WEIGHT * len(urls)
+    total_length = text_length + url_length
+    return total_length
+
+def to_jst_datetime(date_str: str) -> datetime:
+    try:
+        import pytz  # 使うときだけ読み込む (split / merge / tweet の起動を速くするため)
+        date_obj = datetime.strptime(date_str, Constants.Format.DATE_FORMAT)
+        jst = pytz.timezone('Asia/Tokyo')
+        jst_datetime = jst.localize(date_obj)
+        return jst_datetime
+    except ValueError as e:
+        logger.error(f"日付文字列のパースに失敗しました: {date_str} - {e}", exc_info=True)
+        raise
+
+def to_utc_isoformat(jst_datetime: datetime) -> str:
+    import pytz
+    if jst_datetime.tzinfo is None:
+        logger.warning("タイムゾーン情報がないdatetimeオブジェクトが渡されました。JSTとして扱います。")
+        jst = pytz.timezone('Asia/Tokyo')
+        jst_datetime = jst.localize(jst_datetime)
+    utc_datetime = jst_datetime.astimezone(pytz.utc)
+    utc_iso = utc_datetime.strftime(Constants.Format.DATETIME_FORMAT)
+    return utc_iso
+
+def format_date(target_date: str) -> str:
+    try:
+        return datetime.strptime(target_date, Constants.Format.DATE_FORMAT).strftime(Constants.Format.DATE_FORMAT_YYYYMMDD)
+    except ValueError as e:
+        logger.error(f"日付フォーマットに失敗しました: {target_date} - {e}", exc_info=True)
+        return target_date
+
+def format_program_time(program_name: str, weekday: int, default_time: str) -> str:
+    """番組時間をフォーマットする (TV Tokyo用)"""
+    if program_name.startswith(Constants.Program.WBS_PROGRAM_NAME):
+        time_str = "22:00-22:58" if weekday < 4 else "23:00-23:58" # 金曜以外と金曜 (定数化推奨)
+        channel = "テレ東" # 定数化推奨
+        logger.debug(f"WBS ({'月-木' if weekday < 4 else '金'}) の時間を設定: {time_str}")
+        return f"({channel} {time_str})"
+    else:
+        channel = "テレ東" # 定数化推奨
+        logger.debug(f"{program_name} のデフォルト時間を設定: {default_time}")
+        return f"({channel} {default_time})"
+
+def extract_time_info_from_text(text: str) -> str:
+    """ツイートテキストから時刻情報を抽出・整形する"""
+    time_info = "時刻抽出失敗"
+    add_24_hour = False
+
+    if re.search(r"[（\(]深夜[）\)]", text):
+        add_24_hour = True
+        logger.debug("深夜表記を検出")
+
+    time_match = re.search(r'(\d{1,2})日\s?\(.\)\s?(午前|午後)(\d{1,2}):(\d{2})', text)
+    if time_match:
+        # day = int(time_match.group(1)) # day は使わない
+        ampm = time_match.group(2)
+        hour = int(time_match.group(3))
+        minute = int(time_match.group(4))
+        logger.debug(f"抽出された時刻要素: ampm={ampm}, hour={hour}, minute={minute}")
+
+        if ampm == "午後" and hour != 12:
+            hour += 12
+        elif ampm == "午前" and hour == 12:
+            hour = 0
+
+        if add_24_hour:
+            if hour < 12: # 0時～11時台なら24時間加算
+                hour += 24
+                logger.debug(f"24時間加算実行 -> hour={hour}")
+
+        time_info = f"{hour:02}:{minute:02}"
+        logger.debug(f"整形後の時刻情報: {time_info}")
+    else:
+        logger.warning(f"時刻情報のパターンマッチに失敗しました: '{text[:50]}...'")
+
+    return time_info
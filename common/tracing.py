@@ -0,0 +1,132 @@
+"""
+処理全体のスパン (区間) を記録し、Chrome trace event 形式 (Perfetto / chrome://tracing で表示可能) の JSON に出力する
+
+環境変数 SCRAPING_NEWS_TRACE_DIR にディレクトリを設定すると記録が有効になる。
+ワーカープロセスやサブプロセスも環境変数を引き継ぐので、各プロセスは {pid}.jsonl にイベントを追記し、
+最後に export_trace() で1つのファイルにまとめる。無効なときの span() はほぼコストがかからない。
+"""
+import contextlib
+import functools
+import glob
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+TRACE_DIR_ENV = "SCRAPING_NEWS_TRACE_DIR"
+
+_NULL_SPAN = contextlib.nullcontext()
+_lock = threading.Lock()
+_writer = {"pid": None, "file": None}
+
+
+def trace_dir() -> str | None:
+    """記録先のディレクトリ (無効な場合は None)"""
+    return os.environ.get(TRACE_DIR_ENV) or None
+
+
+def enable_tracing(directory: str) -> str:
+    """このプロセスと、これ以降に起動する子プロセスで記録を有効にする"""
+    os.makedirs(directory, exist_ok=True)
+    os.environ[TRACE_DIR_ENV] = directory
+    return directory
+
+
+def disable_tracing() -> None:
+    """記録を無効にし、このプロセスのファイルを閉じる"""
+    os.environ.pop(TRACE_DIR_ENV, None)
+    with _lock:
+        if _writer["file"] is not None and _writer["pid"] == os.getpid():
+            _writer["file"].close()
+        _writer.update(pid=None, file=None)
+
+
+def _write_event(event: dict) -> None:
+    directory = trace_dir()
+    if directory is None:
+        return
+    pid = os.getpid()
+    with _lock:
+        # fork した子プロセスでは親のファイルを使わずに自分のファイルを開く
+        if _writer["pid"] != pid:
+            os.makedirs(directory, exist_ok=True)
+            _writer.update(pid=pid, file=open(os.path.join(directory, f"{pid}.jsonl"), "a", encoding="utf-8", buffering=1))
+            metadata = {"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                        "args": {"name": multiprocessing.current_process().name}}
+            _writer["file"].write(json.dumps(metadata, ensure_ascii=False) + "\n")
+        _writer["file"].write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+
+
+class _Span:
+    """1つの区間を "X" (complete) イベントとして記録するコンテキストマネージャー"""
+
+    __slots__ = ("name", "cat", "args", "_ts", "_start")
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self._ts = time.time_ns() // 1000
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        dur = (time.perf_counter_ns() - self._start) // 1000
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _write_event({"name": self.name, "cat": self.cat, "ph": "X", "ts": self._ts, "dur": dur,
+                      "pid": os.getpid(), "tid": threading.get_native_id(), "args": self.args})
+        return False
+
+
+def span(name: str, cat: str = "app", **args):
+    """
+    with span("driver.get", "browser", url=url): のように区間を記録する。
+    記録が無効な場合は何もしないコンテキストマネージャーを返す
+    """
+    if trace_dir() is None:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def traced(name: str | None = None, cat: str = "app"):
+    """関数の呼び出し全体を1つのスパンとして記録するデコレータ"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def sleep(seconds: float, reason: str = "sleep") -> None:
+    """time.sleep と同じだが、待機した区間を記録する"""
+    with span(reason, "sleep", seconds=seconds):
+        time.sleep(seconds)
+
+
+def export_trace(directory: str, output_path: str) -> int:
+    """directory 内の全プロセスのイベントを1つの trace JSON にまとめ、イベント数を返す"""
+    events = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 強制終了したプロセスの書きかけの行は無視する
+                    continue
+    events.sort(key=lambda e: (e.get("ph") != "M", e.get("ts", 0)))
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return len(events)
@@ -0,0 +1,83 @@
+"""
+検索したツイートの生データをアカウント・放送日ごとに保存するキャッシュ
+
+output/tweet_cache/{アカウント}/{YYYYMMDD}.jsonl.gz に1行1ツイートの JSON で保存する。
+ファイルが存在する日付は「取得済み」とみなし、次回の検索は since_id で新しいツイートだけを取得する。
+"""
+import gzip
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("output", "tweet_cache")
+
+
+def tweet_to_record(tweet) -> dict:
+    """tweepy.Tweet (または dict) を JSON に保存できる dict に変換する"""
+    data = getattr(tweet, "data", None)
+    record = dict(data) if isinstance(data, dict) else dict(tweet)
+    record["id"] = str(record["id"])
+    created_at = record.get("created_at")
+    if created_at is not None and not isinstance(created_at, str):
+        record["created_at"] = created_at.isoformat()
+    return record
+
+
+class TweetCache:
+    """アカウント・放送日ごとのツイートの生データのキャッシュ"""
+
+    def __init__(self, base_dir: str = DEFAULT_CACHE_DIR):
+        self.base_dir = base_dir
+
+    def path(self, account: str, date: str) -> str:
+        return os.path.join(self.base_dir, account, f"{date}.jsonl.gz")
+
+    def exists(self, account: str, date: str) -> bool:
+        return os.path.exists(self.path(account, date))
+
+    def load(self, account: str, date: str) -> list[dict]:
+        """キャッシュを読み込む。存在しない場合は空のリスト"""
+        path = self.path(account, date)
+        if not os.path.exists(path):
+            return []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def add(self, account: str, date: str, tweets) -> list[dict]:
+        """
+        ツイートをキャッシュに追加して保存し、追加後の全件を返す。
+        ID が重複するツイートは新しいもので置き換え、投稿日時順に並べる。
+        ツイートが0件でもファイルを作成し、その日付を取得済みとして記録する。
+        """
+        records = {r["id"]: r for r in self.load(account, date)}
+        for tweet in tweets:
+            record = tweet_to_record(tweet)
+            records[record["id"]] = record
+        merged = sorted(records.values(), key=lambda r: (r.get("created_at") or "", int(r["id"])))
+
+        path = self.path(account, date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            for record in merged:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(temp_path, path)
+        return merged
+
+    def since_id(self, account: str, dates: list[str]) -> str | None:
+        """
+        dates の検索で使える since_id を返す。
+
+        先頭から連続して取得済みの日付のみを対象に、その中で最大のツイートIDを返す。
+        取得済みでない日付より後の日付だけがキャッシュされている場合に、
+        古い日付のツイートを取りこぼさないよう、その場合は None (全件取得) を返す。
+        """
+        cached = [self.exists(account, d) for d in dates]
+        if not cached or not cached[0]:
+            return None
+        if False in cached and any(cached[cached.index(False):]):
+            return None
+        ids = [int(r["id"]) for d in dates if self.exists(account, d) for r in self.load(account, d)]
+        return str(max(ids)) if ids else None
@@ -0,0 +1,203 @@
+"""
+URL のリダイレクト先 (最終的な URL) を調べるリゾルバー
+
+ブラウザで開かずに、コネクションプールを使った HEAD (使えない場合は本文を読まない GET) で
+リダイレクトをたどり、結果を SQLite のキャッシュ (output/url_cache.sqlite3) に保存する。
+キャッシュはプロセス間・実行間で共有するため、スクレイピングのワーカーや get_tweet / open_url から同じ URL を何度も調べずに済む。
+"""
+import os
+import time
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.utils import Constants
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = "url_cache.sqlite3"
+DEFAULT_CACHE_PATH = os.path.join("output", CACHE_FILENAME)
+
+# 同時に調べる URL の最大数 (コネクションプールの大きさも同じにする)
+MAX_RESOLVE_WORKERS = 8
+
+# 短縮 URL のホスト (get_tweet / open_url で展開の対象にする)
+SHORT_URL_HOSTS = ("t.co",)
+
+# HEAD に対応していないサーバーが返すステータス (GET でやり直す)
+HEAD_UNSUPPORTED_STATUSES = (403, 405, 501)
+
+USER_AGENT = "Mozilla/5.0 (compatible; scraping-news url-resolver)"
+
+
+def is_short_url(url: str) -> bool:
+    """短縮 URL (t.co など) かどうか"""
+    return urlparse(url).hostname in SHORT_URL_HOSTS
+
+
+class UrlResolver:
+    """
+    URL のリダイレクト先を調べ、結果を永続キャッシュに保存するリゾルバー。
+
+    resolve() は1件、resolve_many() は複数の URL をスレッドで同時に調べる。
+    リダイレクト先が得られた (ステータスが 400 未満の) 結果のみキャッシュし、
+    失敗した URL は次回あらためて調べる。
+    """
+
+    def __init__(self, cache_path: str | None = DEFAULT_CACHE_PATH,
+                 timeout: float = Constants.Time.URL_RESOLVE_TIMEOUT,
+                 max_workers: int = MAX_RESOLVE_WORKERS,
+                 max_age: float = Constants.Time.URL_CACHE_MAX_AGE,
+                 session: requests.Session | None = None, clock=None):
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self._session = session
+        self._session_lock = threading.Lock()
+        self._clock = clock
+        # キャッシュのヒット数・ミス数 (処理時間の履歴に記録する)
+        self.stats = {"hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+
+    def _now(self) -> float:
+        return self._clock() if self._clock else time.time()
+
+    @property
+    def session(self) -> requests.Session:
+        """コネクションプール付きのセッション (初回のみ作成)"""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                self._session = session
+            return self._session
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.cache_path, timeout=30, isolation_level=None)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS url_cache ("
+            " url TEXT PRIMARY KEY,"
+            " final_url TEXT,"
+            " status INTEGER,"
+            " resolved_at REAL)"
+        )
+        return conn
+
+    def cached(self, url: str) -> dict | None:
+        """有効期間内のキャッシュを返す。ない場合は None"""
+        if not self.cache_path:
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT final_url, status, resolved_at FROM url_cache WHERE url = ?", (url,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or self._now() - row[2] > self.max_age:
+            return None
+        return {"url": url, "final_url": row[0], "status": row[1], "error": None, "cached": True}
+
+    def store(self, url: str, final_url: str, status: int) -> None:
+        """リダイレクト先をキャッシュに保存する"""
+        if not self.cache_path:
+            return
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO url_cache (url, final_url, status, resolved_at) VALUES (?, ?, ?, ?)",
+                (url, final_url, status, self._now()),
+            )
+        finally:
+            conn.close()
+
+    def _fetch(self, url: str) -> dict:
+        """HEAD (対応していなければ本文を読まない GET) でリダイレクトをたどる"""
+        result = {"url": url, "final_url": None, "status": None, "error": None, "cached": False}
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in HEAD_UNSUPPORTED_STATUSES:
+                response = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+                response.close()
+            result["final_url"] = response.url
+            result["status"] = response.status_code
+        except requests.TooManyRedirects:
+            result["error"] = "リダイレクトがループしています"
+        except requests.RequestException as e:
+            result["error"] = str(e)
+        return result
+
+    def resolve_detail(self, url: str) -> dict:
+        """
+        URL を調べて {url, final_url, status, error, cached} を返す。
+        キャッシュがあれば HTTP リクエストは送らない。http(s) の URL でない場合は調べずにエラーを返す。
+        """
+        if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+            return {"url": url, "final_url": None, "status": None, "error": "http(s) の URL ではありません", "cached": False}
+        cached = self.cached(url)
+        with self._stats_lock:
+            self.stats["hits" if cached is not None else "misses"] += 1
+        if cached is not None:
+            return cached
+        result = self._fetch(url)
+        if result["status"] is not None and result["status"] < 400:
+            self.store(url, result["final_url"], result["status"])
+        elif result["error"]:
+            logger.debug(f"URL のリダイレクト先を取得できませんでした: {url} ({result['error']})")
+        return result
+
+    def resolve(self, url: str) -> str | None:
+        """URL のリダイレクト先を返す。取得できなかった場合は None"""
+        result = self.resolve_detail(url)
+        if result["status"] is None or result["status"] >= 400:
+            return None
+        return result["final_url"]
+
+    def resolve_many_detail(self, urls) -> dict[str, dict]:
+        """複数の URL を同時に調べ、URL -> resolve_detail() の結果 を返す"""
+        unique = list(dict.fromkeys(urls))
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(unique)))) as executor:
+            results = list(executor.map(self.resolve_detail, unique))
+        return dict(zip(unique, results))
+
+    def resolve_many(self, urls) -> dict[str, str | None]:
+        """複数の URL を同時に調べ、URL -> リダイレクト先 (取得できなかった場合は None) を返す"""
+        return {
+            url: result["final_url"] if result["status"] is not None and result["status"] < 400 else None
+            for url, result in self.resolve_many_detail(urls).items()
+        }
+
+
+_default_resolver: UrlResolver | None = None
+_default_resolver_pid: int | None = None
+
+
+def default_resolver() -> UrlResolver:
+    """
+    プロセスごとの既定のリゾルバーを返す。
+    (セッションは fork 後に共有できないため、スクレイピングのワーカーではプロセスごとに作り直す)
+    """
+    global _default_resolver, _default_resolver_pid
+    if _default_resolver is None or _default_resolver_pid != os.getpid():
+        _default_resolver = UrlResolver()
+        _default_resolver_pid = os.getpid()
+    return _default_resolver
@@ -1,16 +1,7 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 import logging
 import configparser
-import re
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum, auto
-import pytz
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 class ScrapeStatus(Enum):
     """スクレイピング処理のステータスを表す Enum"""
@@ -38,16 +29,31 @@ class Constants:
         PAGE_LOAD_TIMEOUT = 60  # ページ全体の読み込みタイムアウト（秒）
         TVTOKYO_ELEMENT_TIMEOUT = 10  # TV東京の要素待機タイムアウト（秒）
         NHK_ELEMENT_TIMEOUT = 10  # NHKの要素待機タイムアウト（秒）
+        TWEET_MIN_INTERVAL = 1.0  # ツイート投稿の最小間隔（秒）
+        RATE_LIMIT_RESET_MARGIN = 2.0  # レート制限リセット時刻に加えるマージン（秒）
+        RATE_LIMIT_FALLBACK_DELAY = 10  # リセット時刻が不明な場合の待機時間の基準（秒）
+        URL_RESOLVE_TIMEOUT = 10  # リダイレクト先を調べる HTTP リクエストのタイムアウト（秒）
+        URL_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # リダイレクト先のキャッシュの有効期間（秒）
+        LINK_CHECK_TIMEOUT = 5  # 投稿前のリンクチェックのタイムアウト（秒）
 
     class Program:
         """番組関連の定数"""
         WBS_PROGRAM_NAME = "WBS"
 
     class Character:
-        """文字関連の定数"""
-        FULL_WIDTH_CHAR_WEIGHT = 2
-        HALF_WIDTH_CHAR_WEIGHT = 1
-        URL_CHAR_WEIGHT = 23
+        """文字関連の定数 (X の twitter-text v3 設定 weightedRanges に準拠)"""
+        FULL_WIDTH_CHAR_WEIGHT = 2  # defaultWeight(200) / scale(100)
+        HALF_WIDTH_CHAR_WEIGHT = 1  # ranges 内の文字の weight(100) / scale(100)
+        URL_CHAR_WEIGHT = 23  # transformedURLLength (t.co 短縮後の長さ)
+        EMOJI_CHAR_WEIGHT = 2  # 絵文字シーケンスは構成コードポイント数に関係なく defaultWeight
+        MAX_WEIGHTED_TWEET_LENGTH = 280  # maxWeightedTweetLength
+        # 重み 1 で数えるコードポイント範囲（これ以外はすべて重み 2）
+        HALF_WIDTH_RANGES = (
+            (0x0000, 0x10FF),  # Latin, ギリシャ文字, キリル文字 など
+            (0x2000, 0x200D),  # 各種スペース, ZWJ
+            (0x2010, 0x201F),  # ダッシュ, 引用符 (‐ – — ― ‘ ’ “ ” など)
+            (0x2032, 0x2037),  # プライム記号
+        )
 
     class Format:
         """フォーマット関連の定数"""
@@ -121,15 +127,17 @@ def load_config(config_path: str) -> configparser.ConfigParser:
     return config
 
 class WebDriverManager:
-    """WebDriverをコンテキストマネージャーで管理するクラス"""
+    """WebDriverをコンテキストマネージャーで管理するクラス
+    (Selenium はスクレイピングでしか使わないため、ドライバーを作るときに読み込む)"""
     def __init__(self, options=None):
         self.options = options or self.default_options()
-        self.driver: webdriver.Chrome | None = None
+        self.driver: "webdriver.Chrome | None" = None
         # クラス固有のロガーを取得
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def default_options(self):
         """デフォルトのChromeオプションを設定する"""
+        from selenium.webdriver.chrome.options import Options
         options = Options()
         options.add_argument("--headless")
         options.add_argument("--disable-gpu")
@@ -156,6 +164,7 @@ class WebDriverManager:
     def __enter__(self):
         """コンテキストに入ったときにWebDriverを作成する"""
         try:
+            from selenium import webdriver
             self.driver = webdriver.Chrome(options=self.options)
             # WebDriverの基本タイムアウトを設定
             try:
@@ -276,123 +285,25 @@ def parse_programs_config(config_path: str, target_year: str = None) -> dict | N
     logger.info(f"{broadcaster_type} 番組設定 ({len(programs)}件) を解析しました。")
     return programs
 
-# --- extract_time_from_block, sort_blocks_by_time, count_characters, count_tweet_length ---
-# --- to_jst_datetime, to_utc_isoformat, format_date ---
-# これらの関数は変更なし (内部の logger はモジュールレベルのものを使用)
-def extract_time_from_block(block: str, starts_with: str = "") -> tuple[int, int]:
-    lines = block.split('\n')
-    for line in lines:
-        if starts_with and not line.startswith(starts_with):
-            continue
-        time_match = re.search(r'\(.*?(\d{1,2}:\d{2})', line)
-        if not time_match:
-            time_match = re.search(r'(\d{1,2}:\d{2})', line)
-
-        if time_match:
-            time_str = time_match.group(1)
-            try:
-                hour, minute = map(int, time_str.split(':'))
-                return hour, minute
-            except ValueError:
-                logger.warning(f"時間文字列のパースに失敗: {time_str} in '{line[:30]}...'")
-                continue
-    return Constants.Time.DEFAULT_HOUR, Constants.Time.DEFAULT_MINUTE
-
-def sort_blocks_by_time(blocks: list[str]) -> list[str]:
-    def get_sort_key(block: str) -> tuple[int, int]:
-        return extract_time_from_block(block, starts_with='●')
-    try:
-        return sorted(blocks, key=get_sort_key)
-    except Exception as e:
-        logger.error(f"ブロックのソート中にエラーが発生しました: {e}", exc_info=True)
-        return blocks
-
-def count_characters(text: str) -> int:
-    count = 0
-    for char in text:
-        if ord(char) > 255:
-            count += Constants.Character.FULL_WIDTH_CHAR_WEIGHT
-        else:
-            count += Constants.Character.HALF_WIDTH_CHAR_WEIGHT
-    return count
-
-def count_tweet_length(text):
-    url_pattern = re.compile(r'https?://\S+')
-    urls = url_pattern.findall(text)
-    text_without_urls = url_pattern.sub('', text)
-    text_length = count_characters(text_without_urls)
-    url_length = Constants.Character.URL_CHAR_WEIGHT * len(urls)
-    total_length = text_length + url_length
-    return total_length
-
-def to_jst_datetime(date_str: str) -> datetime:
-    try:
-        date_obj = datetime.strptime(date_str, Constants.Format.DATE_FORMAT)
-        jst = pytz.timezone('Asia/Tokyo')
-        jst_datetime = jst.localize(date_obj)
-        return jst_datetime
-    except ValueError as e:
-        logger.error(f"日付文字列のパースに失敗しました: {date_str} - {e}", exc_info=True)
-        raise
-
-def to_utc_isoformat(jst_datetime: datetime) -> str:
-    if jst_datetime.tzinfo is None:
-        logger.warning("タイムゾーン情報がないdatetimeオブジェクトが渡されました。JSTとして扱います。")
-        jst = pytz.timezone('Asia/Tokyo')
-        jst_datetime = jst.localize(jst_datetime)
-    utc_datetime = jst_datetime.astimezone(pytz.utc)
-    utc_iso = utc_datetime.strftime(Constants.Format.DATETIME_FORMAT)
-    return utc_iso
-
-def format_date(target_date: str) -> str:
-    try:
-        return datetime.strptime(target_date, Constants.Format.DATE_FORMAT).strftime(Constants.Format.DATE_FORMAT_YYYYMMDD)
-    except ValueError as e:
-        logger.error(f"日付フォーマットに失敗しました: {target_date} - {e}", exc_info=True)
-        return target_date
-
-def format_program_time(program_name: str, weekday: int, default_time: str) -> str:
-    """番組時間をフォーマットする (TV Tokyo用)"""
-    if program_name.startswith(Constants.Program.WBS_PROGRAM_NAME):
-        time_str = "22:00-22:58" if weekday < 4 else "23:00-23:58" # 金曜以外と金曜 (定数化推奨)
-        channel = "テレ東" # 定数化推奨
-        logger.debug(f"WBS ({'月-木' if weekday < 4 else '金'}) の時間を設定: {time_str}")
-        return f"({channel} {time_str})"
-    else:
-        channel = "テレ東" # 定数化推奨
-        logger.debug(f"{program_name} のデフォルト時間を設定: {default_time}")
-        return f"({channel} {default_time})"
-
-def extract_time_info_from_text(text: str) -> str:
-    """ツイートテキストから時刻情報を抽出・整形する"""
-    time_info = "時刻抽出失敗"
-    add_24_hour = False
-
-    if re.search(r"[（\(]深夜[）\)]", text):
-        add_24_hour = True
-        logger.debug("深夜表記を検出")
-
-    time_match = re.search(r'(\d{1,2})日\s?\(.\)\s?(午前|午後)(\d{1,2}):(\d{2})', text)
-    if time_match:
-        # day = int(time_match.group(1)) # day は使わない
-        ampm = time_match.group(2)
-        hour = int(time_match.group(3))
-        minute = int(time_match.group(4))
-        logger.debug(f"抽出された時刻要素: ampm={ampm}, hour={hour}, minute={minute}")
-
-        if ampm == "午後" and hour != 12:
-            hour += 12
-        elif ampm == "午前" and hour == 12:
-            hour = 0
-
-        if add_24_hour:
-            if hour < 12: # 0時～11時台なら24時間加算
-                hour += 24
-                logger.debug(f"24時間加算実行 -> hour={hour}")
-
-        time_info = f"{hour:02}:{minute:02}"
-        logger.debug(f"整形後の時刻情報: {time_info}")
-    else:
-        logger.warning(f"時刻情報のパターンマッチに失敗しました: '{text[:50]}...'")
 
-    return time_info
+# テキスト処理の関数は common.text_utils に移動した。
+# 既存のコード・テストが common.utils からインポートできるよう、アクセスされたときに転送する
+# (common.text_utils が common.utils の Constants を使うため、ここで直接インポートすると循環する)
+_TEXT_UTILS_NAMES = frozenset((
+    "extract_time_from_block",
+    "sort_blocks_by_time",
+    "count_characters",
+    "count_tweet_length",
+    "to_jst_datetime",
+    "to_utc_isoformat",
+    "format_date",
+    "format_program_time",
+    "extract_time_info_from_text",
+))
+
+
+def __getattr__(name: str):
+    if name in _TEXT_UTILS_NAMES:
+        from common import text_utils
+        return getattr(text_utils, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,48 @@
+"""
+X API クライアントの生成
+
+環境変数 X_API_BASE_URL を設定すると、tweepy.Client のリクエスト先を
+ローカルのスタンドインサーバー (benchmarks/x_api_server.py) などに切り替える。
+"""
+import os
+import logging
+import tweepy
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# tweepy.Client が固定で使う API のホスト
+X_API_HOST = "https://api.twitter.com"
+BASE_URL_ENV = "X_API_BASE_URL"
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """X_API_HOST 宛てのリクエストを base_url 宛てに書き換えるトランスポートアダプター"""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        if request.url.startswith(X_API_HOST):
+            request.url = self.base_url + request.url[len(X_API_HOST):]
+        return super().send(request, **kwargs)
+
+
+def redirect_client(client: tweepy.Client, base_url: str) -> tweepy.Client:
+    """client のリクエスト先を base_url に切り替える"""
+    client.session.mount(X_API_HOST, _RedirectAdapter(base_url))
+    logger.info(f"X API のリクエスト先を {base_url} に切り替えました。")
+    return client
+
+
+def create_client(**kwargs) -> tweepy.Client:
+    """
+    tweepy.Client を生成する。引数はそのまま tweepy.Client に渡す。
+    X_API_BASE_URL が設定されていれば、リクエスト先をそのURLに切り替える。
+    """
+    client = tweepy.Client(**kwargs)
+    base_url = os.getenv(BASE_URL_ENV)
+    if base_url:
+        redirect_client(client, base_url)
+    return client
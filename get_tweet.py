@@ -1,12 +1,18 @@
 import tweepy
 import os
-import time
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import sys
 import re
 import logging
-from common.utils import to_jst_datetime, to_utc_isoformat, extract_time_info_from_text, setup_logger
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from common.utils import setup_logger, load_config
+from common.text_utils import to_jst_datetime, to_utc_isoformat, extract_time_info_from_text, sort_blocks_by_time
+from common.rate_limiter import RateLimitLedger, SEARCH_ENDPOINT
+from common.x_api import create_client
+from common.tweet_cache import TweetCache
+from common.url_resolver import default_resolver, is_short_url
 
 # --- モジュールレベルのロガーを取得 ---
 logger = logging.getLogger(__name__)
@@ -20,6 +26,16 @@ PROGRAM_NAMES = [
     "英雄たちの選択"
 ]
 
+# 検索するアカウントと番組名の設定ファイル (存在しない場合は DEFAULT_USER と PROGRAM_NAMES を使う)
+TWEET_CONFIG_PATH = "ini/tweet_config.ini"
+DEFAULT_USER = "nhk_docudocu"
+
+# 検索クエリの最大文字数 (X API v2 の search_recent_tweets の上限)
+QUERY_MAX_LENGTH = 512
+
+# アカウントごとの検索を同時に実行する最大スレッド数
+MAX_SEARCH_WORKERS = 4
+
 # 環境変数の読み込み
 load_dotenv()
 
@@ -30,6 +46,47 @@ ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
 ACCESS_SECRET = os.getenv("ACCESS_SECRET")
 BEARER_TOKEN = os.getenv("BEARER_TOKEN")
 
+# tweet.py と共有するレート制限の台帳
+rate_ledger = RateLimitLedger()
+
+# 検索結果の生データのキャッシュ (output/tweet_cache/{アカウント}/{YYYYMMDD}.jsonl.gz)
+tweet_cache = TweetCache()
+# 検索した放送日のうち、キャッシュ済みだった数・なかった数 (処理時間の履歴に記録する)
+tweet_cache_stats = {"hits": 0, "misses": 0}
+_tweet_cache_stats_lock = threading.Lock()
+
+def load_tweet_config(config_path=TWEET_CONFIG_PATH):
+    """
+    検索するアカウントと番組名を設定ファイルから読み込む。
+
+    Returns:
+        dict[str, list[str]]: アカウント -> 番組名のリスト。
+                              設定ファイルがない場合は {DEFAULT_USER: PROGRAM_NAMES}
+    """
+    if not os.path.exists(config_path):
+        logger.info(f"設定ファイル {config_path} がないため、既定のアカウント ({DEFAULT_USER}) と番組名を使用します。")
+        return {DEFAULT_USER: list(PROGRAM_NAMES)}
+
+    config = load_config(config_path)
+    accounts = {}
+    for section in config.sections():
+        user = config.get(section, "user", fallback="").strip()
+        programs = [name.strip() for name in config.get(section, "programs", fallback="").splitlines() if name.strip()]
+        if not user or not programs:
+            logger.warning(f"セクション '{section}' に user または programs がありません。スキップします。")
+            continue
+        # 同じアカウントが複数のセクションにある場合は番組名をまとめる
+        names = accounts.setdefault(user, [])
+        names.extend(name for name in programs if name not in names)
+    return accounts
+
+def all_program_names(accounts):
+    """全アカウントの番組名を重複なく (設定ファイルの順に) 返す"""
+    names = []
+    for programs in accounts.values():
+        names.extend(name for name in programs if name not in names)
+    return names
+
 def create_search_queries(program_names, user):
     """
     APIクエリとX検索窓用のクエリを生成する
@@ -43,84 +100,288 @@ def create_search_queries(program_names, user):
 
     return api_query, x_keyword
 
-def search_tweets(target_date, user=None, count=10):
+def pack_program_names(program_names, user, max_length=None):
     """
-    Twitter API v2を使ってツイートを検索し、整形前のツイートデータを返します。
+    番組名を max_length (省略時は QUERY_MAX_LENGTH) 以内の検索クエリに収まるようにまとめる (First Fit Decreasing)。
+    長い番組名から順に、収まる最初のクエリに追加し、どのクエリにも収まらなければ新しいクエリを作る。
+
+    Returns:
+        list[list[str]]: クエリごとの番組名のリスト (クエリ内は元の順序)
     """
-    try:
-        client = tweepy.Client(bearer_token=BEARER_TOKEN)
+    max_length = max_length or QUERY_MAX_LENGTH
+    order = {name: i for i, name in enumerate(program_names)}
+    chunks = []
+    for name in sorted(dict.fromkeys(program_names), key=len, reverse=True):
+        for chunk in chunks:
+            if len(create_search_queries(chunk + [name], user)[0]) <= max_length:
+                chunk.append(name)
+                break
+        else:
+            if len(create_search_queries([name], user)[0]) > max_length:
+                logger.warning(f"番組名が長すぎて検索クエリの上限 ({max_length}文字) を超えます: {name}")
+            chunks.append([name])
+    return [sorted(chunk, key=order.get) for chunk in chunks]
+
+def dedupe_tweets(tweets):
+    """ツイートIDが重複するツイートを除く (最初に現れたものを残す)"""
+    seen = set()
+    unique = []
+    for tweet in tweets:
+        tweet_id = str(tweet.get("id"))
+        if tweet_id in seen:
+            continue
+        seen.add(tweet_id)
+        unique.append(tweet)
+    return unique
+
+def _rate_limit_hook(response, *args, **kwargs):
+    """検索 (GET /2/tweets/search/recent) のレスポンスヘッダーをレート制限の台帳に記録する
+    (tweepy v2 の Response にはヘッダーが含まれないため、セッションのフックで取得する)"""
+    request = getattr(response, 'request', None)
+    if request is not None and request.method == 'GET' and '/2/tweets/search/recent' in response.url:
+        try:
+            rate_ledger.record_headers(SEARCH_ENDPOINT, response.headers)
+        except Exception as e:
+            logger.warning(f"レート制限台帳の更新に失敗しました: {e}")
+    return response
+
+def _search_page(client, max_retries, **params):
+    """
+    search_recent_tweets を1回呼び出す (1ページ分)。
+    レート制限は tweet.py と共有する台帳 (output/rate_limits.sqlite3) で管理し、
+    429 の場合はリセットまで待って max_retries 回までリトライする。リトライ上限に達した場合は None を返す。
+    """
+    for attempt in range(max_retries + 1):
+        # 台帳で残り回数を確認し、残っていなければリセットまで待つ
+        rate_ledger.acquire(SEARCH_ENDPOINT)
+        try:
+            return client.search_recent_tweets(**params)
+        except tweepy.errors.TooManyRequests as e:
+            reset_header = e.response.headers.get('x-rate-limit-reset') if e.response is not None else None
+            reset_timestamp = int(reset_header) if reset_header else None
+            # 台帳に記録しておけば、次の acquire でリセットまで待機する (他のプロセスも同様)
+            rate_ledger.on_rate_limited(SEARCH_ENDPOINT, reset_timestamp)
+            if attempt >= max_retries:
+                print("レート制限超過。リトライ上限に達しました。")
+                return None
+            print(f"レート制限超過。リセットまで待機してリトライします ({attempt + 1}/{max_retries})...")
+
+def _date_range(start_date, end_date):
+    """start_date から end_date まで (両端を含む) の YYYYMMDD のリスト"""
+    start = datetime.strptime(start_date, "%Y%m%d")
+    end = datetime.strptime(end_date, "%Y%m%d")
+    return [(start + timedelta(days=i)).strftime("%Y%m%d") for i in range((end - start).days + 1)]
+
+def bucket_by_broadcast_date(tweets, dates):
+    """
+    ツイートを放送日 (JST) ごとに振り分ける。
+    番組紹介のツイートは放送日の前日に投稿されるため、JST で前日 00:00 から当日 00:00 までを1日分とする。
+    """
+    # 各放送日の検索期間の開始時刻 (前日 00:00 JST) と終了時刻 (当日 00:00 JST)
+    windows = [(to_jst_datetime(d) - timedelta(days=1), to_jst_datetime(d), d) for d in dates]
+    buckets = {d: [] for d in dates}
+    for tweet in tweets:
+        created_at = tweet.get("created_at")
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        if created_at is None:
+            logger.warning(f"投稿日時のないツイートをスキップします: {tweet}")
+            continue
+        for window_start, window_end, date in windows:
+            if window_start <= created_at < window_end:
+                buckets[date].append(tweet)
+                break
+    return buckets
+
+def search_tweets_range(start_date, end_date, user=None, count=100, max_retries=3, since_id=None,
+                        program_names=None):
+    """
+    放送日 start_date から end_date まで (両端を含む) のツイートをまとめて検索し、
+    放送日ごとに振り分けた整形前のツイートデータを返します。
 
-        # APIクエリとX検索窓用のクエリを生成
-        api_query, x_keyword = create_search_queries(PROGRAM_NAMES, user)
+    期間全体を1つのクエリで検索し、next_token をたどって全ページを取得するため、
+    リクエスト数は日数ではなくツイート数 / count (最大100) で決まります。
+    (search_recent_tweets で検索できるのは直近7日間のみです)
+    since_id を指定した場合は、そのIDより新しいツイートのみを取得します。
+    番組名 (program_names, 省略時は PROGRAM_NAMES) が1つのクエリに収まらない場合は
+    複数のクエリに分けて検索し、ツイートIDで重複を除きます。
 
-        # 検索対象日を放送日の前日に設定
-        jst_datetime_target = to_jst_datetime(target_date) - timedelta(days=1)
+    Returns:
+        dict[str, list]: 放送日 (YYYYMMDD) -> ツイートのリスト。エラーの場合は None
+    """
+    try:
+        client = create_client(bearer_token=BEARER_TOKEN)
+        client.session.hooks['response'].append(_rate_limit_hook)
 
-        # 日付文字列を作成 (YYYY-MM-DD形式)
-        search_date = jst_datetime_target.strftime("%Y-%m-%d")
+        # max_results の範囲チェック
+        if count < 10 or count > 100:
+            print("max_results は 10 以上 100 以下の値を指定してください。")
+            return None
 
-        # 検索クエリとXでの実際の検索内容を表示
-        print("\n検索クエリ情報:")
-        print(f"APIクエリ: {api_query}")
-        print(f"Xでの検索窓入力内容: from:{user} {x_keyword} since:{search_date}_00:00:00_JST until:{search_date}_23:59:59_JST")
+        dates = _date_range(start_date, end_date)
+        if not dates:
+            print(f"日付の範囲が不正です: {start_date} - {end_date}")
+            return None
 
-        # 日本時間の日付と時刻を作成 (検索期間は前日の00:00:00 から 23:59:59)
+        # 検索期間は最初の放送日の前日 00:00:00 から 最後の放送日の前日 23:59:59 (JST)
         #                                        ↑前日に Tweet されているため
-        jst_datetime_start = jst_datetime_target.replace(hour=0, minute=0, second=0, microsecond=0)
-        jst_datetime_end = jst_datetime_target.replace(hour=23, minute=59, second=59, microsecond=999999)
+        jst_datetime_start = to_jst_datetime(dates[0]) - timedelta(days=1)
+        jst_datetime_end = to_jst_datetime(dates[-1]) - timedelta(microseconds=1)
 
         # UTCに変換してISOフォーマットにする
         start_time = to_utc_isoformat(jst_datetime_start)
         end_time = to_utc_isoformat(jst_datetime_end)
 
-        # max_results の範囲チェック
-        if count < 10 or count > 100:
-            print("max_results は 10 以上 100 以下の値を指定してください。")
-            return None
-
-        response = client.search_recent_tweets(
-            query=api_query,
-            max_results=count,
-            tweet_fields=["created_at", "text", "author_id"],
-            start_time=start_time,
-            end_time=end_time
-        )
-
-        tweets = response.data
-        if tweets is None:
-            print("該当するツイートが見つかりませんでした。")
-            return None
-
-        return tweets  # 整形前のtweetsデータを返す
+        tweets = []
+        pages = 0
+        for chunk in pack_program_names(program_names or PROGRAM_NAMES, user):
+            # APIクエリとX検索窓用のクエリを生成
+            api_query, x_keyword = create_search_queries(chunk, user)
+
+            # 検索クエリとXでの実際の検索内容を表示
+            print("\n検索クエリ情報:")
+            print(f"APIクエリ: {api_query}")
+            print(f"Xでの検索窓入力内容: from:{user} {x_keyword} since:{jst_datetime_start:%Y-%m-%d}_00:00:00_JST until:{jst_datetime_end:%Y-%m-%d}_23:59:59_JST")
+
+            next_token = None
+            while True:
+                params = dict(
+                    query=api_query,
+                    max_results=count,
+                    # entities: 本文中の t.co リンクの展開先 (expanded_url) を得るため
+                    tweet_fields=["created_at", "text", "author_id", "entities"],
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+                if since_id:
+                    params["since_id"] = since_id
+                if next_token:
+                    params["next_token"] = next_token
+                response = _search_page(client, max_retries, **params)
+                if response is None:
+                    return None
+                pages += 1
+                tweets.extend(response.data or [])
+                next_token = (response.meta or {}).get("next_token")
+                if not next_token:
+                    break
+
+        tweets = dedupe_tweets(tweets)
+        logger.info(f"{user}: {len(dates)} 日分のツイートを {pages} 回のリクエストで {len(tweets)} 件取得しました。")
+        return bucket_by_broadcast_date(tweets, dates)
 
     except tweepy.TweepyException as e:
-        if isinstance(e, tweepy.errors.TooManyRequests):
-            reset_timestamp = int(e.response.headers.get('x-rate-limit-reset', 0))
-            reset_datetime = datetime.fromtimestamp(reset_timestamp)
-            now_datetime = datetime.now()
-            wait_seconds = int((reset_datetime - now_datetime).total_seconds())  # 小数点以下を切り捨てる
-            wait_seconds += 3  # プラス3秒追加
-
-            print(f"レート制限超過。リセットまで{wait_seconds}秒待機します。")
-            for i in range(wait_seconds, 0, -1):  # カウントダウン
-                print(f"\rリセットまで残り: {i}秒", end="", flush=True)  # 上書き表示
-                time.sleep(1)
-            print("\n待機完了。リトライ...")  # 改行を追加
-
-            return search_tweets(target_date, user, count)  # 再帰的にリトライ
-        else:
-            print(f"エラーが発生しました: {e}")
-            return None
+        print(f"エラーが発生しました: {e}")
+        return None
     except Exception as e:
         print(f"予期せぬエラーが発生しました: {e}")
         return None
 
-def format_program_info(text, time_info, channel="NHK BS"):
+def fetch_tweets_range(start_date, end_date, user, count=100, max_retries=3, program_names=None):
+    """
+    キャッシュを使って放送日 start_date から end_date までのツイートを取得します。
+
+    取得済みの日付がある場合は since_id を指定して新しいツイートのみを検索し、
+    検索結果の生データを放送日ごとにキャッシュへ追加したうえで、キャッシュ済みの分と合わせて返します。
+    (キャッシュはアカウント単位なので、番組名を追加した場合は取得済みの日付の該当ツイートは取得されません。
+     その場合はキャッシュを削除して取得し直してください)
+
+    Returns:
+        dict[str, list]: 放送日 (YYYYMMDD) -> ツイート (dict) のリスト。エラーの場合は None
+    """
+    dates = _date_range(start_date, end_date)
+    hits = sum(tweet_cache.exists(user, d) for d in dates)
+    with _tweet_cache_stats_lock:
+        tweet_cache_stats["hits"] += hits
+        tweet_cache_stats["misses"] += len(dates) - hits
+    since_id = tweet_cache.since_id(user, dates)
+    if since_id:
+        logger.info(f"キャッシュ済みのツイート (ID {since_id} まで) より新しいツイートのみを検索します。")
+
+    buckets = search_tweets_range(start_date, end_date, user, count, max_retries, since_id=since_id,
+                                  program_names=program_names)
+    if buckets is None:
+        return None
+    return {date: tweet_cache.add(user, date, tweets) for date, tweets in buckets.items()}
+
+def _merge_buckets(results):
+    """アカウントごとの放送日別ツイートをまとめ、ツイートIDで重複を除く"""
+    merged = {}
+    for buckets in results:
+        for date, tweets in buckets.items():
+            merged.setdefault(date, []).extend(tweets)
+    return {date: dedupe_tweets(tweets) for date, tweets in merged.items()}
+
+def harvest_tweets(start_date, end_date, accounts, count=100, max_retries=3, max_workers=MAX_SEARCH_WORKERS):
+    """
+    複数のアカウントのツイートを並行して取得し、放送日ごとにまとめて返します。
+
+    アカウントごとに1スレッドで fetch_tweets_range を実行します。
+    各リクエストは共有のレート制限台帳で1回分を確保してから送るため、
+    並行に実行しても残り回数を超えて送ることはありません。
+
+    Args:
+        accounts (dict[str, list[str]]): アカウント -> 番組名のリスト
+
+    Returns:
+        dict[str, list]: 放送日 (YYYYMMDD) -> ツイートのリスト。いずれかのアカウントでエラーの場合は None
+    """
+    if not accounts:
+        logger.error("検索するアカウントがありません。")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(accounts)))) as executor:
+        futures = {
+            user: executor.submit(fetch_tweets_range, start_date, end_date, user, count, max_retries, programs)
+            for user, programs in accounts.items()
+        }
+        results = {user: future.result() for user, future in futures.items()}
+
+    failed = [user for user, buckets in results.items() if buckets is None]
+    if failed:
+        logger.error(f"ツイートの取得に失敗したアカウント: {', '.join(failed)}")
+        return None
+    return _merge_buckets(results.values())
+
+def load_cached_tweets(start_date, end_date, accounts):
+    """
+    キャッシュのみから放送日 start_date から end_date までのツイートを読み込みます (APIは呼び出しません)。
+
+    Returns:
+        dict[str, list]: 放送日 (YYYYMMDD) -> ツイート (dict) のリスト
+    """
+    results = []
+    for user in accounts:
+        buckets = {}
+        for date in _date_range(start_date, end_date):
+            if not tweet_cache.exists(user, date):
+                logger.warning(f"{user} {date}: キャッシュがありません ({tweet_cache.path(user, date)})")
+            buckets[date] = tweet_cache.load(user, date)
+        results.append(buckets)
+    return _merge_buckets(results)
+
+def search_tweets(target_date, user=None, count=100, max_retries=3):
+    """
+    Twitter API v2を使ってツイートを検索し、整形前のツイートデータを返します。
+    該当するツイートがない場合やエラーの場合は None を返します。
+    """
+    buckets = search_tweets_range(target_date, target_date, user, count, max_retries)
+    if buckets is None:
+        return None
+
+    tweets = buckets.get(target_date)
+    if not tweets:
+        print("該当するツイートが見つかりませんでした。")
+        return None
+
+    return tweets  # 整形前のtweetsデータを返す
+
+def format_program_info(text, time_info, channel="NHK BS", program_names=None):
     """番組情報をフォーマットする"""
     program_info = "番組情報の抽出に失敗"  # デフォルト値
 
-    # 番組情報のフォーマット（PROGRAM_NAMESを使用）
-    for program_name in PROGRAM_NAMES:
+    # 番組情報のフォーマット（省略時は PROGRAM_NAMES を使用）
+    for program_name in program_names or PROGRAM_NAMES:
         if program_name in text:
             # Asia Insightの場合は英語表記を使用
             display_name = "Asia Insight" if "Asia" in program_name else program_name
@@ -129,7 +390,7 @@ def format_program_info(text, time_info, channel="NHK BS"):
 
     return program_info
 
-def extract_program_info(lines, text):
+def extract_program_info(lines, text, program_names=None):
     """1行目から番組名と時刻情報を抽出する"""
     time_info = ""
     program_info = ""
@@ -141,25 +402,35 @@ def extract_program_info(lines, text):
         if len(parts) > 3 and parts[0] == "NHK":
             channel = f"NHK {parts[1]}"
             time_info = extract_time_info_from_text(first_line)  # utils.py の共通関数を使用
-            program_info = format_program_info(text, time_info, channel)
+            program_info = format_program_info(text, time_info, channel, program_names)
 
     return time_info, program_info
 
-def extract_url_from_lines(lines):
-    """ツイートの行からURLを抽出する"""
+def expand_url(url, entities):
+    """
+    ツイートの entities から t.co の URL の展開先 (expanded_url) を返す。
+    展開先がない場合は url をそのまま返す (HTTP リクエストで展開はしない)。
+    """
+    for entity in (entities or {}).get("urls", []):
+        if entity.get("url") == url and entity.get("expanded_url"):
+            return entity["expanded_url"]
+    return url
+
+def extract_url_from_lines(lines, entities=None):
+    """ツイートの行からURLを抽出する (entities があれば t.co を展開した URL)"""
     if len(lines) > 0:
         last_line = lines[-1]
         if last_line.startswith("https://"):
-            return last_line
+            return expand_url(last_line, entities)
     return "URLの抽出に失敗"
 
-def cleanup_content(text, content):
+def cleanup_content(text, content, program_names=None):
     """
     ツイート本文から番組名や不要な記号、装飾を除去してサブタイトルのみを抽出する。
     「ＢＳ世界のドキュメンタリー選▽」や従来の「世界のドキュメンタリー「...」」形式に対応。
     """
 
-    for program_name in PROGRAM_NAMES:
+    for program_name in program_names or PROGRAM_NAMES:
         if program_name in text:
             # プログラム名とその前の「ＢＳ」「BS」、およびその後の記号を削除
             pattern = rf'[ＢＳBS\s]*{re.escape(program_name)}[🈟▽　選「]*'
@@ -169,17 +440,37 @@ def cleanup_content(text, content):
             break
     return content
 
-def extract_content_from_lines(lines, text):
+def extract_content_from_lines(lines, text, program_names=None):
     """ツイートの本文を抽出して整形する"""
     content = ""
     if len(lines) > 1:
         content = lines[1]
-        content = cleanup_content(text, content)
+        content = cleanup_content(text, content, program_names)
     return content
 
-def format_tweet_data(tweet_data):
+def expand_short_urls(formatted_list, resolver=None):
+    """
+    フォーマット済みのブロックの末尾に残った短縮 URL (entities に展開先がなかった t.co) を
+    リダイレクト先に置き換える。まとめて同時に調べ、結果は永続キャッシュに保存される。
+    リダイレクト先を取得できなかった URL はそのまま残す。
+    """
+    short_urls = [block.rsplit("\n", 1)[-1] for block in formatted_list if is_short_url(block.rsplit("\n", 1)[-1])]
+    if not short_urls:
+        return formatted_list
+
+    resolved = (resolver or default_resolver()).resolve_many(short_urls)
+    logger.info(f"短縮URL {len(resolved)} 件中 {sum(1 for url in resolved.values() if url)} 件を展開しました。")
+    expanded = []
+    for block in formatted_list:
+        head, _, last_line = block.rpartition("\n")
+        final_url = resolved.get(last_line)
+        expanded.append(f"{head}\n{final_url}" if final_url else block)
+    return expanded
+
+def format_tweet_data(tweet_data, program_names=None):
     """
     ツイートデータを受け取り、指定されたフォーマットで整形されたテキストを返します。
+    program_names を省略した場合は PROGRAM_NAMES で番組を判定します。
     """
     formatted_results = []
 
@@ -194,9 +485,9 @@ def format_tweet_data(tweet_data):
             continue
         lines = text.splitlines()
 
-        time_info, program_info = extract_program_info(lines, text)
-        content = extract_content_from_lines(lines, text)
-        url = extract_url_from_lines(lines)
+        time_info, program_info = extract_program_info(lines, text, program_names)
+        content = extract_content_from_lines(lines, text, program_names)
+        url = extract_url_from_lines(lines, tweet.get("entities"))
 
         # 各要素が取得できたか確認
         if program_info == "番組情報の抽出に失敗" or not content or url == "URL抽出失敗":
@@ -221,45 +512,74 @@ def save_to_file(formatted_list: list[str], target_date: str):
     os.makedirs(output_dir, exist_ok=True)
 
     try:
+        # merge_text でストリーミングマージできるよう、放送時間順に並べてから書き込む
         # リストの各要素を改行2つで結合して書き込む
-        content_to_write = "\n\n".join(formatted_list) + "\n"  # 最後に改行を1つ追加
+        content_to_write = "\n\n".join(sort_blocks_by_time(formatted_list)) + "\n"  # 最後に改行を1つ追加
         with open(filename, "w", encoding="utf-8") as f:
             f.write(content_to_write)
         logger.info(f"テキストファイルを {filename} に出力しました。")
     except Exception as e:
         logger.error(f"ファイル書き込みエラー: {e}", exc_info=True)
 
-def main(target_date: str) -> bool:
+def main(target_date: str, end_date: str | None = None, reformat: bool = False) -> bool:
     """
     メイン処理を実行する
 
     Args:
         target_date (str): 対象日付 (YYYYMMDD形式)
+        end_date (str, optional): 指定した場合は target_date から end_date までの各日付を
+                                  まとめて検索し、日付ごとに YYYYMMDD_tweet.txt を出力する
+        reformat (bool): True の場合は API を呼び出さず、キャッシュ済みの生データから
+                         YYYYMMDD_tweet.txt を作り直す
 
     Returns:
-        bool: 処理が成功した場合はTrue、失敗した場合はFalse
+        bool | None: 処理が成功した場合はTrue、失敗した場合 (ツイートはあったがフォーマットできなかった場合を含む) はFalse、
+                     対象のツイートが1件もなかった場合はNone
     """
     try:
         logger = setup_logger(level=logging.INFO)
         logger.info("=== get-tweet 処理開始 ===")
-        logger.info(f"対象日付: {target_date}")
+        logger.info(f"対象日付: {target_date}" + (f" - {end_date}" if end_date else "")
+                    + (" (キャッシュから再フォーマット)" if reformat else ""))
 
-        user = "nhk_docudocu"
-        count = 20  # 検索件数 (API上限は100)
+        accounts = load_tweet_config()
+        program_names = all_program_names(accounts)
+        count = 100  # 1ページあたりの検索件数 (API上限は100)
+        logger.info(f"検索対象: {len(accounts)} アカウント / {len(program_names)} 番組")
 
-        tweets = search_tweets(target_date, user, count)
+        if reformat:
+            buckets = load_cached_tweets(target_date, end_date or target_date, accounts)
+        else:
+            buckets = harvest_tweets(target_date, end_date or target_date, accounts, count)
+        if buckets is None:
+            logger.error("ツイートの検索に失敗しました。")
+            return False
 
-        if not tweets:
+        saved = 0
+        unformatted = 0
+        for date, tweets in buckets.items():
+            if not tweets:
+                logger.warning(f"{date}: ツイートデータがありません。")
+                continue
+
+            formatted_list = format_tweet_data(tweets, program_names)
+            if not formatted_list:
+                logger.warning(f"{date}: ツイートデータのフォーマットに失敗しました。")
+                unformatted += 1
+                continue
+            formatted_list = expand_short_urls(formatted_list)
+
+            save_to_file(formatted_list, date)
+            saved += 1
+
+        if saved == 0:
+            if unformatted:
+                logger.error("ツイートはありましたが、フォーマットできたものがありません。")
+                return False
             logger.warning("ツイートデータがありません。")
             return None
 
-        formatted_list = format_tweet_data(tweets)
-        if not formatted_list:
-            logger.warning("ツイートデータのフォーマットに失敗しました。")
-            return False
-
-        save_to_file(formatted_list, target_date)
-        logger.info("=== get-tweet 処理完了 ===")
+        logger.info(f"=== get-tweet 処理完了 ({saved}/{len(buckets)} 日分を出力) ===")
         return True
 
     except Exception as e:
@@ -267,10 +587,12 @@ def main(target_date: str) -> bool:
         return False
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
+    args = [arg for arg in sys.argv[1:] if arg != "--reformat"]
+    if len(args) < 1:
         print("エラー: 日付引数がありません。")
-        print("使用方法: python get_tweet.py YYYYMMDD")
+        print("使用方法: python get_tweet.py YYYYMMDD [終了日 YYYYMMDD] [--reformat]")
         sys.exit(1)
 
-    target_date = sys.argv[1]
-    sys.exit(0 if main(target_date) else 1)
+    target_date = args[0]
+    end_date = args[1] if len(args) > 1 else None
+    sys.exit(0 if main(target_date, end_date, reformat="--reformat" in sys.argv[1:]) else 1)
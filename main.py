@@ -17,9 +17,14 @@ import subprocess
 import argparse
 import logging
 import traceback
+import shutil
 from datetime import datetime, timedelta
 from typing import List, Optional
 
+from common import tracing, profiling
+from common.memory import track_allocations
+from common.perf_history import PerfHistory, StageTimer, BASELINE_WINDOW, SLOWDOWN_RATIO, find_regressions, format_report
+
 # ロギング設定
 # ルートロガーのレベルをWARNINGに設定して不要なログを抑制
 logging.basicConfig(
@@ -112,6 +117,7 @@ def get_target_date(date_str: Optional[str] = None) -> str:
     return yesterday.strftime("%Y%m%d")
 
 
+@tracing.traced("scrape", "step")
 def run_scrape(target_date: str) -> bool:
     """スクレイピングを実行します。"""
     logger.info(f"Running scraping for date: {target_date}")
@@ -126,11 +132,14 @@ def run_scrape(target_date: str) -> bool:
         return False
 
 
-def get_tweets(target_date: str) -> Optional[bool]:
+@tracing.traced("get-tweets", "step")
+def get_tweets(target_date: str, end_date: Optional[str] = None, reformat: bool = False) -> Optional[bool]:
     """ツイートを取得する
 
     Args:
         target_date: 処理対象の日付 (YYYYMMDD形式)
+        end_date: 指定した場合は target_date から end_date までをまとめて取得する (YYYYMMDD形式)
+        reformat: True の場合は API を呼び出さず、キャッシュ済みのツイートから作り直す
 
     Returns:
         bool: 成功した場合はTrue、エラーが発生した場合はFalseを返す
@@ -142,7 +151,7 @@ def get_tweets(target_date: str) -> Optional[bool]:
     try:
         # 直接get_tweet.pyのmain関数を呼び出す
         from get_tweet import main as get_tweet_main
-        result = get_tweet_main(target_date)
+        result = get_tweet_main(target_date, end_date, reformat=reformat)
 
         if result is None:
             logger.info("ツイートデータが存在しないためスキップします")
@@ -160,6 +169,7 @@ def get_tweets(target_date: str) -> Optional[bool]:
         return False
 
 
+@tracing.traced("merge", "step")
 def run_merge(target_date: str) -> bool:
     """マージを実行します。"""
     logger.info(f"Merging content for date: {target_date}")
@@ -188,6 +198,7 @@ def run_merge(target_date: str) -> bool:
         return False
 
 
+@tracing.traced("split", "step")
 def run_split(target_date: str) -> bool:
     """テキスト分割を実行します。
 
@@ -196,7 +207,7 @@ def run_split(target_date: str) -> bool:
     - バックアップ: output/{target_date}_before-split.txt (分割が必要な場合のみ)
     - 出力ファイル: output/{target_date}.txt (入力ファイルを上書き)
     """
-    from split_text import split_program, split_by_program, count_tweet_length, get_header_length, TWEET_MAX_LENGTH
+    from split_text import split_programs, split_by_program, count_tweet_length, get_header_length, TWEET_MAX_LENGTH
 
     # ファイルパスの設定
     input_file = os.path.join('output', f"{target_date}.txt")
@@ -250,19 +261,8 @@ def run_split(target_date: str) -> bool:
         # 分割処理
         new_tweet_list = []
         try:
-            for i, program_text in enumerate(programs):
-                current_limit = TWEET_MAX_LENGTH - (header_length if i == 0 else 0)
-                if count_tweet_length(program_text) > current_limit:
-                    # 分割が必要な場合
-                    split_tweets = split_program(
-                        program_text,
-                        max_length=TWEET_MAX_LENGTH,
-                        header_length=(header_length if i == 0 else 0)
-                    )
-                    new_tweet_list.extend(split_tweets)
-                else:
-                    # 分割不要なブロックはそのまま追加
-                    new_tweet_list.append(program_text)
+            # 制限を超えるブロックのみ split_program で分割し、それ以外はそのまま追加
+            new_tweet_list = split_programs(programs, header_length)
 
             # 分割されたテキストをファイルに書き込む (間に空行を入れる)
             content_to_write = "\n\n".join(new_tweet_list) + "\n"
@@ -306,19 +306,91 @@ def run_split(target_date: str) -> bool:
         return False
 
 
-def run_open_urls(target_date: str) -> bool:
+@tracing.traced("pack", "step")
+def run_pack(target_date: str) -> bool:
+    """分割後のツイートのうち、隣り合う短いものを1つのツイートにまとめます。
+
+    - 入力ファイル: output/{target_date}.txt (ツイートは空行区切り)
+    - バックアップ: output/{target_date}_before-pack.txt (ツイート数が減る場合のみ)
+    - 出力ファイル: output/{target_date}.txt (入力ファイルを上書き)
+    """
+    from split_text import pack_blocks, get_header_length
+
+    input_file = os.path.join('output', f"{target_date}.txt")
+    backup_file = os.path.join('output', f"{target_date}_before-pack.txt")
+
+    if not os.path.exists(input_file):
+        logger.error(f"ファイル {input_file} が見つかりません。")
+        return False
+
+    try:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            tweets = [t.strip() for t in f.read().strip().split("\n\n") if t.strip()]
+
+        packed = pack_blocks(tweets, get_header_length(target_date))
+        logger.info(f"投稿予定のツイート数: {len(tweets)} 件 -> {len(packed)} 件")
+
+        if len(packed) == len(tweets):
+            logger.info("まとめられるツイートはありませんでした。ファイルは変更されません。")
+            return True
+
+        import shutil
+        shutil.copy2(input_file, backup_file)
+        logger.info(f"ファイルを {backup_file} にバックアップしました。")
+
+        with open(input_file, 'w', encoding='utf-8') as f:
+            f.write("\n\n".join(packed) + "\n")
+        logger.info(f"まとめたツイート ({len(packed)}件) は {input_file} に保存しました。")
+        return True
+
+    except Exception as e:
+        logger.error(f"ツイートのまとめ処理中にエラーが発生しました: {e}")
+        logger.error(traceback.format_exc())
+        return False
+
+
+@tracing.traced("check", "step")
+def run_check(target_date: str, output_dir: str = "output") -> bool:
+    """投稿前に output/{target_date}.txt のリンクをチェックします。
+
+    Returns:
+        bool: 問題のあるリンクがなければTrue
+    """
+    logger.info(f"Checking links for date: {target_date}")
+    try:
+        from check_links import main as check_links_main
+        return check_links_main(target_date, output_dir) == 0
+    except Exception as e:
+        logger.error(f"リンクチェック中にエラーが発生しました: {e}")
+        logger.error(traceback.format_exc())
+        return False
+
+
+@tracing.traced("open", "step")
+def run_open_urls(target_date: str, review: bool = False) -> bool:
     """URLをブラウザで開きます。
 
     元のopen_url.pyの仕様に合わせて、YYYYMMDD形式の日付を引数として渡します。
+    review=True の場合はサブプロセスを起動せず、全ブロックをまとめたレビューページ
+    (output/{target_date}_review.html) を作成して1回だけ開きます。
     """
-    print(f"\n=== open_url.py を実行中 (日付: {target_date}) ===\n")
-
     # 日付形式のバリデーション
     import re
     if not re.fullmatch(r"\d{8}", target_date):
         print(f"エラー: 日付の形式が不正です: {target_date} (YYYYMMDD形式で指定してください)")
         return False
 
+    if review:
+        try:
+            from open_url import review_main
+            return review_main(target_date)
+        except Exception as e:
+            logger.error(f"レビューページの作成中にエラーが発生しました: {e}")
+            logger.error(traceback.format_exc())
+            return False
+
+    print(f"\n=== open_url.py を実行中 (日付: {target_date}) ===\n")
+
     try:
         import subprocess
         import sys
@@ -351,12 +423,53 @@ def run_open_urls(target_date: str) -> bool:
         return False
 
 
-def run_tweet(target_date: str, output_dir: str = "output") -> bool:
+def record_all_run(target_date: str, timer: StageTimer, success: bool, allocations: Optional[dict] = None) -> None:
+    """
+    all の各ステップの経過時間・キャッシュのヒット数・マージと分割の割り当てメモリと、
+    スクレイピングの番組ごとの処理時間・ステータス・ワーカー数・WebDriver コマンド数・メモリを処理時間の履歴に追記する
+    """
+    cache = {}
+    scrape = {}
+    # 実行中に読み込まれたモジュールの統計のみを記録する (ここで新たに読み込まない)
+    if 'get_tweet' in sys.modules:
+        cache['tweet'] = dict(sys.modules['get_tweet'].tweet_cache_stats)
+    if 'common.url_resolver' in sys.modules:
+        cache['url'] = dict(sys.modules['common.url_resolver'].default_resolver().stats)
+    if 'scraping_news' in sys.modules:
+        scrape = sys.modules['scraping_news'].last_perf_record or {}
+    PerfHistory(os.path.join(OUTPUT_DIR, "perf_history.jsonl")).append({
+        "kind": "all",
+        "date": target_date,
+        "success": success,
+        "total_seconds": timer.total,
+        "stages": timer.stages,
+        "num_workers": scrape.get("num_workers"),
+        "programs": scrape.get("programs", {}),
+        "webdriver_commands": scrape.get("webdriver_commands", 0),
+        "memory": scrape.get("memory", {}),
+        "cache": cache,
+        "allocations": allocations or {},
+    })
+    for stage, stats in (allocations or {}).items():
+        logger.info(f"メモリ ({stage}): ピーク {stats['peak_kb']:.0f}KB, 増加 {stats['net_kb']:.0f}KB")
+
+
+def run_perf_report(kind: str = "scrape", window: int = BASELINE_WINDOW, ratio: float = SLOWDOWN_RATIO) -> bool:
+    """最新の実行を直前の実行の中央値と比べて表示します。遅くなったステージ・番組があれば False を返します。"""
+    runs = PerfHistory(os.path.join(OUTPUT_DIR, "perf_history.jsonl")).load(kind)
+    regressions = find_regressions(runs, window=window, ratio=ratio)
+    print(format_report(runs, regressions, window=window))
+    return not regressions
+
+
+@tracing.traced("tweet", "step")
+def run_tweet(target_date: str, output_dir: str = "output", resume: bool = False) -> bool:
     """ツイートを投稿します。
 
     Args:
         target_date (str): ツイート対象の日付 (YYYYMMDD形式)
         output_dir (str, optional): 出力ディレクトリのパス。デフォルトは"output"。
+        resume (bool, optional): 投稿済みジャーナルの続きから再開する場合はTrue
 
     Returns:
         bool: ツイートが成功した場合はTrue、それ以外はFalse
@@ -380,8 +493,7 @@ def run_tweet(target_date: str, output_dir: str = "output") -> bool:
 
         try:
             # tweet.main() を直接呼び出し、日付と出力ディレクトリを引数として渡す
-            tweet_main(date=target_date, output_dir=output_dir)
-            return True
+            return tweet_main(date=target_date, output_dir=output_dir, resume=resume) == 0
         finally:
             # 元のログレベルに戻す
             logger.setLevel(original_level)
@@ -402,19 +514,43 @@ def parse_args() -> argparse.Namespace:
     # オプション引数としての日付（互換性のため）
     common.add_argument('--date', dest='opt_date', type=str, help='処理する日付 (位置引数と重複時は位置引数を優先)')
     common.add_argument('--debug', action='store_true', help='デバッグモードで実行（詳細なログを表示）')
+    common.add_argument('--profile', action='store_true',
+                        help='親プロセスとワーカーを cProfile で計測し output/YYYYMMDD_profile.pstats に出力する')
+    common.add_argument('--trace', action='store_true',
+                        help='処理の区間を記録し output/YYYYMMDD_trace.json (Chrome trace 形式) に出力する')
 
     # サブコマンド
     subparsers = parser.add_subparsers(dest='command', metavar='command', help='実行するコマンド')
     subparsers.required = False  # 後方互換のため、ここでは必須にしない
 
     # 各コマンド（common を継承することで、すべて位置引数 date とオプション引数 --date を受け付ける）
-    subparsers.add_parser('all', parents=[common], help='全ステップを実行（スクレイピング→ツイート取得→マージ→分割→URLオープン）')
+    # 分割後のまとめ処理（split / all のみ）
+    pack = argparse.ArgumentParser(add_help=False)
+    pack.add_argument('--pack', action='store_true', help='分割後、隣り合う短い番組ブロックを1つのツイートにまとめる')
+    # URLオープンのレビューページ（open / all のみ）
+    review = argparse.ArgumentParser(add_help=False)
+    review.add_argument('--review', action='store_true',
+                        help='URLを1つずつ開かず、全ブロックをまとめたレビューページ (output/YYYYMMDD_review.html) を1回だけ開く')
+
+    subparsers.add_parser('all', parents=[common, pack, review], help='全ステップを実行（スクレイピング→ツイート取得→マージ→分割→リンクチェック→URLオープン）')
     subparsers.add_parser('scrape', parents=[common], help='スクレイピングのみ実行')
-    subparsers.add_parser('get-tweets', parents=[common], help='ツイート取得のみ実行')
+    get_tweets_parser = subparsers.add_parser('get-tweets', parents=[common], help='ツイート取得のみ実行')
+    get_tweets_parser.add_argument('--until', dest='end_date', type=str,
+                                   help='指定した日付 (YYYYMMDD形式) までの各日付をまとめて取得する')
+    get_tweets_parser.add_argument('--reformat', action='store_true',
+                                   help='API を呼び出さず、キャッシュ (output/tweet_cache/) から YYYYMMDD_tweet.txt を作り直す')
     subparsers.add_parser('merge', parents=[common], help='マージのみ実行')
-    subparsers.add_parser('split', parents=[common], help='分割のみ実行')
-    subparsers.add_parser('open', parents=[common], help='URLオープンのみ実行')
-    subparsers.add_parser('tweet', parents=[common], help='ツイート投稿のみ実行')
+    subparsers.add_parser('split', parents=[common, pack], help='分割のみ実行')
+    subparsers.add_parser('check', parents=[common], help='投稿前のリンクチェックのみ実行')
+    subparsers.add_parser('open', parents=[common, review], help='URLオープンのみ実行')
+    tweet_parser = subparsers.add_parser('tweet', parents=[common], help='ツイート投稿のみ実行')
+    tweet_parser.add_argument('--resume', action='store_true', help='投稿済みジャーナル (output/YYYYMMDD_posted.json) の続きから再開する')
+    perf_parser = subparsers.add_parser('perf-report', parents=[common],
+                                        help='最新の実行の処理時間を過去の実行と比べ、遅くなったステージ・番組を表示')
+    perf_parser.add_argument('--kind', choices=['scrape', 'all'], default='scrape',
+                             help='比べる実行の種類 (scrape: スクレイピング, all: 全ステップ)')
+    perf_parser.add_argument('--window', type=int, default=BASELINE_WINDOW, help='基準にする直前の実行の数')
+    perf_parser.add_argument('--ratio', type=float, default=SLOWDOWN_RATIO, help='基準の何倍以上で遅くなったとみなすか')
 
     # 後方互換: 旧フラグを受け付ける（使用時は警告を表示）
     parser.add_argument('--all', dest='flag_all', action='store_true', help=argparse.SUPPRESS)
@@ -472,68 +608,160 @@ def main() -> int:
     target_date = get_target_date(args.date or args.opt_date)
     logger.info(f"Processing date: {target_date}")
 
+    if getattr(args, 'profile', False):
+        return run_with_profile(args, target_date)
+    if getattr(args, 'trace', False):
+        return run_with_trace(args, target_date)
+    return run_command_for(args, target_date)
+
+
+def run_with_profile(args: argparse.Namespace, target_date: str) -> int:
+    """親プロセスとワーカーを cProfile で計測してコマンドを実行し、1つの pstats ファイルにまとめる"""
+    profile_dir = profiling.enable_profiling(os.path.join(OUTPUT_DIR, f".profile_{target_date}_{os.getpid()}"))
+    runner = run_with_trace if getattr(args, 'trace', False) else run_command_for
+    try:
+        return profiling.profiled(runner)(args, target_date)
+    finally:
+        profiling.disable_profiling()
+        output_path = os.path.join(OUTPUT_DIR, f"{target_date}_profile.pstats")
+        stats = profiling.merge_profiles(profile_dir, output_path)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        if stats is None:
+            logger.warning("プロファイルの計測結果がありません")
+        else:
+            logger.info(f"プロファイルを出力しました: {output_path} (python -m pstats {output_path} で詳しく確認できます)\n"
+                        f"{profiling.summarize(stats)}")
+
+
+def run_with_trace(args: argparse.Namespace, target_date: str) -> int:
+    """区間の記録を有効にしてコマンドを実行し、全プロセスの記録を1つの trace JSON にまとめる"""
+    # ワーカープロセスやサブプロセスは環境変数を引き継ぎ、プロセスごとのファイルに書き込む
+    trace_dir = tracing.enable_tracing(os.path.join(OUTPUT_DIR, f".trace_{target_date}_{os.getpid()}"))
+    try:
+        with tracing.span(args.command or "all", "command", date=target_date):
+            return run_command_for(args, target_date)
+    finally:
+        tracing.disable_tracing()
+        output_path = os.path.join(OUTPUT_DIR, f"{target_date}_trace.json")
+        count = tracing.export_trace(trace_dir, output_path)
+        shutil.rmtree(trace_dir, ignore_errors=True)
+        logger.info(f"トレースを出力しました: {output_path} ({count} イベント, Perfetto / chrome://tracing で表示できます)")
+
+
+def run_command_for(args: argparse.Namespace, target_date: str) -> int:
+    """サブコマンドに対応する処理を実行し、終了コードを返す"""
     # 各アクションの実行（サブコマンドに基づく）
     success = True
+    # all の各ステップの経過時間と、マージ・分割の割り当てメモリ (output/perf_history.jsonl に記録する)
+    timer = StageTimer()
+    allocations = {}
 
     try:
         if args.command == 'all':
-            # スクレイピング実行
-            logger.info("=== スクレイピングを開始します ===")
-            if not run_scrape(target_date):
-                logger.error("スクレイピングに失敗しました")
-                success = False
-            else:
-                logger.info("=== スクレイピングが完了しました ===\n")
-
-            # ツイート取得実行（失敗しても処理は続行）
-            logger.info("=== ツイート取得を開始します ===")
-            tweets_result = get_tweets(target_date)
-            if tweets_result is False:  # エラーのみ処理を中断
-                logger.error("ツイート取得に失敗しました")
-                success = False
-            else:
-                logger.info("=== ツイート取得が完了しました ===\n")
-
-            # マージ実行（ツイートデータがあればマージ）
-            logger.info("=== マージを開始します ===")
-            if tweets_result is True:  # ツイートデータがある場合のみマージ
-                if not run_merge(target_date):
-                    logger.error("マージに失敗しました")
+            # 途中で例外が起きた場合も、そこまでの計測値を記録する
+            finished = False
+            try:
+                # スクレイピング実行
+                logger.info("=== スクレイピングを開始します ===")
+                with timer.stage("scrape"):
+                    ok = run_scrape(target_date)
+                if not ok:
+                    logger.error("スクレイピングに失敗しました")
+                    success = False
+                else:
+                    logger.info("=== スクレイピングが完了しました ===\n")
+
+                # ツイート取得実行（失敗しても処理は続行）
+                logger.info("=== ツイート取得を開始します ===")
+                with timer.stage("get-tweets"):
+                    tweets_result = get_tweets(target_date)
+                if tweets_result is False:  # エラーのみ処理を中断
+                    logger.error("ツイート取得に失敗しました")
+                    success = False
+                else:
+                    logger.info("=== ツイート取得が完了しました ===\n")
+
+                # マージ実行（ツイートデータがあればマージ）
+                logger.info("=== マージを開始します ===")
+                if tweets_result is True:  # ツイートデータがある場合のみマージ
+                    # 割り当てのスナップショットはステージの時間に含めない
+                    with track_allocations("merge", allocations), timer.stage("merge"):
+                        ok = run_merge(target_date)
+                    if not ok:
+                        logger.error("マージに失敗しました")
+                        success = False
+                    else:
+                        logger.info("=== マージが完了しました ===\n")
+                else:
+                    logger.info("マージ対象のツイートデータがないためスキップします\n")
+
+                # 分割実行（マージされたファイルを分割）
+                logger.info("=== 分割を開始します ===")
+                with track_allocations("split", allocations), timer.stage("split"):
+                    ok = run_split(target_date)
+                if not ok:
+                    logger.error("テキスト分割に失敗しました")
+                    success = False
+                else:
+                    logger.info("=== 分割が完了しました ===\n")
+
+                # まとめ実行（--pack 指定時のみ）
+                if getattr(args, 'pack', False):
+                    logger.info("=== ツイートのまとめを開始します ===")
+                    with timer.stage("pack"):
+                        ok = run_pack(target_date)
+                    if not ok:
+                        logger.error("ツイートのまとめに失敗しました")
+                        success = False
+                    else:
+                        logger.info("=== ツイートのまとめが完了しました ===\n")
+
+                # リンクチェック実行（問題があっても URL オープンは続行）
+                logger.info("=== リンクチェックを開始します ===")
+                with timer.stage("check"):
+                    ok = run_check(target_date)
+                if not ok:
+                    logger.error("問題のあるリンクがあります。投稿前に修正してください")
+                    success = False
+                else:
+                    logger.info("=== リンクチェックが完了しました ===\n")
+
+                # URLオープン実行
+                logger.info("=== URLオープンを開始します ===")
+                with timer.stage("open"):
+                    ok = run_open_urls(target_date, review=getattr(args, 'review', False))
+                if not ok:
+                    logger.error("URLオープンに失敗しました")
                     success = False
                 else:
-                    logger.info("=== マージが完了しました ===\n")
-            else:
-                logger.info("マージ対象のツイートデータがないためスキップします\n")
-
-            # 分割実行（マージされたファイルを分割）
-            logger.info("=== 分割を開始します ===")
-            if not run_split(target_date):
-                logger.error("テキスト分割に失敗しました")
-                success = False
-            else:
-                logger.info("=== 分割が完了しました ===\n")
-
-            # URLオープン実行
-            logger.info("=== URLオープンを開始します ===")
-            if not run_open_urls(target_date):
-                logger.error("URLオープンに失敗しました")
-                success = False
-            else:
-                logger.info("=== URLオープンが完了しました ===\n")
+                    logger.info("=== URLオープンが完了しました ===\n")
+                finished = True
+            finally:
+                record_all_run(target_date, timer, success and finished, allocations)
 
         # 個別のアクション
         elif args.command == 'scrape':
             success = run_scrape(target_date)
         elif args.command == 'get-tweets':
-            success = get_tweets(target_date)
+            end_date = get_target_date(args.end_date) if getattr(args, 'end_date', None) else None
+            if end_date and end_date < target_date:
+                logger.error(f"終了日 {end_date} が開始日 {target_date} より前です。")
+                return 1
+            success = get_tweets(target_date, end_date, reformat=getattr(args, 'reformat', False))
         elif args.command == 'merge':
             success = run_merge(target_date)
         elif args.command == 'split':
             success = run_split(target_date)
+            if success and getattr(args, 'pack', False):
+                success = run_pack(target_date)
+        elif args.command == 'check':
+            success = run_check(target_date)
         elif args.command == 'open':
-            success = run_open_urls(target_date)
+            success = run_open_urls(target_date, review=getattr(args, 'review', False))
         elif args.command == 'tweet':
-            success = run_tweet(target_date)
+            success = run_tweet(target_date, resume=getattr(args, 'resume', False))
+        elif args.command == 'perf-report':
+            success = run_perf_report(kind=args.kind, window=args.window, ratio=args.ratio)
         else:
             logger.error(f"Unknown command: {args.command}")
             return 1
@@ -1,10 +1,15 @@
 import os
 import sys
 import re
+import heapq
+import shutil
+import tempfile
 from datetime import datetime
 import logging # logging をインポート
 # setup_logger, sort_blocks_by_time をインポート
-from common.utils import setup_logger, sort_blocks_by_time
+from common.utils import setup_logger
+from common.text_utils import sort_blocks_by_time, extract_time_from_block
+from common import tracing
 
 # --- モジュールレベルのロガーを取得 ---
 logger = logging.getLogger(__name__)
@@ -22,132 +27,164 @@ def extract_time_from_line(line: str) -> tuple[int, int] | None:
     return None
 
 
-def sort_and_merge_text(file1_path: str, file2_path: str, output_path: str, before_merge_path: str) -> None:
+class UnsortedSourceError(Exception):
+    """入力ソースのブロックが時間順に並んでいない場合に送出される"""
+    pass
+
+
+def iter_blocks(path: str):
     """
-    2つのテキストファイルを読み込み、時間でソートしてマージする。
+    ファイルを1行ずつ読み込み、'●' で始まるブロック単位で yield する。
+    ブロックの前後の空白は除去する。
     """
-    # 'file1_path' or 'file2_path' が存在しない場合
-    if not os.path.exists(file1_path) or not os.path.exists(file2_path):
-        logger.warning(f"ファイル {file1_path} または {file2_path} が存在しないため、スキップします。")
-        return
+    current_block = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            if line.startswith('●'):
+                if current_block:
+                    yield ''.join(current_block).strip()
+                current_block = [line]
+            elif current_block: # ブロックが開始されていれば追加
+                current_block.append(line)
+            elif line.strip(): # ブロックが開始されておらず、空行でもない場合 (エラーの可能性)
+                logger.warning(f"ヘッダーなしで始まる行を検出 ({path} 行 {i+1}): {line[:50]}...")
+    if current_block:
+        yield ''.join(current_block).strip()
 
-    # 元のファイル (file2_path) をリネーム (バックアップ)
-    try:
-        os.rename(file2_path, before_merge_path)
-        logger.info(f"{file2_path} を {before_merge_path} にリネームしました。")
-    except Exception as e:
-        logger.error(f"{file2_path} のリネーム中にエラーが発生しました: {e}", exc_info=True)
-        # リネーム失敗時は処理を中断
-        raise # or return
 
-    # ファイルの存在確認と読み込み
-    combined_lines = []
-    try:
-        with open(before_merge_path, 'r', encoding='utf-8') as f:
-            combined_lines = f.readlines()
-        logger.info(f"{before_merge_path} を読み込みました ({len(combined_lines)}行)。")
-        # 末尾改行チェックと追加
-        if combined_lines and not combined_lines[-1].endswith('\n'):
-            logger.debug(f"{before_merge_path} の末尾に改行を追加します。")
-            combined_lines[-1] += '\n'
+def _block_sort_key(block: str) -> tuple[int, int]:
+    return extract_time_from_block(block, starts_with='●')
 
-    except Exception as e:
-        logger.error(f"{before_merge_path} の読み込み中にエラーが発生しました: {e}", exc_info=True)
-        # 読み込み失敗時はバックアップを戻して終了するのが安全
-        try:
-            os.rename(before_merge_path, file2_path)
-            logger.info(f"エラー発生のため、{before_merge_path} を {file2_path} に戻しました。")
-        except Exception as rename_e:
-            logger.error(f"バックアップファイルの復元中にエラー: {rename_e}", exc_info=True)
-        raise # or return
-
-    # file1_path (YYYYMMDD_tweet.txt) は任意
-    if os.path.exists(file1_path):
-        try:
-            with open(file1_path, 'r', encoding='utf-8') as f:
-                file1_lines = f.readlines()
-            logger.info(f"{file1_path} を読み込みました ({len(file1_lines)}行)。")
-
-            # 結合前に file2 の末尾と file1 の先頭に不要な空行があれば調整
-            # file2 の末尾に空行がなければ改行追加
-            if combined_lines and not combined_lines[-1].strip() == "":
-                if not combined_lines[-1].endswith('\n'):
-                    combined_lines[-1] += '\n'
-                # file1 が空でなく、combined_lines も空でない場合、間に空行を1つ入れる
-                if file1_lines and combined_lines:
-                    logger.debug("ファイル間に区切りの改行を追加します。")
-                    combined_lines.append('\n') # 区切りとして空行を追加
-
-            # file1 の先頭の空行は削除 (任意)
-            while file1_lines and not file1_lines[0].strip():
-                logger.debug("file1 の先頭の空行を削除します。")
-                file1_lines.pop(0)
-
-            combined_lines.extend(file1_lines)
-            logger.info(f"{file1_path} の内容を結合しました。")
-        except Exception as e:
-            logger.error(f"{file1_path} の処理中にエラーが発生しました: {e}", exc_info=True)
-            # file1 のエラーでもバックアップを戻すか検討
-            try:
-                os.rename(before_merge_path, file2_path)
-                logger.info(f"エラー発生のため、{before_merge_path} を {file2_path} に戻しました。")
-            except Exception as rename_e:
-                logger.error(f"バックアップファイルの復元中にエラー: {rename_e}", exc_info=True)
-            raise # or return
+
+def _ensure_sorted(blocks, source: str):
+    """ブロックが時間順に並んでいることを確認しながら yield する"""
+    previous_key = None
+    for block in blocks:
+        key = _block_sort_key(block)
+        if previous_key is not None and key < previous_key:
+            raise UnsortedSourceError(f"{source} のブロックが時間順に並んでいません: {block[:50]}...")
+        previous_key = key
+        yield block
+
+
+def merge_block_sources(source_paths: list[str], presorted: bool = True):
+    """
+    時間順に並んだ N 個の入力ファイルを1パスでマージし、ブロックを時間順に yield する。
+
+    時刻が同じブロックは source_paths の順に並ぶ (全件を結合して安定ソートした結果と同じ)。
+    presorted=True の場合、時間順に並んでいないソースがあると UnsortedSourceError を送出する。
+    presorted=False の場合は各ソースをメモリ上でソートしてからマージする。
+    """
+    if presorted:
+        iterators = [_ensure_sorted(iter_blocks(path), path) for path in source_paths]
     else:
-        logger.info(f"ファイル {file1_path} は存在しないため、スキップします。")
+        iterators = [sort_blocks_by_time(list(iter_blocks(path))) for path in source_paths]
+    return heapq.merge(*iterators, key=_block_sort_key)
+
+
+def _write_blocks(f, blocks) -> int:
+    """ブロック間に空行を1つ入れて書き込み、書き込んだブロック数を返す"""
+    count = 0
+    for block in blocks:
+        if count:
+            f.write("\n\n")
+        f.write(block)
+        count += 1
+    f.write("\n")
+    return count
+
+
+def _backup_file(path: str, backup_path: str) -> None:
+    """path をバックアップする。可能ならハードリンク、できなければコピー"""
+    if os.path.exists(backup_path):
+        os.remove(backup_path)
+    try:
+        os.link(path, backup_path)
+    except OSError:
+        shutil.copy2(path, backup_path)
 
-    # combined_lines をブロックごとに分割
-    blocks = []
-    current_block = []
-    logger.debug("結合後の行をブロックに分割します...")
-    for i, line in enumerate(combined_lines):
-        if line.startswith('●'):
-            if current_block:
-                blocks.append(''.join(current_block))
-                logger.debug(f"ブロックを追加 (行数: {len(current_block)}): {current_block[0][:50]}...")
-            current_block = [line]
-        elif current_block: # ブロックが開始されていれば追加
-            current_block.append(line)
-        elif line.strip(): # ブロックが開始されておらず、空行でもない場合 (エラーの可能性)
-            logger.warning(f"ヘッダーなしで始まる行を検出 (行 {i+1}): {line[:50]}...")
 
-    if current_block:
-        blocks.append(''.join(current_block))
-        logger.debug(f"最後のブロックを追加 (行数: {len(current_block)}): {current_block[0][:50]}...")
+@tracing.traced("merge", "text")
+def merge_text_sources(source_paths: list[str], output_path: str, before_merge_path: str | None = None) -> int:
+    """
+    複数のテキストファイルを時間順にマージし、output_path に出力する。
 
-    logger.info(f"ブロック分割完了 ({len(blocks)} ブロック)。ソートを開始します...")
-    # ブロックをソート (sort_blocks_by_time は utils にある)
-    sorted_blocks = sort_blocks_by_time(blocks)
-    logger.info("ブロックのソート完了。")
+    各入力はすでに時間順に並んでいる前提でストリーミングマージする。
+    並んでいない入力があった場合は、各入力をソートしてからマージし直す。
+    結果は同じディレクトリの一時ファイルに書き込んでから置き換えるため、
+    途中で失敗しても output_path が壊れることはない。
 
-    # マージされたテキストを作成（ブロック間に空行を1つ入れる）
-    merged_text = "\n\n".join(block.strip() for block in sorted_blocks) + "\n" # 各ブロックの末尾改行を除去し、改行2つで結合、最後に改行1つ
+    Returns:
+        int: 出力したブロック数
+    """
+    existing_paths = []
+    for path in source_paths:
+        if os.path.exists(path):
+            existing_paths.append(path)
+        else:
+            logger.info(f"ファイル {path} は存在しないため、スキップします。")
+
+    # 上書き前の出力ファイルをバックアップ (元ファイルは置き換えまで残るので、失敗時の復元は不要)
+    if before_merge_path and os.path.exists(output_path):
+        try:
+            _backup_file(output_path, before_merge_path)
+            logger.info(f"{output_path} を {before_merge_path} にバックアップしました。")
+        except Exception as e:
+            logger.error(f"{output_path} のバックアップ中にエラーが発生しました: {e}", exc_info=True)
+            raise
 
-    # マージされたテキストを指定されたパスに出力
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(dir=output_dir, prefix='.merge-', suffix='.tmp')
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(merged_text)
-        logger.info(f"マージ・ソートされたテキストを {output_path} に出力しました。")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            try:
+                count = _write_blocks(f, merge_block_sources(existing_paths))
+            except UnsortedSourceError as e:
+                logger.info(f"{e} 各ファイルをソートしてからマージします。")
+                f.seek(0)
+                f.truncate()
+                count = _write_blocks(f, merge_block_sources(existing_paths, presorted=False))
+        if os.path.exists(output_path):
+            shutil.copymode(output_path, temp_path)
+        os.replace(temp_path, output_path)
     except Exception as e:
         logger.error(f"{output_path} への書き込み中にエラーが発生しました: {e}", exc_info=True)
-        # 書き込みエラー時もバックアップを戻す
-        try:
-            os.rename(before_merge_path, file2_path)
-            logger.info(f"書き込みエラー発生のため、{before_merge_path} を {file2_path} に戻しました。")
-        except Exception as rename_e:
-            logger.error(f"バックアップファイルの復元中にエラー: {rename_e}", exc_info=True)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         raise
 
+    logger.info(f"{len(existing_paths)} 個のファイルから {count} ブロックをマージし、{output_path} に出力しました。")
+    return count
+
+
+def sort_and_merge_text(file1_path: str, file2_path: str, output_path: str, before_merge_path: str) -> None:
+    """
+    2つのテキストファイルを読み込み、時間でソートしてマージする。
+    file2_path (スクレイピング結果) は before_merge_path にバックアップされる。
+    """
+    # 'file1_path' or 'file2_path' が存在しない場合
+    if not os.path.exists(file1_path) or not os.path.exists(file2_path):
+        logger.warning(f"ファイル {file1_path} または {file2_path} が存在しないため、スキップします。")
+        return
+
+    # 出力先と異なる場合も、元のファイル (file2_path) をバックアップしておく
+    if before_merge_path and os.path.abspath(file2_path) != os.path.abspath(output_path):
+        _backup_file(file2_path, before_merge_path)
+        logger.info(f"{file2_path} を {before_merge_path} にバックアップしました。")
+        before_merge_path = None
+
+    # 時刻が同じ場合はスクレイピング結果 (file2) を先にする
+    merge_text_sources([file2_path, file1_path], output_path, before_merge_path)
+
 def main():
     """メイン関数"""
     # --- Logger Setup ---
     global_logger = setup_logger(level=logging.INFO)
     # ---------------------
 
-    if len(sys.argv) != 2:
+    if len(sys.argv) < 2:
         global_logger.error("日付引数がありません。")
-        print("使用法: python merge-text.py YYYYMMDD")
+        print("使用法: python merge-text.py YYYYMMDD [追加の入力ファイル ...]")
         sys.exit(1)
 
     target_date = sys.argv[1]
@@ -172,9 +209,18 @@ def main():
     output_path = os.path.join(base_dir, f"{target_date}.txt") # マージ結果は元のファイル名で上書き
     before_merge_path = os.path.join(base_dir, f"{target_date}_before-merge.txt")
 
+    # 追加の入力ファイル (他のアカウントや放送局の出力など)
+    extra_paths = sys.argv[2:]
+
     try:
-        # sort_and_merge_text は内部でモジュールロガーを使用
-        sort_and_merge_text(file1_path, file2_path, output_path, before_merge_path)
+        if extra_paths:
+            if not os.path.exists(file2_path):
+                global_logger.error(f"ファイル {file2_path} が見つかりません。")
+                raise FileNotFoundError(file2_path)
+            merge_text_sources([file2_path, file1_path, *extra_paths], output_path, before_merge_path)
+        else:
+            # sort_and_merge_text は内部でモジュールロガーを使用
+            sort_and_merge_text(file1_path, file2_path, output_path, before_merge_path)
         global_logger.info("マージ処理が正常に完了しました。")
     except FileNotFoundError:
         # sort_and_merge_text内でエラーログ出力済みなので、ここでは main の終了を示す
@@ -3,8 +3,11 @@ import webbrowser
 import re
 import sys
 import time
+import html
 import logging
+from pathlib import Path
 from common.utils import setup_logger, parse_programs_config, Constants
+from common.url_resolver import default_resolver, is_short_url
 
 logger = logging.getLogger(__name__)
 
@@ -36,106 +39,84 @@ def get_wbs_content_types_from_urls(block_urls: list[str]) -> set[str]:
     return content_types
 
 
+def select_list_page_urls(program_config: dict, program_name: str, block_urls: list[str]) -> list[str]:
+    """
+    設定ファイルの一覧ページURLから開くべきものを選ぶ。
+    WBS番組はブロック内のURLのコンテンツタイプ (feature/trend_tamago/oa) に対応するページ、
+    それ以外 (または該当するタイプがない場合) は最初の一覧ページを返す。
+    """
+    list_page_urls = []
+    if 'urls' in program_config and isinstance(program_config['urls'], list) and program_config['urls']:
+        list_page_urls = program_config['urls']
+    elif 'url' in program_config:
+        list_page_urls = [program_config['url']]
+    if not list_page_urls:
+        return []
+
+    # 定数が存在する場合のみWBS判定を行う
+    if hasattr(Constants, 'Program') and hasattr(Constants.Program, 'WBS_PROGRAM_NAME') \
+            and program_name == Constants.Program.WBS_PROGRAM_NAME:
+        # WBS番組の場合、コンテンツタイプに基づいて適切なページを選択
+        content_types = get_wbs_content_types_from_urls(block_urls)
+        logger.debug(f"WBSコンテンツタイプ検出: {content_types}")
+
+        wbs_pages = []
+        for content_type in content_types:
+            if content_type == 'feature' and len(list_page_urls) > 0:
+                wbs_pages.append(list_page_urls[0])
+            elif content_type == 'trend_tamago' and len(list_page_urls) > 1:
+                wbs_pages.append(list_page_urls[1])
+            elif content_type == 'oa' and len(list_page_urls) > 2:
+                wbs_pages.append(list_page_urls[2])
+        if wbs_pages:
+            return wbs_pages
+        if content_types:
+            logger.warning("WBS番組: 適切なコンテンツタイプが見つかりませんでした")
+        else:
+            logger.debug("WBS番組: ブロック内にWBS関連URLが見つかりませんでした")
+
+    return [list_page_urls[0]]
+
+
 def open_urls_from_config(config_programs: dict, program_name: str, block_urls: list[str]) -> bool:
     """【再修正】設定ファイルのURL (一覧) とブロック内のURL (詳細) をまとめて開く"""
     if program_name not in config_programs:
         return False
 
     program_config = config_programs[program_name]
-    list_page_urls = []
-    list_page_url_to_open = None # 開く一覧ページURL
-    opened_any_url = False # 何かURLを開いたかどうかのフラグ
-
-    # --- 1. 一覧ページURLの取得 ---
-    if isinstance(program_config, dict):
-        if 'urls' in program_config and isinstance(program_config['urls'], list) and program_config['urls']:
-            list_page_urls = program_config['urls']
-        elif 'url' in program_config:
-            list_page_urls = [program_config['url']]
-    else:
+    if not isinstance(program_config, dict):
         logger.error(f"'{program_name}' の設定データ形式が不正です。")
         return False
+    opened_any_url = False # 何かURLを開いたかどうかのフラグ
 
-    # --- 2. WBS番組の場合の特別処理 ---
-    wbs_pages_to_open = [] # 開くべきWBSページのリスト
-
-    if list_page_urls:
-        try:
-            # 定数が存在する場合のみWBS判定を行う
-            if hasattr(Constants, 'Program') and hasattr(Constants.Program, 'WBS_PROGRAM_NAME'):
-                wbs_program_name = Constants.Program.WBS_PROGRAM_NAME
-                if program_name == wbs_program_name:
-                    # WBS番組の場合、コンテンツタイプに基づいて適切なページを選択
-                    content_types = get_wbs_content_types_from_urls(block_urls)
-
-                    logger.debug(f"WBSコンテンツタイプ検出: {content_types}")
-
-                    if content_types:
-                        # 各コンテンツタイプに対応するページをリストアップ
-                        for content_type in content_types:
-                            if content_type == 'feature' and len(list_page_urls) > 0:
-                                wbs_pages_to_open.append(list_page_urls[0])
-                            elif content_type == 'trend_tamago' and len(list_page_urls) > 1:
-                                wbs_pages_to_open.append(list_page_urls[1])
-                            elif content_type == 'oa' and len(list_page_urls) > 2:
-                                wbs_pages_to_open.append(list_page_urls[2])
-
-                        if wbs_pages_to_open:
-                            logger.info(f"WBS番組: コンテンツタイプ別ページを開きます - {len(wbs_pages_to_open)}件")
-                        else:
-                            logger.warning("WBS番組: 適切なコンテンツタイプが見つかりませんでした")
-                    else:
-                        logger.debug("WBS番組: ブロック内にWBS関連URLが見つかりませんでした")
-
-                # WBS番組以外の場合の処理
-                if program_name != wbs_program_name or not wbs_pages_to_open:
-                    list_page_url_to_open = list_page_urls[0] if list_page_urls else None
-            else:
-                logger.debug("Constants.Program.WBS_PROGRAM_NAME未定義のためWBS判定スキップ。")
-                list_page_url_to_open = list_page_urls[0] if list_page_urls else None
-
-        except Exception as e:
-            logger.error(f"WBSコンテンツタイプ処理中にエラー: {e}", exc_info=True)
-            list_page_url_to_open = list_page_urls[0] if list_page_urls else None
-
-        # WBS番組で複数のページを開く場合
-        if wbs_pages_to_open:
-            for i, page_url in enumerate(wbs_pages_to_open):
-                logger.info(f"WBS番組ページ {i+1}/{len(wbs_pages_to_open)} を開きます: {page_url}")
-                webbrowser.open(page_url)
-                opened_any_url = True
-        # 通常の番組またはWBSでページが選択された場合
-        elif list_page_url_to_open:
-            logger.info(f"'{program_name}' の一覧ページを開きます: {list_page_url_to_open}")
-            webbrowser.open(list_page_url_to_open)
-            opened_any_url = True
-        else:
-            logger.warning(f"'{program_name}' の一覧ページURL特定に失敗しました。")
-    else:
+    # --- 1. 一覧ページURLの選択 (WBS番組はコンテンツタイプ別のページ) ---
+    try:
+        list_pages_to_open = select_list_page_urls(program_config, program_name, block_urls)
+    except Exception as e:
+        logger.error(f"WBSコンテンツタイプ処理中にエラー: {e}", exc_info=True)
+        list_pages_to_open = []
+
+    # --- 2. 一覧ページを開く ---
+    if len(list_pages_to_open) > 1:
+        logger.info(f"WBS番組: コンテンツタイプ別ページを開きます - {len(list_pages_to_open)}件")
+    for i, page_url in enumerate(list_pages_to_open):
+        logger.info(f"'{program_name}' の一覧ページ {i+1}/{len(list_pages_to_open)} を開きます: {page_url}")
+        webbrowser.open(page_url)
+        opened_any_url = True
+    if not list_pages_to_open:
         logger.warning(f"'{program_name}' の一覧ページURLが設定から取得できませんでした。")
 
-
-    # --- 3. 開くべき「詳細URL」のリストを作成 ---
-    detail_urls_to_open = []
-    if block_urls:
-        unique_block_urls = sorted(list(set(block_urls))) # 念のため重複除去
-        for detail_url in unique_block_urls:
-            # 一覧ページと同じURLはスキップ
-            if list_page_url_to_open and detail_url == list_page_url_to_open:
-                continue
-            detail_urls_to_open.append(detail_url)
+    # --- 3. 開くべき「詳細URL」のリストを作成 (一覧ページと同じURLはスキップ) ---
+    detail_urls_to_open = [url for url in sorted(set(block_urls)) if url not in list_pages_to_open]
 
     # --- 4. 詳細URLをまとめて開く ---
     if detail_urls_to_open:
         logger.info(f"'{program_name}' の詳細ページ ({len(detail_urls_to_open)}件) をまとめて開きます:")
-        opened_detail_count = 0
         for i, detail_url in enumerate(detail_urls_to_open):
             logger.debug(f"  詳細URL {i+1}/{len(detail_urls_to_open)} を開くリクエスト: {detail_url}")
             webbrowser.open(detail_url)
-            opened_detail_count += 1
             opened_any_url = True
-        if opened_detail_count > 0:
-            logger.info(f"'{program_name}': 詳細ページ {opened_detail_count} 件を開くリクエストを連続して送信しました。")
+        logger.info(f"'{program_name}': 詳細ページ {len(detail_urls_to_open)} 件を開くリクエストを連続して送信しました。")
     elif opened_any_url: # 一覧は開いたが詳細がなかった場合
         logger.info(f"'{program_name}' ブロック内に開くべき追加の詳細URLは見つかりませんでした。")
 
@@ -145,8 +126,38 @@ def open_urls_from_config(config_programs: dict, program_name: str, block_urls:
     return opened_any_url # 何かURLを開いた場合に True を返す
 
 
-def process_program_block(block: str, nhk_programs: dict, tvtokyo_programs: dict) -> None:
-    """【再修正】番組ブロックを処理し、該当URLをまとめて開いた後に待機する"""
+def extract_block_urls(block: str) -> list[str]:
+    """ブロックの2行目以降から URL を抽出する"""
+    block_urls = []
+    for line in block.strip().split('\n')[1:]:
+        for url in re.findall(r'https?://[^\s"\'<>]+', line):
+            block_urls.append(url.rstrip('。、」)'))
+    return block_urls
+
+
+def resolve_short_urls(program_blocks: list[str], resolver=None) -> dict[str, str]:
+    """
+    全ブロックの短縮 URL (t.co) のリダイレクト先をまとめて同時に調べる。
+    Returns: 短縮 URL -> リダイレクト先 (取得できたもののみ)
+    """
+    short_urls = [url for block in program_blocks for url in extract_block_urls(block) if is_short_url(url)]
+    if not short_urls:
+        return {}
+    resolved = (resolver or default_resolver()).resolve_many(short_urls)
+    logger.info(f"短縮URL {len(resolved)} 件のリダイレクト先を調べました (展開できたもの: {sum(1 for url in resolved.values() if url)} 件)")
+    return {url: final_url for url, final_url in resolved.items() if final_url}
+
+
+def extract_program_name(header_line: str) -> str | None:
+    """ヘッダー行 (●番組名(放送局 時刻)) から番組名を抽出する"""
+    program_name_match = re.match(r"●(.*?)\s?\(", header_line) or re.match(r"●(.*)", header_line)
+    return program_name_match.group(1).strip() if program_name_match else None
+
+
+def process_program_block(block: str, nhk_programs: dict, tvtokyo_programs: dict,
+                          resolved_urls: dict[str, str] | None = None) -> None:
+    """【再修正】番組ブロックを処理し、該当URLをまとめて開いた後に待機する
+    resolved_urls (短縮URL -> リダイレクト先) があれば、短縮URLの代わりにリダイレクト先を開く"""
     lines = block.strip().split('\n')
     if not lines:
         return
@@ -157,23 +168,14 @@ def process_program_block(block: str, nhk_programs: dict, tvtokyo_programs: dict
         return
 
     # --- 番組名抽出 ---
-    program_name_match = re.match(r"●(.*?)\s?\(", header_line)
-    if not program_name_match:
-        program_name_match = re.match(r"●(.*)", header_line)
-        if not program_name_match:
-            logger.error(f"ヘッダーから番組名抽出失敗: {header_line}")
-            return
-    program_name = program_name_match.group(1).strip()
+    program_name = extract_program_name(header_line)
+    if program_name is None:
+        logger.error(f"ヘッダーから番組名抽出失敗: {header_line}")
+        return
     logger.info(f"--- ブロック処理開始: {program_name} ---")
 
-    # --- ブロック内URL抽出 ---
-    block_urls = []
-    for line in lines[1:]:
-        url_matches = re.findall(r'https?://[^\s"\'<>]+', line)
-        if url_matches:
-            for url in url_matches:
-                cleaned_url = url.rstrip('。、」)')
-                block_urls.append(cleaned_url)
+    # --- ブロック内URL抽出 (短縮URLは調べておいたリダイレクト先に置き換える) ---
+    block_urls = [(resolved_urls or {}).get(url, url) for url in extract_block_urls(block)]
     # 重複を除去したリストをデバッグログに出力
     unique_block_urls_for_log = sorted(list(set(block_urls)))
     logger.debug(f"ブロック内URL ({len(unique_block_urls_for_log)}件, 重複除去後): {unique_block_urls_for_log}")
@@ -249,6 +251,112 @@ def process_program_block(block: str, nhk_programs: dict, tvtokyo_programs: dict
     logger.info(f"--- ブロック処理終了: {program_name} ---")
 
 
+def build_review_entry(block: str, nhk_programs: dict, tvtokyo_programs: dict,
+                       resolved_urls: dict[str, str] | None = None) -> dict | None:
+    """
+    番組ブロックからレビューページの1項目を作る (process_program_block と同じ基準で一覧・詳細URLを選ぶ)。
+    Returns: {program, source, text, list_urls, detail_urls}。ヘッダー行が不正な場合は None
+    """
+    lines = block.strip().split('\n')
+    if not lines or not lines[0].strip().startswith("●"):
+        logger.warning(f"ヘッダー行形式不正: {lines[0][:50] if lines else ''}...")
+        return None
+    program_name = extract_program_name(lines[0].strip())
+    if program_name is None:
+        logger.error(f"ヘッダーから番組名抽出失敗: {lines[0]}")
+        return None
+
+    block_urls = [(resolved_urls or {}).get(url, url) for url in extract_block_urls(block)]
+    source, list_urls = None, []
+    for label, programs in (("NHK", nhk_programs), ("テレ東", tvtokyo_programs)):
+        if program_name in programs and isinstance(programs[program_name], dict):
+            source = label
+            list_urls = select_list_page_urls(programs[program_name], program_name, block_urls)
+            break
+    detail_urls = [url for url in dict.fromkeys(block_urls) if url not in list_urls]
+    return {"program": program_name, "source": source, "text": block.strip(),
+            "list_urls": list_urls, "detail_urls": detail_urls}
+
+
+def render_review_page(date: str, entries: list[dict]) -> str:
+    """レビューページの HTML を返す"""
+    def links(urls, label):
+        return "".join(
+            f'<li><span class="label">{label}</span> <a href="{html.escape(url)}" target="_blank" rel="noopener">{html.escape(url)}</a></li>'
+            for url in urls
+        )
+
+    sections = []
+    for i, entry in enumerate(entries, start=1):
+        source = f'<span class="source">{entry["source"]}</span>' if entry["source"] else '<span class="source none">設定なし</span>'
+        sections.append(
+            f'<section id="block-{i}">'
+            f'<h2>{i}. {html.escape(entry["program"])} {source}</h2>'
+            f'<pre>{html.escape(entry["text"])}</pre>'
+            f'<ul>{links(entry["list_urls"], "一覧")}{links(entry["detail_urls"], "詳細")}</ul>'
+            '</section>'
+        )
+    url_count = sum(len(e["list_urls"]) + len(e["detail_urls"]) for e in entries)
+    return (
+        '<!DOCTYPE html>\n<html lang="ja"><head><meta charset="utf-8">'
+        f'<title>{date} レビュー</title>'
+        '<style>'
+        'body{font-family:sans-serif;max-width:960px;margin:1em auto;padding:0 1em}'
+        'section{border-top:1px solid #ccc;padding:.5em 0}'
+        'pre{background:#f6f6f6;padding:.5em;white-space:pre-wrap}'
+        '.label{display:inline-block;min-width:3em;color:#666}'
+        '.source{font-size:70%;background:#def;padding:0 .4em;border-radius:3px}'
+        '.source.none{background:#fdd}'
+        'a:visited{color:#888}'
+        '</style></head><body>'
+        f'<h1>{date} のレビュー ({len(entries)} 番組 / {url_count} URL)</h1>'
+        + "".join(sections) +
+        '</body></html>\n'
+    )
+
+
+def write_review_page(date: str, program_blocks: list[str], nhk_programs: dict, tvtokyo_programs: dict,
+                      output_dir: str = 'output', resolved_urls: dict[str, str] | None = None) -> str:
+    """全ブロックのレビューページを output_dir/YYYYMMDD_review.html に書き出し、そのパスを返す"""
+    entries = [entry for block in program_blocks
+               if (entry := build_review_entry(block, nhk_programs, tvtokyo_programs, resolved_urls))]
+    path = os.path.join(output_dir, f"{date}_review.html")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_review_page(date, entries))
+    logger.info(f"レビューページ ({len(entries)} 番組) を {path} に出力しました。")
+    return path
+
+
+def review_main(date: str, output_dir: str = 'output', open_browser: bool = True) -> bool:
+    """
+    1日分の全ブロックを1つのレビューページにまとめ、ブラウザで1回だけ開く (待機なし)。
+    main.py から同じプロセスで呼び出す。
+
+    Returns:
+        bool: レビューページを作成できた場合は True
+    """
+    input_path = os.path.join(output_dir, f"{date}.txt")
+    try:
+        with open(input_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+    except FileNotFoundError:
+        logger.error(f"指定された出力ファイルが見つかりません: {input_path}")
+        return False
+
+    program_blocks = [block.strip() for block in re.findall(r"(^●.*?)(?=^●|\Z)", content, re.MULTILINE | re.DOTALL)]
+    if not program_blocks:
+        logger.warning("出力ファイルに処理対象の番組ブロック ('●'で始まる行) が見つかりませんでした。")
+        return False
+
+    nhk_programs = parse_programs_config('ini/nhk_config.ini') or {}
+    tvtokyo_programs = parse_programs_config('ini/tvtokyo_config.ini') or {}
+    resolved_urls = resolve_short_urls(program_blocks)
+    path = write_review_page(date, program_blocks, nhk_programs, tvtokyo_programs, output_dir, resolved_urls)
+    if open_browser:
+        webbrowser.open(Path(path).resolve().as_uri())
+    return True
+
+
 # main 関数は変更なし (ただし、Constantsの確認処理を強化)
 def main():
     """メイン関数"""
@@ -293,12 +401,13 @@ def main():
         sys.exit(1)
 
     # --- コマンドライン引数処理 ---
-    if len(sys.argv) != 2:
+    args = [arg for arg in sys.argv[1:] if arg != "--review"]
+    if len(args) != 1:
         global_logger.error("日付引数がありません。")
-        print("使用法: python <スクリプト名>.py YYYYMMDD")
+        print("使用法: python <スクリプト名>.py YYYYMMDD [--review]")
         sys.exit(1)
 
-    date_input = sys.argv[1]
+    date_input = args[0]
     if not re.fullmatch(r"\d{8}", date_input):
         global_logger.error(f"日付引数の形式が不正です: {date_input} (YYYYMMDD形式)")
         print("エラー: 日付引数の形式が不正です (YYYYMMDD形式で指定してください)。")
@@ -307,6 +416,10 @@ def main():
     global_logger.info("=== open-url 処理開始 ===")
     global_logger.info(f"対象日付: {date_input}")
 
+    # --- レビューページモード (1つのHTMLにまとめて1回だけ開く) ---
+    if "--review" in sys.argv[1:]:
+        sys.exit(0 if review_main(date_input) else 1)
+
     # --- ファイルパス設定 ---
     output_dir = 'output'
     output_file_path = os.path.join(output_dir, f"{date_input}.txt")
@@ -354,13 +467,16 @@ def main():
 
     global_logger.info(f"{len(program_blocks)}件の番組ブロックを検出しました。処理を開始します。")
 
+    # --- 短縮URLのリダイレクト先をまとめて調べる ---
+    resolved_urls = resolve_short_urls(program_blocks)
+
     # --- 各ブロックを処理 ---
     total_blocks = len(program_blocks)
     for i, block_content in enumerate(program_blocks):
         block_num = i + 1
         logger.info(f"===== ブロック {block_num}/{total_blocks} 処理開始 =====")
         # process_program_block 内で番組名ログが出るので、ここではブロック番号のみ
-        process_program_block(block_content.strip(), nhk_programs, tvtokyo_programs)
+        process_program_block(block_content.strip(), nhk_programs, tvtokyo_programs, resolved_urls)
         logger.info(f"===== ブロック {block_num}/{total_blocks} 処理終了 =====")
 
 
@@ -17,19 +17,26 @@ from common.base_scraper import BaseScraper
 from common.episode_processor import EpisodeProcessor
 from common.utils import (
     setup_logger, WebDriverManager, parse_programs_config,
-    sort_blocks_by_time, Constants, format_date,
-    format_program_time,
-    ScrapeStatus
+    Constants, ScrapeStatus
 )
+from common.text_utils import sort_blocks_by_time, format_date, format_program_time
 from common.CustomExpectedConditions import CustomExpectedConditions
+from common.url_resolver import default_resolver
+from common.log_queue import configure_worker_logging, start_log_listener, task_context
+from common import tracing, profiling
+from common.perf_history import PerfHistory, StageTimer
+from common.memory import RssSampler
 
 # --- 型エイリアス定義 ---
 # Scraper が返す型
 ScrapeResultData = Optional[Union[str, List[str]]]
 ScrapeResult = Tuple[ScrapeStatus, ScrapeResultData]
 
-# fetch_program_info が返す型
-FetchResult: TypeAlias = Optional[Tuple[str, ScrapeStatus, ScrapeResultData]]
+# fetch_program_info が返す型 (4番目の要素は処理時間の履歴に記録する計測値)
+FetchResult: TypeAlias = Optional[Tuple[str, ScrapeStatus, ScrapeResultData, dict]]
+
+# 並列で動かすワーカー (それぞれ Chrome を1つ常駐させる) の既定の数
+NUM_WORKERS = 6
 
 class NHKScraper(BaseScraper):
     """NHKの番組情報をスクレイピングするクラス"""
@@ -52,7 +59,7 @@ class NHKScraper(BaseScraper):
         try:
             result = self.execute_with_driver(scrape_operation)
         except Exception as e:
-            self.logger.error(f"[{program_name}] 取得エラー: {type(e).__name__}")
+            self.logger.error("[%s] 取得エラー: %s", program_name, type(e).__name__)
             return ScrapeStatus.FAILURE, f"エラー: {type(e).__name__}"
 
         if result is None:
@@ -60,7 +67,7 @@ class NHKScraper(BaseScraper):
         elif isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], ScrapeStatus):
             return result
         else:
-            self.logger.error(f"execute_with_driver が予期しない値を返しました: {result}")
+            self.logger.error("execute_with_driver が予期しない値を返しました: %s", result)
             return ScrapeStatus.FAILURE, f"予期しない内部エラー"
 
     def get_program_info_with_driver(self, driver, program_name: str, target_date: str) -> ScrapeResult:
@@ -76,7 +83,7 @@ class NHKScraper(BaseScraper):
         try:
             result = self.execute_with_existing_driver(driver, scrape_operation)
         except Exception as e:
-            self.logger.error(f"[{program_name}] 取得エラー: {type(e).__name__}")
+            self.logger.error("[%s] 取得エラー: %s", program_name, type(e).__name__)
             return ScrapeStatus.FAILURE, f"エラー: {type(e).__name__}"
 
         if result is None:
@@ -84,7 +91,7 @@ class NHKScraper(BaseScraper):
         elif isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], ScrapeStatus):
             return result
         else:
-            self.logger.error(f"execute_with_existing_driver が予期しない値を返しました: {result}")
+            self.logger.error("execute_with_existing_driver が予期しない値を返しました: %s", result)
             return ScrapeStatus.FAILURE, f"予期しない内部エラー"
 
     def _scrape_nhk_program(self, driver, program_name: str, target_date: str, program_info: dict) -> ScrapeResult:
@@ -106,7 +113,8 @@ class NHKScraper(BaseScraper):
         if not program_info:
             return None
 
-        driver.get(program_info["url"])
+        with tracing.span("driver.get", "browser", url=program_info["url"]):
+            driver.get(program_info["url"])
         target_date_dt = datetime.strptime(target_date, '%Y%m%d')
         
         # 動的な読み込み（遅延読み込み）に対応するため、スクロールしながら最大3回試行
@@ -115,13 +123,14 @@ class NHKScraper(BaseScraper):
         
         for retry in range(max_scroll_retries + 1):
             # 空番組での長期待機（ボトルネック）を避けるため、要素出現待機時間を定数から取得
-            episodes = self.episode_processor.find_episode_elements(driver, program_title, timeout=Constants.Time.NHK_ELEMENT_TIMEOUT)
+            with tracing.span("find_episodes", "wait", retry=retry):
+                episodes = self.episode_processor.find_episode_elements(driver, program_title, timeout=Constants.Time.NHK_ELEMENT_TIMEOUT)
             if not episodes:
                 if retry == 0:
-                    self.logger.info(f"[{program_title}] 初回描画でエピソードリストが空です。対象エピソードなしと判断します。")
+                    self.logger.info("[%s] 初回描画でエピソードリストが空です。対象エピソードなしと判断します。", program_title)
                     return None
                 else:
-                    self.logger.info(f"[{program_title}] 追加のエピソードが見つかりませんでした (試行 {retry+1})")
+                    self.logger.info("[%s] 追加のエピソードが見つかりませんでした (試行 %s)", program_title, retry+1)
                     return None
 
             # 走査中のfind_elementsで要素がない場合の余計な3秒待機を防ぐため、一時的に0に設定
@@ -137,12 +146,12 @@ class NHKScraper(BaseScraper):
                     # エピソードタイトルを抽出して保存
                     self.current_episode_title = self.episode_processor.extract_episode_title(episode, program_title)
                     if self.current_episode_title:
-                        self.logger.debug(f"エピソードタイトルを抽出しました: {self.current_episode_title}")
+                        self.logger.debug("エピソードタイトルを抽出しました: %s", self.current_episode_title)
                     return self.episode_processor.extract_episode_url(episode, program_title)
                 
                 # 降順に並んでいる前提だったが、対象日より古い日付が出ても直ちに探索を終了しない
                 if episode_date < target_date_dt:
-                    self.logger.debug(f"[{program_title}] 対象日より古いエピソードをスキップします ({episode_date.strftime('%Y-%m-%d')})")
+                    self.logger.debug("[%s] 対象日より古いエピソードをスキップします (%s)", program_title, episode_date.strftime('%Y-%m-%d'))
                     continue
             
             # 以降の処理（スクロールやJSON-LD探索等）のために元に戻す
@@ -151,15 +160,15 @@ class NHKScraper(BaseScraper):
             # リストの最後まで見たが、まだ対象日より新しい日付しか見つかっていない場合、スクロールして次を読み込む
             processed_episodes_count = len(episodes)
             if retry < max_scroll_retries:
-                self.logger.debug(f"[{program_title}] リストの末尾に達しましたが対象日が見つかりません。スクロールして追加読み込みを試みます (現在 {processed_episodes_count}件)")
+                self.logger.debug("[%s] リストの末尾に達しましたが対象日が見つかりません。スクロールして追加読み込みを試みます (現在 %s件)", program_title, processed_episodes_count)
                 driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                import time
-                time.sleep(2)
+                tracing.sleep(2, "scroll_wait")
             else:
-                self.logger.info(f"[{program_title}] 最大スクロール回数に達しましたが、対象エピソードは見つかりませんでした。")
+                self.logger.info("[%s] 最大スクロール回数に達しましたが、対象エピソードは見つかりませんでした。", program_title)
 
         return None
 
+    @tracing.traced("json_ld", "parse")
     def _extract_time_from_json_ld(self, driver, program_title: str) -> Optional[str]:
         """エピソード詳細ページのJSON-LDから放送時間を抽出する。
 
@@ -191,7 +200,7 @@ class NHKScraper(BaseScraper):
                                     end_date = datetime.fromisoformat(data['endDate'].replace('Z', '+00:00'))
                                     times.append((start_date, end_date, path.copy()))
                                 except (ValueError, TypeError) as e:
-                                    self.logger.debug(f"日付のパースに失敗しました: {e}")
+                                    self.logger.debug("日付のパースに失敗しました: %s", e)
 
                             # ネストされたオブジェクトを再帰的にチェック
                             for key, value in data.items():
@@ -212,11 +221,11 @@ class NHKScraper(BaseScraper):
                     all_broadcast_times.extend(broadcast_times)
 
                 except json.JSONDecodeError as e:
-                    self.logger.debug(f"JSONのパースに失敗しました: {e}")
+                    self.logger.debug("JSONのパースに失敗しました: %s", e)
                     continue
 
             if not all_broadcast_times:
-                self.logger.warning(f"[{program_title}] JSON-LD内に放送時間情報が見つかりませんでした。")
+                self.logger.warning("[%s] JSON-LD内に放送時間情報が見つかりませんでした。", program_title)
                 return None
 
             # 放送時間でソート（最も早い時間が最初に来るように）
@@ -224,17 +233,17 @@ class NHKScraper(BaseScraper):
 
             # デバッグ用にすべての放送時間をログに記録
             for i, (start, end, path) in enumerate(all_broadcast_times, 1):
-                self.logger.debug(f"放送時間 {i}: {start.strftime('%Y-%m-%d %H:%M')} - {end.strftime('%H:%M')} (path: {' > '.join(path)})")
+                self.logger.debug("放送時間 %s: %s - %s (path: %s)", i, start.strftime('%Y-%m-%d %H:%M'), end.strftime('%H:%M'), ' > '.join(path))
 
             # 最初の放送時間を返す（通常はメイン放送）
             main_start, main_end, _ = all_broadcast_times[0]
             return f"{main_start.strftime('%H:%M')}-{main_end.strftime('%H:%M')}"
 
         except (NoSuchElementException, TimeoutException) as e:
-            self.logger.debug(f"JSON-LDのscriptタグが見つかりませんでした: {e}")
+            self.logger.debug("JSON-LDのscriptタグが見つかりませんでした: %s", e)
             return None
         except Exception as e:
-            self.logger.error(f"[{program_title}] 放送時間の抽出中にエラーが発生しました: {e}", exc_info=True)
+            self.logger.error("[%s] 放送時間の抽出中にエラーが発生しました: %s", program_title, e, exc_info=True)
             return None
 
     def _get_nhk_formatted_episode_info(self, driver, program_title: str, episode_url: str, channel: str) -> str | None:
@@ -257,7 +266,7 @@ class NHKScraper(BaseScraper):
         if time_str:
             program_time = f"({channel} {time_str})"
         else:
-            self.logger.warning(f"放送時間が取得できませんでした。({program_title})")
+            self.logger.warning("放送時間が取得できませんでした。(%s)", program_title)
             program_time = f"({channel} 時間未定)"
 
         # _process_eyecatch_or_iframe に program_time を渡すように変更
@@ -295,13 +304,13 @@ class NHKScraper(BaseScraper):
         try:
             final_url = self._process_eyecatch_image(driver, program_title, episode_url)
         except Exception:
-            self.logger.debug(f"eyecatch画像処理失敗。iframeを試行します。 - {program_title}")
+            self.logger.debug("eyecatch画像処理失敗。iframeを試行します。 - %s", program_title)
 
         if not final_url:
             try:
                 final_url = self._process_iframe_url(driver, program_title, episode_url)
             except Exception as iframe_e:
-                self.logger.debug(f"iframe URL取得失敗: {str(iframe_e)} - {program_title}")
+                self.logger.debug("iframe URL取得失敗: %s - %s", str(iframe_e), program_title)
 
         if final_url:
             url_to_use = nhk_plus_url if nhk_plus_url else final_url
@@ -312,10 +321,10 @@ class NHKScraper(BaseScraper):
                 episode_title=episode_title,
                 url_to_display=url_to_use
             )
-            self.logger.info(f"{program_title} の詳細情報を取得しました")
+            self.logger.info("%s の詳細情報を取得しました", program_title)
             return formatted_output
 
-        self.logger.debug(f"eyecatch/iframe どちらからも有効なURLを取得できませんでした - {program_title}")
+        self.logger.debug("eyecatch/iframe どちらからも有効なURLを取得できませんでした - %s", program_title)
         return None
 
     def _process_eyecatch_image(self, driver, program_title: str, episode_url: str) -> str | None:
@@ -325,8 +334,14 @@ class NHKScraper(BaseScraper):
         )
         a_tag_element = eyecatch_div.find_element(By.TAG_NAME, Constants.CSSSelector.EPISODE_URL_TAG)
         image_link = a_tag_element.get_attribute('href')
-        driver.get(image_link)
-        WebDriverWait(driver, Constants.Time.DEFAULT_TIMEOUT).until(CustomExpectedConditions.page_is_ready())
+        # リダイレクト先を知るためだけにブラウザで開かず、HTTP で調べる (キャッシュ済みならリクエストなし)
+        final_url = default_resolver().resolve(image_link)
+        if final_url:
+            return final_url
+        self.logger.debug("HTTP でリダイレクト先を取得できないためブラウザで開きます: %s - %s", image_link, program_title)
+        with tracing.span("driver.get", "browser", url=image_link):
+            driver.get(image_link)
+            WebDriverWait(driver, Constants.Time.DEFAULT_TIMEOUT).until(CustomExpectedConditions.page_is_ready())
         return driver.current_url
 
     def _process_iframe_url(self, driver, program_title: str, episode_url: str) -> str | None:
@@ -338,13 +353,12 @@ class NHKScraper(BaseScraper):
         match = re.search(r'/st/(.*?)\?', iframe_src)
         if match:
             extracted_id = match.group(1)
+            # URL は ID から組み立てるだけなので、ブラウザで開く必要はない
             final_url = f"https://plus.nhk.jp/watch/st/{extracted_id}"
-            driver.get(final_url)
-            WebDriverWait(driver, Constants.Time.DEFAULT_TIMEOUT).until(CustomExpectedConditions.page_is_ready())
-            self.logger.info(f"iframeからURLを生成しました: {final_url} - {program_title}")
+            self.logger.info("iframeからURLを生成しました: %s - %s", final_url, program_title)
             return final_url
         else:
-            self.logger.debug(f"iframeからIDを抽出できませんでした: {program_title}")
+            self.logger.debug("iframeからIDを抽出できませんでした: %s", program_title)
             return None
 
     #【修正】引数を変更し、ロジックを簡略化
@@ -373,7 +387,7 @@ class TVTokyoScraper(BaseScraper):
             with WebDriverManager() as driver:
                 return self._scrape_tvtokyo_program(driver, program_name, target_date)
         except Exception as e:
-            self.logger.error(f"[{program_name}] 取得エラー: {type(e).__name__}")
+            self.logger.error("[%s] 取得エラー: %s", program_name, type(e).__name__)
             return ScrapeStatus.FAILURE, f"処理中にエラー: {e}"
 
     def get_program_info_with_driver(self, driver, program_name: str, target_date: str) -> ScrapeResult:
@@ -384,13 +398,13 @@ class TVTokyoScraper(BaseScraper):
         try:
             return self._scrape_tvtokyo_program(driver, program_name, target_date)
         except Exception as e:
-            self.logger.error(f"[{program_name}] 取得エラー: {type(e).__name__}")
+            self.logger.error("[%s] 取得エラー: %s", program_name, type(e).__name__)
             return ScrapeStatus.FAILURE, f"処理中にエラー: {e}"
 
     def _scrape_tvtokyo_program(self, driver, program_name: str, target_date: str) -> ScrapeResult:
         """TV東京番組の実際のスクレイピング処理（共通ロジック）"""
         program_config = self.config.get(program_name)
-        self.logger.debug(f"[{program_name}] 設定内容: {program_config}")
+        self.logger.debug("[%s] 設定内容: %s", program_name, program_config)
 
         formatted_date = format_date(target_date)
         weekday = datetime.strptime(target_date, '%Y%m%d').weekday()
@@ -410,22 +424,22 @@ class TVTokyoScraper(BaseScraper):
         url_value = program_config.get("url")
 
         if urls_value:
-            self.logger.debug(f"[{program_name}] 'urls' キーを処理: {urls_value} (型: {type(urls_value)})")
+            self.logger.debug("[%s] 'urls' キーを処理: %s (型: %s)", program_name, urls_value, type(urls_value))
             if isinstance(urls_value, str):
                 target_urls = [url.strip() for url in urls_value.split(',') if url.strip()]
             elif isinstance(urls_value, list):
                 target_urls = [str(url).strip() for url in urls_value if str(url).strip()]
             else:
-                self.logger.warning(f"[{program_name}] 'urls' の型が不正 ({type(urls_value)})。'url' キーを試行します。")
+                self.logger.warning("[%s] 'urls' の型が不正 (%s)。'url' キーを試行します。", program_name, type(urls_value))
 
         if not target_urls and url_value:
-            self.logger.debug(f"[{program_name}] 'url' キーを処理: {url_value} (型: {type(url_value)})")
+            self.logger.debug("[%s] 'url' キーを処理: %s (型: %s)", program_name, url_value, type(url_value))
             if isinstance(url_value, str) and url_value.strip():
                 target_urls = [url_value.strip()]
             else:
-                self.logger.warning(f"[{program_name}] 'url' キーの値が無効です: {url_value}")
+                self.logger.warning("[%s] 'url' キーの値が無効です: %s", program_name, url_value)
 
-        self.logger.debug(f"[{program_name}] 最終的な target_urls: {target_urls}")
+        self.logger.debug("[%s] 最終的な target_urls: %s", program_name, target_urls)
         return target_urls
 
     def _fetch_and_format_tvtokyo_episodes(self, driver, program_config: dict, target_urls: List[str], formatted_date: str, program_time: str, program_name: str) -> ScrapeResult:
@@ -509,19 +523,21 @@ class TVTokyoScraper(BaseScraper):
         for target_url in target_urls:
             try:
                 try:
-                    driver.get(target_url)
+                    with tracing.span("driver.get", "browser", url=target_url):
+                        driver.get(target_url)
                 except TimeoutException:
                     # ページ読み込みが長時間ブロックされる場合は早期にスキップ
-                    self.logger.warning(f"[{program_name}] ページ読み込みタイムアウト: {target_url}")
+                    self.logger.warning("[%s] ページ読み込みタイムアウト: %s", program_name, target_url)
                     error_count += 1
                     continue
                 # 対象番組の一覧コンテナが表示されるまで待機（TV東京のページは重いため長めに設定）
                 try:
-                    WebDriverWait(driver, Constants.Time.TVTOKYO_ELEMENT_TIMEOUT).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_LIST_CONTAINER))
-                    )
+                    with tracing.span("wait_list_container", "wait", url=target_url):
+                        WebDriverWait(driver, Constants.Time.TVTOKYO_ELEMENT_TIMEOUT).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_LIST_CONTAINER))
+                        )
                 except TimeoutException:
-                    self.logger.warning(f"{program_name} の一覧コンテナが見つかりませんでした（タイムアウト） - {target_url}")
+                    self.logger.warning("%s の一覧コンテナが見つかりませんでした（タイムアウト） - %s", program_name, target_url)
                     error_count += 1
                     continue  # 次のURLへ
 
@@ -529,13 +545,14 @@ class TVTokyoScraper(BaseScraper):
                 # リストの最後の要素が 'visibility' (表示状態) になるまで待つ
                 try:
                     # コンテナ配下のアイテム件数が > 0 になるまで待機（可視待機より直接的）
-                    WebDriverWait(driver, Constants.Time.TVTOKYO_ELEMENT_TIMEOUT).until(
-                        lambda d: len(d.find_element(By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_LIST_CONTAINER)
-                                       .find_elements(By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_ITEM)) > 0
-                    )
+                    with tracing.span("wait_list_items", "wait", url=target_url):
+                        WebDriverWait(driver, Constants.Time.TVTOKYO_ELEMENT_TIMEOUT).until(
+                            lambda d: len(d.find_element(By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_LIST_CONTAINER)
+                                           .find_elements(By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_ITEM)) > 0
+                        )
                 except TimeoutException:
                     self.logger.warning(
-                        f"{program_name} のアイテム出現待機でタイムアウトしました - {target_url}"
+                        "%s のアイテム出現待機でタイムアウトしました - %s", program_name, target_url
                     )
                     error_count += 1
 
@@ -543,7 +560,7 @@ class TVTokyoScraper(BaseScraper):
                 container = driver.find_element(By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_LIST_CONTAINER)
                 episode_elements = container.find_elements(By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_ITEM)
                 if not episode_elements:
-                    self.logger.warning(f"{program_name} のエピソード要素が見つかりませんでした - {target_url}")
+                    self.logger.warning("%s のエピソード要素が見つかりませんでした - %s", program_name, target_url)
                     continue
 
                 urls_found_on_page = []
@@ -559,16 +576,16 @@ class TVTokyoScraper(BaseScraper):
                         try:
                             date_elements = episode.find_elements(By.CSS_SELECTOR, Constants.CSSSelector.TVTOKYO_DATE_SPAN)
                             if not date_elements:
-                                self.logger.debug(f"日付要素が見つかりませんでした - {program_name} - {target_url}")
+                                self.logger.debug("日付要素が見つかりませんでした - %s - %s", program_name, target_url)
                                 continue
                             
                             # StaleElement を避けるため、即座にテキストを取得
                             date_text = date_elements[0].text.strip()
                         except (StaleElementReferenceException, NoSuchElementException):
-                            self.logger.debug(f"要素が古くなったか見つかりません（スキップ） - {program_name}")
+                            self.logger.debug("要素が古くなったか見つかりません（スキップ） - %s", program_name)
                             continue
 
-                        self.logger.debug(f"抽出された日付テキスト: '{date_text}' (対象日付: {formatted_date})")
+                        self.logger.debug("抽出された日付テキスト: '%s' (対象日付: %s)", date_text, formatted_date)
 
                         # 日付のマッチング確認と「それ以降の探索が必要か」の判定
                         is_matching_date = False
@@ -606,18 +623,18 @@ class TVTokyoScraper(BaseScraper):
 
                             # 対象日より古い日付が出現した場合も、並び順が確実ではないため探索を終了させずスキップして次へ進む
                             if current_date_dt and current_date_dt < target_date_dt:
-                                self.logger.debug(f"[{program_name}] 対象日より古いエピソードをスキップします ({current_date_dt})")
+                                self.logger.debug("[%s] 対象日より古いエピソードをスキップします (%s)", program_name, current_date_dt)
                                 continue
 
                         except Exception as e:
-                            self.logger.error(f"[{program_name}] 日付マッチング中にエラーが発生しました: {e}")
+                            self.logger.error("[%s] 日付マッチング中にエラーが発生しました: %s", program_name, e)
 
                         if is_matching_date:
                             try:
                                 self.logger.debug("一致する日付のエピソードが見つかりました。リンクを検索中...")
                                 link_elements = episode.find_elements(By.CSS_SELECTOR, 'a[href*="/post_"]')
                                 if not link_elements:
-                                    self.logger.debug(f"リンク要素が見つかりませんでした - {program_name} - {target_url}")
+                                    self.logger.debug("リンク要素が見つかりませんでした - %s - %s", program_name, target_url)
                                 for link_el in link_elements:
                                     link = link_el.get_attribute("href")
                                     if not link:
@@ -625,23 +642,23 @@ class TVTokyoScraper(BaseScraper):
                                     # URLの形式をバリデーション（番組一致・/oa必須・/vod除外）
                                     if not self._validate_program_url(link, program_name):
                                         continue
-                                    self.logger.debug(f"見つかったリンク: {link}")
+                                    self.logger.debug("見つかったリンク: %s", link)
                                     urls_found_on_page.append(link)
                                     break  # 同一アイテムで1本取れれば十分
                             except Exception as e:
-                                self.logger.error(f"[{program_name}] リンク抽出中にエラーが発生しました: {e}")
+                                self.logger.error("[%s] リンク抽出中にエラーが発生しました: %s", program_name, e)
 
                     except Exception as e_inner:
-                        self.logger.error(f"エピソード解析中に予期せぬエラー: {e_inner} - {program_name} - {target_url}", exc_info=True)
+                        self.logger.error("エピソード解析中に予期せぬエラー: %s - %s - %s", e_inner, program_name, target_url, exc_info=True)
 
                 # 以降の処理のために元に戻す
                 driver.implicitly_wait(3)
 
                 if urls_found_on_page:
-                    self.logger.debug(f"抽出されたURL ({target_url}): {urls_found_on_page}")
+                    self.logger.debug("抽出されたURL (%s): %s", target_url, urls_found_on_page)
                     all_urls.extend(urls_found_on_page)
                 else:
-                    self.logger.debug(f"対象日付のエピソードは見つかりませんでした - {program_name} - {target_url} (日付: {formatted_date})")
+                    self.logger.debug("対象日付のエピソードは見つかりませんでした - %s - %s (日付: %s)", program_name, target_url, formatted_date)
                     # URLカテゴリを判定（WBSの場合）
                     if "feature" in target_url:
                         zero_result_urls.append("特集")
@@ -653,12 +670,12 @@ class TVTokyoScraper(BaseScraper):
                         zero_result_urls.append("データなし")
 
             except Exception as e_outer:
-                self.logger.error(f"URL ({target_url}) の処理中にエラー: {e_outer} - {program_name}", exc_info=True)
+                self.logger.error("URL (%s) の処理中にエラー: %s - %s", target_url, e_outer, program_name, exc_info=True)
                 error_count += 1
 
         # 重複を除去して返す
         unique_urls = sorted(list(set(all_urls)))
-        self.logger.debug(f"最終的に抽出されたユニークなエピソードURL: {program_name} - {unique_urls}")
+        self.logger.debug("最終的に抽出されたユニークなエピソードURL: %s - %s", program_name, unique_urls)
         return unique_urls, error_count, zero_result_urls
 
     def _validate_program_url(self, url: str, program_name: str) -> bool:
@@ -685,16 +702,16 @@ class TVTokyoScraper(BaseScraper):
 
         # URLが別の番組のものである場合は除外
         if detected_program != program_name:
-            self.logger.debug(f"他番組の記事をスキップ: {url} (期待:{program_name}, 検出:{detected_program})")
+            self.logger.debug("他番組の記事をスキップ: %s (期待:%s, 検出:%s)", url, program_name, detected_program)
             return False
 
         # /oa/と/vod/の処理
         if current_pattern[1]:  # oa_patternが存在する場合
             if current_pattern[2] in url:  # vodを含む場合は除外
-                self.logger.debug(f"{program_name}のVOD URLをスキップ: {url}")
+                self.logger.debug("%sのVOD URLをスキップ: %s", program_name, url)
                 return False
             if current_pattern[1] not in url:  # oaを含まない場合も除外
-                self.logger.debug(f"{program_name}の不正なURL形式をスキップ: {url}")
+                self.logger.debug("%sの不正なURL形式をスキップ: %s", program_name, url)
                 return False
 
         return True
@@ -712,15 +729,16 @@ class TVTokyoScraper(BaseScraper):
         """テレビ東京のエピソード詳細情報を取得する"""
         # URLの形式をバリデーション
         if not self._validate_program_url(episode_url, program_name):
-            self.logger.warning(f"[{program_name}] 無効なURLのためスキップ: {episode_url}")
+            self.logger.warning("[%s] 無効なURLのためスキップ: %s", program_name, episode_url)
             return None, None
             
         # ガイアの夜明けの場合は特別な処理を行う
         is_gaia = 'gaia' in episode_url.lower()
         if is_gaia:
-            self.logger.debug(f"ガイアの夜明けのページを処理中: {episode_url}")
+            self.logger.debug("ガイアの夜明けのページを処理中: %s", episode_url)
             try:
-                driver.get(episode_url)
+                with tracing.span("driver.get", "browser", url=episode_url):
+                    driver.get(episode_url)
                 # ページが完全にロードされるのを最長5秒だけ待つ（すでにeagerで早い段階で戻ってきているため）
                 try:
                     WebDriverWait(driver, 5).until(
@@ -734,7 +752,7 @@ class TVTokyoScraper(BaseScraper):
                 if title_elements:
                     title = title_elements[0].text.strip()
                     if title and len(title) > 0:
-                        self.logger.debug(f"episode__titleから取得: {title}")
+                        self.logger.debug("episode__titleから取得: %s", title)
                         return title, episode_url
                 
                 # 2. 次に、JavaScriptを使用して要素を取得
@@ -756,7 +774,7 @@ class TVTokyoScraper(BaseScraper):
                 """)
                 
                 if title and len(title) > 0:
-                    self.logger.debug(f"JavaScriptで取得したタイトル: {title}")
+                    self.logger.debug("JavaScriptで取得したタイトル: %s", title)
                     return title, episode_url
                 
                 # 3. 最終手段として説明文から最初の1文を取得
@@ -777,18 +795,19 @@ class TVTokyoScraper(BaseScraper):
                     title = title[:97] + '...' if len(title) > 100 else title
                     
                     if title and len(title) > 5:
-                        self.logger.debug(f"説明文から抽出: {title}")
+                        self.logger.debug("説明文から抽出: %s", title)
                         return title, episode_url
                 
                 # どうしても取得できない場合はデフォルトのタイトルを返す
                 return f"{program_name}の番組情報", episode_url
             except Exception as e:
-                self.logger.error(f"[{program_name}] ガイアの夜明けのタイトル取得中にエラーが発生しました: {e}")
+                self.logger.error("[%s] ガイアの夜明けのタイトル取得中にエラーが発生しました: %s", program_name, e)
                 # エラーが発生した場合はデフォルトのタイトルを返す
                 return f"{program_name}の番組情報", episode_url
             
         try:
-            driver.get(episode_url)
+            with tracing.span("driver.get", "browser", url=episode_url):
+                driver.get(episode_url)
             # ページが完全に読み込まれるまで待機（固定のtime.sleepを廃止し、eagerロードと後続の探索に任せる）
             
             # 複数のタイトルセレクタを試行（優先順位順）
@@ -811,14 +830,14 @@ class TVTokyoScraper(BaseScraper):
                 try:
                     title_elements = driver.find_elements(By.CSS_SELECTOR, selector)
                     if is_gaia and title_elements:
-                        self.logger.debug(f"ガイアの夜明け - セレクタ '{selector}' で {len(title_elements)} 個の要素を発見")
+                        self.logger.debug("ガイアの夜明け - セレクタ '%s' で %s 個の要素を発見", selector, len(title_elements))
                         
                     for i, element in enumerate(title_elements):
                         try:
                             # テキストを取得
                             text = element.text.strip()
                             if is_gaia and text:
-                                self.logger.debug(f"  要素 {i+1}: テキスト長={len(text)}, テキスト='{text[:50]}...'")
+                                self.logger.debug("  要素 %s: テキスト長=%s, テキスト='%s...'", i+1, len(text), text[:50])
                                 
                             if text and len(text) > 5:  # 意味のある長さのテキスト
                                 # 最初の行のみを取得（改行で分割）
@@ -828,30 +847,30 @@ class TVTokyoScraper(BaseScraper):
                                     # 広告テキストを除外
                                     if any(ad_text in title.lower() for ad_text in ['無料登録', '今すぐ', 'ログイン', '登録', 'ミュートを解除']):
                                         if is_gaia:
-                                            self.logger.debug(f"  広告テキストのためスキップ: {title}")
+                                            self.logger.debug("  広告テキストのためスキップ: %s", title)
                                         continue
                                         
                                     # ガイアの夜明けの場合はより詳細なログを出力
                                     if is_gaia:
-                                        self.logger.debug(f"  候補タイトル: '{title}' (長さ: {len(title)})")
+                                        self.logger.debug("  候補タイトル: '%s' (長さ: %s)", title, len(title))
                                     
                                     # より確実なタイトル判定（長いタイトルを優先）
                                     if len(title) > 10 and not title.startswith('ミュート'):
-                                        self.logger.debug(f"タイトルを取得しました ({selector}): {title}")
+                                        self.logger.debug("タイトルを取得しました (%s): %s", selector, title)
                                         return title, episode_url
                         except Exception as e:
-                            self.logger.debug(f"要素の処理中にエラーが発生しました: {e}")
+                            self.logger.debug("要素の処理中にエラーが発生しました: %s", e)
                             continue
                 except Exception as e:
-                    self.logger.debug(f"タイトルの取得中にエラーが発生しました: {e}")
+                    self.logger.debug("タイトルの取得中にエラーが発生しました: %s", e)
                     continue
             
             # タイトルが見つからなかった場合
-            self.logger.warning(f"[{program_name}] タイトルが見つかりませんでした: {episode_url}")
+            self.logger.warning("[%s] タイトルが見つかりませんでした: %s", program_name, episode_url)
             return f"{program_name}の番組情報", episode_url
             
         except Exception as e:
-            self.logger.error(f"[{program_name}] エピソード詳細の取得中にエラーが発生しました: {e}")
+            self.logger.error("[%s] エピソード詳細の取得中にエラーが発生しました: %s", program_name, e)
             return None, None
 
 # --- 関数定義 ---
@@ -859,24 +878,48 @@ class TVTokyoScraper(BaseScraper):
 logger = logging.getLogger(__name__)
 
 worker_driver = None
+# このワーカーで送った WebDriver コマンドの数 (処理時間の履歴に記録する)
+worker_command_count = 0
+# 直前の main() で処理時間の履歴に記録したレコード (main.py all のレコードにも含める)
+last_perf_record: dict | None = None
+
+def _count_webdriver_commands(driver) -> None:
+    """
+    driver.execute を数えるラッパーに置き換える。
+    WebElement の操作も親の driver.execute を通るため、すべてのコマンドが数えられる
+    """
+    execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        global worker_command_count
+        worker_command_count += 1
+        return execute(driver_command, params)
 
-def init_worker():
-    """各ワーカープロセスの初期化処理。自身のWebDriverインスタンスを作成し保持する。"""
+    driver.execute = counting_execute
+
+@profiling.profiled
+def init_worker(log_queue=None, log_level: int = logging.INFO):
+    """
+    各ワーカープロセスの初期化処理。自身のWebDriverインスタンスを作成し保持する。
+    log_queue が渡された場合、ログは親プロセスのリスナーに送る。
+    """
     global worker_driver
+    # ブラウザの起動より先にロガーを設定し、起動時のエラーも親プロセスに届くようにする
+    if log_queue is not None:
+        configure_worker_logging(log_queue, log_level)
+    else:
+        setup_logger(level=log_level)
     try:
         import atexit
         # WebDriverManagerを使用してヘッドレスブラウザを起動
         manager = WebDriverManager()
-        worker_driver = manager.__enter__()
+        with tracing.span("chrome_startup", "browser"):
+            worker_driver = manager.__enter__()
+        _count_webdriver_commands(worker_driver)
         atexit.register(cleanup_worker)
-        
-        # ロガーを初期化
-        setup_logger(level=logging.INFO)
-        
-        import os
-        print(f" [DEBUG] ワーカープロセスを初期化しました (PID: {os.getpid()})", flush=True)
+        logger.debug("ワーカープロセスを初期化しました (PID: %s)", os.getpid())
     except Exception as e:
-        print(f" [ERROR] ワーカープロセスの初期化に失敗しました: {e}", flush=True)
+        logger.error("ワーカープロセスの初期化に失敗しました: %s", e)
         worker_driver = None
 
 def cleanup_worker():
@@ -889,8 +932,30 @@ def cleanup_worker():
             pass
         worker_driver = None
 
+@profiling.profiled
 def fetch_single_program(args: tuple[str, str, dict, dict, str]) -> FetchResult:
-    """単一の番組を処理するワーカー関数。プロセスのグローバルなWebDriverを使い回す。"""
+    """
+    単一の番組を処理するワーカー関数。プロセスのグローバルなWebDriverを使い回す。
+    結果の4番目の要素に、この番組の処理時間・WebDriver コマンド数・URL キャッシュのヒット数と、
+    処理中のワーカー自身および Chrome (子孫プロセス) の RSS のピーク・平均を入れる。
+    """
+    resolver_stats = dict(default_resolver().stats)
+    commands_before = worker_command_count
+    start = time.perf_counter()
+    with RssSampler() as sampler:
+        program_name, status, data_or_message = _fetch_single_program(args)
+    metrics = {
+        "seconds": round(time.perf_counter() - start, 3),
+        "pid": os.getpid(),
+        "webdriver_commands": worker_command_count - commands_before,
+        "url_cache_hits": default_resolver().stats["hits"] - resolver_stats["hits"],
+        "url_cache_misses": default_resolver().stats["misses"] - resolver_stats["misses"],
+        **sampler.summary(),
+    }
+    return (program_name, status, data_or_message, metrics)
+
+def _fetch_single_program(args: tuple[str, str, dict, dict, str]) -> tuple[str, ScrapeStatus, ScrapeResultData]:
+    """fetch_single_program の本体。(番組名, ステータス, データまたはメッセージ) を返す"""
     task_type, program_name, nhk_programs, tvtokyo_programs, target_date = args
     batch_logger = logging.getLogger(f"{__name__}.worker")
     
@@ -898,36 +963,39 @@ def fetch_single_program(args: tuple[str, str, dict, dict, str]) -> FetchResult:
     if worker_driver is None:
         return (program_name, ScrapeStatus.FAILURE, "ワーカーのブラウザ初期化に失敗しました")
         
-    try:
-        nhk_scraper = NHKScraper(nhk_programs) if nhk_programs else None
-        tvtokyo_scraper = TVTokyoScraper(tvtokyo_programs) if tvtokyo_programs else None
-        
-        status = ScrapeStatus.FAILURE
-        data_or_message = "不明なエラー"
-
-        if task_type == 'nhk' and nhk_scraper:
-            status, data_or_message = nhk_scraper.get_program_info_with_driver(
-                worker_driver, program_name, target_date
-            )
-        elif task_type == 'tvtokyo' and tvtokyo_scraper:
-            status, data_or_message = tvtokyo_scraper.get_program_info_with_driver(
-                worker_driver, program_name, target_date
-            )
-        else:
-            batch_logger.error(f"不明なタスクタイプです: {task_type}")
-            data_or_message = f"不明なタスクタイプ: {task_type}"
+    # このタスクの間に出るログには番組名と PID が付く
+    with task_context(program_name), tracing.span("scrape", "scrape", program=program_name, type=task_type):
+        try:
+            nhk_scraper = NHKScraper(nhk_programs) if nhk_programs else None
+            tvtokyo_scraper = TVTokyoScraper(tvtokyo_programs) if tvtokyo_programs else None
+            
+            status = ScrapeStatus.FAILURE
+            data_or_message = "不明なエラー"
+
+            if task_type == 'nhk' and nhk_scraper:
+                status, data_or_message = nhk_scraper.get_program_info_with_driver(
+                    worker_driver, program_name, target_date
+                )
+            elif task_type == 'tvtokyo' and tvtokyo_scraper:
+                status, data_or_message = tvtokyo_scraper.get_program_info_with_driver(
+                    worker_driver, program_name, target_date
+                )
+            else:
+                batch_logger.error("不明なタスクタイプです: %s", task_type)
+                data_or_message = f"不明なタスクタイプ: {task_type}"
 
-        return (program_name, status, data_or_message)
-        
-    except Exception as e:
-        batch_logger.error(f"{program_name} の情報取得で予期せぬエラー: {e}", exc_info=True)
-        return (program_name, ScrapeStatus.FAILURE, f"プロセスエラー: {e}")
+            return (program_name, status, data_or_message)
+            
+        except Exception as e:
+            batch_logger.error("%s の情報取得で予期せぬエラー: %s", program_name, e, exc_info=True)
+            return (program_name, ScrapeStatus.FAILURE, f"プロセスエラー: {e}")
 
 def get_elapsed_time(start_time: float) -> float:
     """経過時間を計算する"""
     end_time = time.time()
     return end_time - start_time
 
+@tracing.traced(cat="postprocess")
 def write_results_to_file(sorted_blocks: list[str], output_file_path: str) -> None:
     """ソートされた結果をファイルに書き込む (logger を引数で受け取らない)"""
     # モジュールレベルの logger を使用
@@ -938,42 +1006,43 @@ def write_results_to_file(sorted_blocks: list[str], output_file_path: str) -> No
             for i, block in enumerate(sorted_blocks):
                 lines = [line for line in block.split('\n') if line.strip()]
                 if not lines:
-                    logger.debug(f"空のブロックをスキップしました: index={i}")
+                    logger.debug("空のブロックをスキップしました: index=%s", i)
                     continue
                 current_header = lines[0]
                 is_header = current_header.startswith('●')
                 if is_header:
                     if current_header == previous_header:
-                        logger.debug(f"ヘッダー重複検出、結合します: {current_header}")
+                        logger.debug("ヘッダー重複検出、結合します: %s", current_header)
                         for line in lines[1:]:
                             f.write(line + '\n')
                     else:
                         if i > 0: f.write('\n')
-                        logger.debug(f"新しいヘッダーを書き込みます: {current_header}")
+                        logger.debug("新しいヘッダーを書き込みます: %s", current_header)
                         for line in lines: f.write(line + '\n')
                         previous_header = current_header
                 else:
-                    logger.warning(f"予期しない形式のブロック（ヘッダーなし）: index={i}, content='{block[:50]}...'")
+                    logger.warning("予期しない形式のブロック（ヘッダーなし）: index=%s, content='%s...'", i, block[:50])
                     if i > 0: f.write('\n')
                     for line in lines: f.write(line + '\n')
                     previous_header = None
 
-        logger.info(f"ファイルへの書き込み完了: {output_file_path}")
+        logger.info("ファイルへの書き込み完了: %s", output_file_path)
 
     except Exception as e:
-        logger.error(f"ファイルへの書き込み中にエラーが発生しました: {e}", exc_info=True)
+        logger.error("ファイルへの書き込み中にエラーが発生しました: %s", e, exc_info=True)
         raise
 
+@tracing.traced(cat="postprocess")
 def process_and_sort_results(results: list[str | list[str] | None], start_time: float) -> list[str]:
     """結果を番組ブロックごとに分割し、時間順にソートする"""
-    logger.info(f"【後処理開始】結果の分割とソート...（経過時間：{get_elapsed_time(start_time):.0f}秒）")
+    logger.info("【後処理開始】結果の分割とソート...（経過時間：%.0f秒）", get_elapsed_time(start_time))
     flat_results = []
     for res in results:
         if isinstance(res, list):
             flat_results.extend(r for r in res if isinstance(r, str))
         elif isinstance(res, str):
             flat_results.append(res)
-    logger.debug(f"有効な結果件数: {len(flat_results)}")
+    logger.debug("有効な結果件数: %s", len(flat_results))
 
     blocks = []
     current_block = []
@@ -985,15 +1054,15 @@ def process_and_sort_results(results: list[str | list[str] | None], start_time:
         elif current_block:
             current_block.append(line)
         else:
-            logger.warning(f"ヘッダーなしで始まる行を検出、スキップします: {line[:50]}...")
+            logger.warning("ヘッダーなしで始まる行を検出、スキップします: %s...", line[:50])
 
     if current_block:
         blocks.append('\n'.join(current_block))
 
-    logger.info(f"番組ブロックの分割完了: {len(blocks)} ブロック")
-    logger.info(f"番組ブロックを時間順にソート中...")
+    logger.info("番組ブロックの分割完了: %s ブロック", len(blocks))
+    logger.info("番組ブロックを時間順にソート中...")
     sorted_blocks = sort_blocks_by_time(blocks) # sort_blocks_by_time は修正済みの extract_time_from_block を使う
-    logger.info(f"番組ブロックのソート完了（経過時間：{get_elapsed_time(start_time):.0f}秒）")
+    logger.info("番組ブロックのソート完了（経過時間：%.0f秒）", get_elapsed_time(start_time))
     return sorted_blocks
 
 # --- ヘルパー関数定義 ---
@@ -1006,7 +1075,7 @@ def _process_fetch_result(fetch_result: FetchResult, results_list: list[str], lo
         logger.error("fetch_program_info が None を返しました")
         return "不明なタスクでエラー発生"
 
-    program_name, status, data_or_message = fetch_result
+    program_name, status, data_or_message = fetch_result[:3]
     progress_message = ""
 
     if status == ScrapeStatus.SUCCESS:
@@ -1050,7 +1119,7 @@ def _process_fetch_result(fetch_result: FetchResult, results_list: list[str], lo
         progress_message = f"失敗: {failure_reason}"
     else:
         progress_message = f"未知の状態 ({status.name})"
-        logger.warning(f"不明なステータスを受け取りました: {fetch_result}")
+        logger.warning("不明なステータスを受け取りました: %s", fetch_result)
 
     return program_name, progress_message
 
@@ -1072,27 +1141,43 @@ def _pad_to_width(text: str, target_width: int) -> str:
         return text
     return text + " " * (target_width - current_width)
 
-def main():
-    """メイン関数"""
+def main(target_date: str | None = None, config_dir: str = "ini", output_dir: str = "output",
+         workers: int = NUM_WORKERS):
+    """
+    メイン関数。target_date を省略した場合はコマンドライン引数から読む。
+    config_dir / output_dir は設定ファイル (nhk_config.ini, tvtokyo_config.ini) と出力先のディレクトリ
+    (オフラインのベンチマークでは差し替えた設定と一時ディレクトリを使う)。workers はワーカーの数。
+    処理時間の履歴に記録したレコードを返す (失敗して終了する場合も last_perf_record に残す)
+    """
+    global last_perf_record
+    last_perf_record = None
     # --- Logger Setup ---
     # --- Logger Setup ---
     global_logger = setup_logger(level=logging.INFO)
     # global_logger = setup_logger(level=logging.DEBUG)
     # ---------------------
 
-    target_date = sys.argv[1]
-    output_dir = "output"
+    target_date = target_date or sys.argv[1]
     os.makedirs(output_dir, exist_ok=True)
     output_file_path = os.path.join(output_dir, f"{target_date}.txt")
 
     start_time = time.time()
     global_logger.info("=== scraping-news 処理開始 ===")
-    global_logger.info(f"対象日付: {target_date}")
+    global_logger.info("対象日付: %s", target_date)
+
+    # 処理時間の履歴 (output/perf_history.jsonl) に記録する計測値
+    timer = StageTimer()
+    program_metrics = {}
+    num_workers = 0
+    success = False
+    # 親プロセスと、その子孫 (ワーカー・Chrome) 全体の RSS
+    parent_sampler = RssSampler()
 
     try:
         target_year = target_date[:4]
-        nhk_programs = parse_programs_config('ini/nhk_config.ini', target_year=target_year)
-        tvtokyo_programs = parse_programs_config('ini/tvtokyo_config.ini', target_year=target_year)
+        with timer.stage("config"):
+            nhk_programs = parse_programs_config(os.path.join(config_dir, 'nhk_config.ini'), target_year=target_year)
+            tvtokyo_programs = parse_programs_config(os.path.join(config_dir, 'tvtokyo_config.ini'), target_year=target_year)
 
         if not nhk_programs and not tvtokyo_programs:
             global_logger.error("設定ファイルの読み込みに失敗したか、設定が空です。処理を終了します。")
@@ -1106,7 +1191,7 @@ def main():
         if total_tasks == 0:
             global_logger.warning("実行するタスクがありません。")
         else:
-            num_workers = 6
+            num_workers = workers
             # ▼ create_batches() の代わりに、単発タスクのリストを作成
             single_tasks = []
             if nhk_programs:
@@ -1114,7 +1199,7 @@ def main():
             if tvtokyo_programs:
                 single_tasks.extend([('tvtokyo', name, nhk_programs or {}, tvtokyo_programs, target_date) for name in tvtokyo_programs.keys()])
                 
-            global_logger.info(f"並列処理を開始します ({total_tasks} タスク, {num_workers} ワーカー)")
+            global_logger.info("並列処理を開始します (%s タスク, %s ワーカー)", total_tasks, num_workers)
 
             # 列幅を全番組名の最大表示幅から動的に計算（＋マージン 2）
             name_col_width = max(
@@ -1132,8 +1217,17 @@ def main():
             
             is_header_printed = False
 
+            # ワーカーのログはキュー経由で親プロセスのリスナーがまとめて出力する
+            # (ワーカー内ではレベル未満のログを文字列化せずに捨てる)
+            log_level = logging.getLogger().getEffectiveLevel()
+            log_queue, log_listener = start_log_listener(log_level)
+
             # initializerを使ってワーカープロセス起動時に1度だけWebDriverを初期化・常駐させる
-            pool = multiprocessing.Pool(processes=num_workers, initializer=init_worker)
+            scrape_start = time.perf_counter()
+            pool = multiprocessing.Pool(processes=num_workers, initializer=init_worker,
+                                        initargs=(log_queue, log_level))
+            # サンプリングのスレッドはワーカーを fork した後に開始する
+            parent_sampler.start()
             try:
                 # imap_unordered は単発タスクの結果を即座に返す（バッチ完了を待つ必要がない）
                 for fetch_result in pool.imap_unordered(fetch_single_program, single_tasks):
@@ -1147,6 +1241,8 @@ def main():
 
                     # ヘルパー関数で結果処理とメッセージ生成
                     prog_name, status_text = _process_fetch_result(fetch_result, results, global_logger)
+                    if fetch_result is not None and len(fetch_result) > 3:
+                        program_metrics[prog_name] = {"status": fetch_result[1].name, **fetch_result[3]}
 
                     # 進捗表示（列揃えフォーマット）
                     task_str = f"{processed_tasks:>{num_width}}/{total_tasks}"
@@ -1161,16 +1257,20 @@ def main():
                 global_logger.info("すべてのプロセスを終了しました。")
                 sys.exit(130)
             except Exception as e:
-                global_logger.error(f"\n予期しないエラーが発生しました: {e}", exc_info=True)
+                global_logger.error("\n予期しないエラーが発生しました: %s", e, exc_info=True)
                 pool.terminate()
                 pool.join()
                 raise
             finally:
                 pool.close()
                 pool.join()
+                log_listener.stop()
+                timer.add("scrape", time.perf_counter() - scrape_start)
+                parent_sampler.stop()
 
             print() # \r で上書きした行の後で改行を入れる
             global_logger.info("並列処理が完了しました。")
+            log_memory_summary(parent_sampler.summary(), program_metrics, global_logger)
 
         # --- 結果の集計とファイル書き込み ---
         if not results:
@@ -1178,17 +1278,55 @@ def main():
             print("有効な番組情報が見つからなかったため、ファイルは作成されませんでした。")
         else:
             # process_and_sort_results は成功データ (results) のみを処理する
-            sorted_blocks = process_and_sort_results(results, start_time)
-            write_results_to_file(sorted_blocks, output_file_path)
+            with timer.stage("postprocess"):
+                sorted_blocks = process_and_sort_results(results, start_time)
+            with timer.stage("write"):
+                write_results_to_file(sorted_blocks, output_file_path)
             print(f"\n結果を {output_file_path} に出力しました。（経過時間：{get_elapsed_time(start_time):.0f}秒）")
 
 
+        success = True
+
     except Exception as e:
-        global_logger.error(f"メイン処理で予期せぬエラーが発生しました: {e}", exc_info=True)
+        global_logger.error("メイン処理で予期せぬエラーが発生しました: %s", e, exc_info=True)
         print(f"エラーが発生しました: {e}")
         sys.exit(1)
     finally:
-        global_logger.info(f"=== scraping-news 処理終了（総経過時間：{get_elapsed_time(start_time):.0f}秒） ===")
+        global_logger.info("=== scraping-news 処理終了（総経過時間：%.0f秒） ===", get_elapsed_time(start_time))
+        last_perf_record = PerfHistory(os.path.join(output_dir, "perf_history.jsonl")).append(build_perf_record(target_date, timer, program_metrics, num_workers, success,
+                                               parent_sampler.summary()))
+    return last_perf_record
+
+def log_memory_summary(parent_memory: dict, program_metrics: dict, logger: logging.Logger, top: int = 5) -> None:
+    """親プロセス全体のピーク RSS と、Chrome を含めたピーク RSS の大きい番組を表示する"""
+    if not parent_memory:
+        return
+    logger.info("メモリ: 親プロセス %.0fMB (ピーク) / ワーカーと Chrome を含めた合計 %.0fMB (ピーク)",
+                parent_memory["peak_rss_mb"], parent_memory["peak_total_rss_mb"])
+    heavy = sorted((m for m in program_metrics.items() if "peak_total_rss_mb" in m[1]),
+                   key=lambda m: m[1]["peak_total_rss_mb"], reverse=True)[:top]
+    for name, metrics in heavy:
+        logger.info("  %s: ワーカー+Chrome %.0fMB (ピーク) / 平均 %.0fMB",
+                    name, metrics["peak_total_rss_mb"], metrics["avg_rss_mb"] + metrics["avg_children_rss_mb"])
+
+def build_perf_record(target_date: str, timer: StageTimer, program_metrics: dict, num_workers: int, success: bool,
+                      memory: dict | None = None) -> dict:
+    """処理時間の履歴に記録するレコードを作る (番組ごとの計測値をワーカー全体で合計する)"""
+    return {
+        "kind": "scrape",
+        "date": target_date,
+        "success": success,
+        "total_seconds": timer.total,
+        "stages": timer.stages,
+        "num_workers": num_workers,
+        "programs": program_metrics,
+        "webdriver_commands": sum(m.get("webdriver_commands", 0) for m in program_metrics.values()),
+        "cache": {"url": {
+            "hits": sum(m.get("url_cache_hits", 0) for m in program_metrics.values()),
+            "misses": sum(m.get("url_cache_misses", 0) for m in program_metrics.values()),
+        }},
+        "memory": memory or {},
+    }
 
 if __name__ == "__main__":
     # Windows で multiprocessing を使う場合に必要な場合がある
@@ -8,13 +8,18 @@ from common.constants import (
     get_header_length
 )
 # count_tweet_length, setup_logger をインポート
-from common.utils import count_tweet_length, setup_logger
+from common.utils import setup_logger
+from common.text_utils import count_tweet_length
+from common import tracing
 
 # --- モジュールレベルのロガーを取得 ---
 logger = logging.getLogger(__name__)
 
-def split_program(text, max_length=TWEET_MAX_LENGTH, header_length=0):
-    split_tweets = []
+def _parse_program_block(text):
+    """
+    番組ブロックをヘッダー行と (タイトル, URL) のリストに分解する。
+    ヘッダー行が不正な場合は (None, []) を返す。
+    """
     lines = text.strip().split('\n')
 
     program_name_line = ""
@@ -41,15 +46,105 @@ def split_program(text, max_length=TWEET_MAX_LENGTH, header_length=0):
     else:
         # ここでエラーログは出すが、処理は続行せず空リストを返す
         logger.error(f"ヘッダー行が見つからないか形式が不正です: {text[:50]}...")
+        return None, []
+
+    return program_name_line, items
+
+def _format_item(title, url):
+    """アイテム (タイトル + URL) をツイート用テキストにする。URLが "(URLなし)" の場合はタイトルのみ"""
+    return f"{title}" + (f"\n{url}" if url != "(URLなし)" else "")
+
+def split_program(text, max_length=TWEET_MAX_LENGTH, header_length=0):
+    """
+    番組ブロックを文字数制限内のツイートに分割する（動的計画法による最適分割）。
+
+    1. ツイート数が最小になる分割を選ぶ
+    2. ツイート数が同じ分割の中では、各ツイートの長さの二乗和が最小（= 長さが均等）になるものを選ぶ
+
+    1件目のツイートはヘッダー行を含み、投稿時に付くヘッダー (header_length) の分だけ制限が短くなる。
+    タイトルと URL の組は分割しない。
+    """
+    program_name_line, items = _parse_program_block(text)
+    if program_name_line is None:
+        return [] # 分割不可
+
+    # アイテム単体でも制限を超えるものは分割しようがないのでスキップ
+    item_texts = []
+    for title, url in items:
+        item_text = _format_item(title, url)
+        if count_tweet_length(item_text) > max_length:
+            logger.error(f"分割後のツイート（アイテム単体）も長すぎます。スキップ: {item_text[:50]}...")
+            continue
+        item_texts.append(item_text)
+
+    # 改行を挟んで結合するだけなので、各アイテムの文字数を先に数えておけば区間の長さは足し算で求まる
+    item_lengths = [count_tweet_length(t) for t in item_texts]
+    header_line_length = count_tweet_length(program_name_line)
+    first_limit = max_length - header_length
+    n = len(item_texts)
+
+    if header_line_length > first_limit:
+        logger.warning(f"ヘッダー行だけで1件目の制限 ({first_limit}) を超えています: {program_name_line[:30]}...")
+
+    # best[b] = (ツイート数, 長さの二乗和) : アイテム [0, b) を分割したときの最良値
+    # prev[b] = 直前の区切り位置 (1件目のみで構成される場合は None)
+    best = [None] * (n + 1)
+    prev = [None] * (n + 1)
+
+    # 1件目のツイート: ヘッダー行 + アイテム [0, j)
+    first_length = header_line_length
+    for j in range(n + 1):
+        if j > 0:
+            first_length += 1 + item_lengths[j - 1]  # 改行 + アイテム
+        if first_length > first_limit and j > 0:
+            break
+        # 均等化の評価は、実際に投稿されるヘッダー込みの長さで行う
+        best[j] = (1, (first_length + header_length) ** 2)
+
+    # 2件目以降のツイート: アイテム [a, b)
+    for b in range(1, n + 1):
+        segment_length = -1  # 先頭アイテムの前には改行が入らない
+        for a in range(b - 1, -1, -1):
+            segment_length += 1 + item_lengths[a]
+            if segment_length > max_length:
+                break
+            if best[a] is None:
+                continue
+            candidate = (best[a][0] + 1, best[a][1] + segment_length ** 2)
+            if best[b] is None or candidate < best[b]:
+                best[b] = candidate
+                prev[b] = a
+
+    # 区切り位置を復元
+    boundaries = []
+    b = n
+    while prev[b] is not None:
+        boundaries.append((prev[b], b))
+        b = prev[b]
+    boundaries.reverse()
+
+    split_tweets = ["\n".join([program_name_line] + item_texts[:b]).strip()]
+    for a, b in boundaries:
+        split_tweets.append("\n".join(item_texts[a:b]).strip())
+
+    logger.info(f"プログラムを {len(split_tweets)} 個のツイートに分割しました: {program_name_line[:30]}...")
+    return split_tweets
+
+def split_program_greedy(text, max_length=TWEET_MAX_LENGTH, header_length=0):
+    """
+    従来の貪欲法による分割（ツイートを埋められるだけ埋めて次へ進む）。
+    split_program との比較ベンチマーク用に残している。
+    """
+    split_tweets = []
+    program_name_line, items = _parse_program_block(text)
+    if program_name_line is None:
         return [] # 分割不可
 
-    # アイテム結合ロジックは変更なし
     current_tweet_text = program_name_line
     is_first_tweet_in_block = True
 
     for title, url in items:
-        # URLが "(URLなし)" の場合はタイトルのみ追加
-        item_text = f"\n{title}" + (f"\n{url}" if url != "(URLなし)" else "")
+        item_text = "\n" + _format_item(title, url)
         current_length = count_tweet_length(current_tweet_text)
         item_length = count_tweet_length(item_text)
 
@@ -58,36 +153,77 @@ def split_program(text, max_length=TWEET_MAX_LENGTH, header_length=0):
         if current_length + item_length <= limit:
             current_tweet_text += item_text
         else:
-            # 分割が発生
-            # current_tweet_text が空でないことを確認してから追加
             if current_tweet_text.strip():
                 split_tweets.append(current_tweet_text.strip())
             else:
-                # ヘッダー行のみで既に制限を超えていた、などの特殊ケースで発生する可能性
                 logger.warning("分割時に空のツイートを検知しました。")
 
             # 次のツイートの準備 (ヘッダーなしでアイテムから開始)
-            # URLがない場合も考慮
-            current_tweet_text = f"{title}" + (f"\n{url}" if url != "(URLなし)" else "")
-            # ★フラグ更新: これ以降はブロック内の最初のツイートではない
+            current_tweet_text = _format_item(title, url)
             is_first_tweet_in_block = False
 
-            # 分割直後のアイテムだけでも長すぎる場合のチェック
-            # 次のツイートの制限はヘッダーを含まない max_length
-            # ★修正箇所: チェックする制限を max_length にする
+            # 分割直後のアイテムだけでも長すぎる場合はスキップ
             if count_tweet_length(current_tweet_text) > max_length:
                 logger.error(f"分割後のツイート（アイテム単体）も長すぎます。スキップ: {current_tweet_text[:50]}...")
-                # エラー処理: アイテムをスキップするため、current_tweet_text を空にする
                 current_tweet_text = ""
-                # is_first_tweet_in_block は False のまま
 
-    # ループ終了後、最後の current_tweet_text が残っている場合に追加
     if current_tweet_text.strip():
         split_tweets.append(current_tweet_text.strip())
 
     logger.info(f"プログラムを {len(split_tweets)} 個のツイートに分割しました: {program_name_line[:30]}...")
     return split_tweets
 
+@tracing.traced("split", "text")
+def split_programs(programs, header_length, max_length=TWEET_MAX_LENGTH, splitter=split_program):
+    """
+    番組ブロックのリストを受け取り、制限を超えるブロックだけを分割したツイートのリストを返す。
+    ヘッダーが付くのはファイル先頭のブロック (1件目のツイート) のみ。
+    """
+    new_tweet_list = []
+    for i, program_text in enumerate(programs):
+        current_header_length = header_length if i == 0 else 0
+        if count_tweet_length(program_text) > max_length - current_header_length:
+            new_tweet_list.extend(splitter(program_text,
+                                           max_length=max_length,
+                                           header_length=current_header_length))
+        else:
+            # 分割不要なブロックはそのまま追加
+            new_tweet_list.append(program_text)
+    return new_tweet_list
+
+@tracing.traced("pack", "text")
+def pack_blocks(tweets, header_length, max_length=TWEET_MAX_LENGTH):
+    """
+    連続するツイート (番組ブロック) を、文字数制限に収まる範囲で1つのツイートにまとめる。
+
+    放送時間順を崩さないよう、隣り合うツイート同士のみを改行1つで結合する。
+    順序を固定した場合はこの貪欲法でツイート数が最小になる。
+    1件目のツイートには投稿時にヘッダーが付くため、その分だけ制限が短くなる。
+    """
+    packed = []
+    current = ""
+    current_length = 0
+    for tweet in tweets:
+        tweet = tweet.strip()
+        if not tweet:
+            continue
+        tweet_length = count_tweet_length(tweet)
+        if current:
+            limit = max_length - (header_length if not packed else 0)
+            # 改行1つ分 (+1) を加えても制限内なら結合する
+            if current_length + 1 + tweet_length <= limit:
+                current += "\n" + tweet
+                current_length += 1 + tweet_length
+                continue
+            packed.append(current)
+        current = tweet
+        current_length = tweet_length
+    if current:
+        packed.append(current)
+
+    logger.info(f"ツイートをまとめました: {len(tweets)} 件 -> {len(packed)} 件")
+    return packed
+
 def split_by_program(text):
     programs = re.findall(r"(^●.*?)(?=^●|\Z)", text, re.MULTILINE | re.DOTALL)
     program_list = [p.strip() for p in programs if p.strip()] # 前後の空白を除去し、空のブロックを除外
@@ -164,18 +300,8 @@ if __name__ == "__main__":
         # 分割処理
         new_tweet_list = []
         try: # 分割処理全体も try-except で囲むと、エラー時に復元しやすい
-            for i, program_text in enumerate(programs):
-                # 分割が必要かどうかのチェックは、分割前チェックと同じロジックで行う
-                current_limit = TWEET_MAX_LENGTH - (header_length if i == 0 else 0)
-                if count_tweet_length(program_text) > current_limit:
-                    # split_program 呼び出し (max_length と header_length を渡す)
-                    split_tweets = split_program(program_text,
-                                                 max_length=TWEET_MAX_LENGTH,
-                                                 header_length=(header_length if i == 0 else 0))
-                    new_tweet_list.extend(split_tweets)
-                else:
-                    # 分割不要なブロックはそのまま追加
-                    new_tweet_list.append(program_text)
+            # 分割が必要かどうかのチェックは、分割前チェックと同じロジックで行う
+            new_tweet_list = split_programs(programs, header_length)
 
             # 分割されたテキストをファイルに書き込む (間に空行を入れる)
             content_to_write = "\n\n".join(new_tweet_list) + "\n" # 最後に改行追加
@@ -0,0 +1,50 @@
+from benchmarks import bench_scrape
+from benchmarks.bench_scrape import compare, count_programs, inflate_configs, percentile, summarize_run
+
+
+def test_inflate_configs_duplicates_nhk_programs(tmp_path):
+    nhk, tvtokyo = count_programs("ini")
+
+    assert inflate_configs("ini", str(tmp_path / "same"), nhk + tvtokyo) == nhk + tvtokyo
+    assert inflate_configs("ini", str(tmp_path / "big"), 100) == 100
+    assert count_programs(str(tmp_path / "big")) == (100 - tvtokyo, tvtokyo)
+    assert "ドキュメント72時間 #2" in (tmp_path / "big" / "nhk_config.ini").read_text(encoding="utf-8")
+
+
+def test_summarize_run_reports_latency_and_throughput():
+    perf = {
+        "stages": {"scrape": 30.0},
+        "programs": {f"番組{i}": {"seconds": float(i), "status": "SUCCESS" if i % 2 else "NOT_FOUND"}
+                     for i in range(1, 21)},
+        "webdriver_commands": 400,
+        "memory": {"peak_total_rss_mb": 1800.0},
+    }
+    summary = summarize_run(perf, 31.2)
+
+    assert summary["programs"] == 20
+    assert summary["succeeded"] == 10
+    assert summary["programs_per_minute"] == 40.0
+    assert (summary["p50_task_seconds"], summary["p95_task_seconds"]) == (10.0, 19.0)
+    assert summary["webdriver_commands_per_program"] == 20.0
+    assert summary["peak_total_rss_mb"] == 1800.0
+    assert percentile([], 50) is None
+
+
+def test_run_suite_covers_every_combination(monkeypatch):
+    calls = []
+
+    def fake_replay(date, corpus_dir, config_dir, latency, workers=None, fake=False):
+        calls.append(workers)
+        perf = {"stages": {"scrape": 60.0 / workers},
+                "programs": {"番組A": {"seconds": 1.0, "status": "SUCCESS"}}, "webdriver_commands": 10}
+        return {"success": True, "seconds": 60.0 / workers, "perf": perf}
+
+    monkeypatch.setattr(bench_scrape, "replay", fake_replay)
+    result = bench_scrape.run_suite("20251003", [1, 4], [27, 100])
+
+    assert calls == [1, 4, 1, 4]
+    assert [(r["requested_programs"], r["workers"]) for r in result["runs"]] == [(27, 1), (27, 4), (100, 1), (100, 4)]
+    assert result["runs"][1]["programs_per_minute"] == 4.0
+
+    slower = {"runs": [dict(run, makespan_seconds=run["makespan_seconds"] * 2) for run in result["runs"]]}
+    assert compare(slower, result)[0]["makespan_ratio"] == 2.0
@@ -0,0 +1,92 @@
+"""
+テキスト処理のマイクロベンチマーク (benchmarks/bench_text.py) のテスト
+
+基準 (benchmarks/bench_text_baseline.json) と比べて、遅くなった・メモリが増えた関数がないことを確認する。
+実データでの比較は、pytest のカバレッジ計測 (トレーサー) の影響を受けないよう別のプロセスで --check を実行する。
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks import bench_text
+from benchmarks.bench_text import (
+    active_tracer, find_regressions, inflate_day, load_days, run_check, tweets_from_blocks,
+)
+from get_tweet import format_tweet_data
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = REPO_ROOT / "output"
+
+
+def _result(seconds, relative, peak_kb):
+    return {"seconds": seconds, "relative": relative, "peak_kb": peak_kb, "retained_blocks": 0}
+
+
+def test_inflate_day_repeats_program_blocks():
+    day = {"date": "20260105", "text": "●番組A(NHK BS 21:00-)\n・A\nhttps://example.com/a\n"}
+    inflated = inflate_day(day, 10)
+    assert inflated["date"] == "20260105"
+    assert inflated["text"].count("●番組A") == 10
+
+
+def test_tweets_rebuilt_from_archive_are_formatted_back():
+    blocks = ["●英雄たちの選択(NHK BS 21:00-)\n・古墳の時代\nhttps://t.co/abc",
+              "●モーサテ(テレ東 05:45-07:05)\n・特集\nhttps://example.com/x"]
+    tweets = tweets_from_blocks(blocks, "20260105")
+    assert len(tweets) == 1
+    assert format_tweet_data(tweets) == [blocks[0]]
+
+
+def test_find_regressions_uses_ratio_and_noise_floor():
+    baseline = {"results": {"split_program@10x": _result(0.1, 1.0, 1000),
+                            "split_by_program@1x": _result(0.001, 0.01, 10)}}
+    current = {"results": {"split_program@10x": _result(0.25, 2.5, 1200),
+                           "split_by_program@1x": _result(0.0015, 0.1, 60)}}
+    regressions = find_regressions(current, baseline)
+    # 短すぎる処理時間と小さいメモリの差は誤差として無視する
+    assert len(regressions) == 1
+    assert regressions[0].startswith("split_program@10x: 処理時間")
+
+    current["results"]["split_program@10x"] = _result(0.1, 1.0, 1600)
+    assert find_regressions(current, baseline) == ["split_program@10x: ピークメモリ 1600KB (基準 1000KB)"]
+
+
+def test_run_check_refuses_to_compare_under_a_tracer(tmp_path):
+    previous = sys.getprofile()
+    sys.setprofile(lambda frame, event, arg: None)
+    try:
+        assert active_tracer() is not None
+        with pytest.raises(RuntimeError, match="トレーサー"):
+            run_check(tmp_path)
+    finally:
+        sys.setprofile(previous)
+
+
+@pytest.mark.slow
+def test_text_pipeline_has_no_regressions():
+    if not load_days(OUTPUT_DIR, limit=1, complete=True):
+        pytest.skip("output/ に実データがありません")
+    # pytest-cov は環境変数を通じて子プロセスでもカバレッジを始めるため、その設定を外す
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith("COV_CORE_") and key != "COVERAGE_PROCESS_START"}
+    result = subprocess.run([sys.executable, "-m", "benchmarks.bench_text", "--check", "--output-dir", str(OUTPUT_DIR)],
+                            cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+
+
+def test_run_check_reports_only_persistent_regressions(monkeypatch, tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text('{"results": {"a@1x": {"seconds": 0.1, "relative": 1.0, "peak_kb": 100, '
+                        '"retained_blocks": 0}}}', encoding="utf-8")
+    # 計測は差し替えるので、カバレッジ計測中でも比べてよい
+    monkeypatch.setattr(bench_text, "active_tracer", lambda: None)
+    # 1回目だけ遅い (一時的な負荷) 場合は報告しない
+    runs = iter([3.0, 1.0])
+    monkeypatch.setattr(bench_text, "run_suite", lambda *a, **k: {"results": {"a@1x": _result(0.3, next(runs), 100)}})
+    assert run_check(tmp_path, baseline)[1] == []
+
+    monkeypatch.setattr(bench_text, "run_suite", lambda *a, **k: {"results": {"a@1x": _result(0.3, 3.0, 100)}})
+    assert run_check(tmp_path, baseline)[1] == ["a@1x: 処理時間 3.00 (基準 1.00, 3.0倍)"]
@@ -0,0 +1,94 @@
+"""
+check_links (投稿前のリンクチェック) のテスト
+
+ステータスを返し分けるローカルの HTTP サーバーに対して実際にチェックする。
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import check_links
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """/ok は 200, /gone は 404, /error は 500, /loop は自分自身へのリダイレクト, /moved は /ok へ"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self):
+        self.server.connections.add(self.client_address)
+        status, location = {
+            "/ok": (200, None), "/gone": (404, None), "/error": (500, None),
+            "/loop": (302, "/loop"), "/moved": (301, "/ok"),
+        }.get(self.path.split("?")[0], (404, None))
+        self.send_response(status)
+        if location:
+            self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_HEAD = _respond
+    do_GET = _respond
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_day_file(url):
+    return (
+        f"●NHKスペシャル(NHK総合 22:00-22:50)\n・正常\n{url}/ok\n\n"
+        f"●クローズアップ現代(NHK総合 19:30-19:57)\n・削除済み\n{url}/gone\n・リダイレクト\n{url}/moved\n\n"
+        f"●ドキュメント72時間(NHK総合 22:00-22:30)\n・サーバーエラー\n{url}/error\n\n"
+        f"●視点・論点(NHK Eテレ 12:50-13:00)\n・ループ\n{url}/loop\n\n"
+        "●所さん!事件ですよ(NHK総合 18:05-18:42)\n・タイトル\n(URL不明)\n\n"
+        f"●WBS(テレ東 22:00-22:58)\n・URLのないアイテム\n・次のアイテム\n{url}/ok\n"
+    )
+
+
+def test_check_links_flags_problems(server):
+    text = make_day_file(server.url)
+    resolver = check_links.UrlResolver(cache_path=None, timeout=2, max_workers=8)
+
+    problems = check_links.check_links(text, resolver)
+
+    assert [(p["line"], p["reason"]) for p in problems] == [
+        (7, "HTTP 404"),
+        (13, "HTTP 500"),
+        (17, "リダイレクトがループしています"),
+        (21, "URLのプレースホルダー: (URL不明)"),
+        (24, "URLがありません"),
+    ]
+    assert problems[0]["program"].startswith("●クローズアップ現代")
+
+
+def test_check_links_is_concurrent_and_reuses_connections(server):
+    """URL は同時に調べ、コネクションは使い回す"""
+    urls = "".join(f"●番組{i}(NHK総合 22:00-)\n・回{i}\n{server.url}/ok?{i}\n\n" for i in range(40))
+    resolver = check_links.UrlResolver(cache_path=None, timeout=2, max_workers=4)
+    start = time.perf_counter()
+    assert check_links.check_links(urls, resolver) == []
+    assert time.perf_counter() - start < 5
+    # 40件でも接続数はワーカー数以下
+    assert len(server.connections) <= 4
+
+
+def test_main_returns_nonzero_when_problems(server, tmp_path):
+    (tmp_path / "20250129.txt").write_text(
+        f"●NHKスペシャル(NHK総合 22:00-22:50)\n・正常\n{server.url}/ok\n", encoding="utf-8")
+    assert check_links.main("20250129", str(tmp_path)) == 0
+
+    (tmp_path / "20250130.txt").write_text(make_day_file(server.url), encoding="utf-8")
+    assert check_links.main("20250130", str(tmp_path)) == 1
+    assert check_links.main("20250131", str(tmp_path)) == 1
@@ -0,0 +1,105 @@
+"""
+偽の WebDriver (common/fake_webdriver.py) のテスト
+
+スクレイパーが使うセレクタ・属性・テキストがブラウザと同じように動くことと、
+NHK の一覧・詳細ページをブラウザなしでスクレイピングできることを確認する。
+"""
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+import scraping_news
+from common import episode_processor
+from common.fake_webdriver import FakeWebDriver, StaticWait
+from common.utils import Constants
+from scraping_news import NHKScraper
+
+LIST_URL = "https://www.web.nhk/tv/an/72hours/pl/series-tep-W3W8WRN8M3"
+EPISODE_URL = "https://www.web.nhk/tv/an/72hours/pl/series-tep-W3W8WRN8M3/ep/ABC"
+PLUS_URL = "https://plus.nhk.jp/watch/st/g1_2025100312345"
+
+LIST_HTML = """<!DOCTYPE html><html><head><title>ドキュメント72時間</title></head><body>
+<ul>
+  <li class="esl7kn2s"><a href="/tv/an/72hours/pl/series-tep-W3W8WRN8M3/ep/NEW">
+    <time>2025年10月10日(金) 午後10:00</time><strong>新しい回</strong></a></li>
+  <li class="esl7kn2s"><a href="/tv/an/72hours/pl/series-tep-W3W8WRN8M3/ep/ABC">
+    <time datetime="2025-10-03T22:00:00+09:00">2025年10月3日(金) 午後10:00</time>
+    <strong>秋の公園で　夜を過ごして</strong></a></li>
+</ul></body></html>"""
+
+EPISODE_HTML = """<!DOCTYPE html><html><head>
+<script type="application/ld+json">{"@type": "BroadcastEvent",
+  "startDate": "2025-10-03T22:00:00+09:00", "endDate": "2025-10-03T22:30:00+09:00"}</script>
+</head><body>
+<h1>秋の公園で　夜を過ごして</h1>
+<div class="detailed-memo-body"><span class="detailed-memo-headline">
+  <a href="https://plus.nhk.jp/watch/st/g1_2025100312345">NHKプラス配信はこちらからご覧ください</a></span></div>
+<div class="_1xkzxzo abc"><a href="./ABC/eyecatch"><img src="/img/eyecatch.jpg"></a></div>
+<iframe id="eyecatchIframe" src="https://www.web.nhk/st/g1_2025100312345?autoplay=1"></iframe>
+<p style="display: none">非表示</p>
+</body></html>"""
+
+
+@pytest.fixture
+def driver():
+    driver = FakeWebDriver({LIST_URL: LIST_HTML, EPISODE_URL: EPISODE_HTML})
+    driver.get(LIST_URL)
+    return driver
+
+
+def test_css_selectors_and_text_match_the_browser(driver):
+    episodes = driver.find_elements(By.CSS_SELECTOR, "li.esl7kn2s")
+    assert len(episodes) == 2
+    assert episodes[1].find_element(By.CSS_SELECTOR, "time").text == "2025年10月3日(金) 午後10:00"
+    assert episodes[1].find_element(By.CSS_SELECTOR, "strong").text == "秋の公園で　夜を過ごして"
+    # 相対 URL の href はブラウザと同じく絶対 URL になる
+    link = episodes[1].find_element(By.CSS_SELECTOR, Constants.CSSSelector.EPISODE_URL_TAG)
+    assert link.get_attribute("href") == EPISODE_URL
+    assert [e.get_attribute("datetime") for e in driver.find_elements(By.CSS_SELECTOR, "ul > li time[datetime]")] \
+        == ["2025-10-03T22:00:00+09:00"]
+    assert driver.find_elements(By.CSS_SELECTOR, "li:not(.esl7kn2s), h1") == []
+    assert driver.title == "ドキュメント72時間"
+    with pytest.raises(NoSuchElementException):
+        driver.find_element(By.ID, "eyecatchIframe")
+
+
+def test_xpath_json_ld_and_hidden_elements(driver):
+    driver.get(EPISODE_URL)
+    link = driver.find_element(By.XPATH, Constants.CSSSelector.NHK_PLUS_URL_SPAN)
+    assert link.get_attribute("href") == PLUS_URL
+    assert link.find_element(By.XPATH, "..").get_attribute("class") == "detailed-memo-headline"
+
+    script = driver.find_element(By.CSS_SELECTOR, 'script[type="application/ld+json"]')
+    assert '"endDate": "2025-10-03T22:30:00+09:00"' in script.get_attribute("innerHTML")
+    assert script.text == ""
+    assert driver.find_element(By.TAG_NAME, "p").is_displayed() is False
+    assert driver.find_element(By.TAG_NAME, "body").text.splitlines()[0] == "秋の公園で　夜を過ごして"
+    assert driver.execute_script("return document.readyState") == "complete"
+    # Selenium と同じく CLASS_NAME は ".{値}" の CSS セレクタとして探す
+    assert driver.find_elements(By.CLASS_NAME, Constants.CSSSelector.EYECATCH_IMAGE_DIV) == []
+    assert len(driver.find_elements(By.CSS_SELECTOR, Constants.CSSSelector.EYECATCH_IMAGE_DIV)) == 1
+
+
+def test_static_wait_evaluates_once_without_sleeping(driver):
+    wait = StaticWait(driver, 10)
+    assert wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "strong"))).text == "新しい回"
+    with pytest.raises(TimeoutException):
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1")))
+
+
+def test_nhk_scraper_runs_against_saved_pages(monkeypatch):
+    monkeypatch.setattr(scraping_news, "WebDriverWait", StaticWait)
+    monkeypatch.setattr(episode_processor, "WebDriverWait", StaticWait)
+    driver = FakeWebDriver({LIST_URL: LIST_HTML, EPISODE_URL: EPISODE_HTML})
+    commands = []
+    driver.execute = lambda command, params=None: commands.append(command)
+    scraper = NHKScraper({"ドキュメント72時間": {"name": "ドキュメント72時間", "url": LIST_URL, "channel": "NHK総合"}})
+
+    status, text = scraper.get_program_info_with_driver(driver, "ドキュメント72時間", "20251003")
+
+    assert status == scraping_news.ScrapeStatus.SUCCESS
+    assert text == f"●ドキュメント72時間(NHK総合 22:00-22:30)\n・秋の公園で　夜を過ごして\n{PLUS_URL}\n"
+    assert driver.visited == [LIST_URL, EPISODE_URL]
+    # 各操作は execute を通るため、WebDriver コマンドの数を数えられる
+    assert commands.count("get") == 2 and "findElements" in commands
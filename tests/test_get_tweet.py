@@ -0,0 +1,203 @@
+"""
+get_tweet の期間検索 (ページング・放送日ごとの振り分け) のテスト
+
+X API スタンドインサーバー (benchmarks/x_api_server.py) に対して実際に検索する。
+"""
+from datetime import datetime, timedelta, timezone
+import pytest
+from benchmarks.x_api_server import XApiServer, XApiState
+from common.rate_limiter import RateLimitLedger
+from common.tweet_cache import TweetCache
+from common.url_resolver import UrlResolver
+
+JST = timezone(timedelta(hours=9))
+
+
+@pytest.fixture
+def get_tweet_module(monkeypatch, tmp_path):
+    monkeypatch.setenv("BEARER_TOKEN", "test_bearer_token")
+    import get_tweet
+    monkeypatch.setattr(get_tweet, "rate_ledger", RateLimitLedger(str(tmp_path / "rate_limits.sqlite3")))
+    monkeypatch.setattr(get_tweet, "tweet_cache", TweetCache(str(tmp_path / "tweet_cache")))
+    # テスト用のツイートの t.co は実在しないので、短縮URLの展開は行わない
+    monkeypatch.setattr(get_tweet, "expand_short_urls", lambda formatted_list, resolver=None: formatted_list)
+    return get_tweet
+
+
+@pytest.fixture
+def server(monkeypatch):
+    state = XApiState()
+    # 放送日 20250128 (投稿は前日 01/27): 130件 -> 100件ずつのページングが必要
+    for i in range(130):
+        state.add_tweet(f"NHK BS 1月28日(火) 午後11:00 アナザーストーリーズ\n第{i}回\nhttps://t.co/a{i}",
+                        created_at=datetime(2025, 1, 27, 8, 0, tzinfo=JST) + timedelta(minutes=i))
+    # 放送日 20250129 (投稿は前日 01/28 の 23:59 JST = UTC では 01/28 14:59)
+    state.add_tweet("NHK BS 1月29日(水) 午後11:00 英雄たちの選択\n関ヶ原\nhttps://t.co/b",
+                    created_at=datetime(2025, 1, 28, 23, 59, tzinfo=JST))
+    # 放送日 20250130 は 0件
+    server = XApiServer(state).start()
+    monkeypatch.setenv("X_API_BASE_URL", server.base_url)
+    yield server
+    server.stop()
+
+
+def test_search_range_paginates_and_buckets(get_tweet_module, server):
+    """期間全体を1つのクエリで検索し、next_token をたどって放送日ごとに振り分ける"""
+    buckets = get_tweet_module.search_tweets_range("20250128", "20250130", "nhk_docudocu", 100)
+
+    assert {date: len(tweets) for date, tweets in buckets.items()} == {
+        "20250128": 130, "20250129": 1, "20250130": 0,
+    }
+    # 3日分でも 131件 / 100件 = 2リクエスト
+    assert server.state.request_count == 2
+
+
+def test_search_tweets_single_day(get_tweet_module, server):
+    """1日分の検索も全ページを取得する (以前は20件で打ち切られていた)"""
+    tweets = get_tweet_module.search_tweets("20250128", "nhk_docudocu", 100)
+    assert len(tweets) == 130
+    assert get_tweet_module.search_tweets("20250130", "nhk_docudocu", 100) is None
+
+
+def test_main_writes_tweet_file_for_each_date(get_tweet_module, server, tmp_path, monkeypatch):
+    """期間指定の main は放送日ごとに YYYYMMDD_tweet.txt を出力する"""
+    monkeypatch.chdir(tmp_path)
+    assert get_tweet_module.main("20250128", "20250130") is True
+    assert (tmp_path / "output" / "20250128_tweet.txt").exists()
+    assert (tmp_path / "output" / "20250129_tweet.txt").read_text(encoding="utf-8").startswith("●英雄たちの選択")
+    assert not (tmp_path / "output" / "20250130_tweet.txt").exists()
+
+
+def test_main_distinguishes_no_tweets_from_format_failure(get_tweet_module, server, tmp_path, monkeypatch):
+    """ツイートがない日だけなら None、ツイートはあったがフォーマットできなかった場合は False"""
+    monkeypatch.chdir(tmp_path)
+    assert get_tweet_module.main("20250130") is None
+
+    monkeypatch.setattr(get_tweet_module, "format_tweet_data", lambda tweets, program_names=None: [])
+    assert get_tweet_module.main("20250128", "20250130") is False
+    assert not (tmp_path / "output" / "20250128_tweet.txt").exists()
+
+
+def test_fetch_uses_since_id_for_cached_dates(get_tweet_module, server):
+    """2回目の取得はキャッシュ済みの最新IDより新しいツイートだけを検索し、キャッシュと合わせて返す"""
+    first = get_tweet_module.fetch_tweets_range("20250128", "20250130", "nhk_docudocu")
+    assert len(first["20250128"]) == 130
+    requests_after_first = server.state.request_count
+
+    server.state.add_tweet("NHK BS 1月30日(木) 午後11:00 Asia Insight\n新作\nhttps://t.co/c",
+                           created_at=datetime(2025, 1, 29, 12, 0, tzinfo=JST))
+    second = get_tweet_module.fetch_tweets_range("20250128", "20250130", "nhk_docudocu")
+
+    # 新しい1件だけなので1リクエストで済む
+    assert server.state.request_count - requests_after_first == 1
+    assert {date: len(tweets) for date, tweets in second.items()} == {
+        "20250128": 130, "20250129": 1, "20250130": 1,
+    }
+
+
+def test_reformat_rebuilds_from_cache_without_api(get_tweet_module, server, tmp_path, monkeypatch):
+    """--reformat はキャッシュだけから YYYYMMDD_tweet.txt を作り直す"""
+    monkeypatch.chdir(tmp_path)
+    assert get_tweet_module.main("20250128", "20250130") is True
+    output = tmp_path / "output" / "20250129_tweet.txt"
+    expected = output.read_text(encoding="utf-8")
+    output.unlink()
+    requests_before = server.state.request_count
+
+    assert get_tweet_module.main("20250128", "20250130", reformat=True) is True
+    assert output.read_text(encoding="utf-8") == expected
+    assert server.state.request_count == requests_before
+
+
+def test_since_id_requires_cached_prefix(tmp_path):
+    """先頭から連続して取得済みでない場合は since_id を使わない (古い日付の取りこぼし防止)"""
+    cache = TweetCache(str(tmp_path))
+    cache.add("user", "20250130", [{"id": "30", "text": "a", "created_at": "2025-01-29T03:00:00.000Z"}])
+    assert cache.since_id("user", ["20250128", "20250129", "20250130"]) is None
+
+    cache.add("user", "20250128", [{"id": "10", "text": "b", "created_at": "2025-01-27T03:00:00.000Z"}])
+    cache.add("user", "20250128", [{"id": "10", "text": "b", "created_at": "2025-01-27T03:00:00.000Z"}])
+    assert len(cache.load("user", "20250128")) == 1
+    assert cache.since_id("user", ["20250128", "20250129", "20250130"]) is None
+    assert cache.since_id("user", ["20250128", "20250129"]) == "10"
+
+
+def test_pack_program_names_fits_query_limit(get_tweet_module):
+    """番組名は上限以内のできるだけ少ないクエリにまとめる"""
+    names = [f"番組{i:02d}" + "あ" * (i % 7) for i in range(60)]
+    chunks = get_tweet_module.pack_program_names(names, "nhk_docudocu", max_length=120)
+
+    assert sorted(name for chunk in chunks for name in chunk) == sorted(names)
+    for chunk in chunks:
+        assert len(get_tweet_module.create_search_queries(chunk, "nhk_docudocu")[0]) <= 120
+    # 全体の文字数から求めた下限 + 1 以内に収まる
+    total = sum(len(name) + len(" OR ") for name in names)
+    per_query = 120 - len("from:nhk_docudocu ()") + len(" OR ")
+    assert len(chunks) <= -(-total // per_query) + 1
+    # 1つのクエリに収まる場合は分割しない
+    assert get_tweet_module.pack_program_names(get_tweet_module.PROGRAM_NAMES, "nhk_docudocu") == [
+        get_tweet_module.PROGRAM_NAMES
+    ]
+
+
+def test_load_tweet_config(get_tweet_module, tmp_path):
+    """設定ファイルからアカウントごとの番組名を読み込み、ない場合は既定値を使う"""
+    config = tmp_path / "tweet_config.ini"
+    config.write_text(
+        "[account_1]\nuser = nhk_docudocu\nprograms =\n    アナザーストーリーズ\n    英雄たちの選択\n\n"
+        "[account_2]\nuser = other_station\nprograms = 映像の世紀\n",
+        encoding="utf-8",
+    )
+    assert get_tweet_module.load_tweet_config(str(config)) == {
+        "nhk_docudocu": ["アナザーストーリーズ", "英雄たちの選択"],
+        "other_station": ["映像の世紀"],
+    }
+    assert get_tweet_module.load_tweet_config(str(tmp_path / "missing.ini")) == {
+        "nhk_docudocu": get_tweet_module.PROGRAM_NAMES,
+    }
+
+
+def test_harvest_multiple_accounts_with_chunked_queries(get_tweet_module, server, monkeypatch):
+    """複数アカウントを並行して検索し、クエリを分割しても重複なく放送日ごとにまとめる"""
+    server.state.add_tweet("NHK BS 1月29日(水) 午後10:00 映像の世紀\n第1集\nhttps://t.co/d",
+                           created_at=datetime(2025, 1, 28, 9, 0, tzinfo=JST), author="other_station")
+    # 2つの番組名を含むツイートは両方のクエリでヒットする
+    server.state.add_tweet("NHK BS 1月29日(水) 午後9:00 映像の世紀 バタフライエフェクト\n特集\nhttps://t.co/e",
+                           created_at=datetime(2025, 1, 28, 10, 0, tzinfo=JST), author="other_station")
+    # クエリを番組名1つずつに分割させる
+    monkeypatch.setattr(get_tweet_module, "QUERY_MAX_LENGTH", len("from:other_station (バタフライエフェクト)"))
+
+    accounts = {"nhk_docudocu": ["英雄たちの選択"], "other_station": ["映像の世紀", "バタフライエフェクト"]}
+    buckets = get_tweet_module.harvest_tweets("20250129", "20250129", accounts)
+
+    texts = sorted(tweet["text"].splitlines()[1] for tweet in buckets["20250129"])
+    assert texts == sorted(["第1集", "特集", "関ヶ原"])
+
+
+def test_formatted_block_uses_expanded_url(get_tweet_module, server):
+    """entities の expanded_url をそのまま使い、展開先がない場合のみ t.co を使う"""
+    server.state.add_tweet("NHK BS 1月30日(木) 午後11:00 アナザーストーリーズ\n新作\nhttps://t.co/x",
+                           created_at=datetime(2025, 1, 29, 9, 0, tzinfo=JST),
+                           expanded_urls={"https://t.co/x": "https://www.nhk.jp/p/anotherstories/ts/ABC/episode/te/XYZ/"})
+    requests_before = server.state.request_count
+    buckets = get_tweet_module.search_tweets_range("20250129", "20250130", "nhk_docudocu", 100)
+    # 展開のための追加のリクエストはない
+    assert server.state.request_count - requests_before == 1
+
+    formatted = get_tweet_module.format_tweet_data(buckets["20250130"]) + get_tweet_module.format_tweet_data(buckets["20250129"])
+    assert formatted[0].endswith("\nhttps://www.nhk.jp/p/anotherstories/ts/ABC/episode/te/XYZ/")
+    assert formatted[1].endswith("\nhttps://t.co/b")
+
+
+def test_expand_short_urls_uses_resolver_cache(tmp_path):
+    """entities で展開できなかった t.co はリゾルバー (キャッシュ済みなら HTTP なし) で展開する"""
+    import get_tweet
+    resolver = UrlResolver(str(tmp_path / "url_cache.sqlite3"))
+    resolver.store("https://t.co/b", "https://www.nhk.jp/p/senkyo/ts/XYZ/", 200)
+
+    blocks = ["●英雄たちの選択(NHK BS 23:00-)\n・関ヶ原\nhttps://t.co/b",
+              "●アナザーストーリーズ(NHK BS 23:00-)\n・新作\nhttps://www.nhk.jp/p/as/"]
+    assert get_tweet.expand_short_urls(blocks, resolver) == [
+        "●英雄たちの選択(NHK BS 23:00-)\n・関ヶ原\nhttps://www.nhk.jp/p/senkyo/ts/XYZ/",
+        blocks[1],
+    ]
@@ -0,0 +1,34 @@
+"""
+インポート時間のテスト (python -X importtime)
+
+テキスト処理だけのサブコマンド (split / merge / tweet) が Selenium・pytz・tweepy などを
+インポート時に読み込まず、すぐに起動できることを確認する。
+"""
+import os
+import subprocess
+import sys
+import pytest
+from benchmarks.bench_import import measure_import, heavy_imports, REPO_ROOT
+
+
+@pytest.mark.parametrize("module", ["main", "split_text", "merge_text", "tweet", "common.constants", "common.text_utils"])
+def test_text_modules_do_not_import_heavy_libraries(module):
+    assert heavy_imports(measure_import(module)) == []
+
+
+def test_importing_tweet_without_credentials_does_not_exit():
+    """tweet.py はインポートしただけでは終了せず、API クライアントも作らない"""
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("API_KEY", "API_SECRET", "ACCESS_TOKEN", "ACCESS_SECRET", "BEARER_TOKEN")}
+    result = subprocess.run([sys.executable, "-c", "import tweet; print(hasattr(tweet, 'client'))"],
+                            cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout.strip() == "False"
+
+
+def test_utils_keeps_text_functions_importable():
+    """common.utils からも従来どおりテキスト処理の関数をインポートできる"""
+    from common.utils import count_tweet_length, sort_blocks_by_time
+    from common import text_utils
+    assert count_tweet_length is text_utils.count_tweet_length
+    assert sort_blocks_by_time is text_utils.sort_blocks_by_time
@@ -0,0 +1,66 @@
+import logging
+import multiprocessing
+
+import pytest
+
+from common.log_queue import configure_worker_logging, start_log_listener, task_context, TaskContextFilter
+
+
+def _init(log_queue, level):
+    configure_worker_logging(log_queue, level)
+
+
+def _work(program):
+    with task_context(program):
+        logging.getLogger("scraping_news.worker").info("取得しました: %s", program)
+        logging.getLogger("scraping_news.worker").debug("表示されない: %s", program)
+    return program
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_worker_logs_reach_parent_with_context(capfd):
+    log_queue, listener = start_log_listener(logging.INFO)
+    try:
+        with multiprocessing.Pool(2, initializer=_init, initargs=(log_queue, logging.INFO)) as pool:
+            assert sorted(pool.map(_work, ["番組A", "番組B"])) == ["番組A", "番組B"]
+    finally:
+        listener.stop()
+
+    err = capfd.readouterr().err
+    lines = [line for line in err.splitlines() if "取得しました" in line]
+    assert len(lines) == 2
+    for name in ("番組A", "番組B"):
+        line = next(line for line in lines if line.endswith(name))
+        assert f" {name}]" in line
+        assert "[pid=" in line
+    assert "表示されない" not in err
+
+
+def test_messages_below_level_are_not_formatted(restore_root_logger):
+    class Expensive:
+        calls = 0
+
+        def __str__(self):
+            Expensive.calls += 1
+            return "expensive"
+
+    configure_worker_logging(multiprocessing.Queue(), logging.INFO)
+    logging.getLogger("scraping_news").debug("設定内容: %s", Expensive())
+    assert Expensive.calls == 0
+
+
+def test_task_context_is_restored():
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+    with task_context("番組A"):
+        TaskContextFilter().filter(record)
+        assert record.program == "番組A"
+    TaskContextFilter().filter(record)
+    assert record.program == "-"
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import pytest
+
+from common import memory
+from common.perf_history import format_report
+
+
+@pytest.fixture
+def child_process():
+    process = subprocess.Popen([sys.executable, "-c", "import time; data = bytearray(8 * 1024 * 1024); time.sleep(30)"])
+    yield process
+    process.kill()
+    process.wait()
+
+
+@pytest.fixture(params=["proc", "psutil"])
+def backend(request, monkeypatch):
+    """psutil があれば psutil と /proc の両方で確認する"""
+    if request.param == "proc":
+        if not os.path.exists("/proc/self/statm"):
+            pytest.skip("/proc がありません")
+        monkeypatch.setattr(memory, "psutil", None)
+    elif memory.psutil is None:
+        pytest.skip("psutil がインストールされていません")
+    return request.param
+
+
+def test_process_rss_and_descendants(backend, child_process):
+    assert memory.process_rss(os.getpid()) > 0
+    assert child_process.pid in memory.descendant_pids(os.getpid())
+    assert memory.process_rss(999_999_999) is None
+
+
+def test_sampler_records_own_and_children_rss(backend, child_process):
+    with memory.RssSampler(interval=0.01) as sampler:
+        pass
+    summary = sampler.summary()
+    assert summary["peak_rss_mb"] > 0
+    assert summary["peak_children_rss_mb"] > 0
+    assert summary["peak_total_rss_mb"] >= summary["peak_rss_mb"] + summary["peak_children_rss_mb"] - 0.2
+
+
+def test_track_allocations_reports_peak_and_top_lines():
+    results = {}
+    with memory.track_allocations("split", results):
+        data = [str(i) * 10 for i in range(20000)]
+    assert results["split"]["peak_kb"] > 500
+    assert results["split"]["net_kb"] > 500
+    assert any("test_memory.py" in line for line in results["split"]["top"])
+    assert not tracemalloc.is_tracing()
+    del data
+
+
+def test_report_shows_memory_hogs():
+    run = {"kind": "scrape", "total_seconds": 10, "memory": {"peak_rss_mb": 80, "peak_total_rss_mb": 2400},
+           "programs": {"番組A": {"seconds": 3, "peak_total_rss_mb": 900},
+                        "番組B": {"seconds": 3, "peak_total_rss_mb": 400}},
+           "allocations": {"merge": {"peak_kb": 120}}}
+    report = format_report([run], [])
+    assert "ワーカーと Chrome を含めた合計 2400MB" in report
+    assert "メモリの多い番組: 番組A 900MB, 番組B 400MB" in report
+    assert "割り当て (merge): ピーク 120KB" in report
@@ -0,0 +1,88 @@
+"""
+merge_text のストリーミングマージのテスト
+"""
+import pytest
+from unittest.mock import patch
+import merge_text
+from merge_text import merge_text_sources, sort_and_merge_text, UnsortedSourceError, merge_block_sources
+
+
+def _block(name, time, title):
+    return f"●{name}(NHK総合 {time}-)\n・{title}\nhttps://example.com/{title}"
+
+
+def _write(path, blocks):
+    path.write_text("\n\n".join(blocks) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_merge_two_sorted_sources(tmp_path):
+    """時間順の2ファイルが1パスで時間順にマージされ、元ファイルはバックアップされる"""
+    scraped = [_block("A", "07:00", "a"), _block("C", "21:00", "c")]
+    tweets = [_block("B", "11:00", "b"), _block("D", "23:00", "d")]
+    file2 = _write(tmp_path / "20250101.txt", scraped)
+    file1 = _write(tmp_path / "20250101_tweet.txt", tweets)
+    backup = tmp_path / "20250101_before-merge.txt"
+
+    sort_and_merge_text(file1, file2, file2, str(backup))
+
+    merged = (tmp_path / "20250101.txt").read_text(encoding="utf-8")
+    assert merged == "\n\n".join([scraped[0], tweets[0], scraped[1], tweets[1]]) + "\n"
+    assert backup.read_text(encoding="utf-8") == "\n\n".join(scraped) + "\n"
+    # 一時ファイルが残っていない
+    assert sorted(p.name for p in tmp_path.iterdir()) == \
+        ["20250101.txt", "20250101_before-merge.txt", "20250101_tweet.txt"]
+
+
+def test_merge_n_sources_keeps_source_order_for_ties(tmp_path):
+    """N 個の入力に対応し、同時刻のブロックは入力順に並ぶ"""
+    paths = [
+        _write(tmp_path / f"src{i}.txt", [_block(f"S{i}", "10:00", f"x{i}"), _block(f"S{i}", f"1{i + 1}:30", f"y{i}")])
+        for i in range(3)
+    ]
+    output = tmp_path / "out.txt"
+
+    assert merge_text_sources(paths, str(output)) == 6
+
+    headers = [line for line in output.read_text(encoding="utf-8").splitlines() if line.startswith("●")]
+    assert headers == [
+        "●S0(NHK総合 10:00-)", "●S1(NHK総合 10:00-)", "●S2(NHK総合 10:00-)",
+        "●S0(NHK総合 11:30-)", "●S1(NHK総合 12:30-)", "●S2(NHK総合 13:30-)",
+    ]
+
+
+def test_unsorted_source_falls_back_to_sort(tmp_path):
+    """時間順でない入力があっても、全件ソートと同じ結果になる"""
+    scraped = [_block("A", "07:00", "a"), _block("C", "21:00", "c")]
+    tweets = [_block("D", "23:00", "d"), _block("B", "11:00", "b")]  # 新しい順
+    file2 = _write(tmp_path / "a.txt", scraped)
+    file1 = _write(tmp_path / "t.txt", tweets)
+
+    with pytest.raises(UnsortedSourceError):
+        list(merge_block_sources([file2, file1]))
+
+    merge_text_sources([file2, file1], file2)
+    merged = (tmp_path / "a.txt").read_text(encoding="utf-8")
+    assert merged == "\n\n".join([scraped[0], tweets[1], scraped[1], tweets[0]]) + "\n"
+
+
+def test_output_untouched_on_write_error(tmp_path):
+    """書き込みに失敗しても出力ファイルは元のまま残る"""
+    scraped = [_block("A", "07:00", "a")]
+    file2 = _write(tmp_path / "a.txt", scraped)
+    file1 = _write(tmp_path / "t.txt", [_block("B", "11:00", "b")])
+    original = (tmp_path / "a.txt").read_text(encoding="utf-8")
+
+    with patch.object(merge_text, "_write_blocks", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            merge_text_sources([file2, file1], file2, str(tmp_path / "backup.txt"))
+
+    assert (tmp_path / "a.txt").read_text(encoding="utf-8") == original
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.txt", "backup.txt", "t.txt"]
+
+
+def test_missing_tweet_file_skips_merge(tmp_path):
+    """ツイートファイルがない場合は何もしない (従来通り)"""
+    file2 = _write(tmp_path / "a.txt", [_block("A", "07:00", "a")])
+    sort_and_merge_text(str(tmp_path / "t.txt"), file2, file2, str(tmp_path / "b.txt"))
+    assert not (tmp_path / "b.txt").exists()
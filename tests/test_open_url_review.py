@@ -0,0 +1,48 @@
+"""
+open_url のレビューページモードのテスト
+"""
+import open_url
+
+NHK_PROGRAMS = {"NHKスペシャル": {"url": "https://www.web.nhk/tv/an/special/pl/series-tep-2NY2QQLPM3"}}
+TVTOKYO_PROGRAMS = {"WBS": {"urls": ["https://txbiz.tv-tokyo.co.jp/wbs/feature",
+                                     "https://txbiz.tv-tokyo.co.jp/wbs/trend_tamago",
+                                     "https://txbiz.tv-tokyo.co.jp/wbs/oa"]}}
+
+DAY_FILE = (
+    "●NHKスペシャル(NHK総合 22:00-22:50)\n・幻のカニ\nhttps://www.web.nhk/tv/an/special/pl/series-tep-2NY2QQLPM3/ep/Z84W67RN6K\n\n"
+    "●WBS(テレ東 22:00-22:58)\n・特集\nhttps://txbiz.tv-tokyo.co.jp/wbs/feature/post_1\n"
+    "・トレたま\nhttps://txbiz.tv-tokyo.co.jp/wbs/trend_tamago/post_2\n\n"
+    "●映像の世紀(NHK BS 22:00-)\n・第1集\nhttps://www.nhk.jp/p/ts/XYZ/\n"
+)
+
+
+def test_review_entry_uses_wbs_content_type_routing():
+    block = DAY_FILE.split("\n\n")[1]
+    entry = open_url.build_review_entry(block, NHK_PROGRAMS, TVTOKYO_PROGRAMS)
+    assert entry["source"] == "テレ東"
+    assert set(entry["list_urls"]) == {"https://txbiz.tv-tokyo.co.jp/wbs/feature",
+                                       "https://txbiz.tv-tokyo.co.jp/wbs/trend_tamago"}
+    assert entry["detail_urls"] == ["https://txbiz.tv-tokyo.co.jp/wbs/feature/post_1",
+                                    "https://txbiz.tv-tokyo.co.jp/wbs/trend_tamago/post_2"]
+
+
+def test_review_page_contains_every_block_and_opens_once(tmp_path, monkeypatch):
+    (tmp_path / "20260101.txt").write_text(DAY_FILE, encoding="utf-8")
+    opened = []
+    monkeypatch.setattr(open_url.webbrowser, "open", opened.append)
+    monkeypatch.setattr(open_url, "parse_programs_config",
+                        lambda path: NHK_PROGRAMS if "nhk" in path else TVTOKYO_PROGRAMS)
+    monkeypatch.setattr(open_url.time, "sleep", lambda seconds: (_ for _ in ()).throw(AssertionError("sleep")))
+
+    assert open_url.review_main("20260101", str(tmp_path)) is True
+
+    page = (tmp_path / "20260101_review.html").read_text(encoding="utf-8")
+    assert opened == [(tmp_path / "20260101_review.html").resolve().as_uri()]
+    assert page.count("<section") == 3
+    assert "https://www.web.nhk/tv/an/special/pl/series-tep-2NY2QQLPM3" in page
+    assert "https://txbiz.tv-tokyo.co.jp/wbs/trend_tamago/post_2" in page
+    assert "設定なし" in page  # 映像の世紀は設定にない
+
+
+def test_review_main_without_day_file(tmp_path):
+    assert open_url.review_main("20260102", str(tmp_path), open_browser=False) is False
@@ -0,0 +1,137 @@
+from unittest.mock import MagicMock
+
+from common.perf_history import PerfHistory, StageTimer, find_regressions, format_report
+from common.utils import ScrapeStatus
+
+
+def _run(total, stages=None, programs=None, kind="scrape"):
+    return {"kind": kind, "date": "20250101", "total_seconds": total, "stages": stages or {},
+            "programs": {name: {"seconds": sec, "status": "SUCCESS"} for name, sec in (programs or {}).items()}}
+
+
+def test_history_roundtrip_filters_by_kind(tmp_path):
+    history = PerfHistory(str(tmp_path / "perf_history.jsonl"))
+    history.append(_run(10))
+    history.append(_run(20, kind="all"))
+    with (tmp_path / "perf_history.jsonl").open("a", encoding="utf-8") as f:
+        f.write("{broken\n")
+
+    assert [r["total_seconds"] for r in history.load()] == [10, 20]
+    assert [r["total_seconds"] for r in history.load("all")] == [20]
+    assert "recorded_at" in history.load()[0]
+
+
+def test_stage_timer_accumulates():
+    timer = StageTimer()
+    with timer.stage("scrape"):
+        pass
+    timer.add("scrape", 1.5)
+    assert 1.5 <= timer.stages["scrape"] < 2.0
+    assert timer.total >= 0
+
+
+def test_find_regressions_flags_slower_stage_and_program():
+    runs = [_run(60, {"scrape": 50}, {"番組A": 10, "番組B": 3}) for _ in range(5)]
+    runs.append(_run(95, {"scrape": 80}, {"番組A": 30, "番組B": 4.4, "新番組": 100}))
+
+    regressions = find_regressions(runs)
+    flagged = {(r["kind"], r["name"]) for r in regressions}
+    # 番組B は 1.5倍弱、新番組は比べる履歴がないので対象外
+    assert flagged == {("program", "番組A"), ("stage", "scrape"), ("total", "total")}
+    assert regressions[0]["name"] == "番組A"
+    assert "番組A: 30.0秒 (基準 10.0秒, 3.0倍)" in format_report(runs, regressions)
+
+
+def test_small_absolute_slowdowns_are_ignored():
+    runs = [_run(1.0, {"split": 0.2}), _run(1.0, {"split": 0.2}), _run(2.5, {"split": 1.0})]
+    assert find_regressions(runs) == []
+    assert "遅くなったステージ・番組はありません" in format_report(runs, [])
+
+
+def test_fetch_single_program_returns_metrics(monkeypatch):
+    import scraping_news
+
+    driver = MagicMock()
+    driver.execute.return_value = {"value": None}
+    monkeypatch.setattr(scraping_news, "worker_driver", driver)
+    monkeypatch.setattr(scraping_news, "worker_command_count", 0)
+    scraping_news._count_webdriver_commands(driver)
+
+    def fake_fetch(self, drv, program_name, target_date):
+        drv.execute("get", {"url": "https://example.com"})
+        drv.execute("findElements", {})
+        return ScrapeStatus.SUCCESS, "●番組A\n"
+
+    monkeypatch.setattr(scraping_news.NHKScraper, "get_program_info_with_driver", fake_fetch)
+    result = scraping_news.fetch_single_program(("nhk", "番組A", {"番組A": {}}, {}, "20250101"))
+
+    assert result[:3] == ("番組A", ScrapeStatus.SUCCESS, "●番組A\n")
+    assert result[3]["webdriver_commands"] == 2
+    assert result[3]["seconds"] >= 0
+    assert result[3]["peak_rss_mb"] > 0
+    assert scraping_news._process_fetch_result(result, [], MagicMock()) == ("番組A", "完了 (1件)")
+
+
+def test_perf_report_command(tmp_path, monkeypatch, capsys):
+    import main
+
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    history = PerfHistory(str(tmp_path / "perf_history.jsonl"))
+    assert main.run_perf_report() is True
+    for total in (10, 10, 30):
+        history.append(_run(total, {"scrape": total}))
+
+    assert main.run_perf_report(kind="scrape") is False
+    out = capsys.readouterr().out
+    assert "[ステージ] scrape: 30.0秒" in out
+    assert main.run_perf_report(kind="all") is True
+
+
+def test_all_record_includes_scrape_metrics_and_failed_runs(tmp_path, monkeypatch):
+    import argparse
+    import main
+    import scraping_news
+
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    scrape_record = dict(_run(12, {"scrape": 12}, {"番組A": 5.0}), num_workers=6, webdriver_commands=40,
+                         memory={"peak_total_rss_mb": 900.0})
+    monkeypatch.setattr(scraping_news, "last_perf_record", scrape_record)
+
+    def failing_get_tweets(target_date):
+        raise RuntimeError("検索に失敗")
+
+    monkeypatch.setattr(main, "run_scrape", lambda target_date: True)
+    monkeypatch.setattr(main, "get_tweets", failing_get_tweets)
+    args = argparse.Namespace(command="all", debug=False)
+    assert main.run_command_for(args, "20250101") == 1
+
+    [record] = PerfHistory(str(tmp_path / "perf_history.jsonl")).load("all")
+    assert record["success"] is False
+    assert set(record["stages"]) == {"scrape", "get-tweets"}
+    assert record["programs"] == scrape_record["programs"]
+    assert (record["num_workers"], record["webdriver_commands"]) == (6, 40)
+    assert record["memory"] == {"peak_total_rss_mb": 900.0}
+
+
+def test_all_stage_times_exclude_allocation_snapshots(tmp_path, monkeypatch):
+    import argparse
+    import time
+    import main
+    from common import memory
+
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    for step in ("run_scrape", "get_tweets", "run_merge", "run_split", "run_check"):
+        monkeypatch.setattr(main, step, lambda target_date: True)
+    monkeypatch.setattr(main, "run_open_urls", lambda target_date, review=False: True)
+    take_snapshot = memory.tracemalloc.take_snapshot
+
+    def slow_snapshot():
+        time.sleep(0.2)
+        return take_snapshot()
+
+    monkeypatch.setattr(memory.tracemalloc, "take_snapshot", slow_snapshot)
+    assert main.run_command_for(argparse.Namespace(command="all", debug=False), "20250101") == 0
+
+    [record] = PerfHistory(str(tmp_path / "perf_history.jsonl")).load("all")
+    assert set(record["allocations"]) == {"merge", "split"}
+    assert record["stages"]["merge"] < 0.1 and record["stages"]["split"] < 0.1
@@ -0,0 +1,62 @@
+import argparse
+import multiprocessing
+import os
+
+import pytest
+
+from common import profiling
+
+
+@profiling.profiled
+def _busy_worker(n):
+    return sum(i * i for i in range(n))
+
+
+def _busy_parent():
+    return sorted(range(1000), reverse=True)
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    directory = profiling.enable_profiling(str(tmp_path / "profile"))
+    yield directory
+    profiling.disable_profiling()
+
+
+def _functions(stats):
+    return {name for (_, _, name) in stats.stats}
+
+
+def test_parent_and_pool_workers_are_merged(profile_dir, tmp_path):
+    def run():
+        _busy_parent()
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            pool.map(_busy_worker, [20000] * 4)
+
+    profiling.profiled(run)()
+
+    files = os.listdir(profile_dir)
+    assert f"{os.getpid()}.prof" in files
+    assert len(files) >= 2  # 親 + ワーカー
+
+    stats = profiling.merge_profiles(profile_dir, str(tmp_path / "merged.pstats"))
+    assert (tmp_path / "merged.pstats").exists()
+    assert {"_busy_parent", "_busy_worker"} <= _functions(stats)
+    assert "_busy_worker" in profiling.summarize(stats, limit=50)
+
+
+def test_profiled_is_passthrough_when_disabled(tmp_path, monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_DIR_ENV, raising=False)
+    assert _busy_worker(10) == 285
+    assert profiling.merge_profiles(str(tmp_path), str(tmp_path / "out.pstats")) is None
+
+
+def test_run_with_profile_writes_pstats(tmp_path, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "run_command_for", lambda args, date: _busy_parent() and 0)
+
+    assert main.run_with_profile(argparse.Namespace(command="split", trace=False), "20250101") == 0
+    assert profiling.profile_dir() is None
+    assert sorted(os.listdir(tmp_path)) == ["20250101_profile.pstats"]
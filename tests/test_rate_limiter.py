@@ -0,0 +1,187 @@
+"""
+TokenBucketPacer と RateLimitLedger のテスト (時計と sleep を差し替えて検証する)
+"""
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from common.rate_limiter import TokenBucketPacer, RateLimitLedger, TWEET_ENDPOINT, SEARCH_ENDPOINT
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_pacer(clock, min_interval=1.0, reset_margin=2.0):
+    return TokenBucketPacer(min_interval=min_interval, reset_margin=reset_margin,
+                            clock=clock.time, sleep=clock.sleep)
+
+
+def test_no_wait_without_rate_limit_info(clock):
+    """レート制限情報がなければ、最初のリクエストは待たない"""
+    pacer = make_pacer(clock)
+    assert pacer.delay() == 0
+
+
+def test_min_interval_when_budget_is_enough(clock):
+    """残りが十分なら最小間隔だけ空ける"""
+    pacer = make_pacer(clock)
+    pacer.update(remaining=100, reset=int(clock.now) + 900, limit=100)
+    pacer.record_request()
+    clock.now += 0.3
+    assert pacer.delay(pending=10) == pytest.approx(0.7)
+
+
+def test_spreads_requests_when_budget_is_short(clock):
+    """投稿予定数が残りを上回る場合は、リセットまでの時間に均等に割り振る"""
+    pacer = make_pacer(clock)
+    pacer.update(remaining=4, reset=int(clock.now) + 100)
+    assert pacer.delay(pending=10) == pytest.approx(25.0)
+
+
+def test_waits_until_reset_when_exhausted(clock):
+    """残りが0ならリセット時刻 + マージンまで待つ"""
+    pacer = make_pacer(clock)
+    pacer.update(remaining=0, reset=int(clock.now) + 30)
+    assert pacer.wait() == pytest.approx(32.0)
+    assert clock.sleeps == [pytest.approx(32.0)]
+
+
+def test_bucket_refills_after_reset(clock):
+    """リセット時刻を過ぎたら上限まで回復したものとして扱う"""
+    pacer = make_pacer(clock)
+    pacer.update(remaining=0, reset=int(clock.now) + 10, limit=50)
+    clock.now += 11
+    assert pacer.delay(pending=5) == 0
+    assert pacer.remaining == 50
+
+
+def test_record_request_decrements_remaining(clock):
+    """ヘッダーで更新されるまでは手元で残りを減らす"""
+    pacer = make_pacer(clock)
+    pacer.update(remaining=2, reset=int(clock.now) + 60)
+    pacer.record_request()
+    pacer.record_request()
+    pacer.record_request()
+    assert pacer.remaining == 0
+
+
+def test_update_from_headers(clock):
+    """x-rate-limit-* ヘッダーを解析する"""
+    pacer = make_pacer(clock)
+    assert pacer.update_from_headers({
+        "x-rate-limit-remaining": "7",
+        "x-rate-limit-reset": str(int(clock.now) + 60),
+        "x-rate-limit-limit": "100",
+    })
+    assert (pacer.remaining, pacer.limit) == (7, 100)
+    assert not pacer.update_from_headers({})
+
+
+def test_on_rate_limited_without_reset_uses_fallback(clock):
+    """429 でリセット時刻が不明な場合は fallback_delay 後まで待つ"""
+    pacer = make_pacer(clock, reset_margin=0)
+    pacer.on_rate_limited(None, fallback_delay=20)
+    assert pacer.delay() == pytest.approx(20.0)
+
+
+def test_thread_posting_time_is_bounded_by_budget(clock):
+    """残りが十分なスレッドは 最小間隔 x (件数-1) で投稿できる"""
+    pacer = make_pacer(clock)
+    pacer.update(remaining=50, reset=int(clock.now) + 900, limit=50)
+    start = clock.now
+    for pending in range(10, 0, -1):
+        pacer.wait(pending)
+        pacer.record_request()
+    assert clock.now - start == pytest.approx(9.0)
+
+
+# --- RateLimitLedger ---
+
+def make_ledger(tmp_path, clock, reset_margin=2.0):
+    return RateLimitLedger(str(tmp_path / "rate_limits.sqlite3"), reset_margin=reset_margin,
+                           clock=clock.time, sleep=clock.sleep)
+
+
+def test_ledger_without_record_does_not_wait(tmp_path, clock):
+    """記録がないエンドポイントは待たずに呼び出せる"""
+    ledger = make_ledger(tmp_path, clock)
+    assert ledger.acquire(TWEET_ENDPOINT) == 0
+    assert ledger.get(TWEET_ENDPOINT) is None
+
+
+def test_ledger_decrements_and_waits_until_reset(tmp_path, clock):
+    """残り回数を使い切ったらリセット時刻 + マージンまで待つ"""
+    ledger = make_ledger(tmp_path, clock)
+    ledger.record_headers(SEARCH_ENDPOINT, {
+        "x-rate-limit-remaining": "2",
+        "x-rate-limit-reset": str(int(clock.now) + 60),
+        "x-rate-limit-limit": "180",
+    })
+    assert ledger.acquire(SEARCH_ENDPOINT) == 0
+    assert ledger.acquire(SEARCH_ENDPOINT) == 0
+    assert ledger.acquire(SEARCH_ENDPOINT) == pytest.approx(62.0)
+    # リセット後は上限まで回復し、1回分を確保済み
+    assert ledger.get(SEARCH_ENDPOINT)["remaining"] == 179
+
+
+def test_ledger_is_shared_between_instances(tmp_path, clock):
+    """別のインスタンス (別プロセス相当) からも同じ残り回数が見える"""
+    first = make_ledger(tmp_path, clock)
+    second = make_ledger(tmp_path, clock)
+    first.record(TWEET_ENDPOINT, remaining=1, reset=int(clock.now) + 30, limit=100)
+    assert second.reserve(TWEET_ENDPOINT) == 0
+    assert first.reserve(TWEET_ENDPOINT) == pytest.approx(32.0)
+
+
+def test_ledger_endpoints_are_independent(tmp_path, clock):
+    """エンドポイントごとに別々に管理される"""
+    ledger = make_ledger(tmp_path, clock)
+    ledger.on_rate_limited(TWEET_ENDPOINT, reset=int(clock.now) + 100)
+    assert ledger.reserve(SEARCH_ENDPOINT) == 0
+    assert ledger.reserve(TWEET_ENDPOINT) > 0
+
+
+def test_ledger_concurrent_reserves_never_exceed_budget(tmp_path, clock):
+    """複数スレッドから同時に確保しても、残り回数を超えて確保されない"""
+    ledger = make_ledger(tmp_path, clock)
+    ledger.record(TWEET_ENDPOINT, remaining=10, reset=int(clock.now) + 900)
+
+    def reserve(_):
+        return make_ledger(tmp_path, clock).reserve(TWEET_ENDPOINT) == 0
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        granted = sum(executor.map(reserve, range(30)))
+    assert granted == 10
+    assert ledger.get(TWEET_ENDPOINT)["remaining"] == 0
+
+
+def test_ledger_waits_for_headers_after_refilled_budget_is_used(tmp_path, clock):
+    """リセット後に回復した分を使い切ったら、残り回数を負にせずヘッダーでの更新を待つ"""
+    ledger = make_ledger(tmp_path, clock)
+    ledger.record(SEARCH_ENDPOINT, remaining=0, reset=int(clock.now) - 1, limit=2)
+    assert ledger.reserve(SEARCH_ENDPOINT) == 0
+    assert ledger.reserve(SEARCH_ENDPOINT) == 0
+    assert ledger.reserve(SEARCH_ENDPOINT) == pytest.approx(10.0)
+    assert ledger.get(SEARCH_ENDPOINT)["remaining"] == 0
+
+    # ヘッダーが届かなくても、fallback_delay ごとに1回分は確保できる
+    clock.now += 10
+    assert ledger.reserve(SEARCH_ENDPOINT) == 0
+    assert ledger.get(SEARCH_ENDPOINT)["remaining"] == 0
+
+    # ヘッダーで更新されれば、その残り回数で確保する
+    ledger.record(SEARCH_ENDPOINT, remaining=5, reset=int(clock.now) + 900, limit=2)
+    assert ledger.reserve(SEARCH_ENDPOINT) == 0
@@ -0,0 +1,98 @@
+"""
+スクレイピングの記録・再生 (benchmarks/scrape_replay.py) のテスト
+
+ブラウザは起動せず、記録のラッパー・リプレイサーバー・設定ファイルの書き換え・偽の WebDriver での再生を確認する。
+"""
+from unittest.mock import MagicMock
+
+import requests
+
+from selenium.webdriver.common.by import By
+
+from benchmarks.scrape_replay import (
+    Corpus, ReplayServer, _fake_driver_manager, _fake_resolver_factory, install_recorder, restore_text,
+    rewrite_configs, rewrite_url,
+)
+from common.url_resolver import UrlResolver
+from common.utils import parse_programs_config
+
+LIST_URL = "https://www.web.nhk/tv/an/72hours/pl/series-tep-W3W8WRN8M3"
+EPISODE_URL = "https://www.web.nhk/tv/an/72hours/pl/series-tep-W3W8WRN8M3/ep/ABC"
+EYECATCH_URL = "https://www.web.nhk/eyecatch/ABC"
+PLUS_URL = "https://plus.nhk.jp/watch/st/g1_2025100312345"
+
+
+def _corpus(tmp_path):
+    corpus = Corpus(tmp_path / "20251003")
+    corpus.clear()
+    corpus.save_page(LIST_URL, f'<html><body><a href="{EPISODE_URL}">第1回</a></body></html>')
+    corpus.save_page(EPISODE_URL, f'<html><body><div class="eyecatch"><a href="{EYECATCH_URL}"></a></div></body></html>')
+    corpus.save_redirect(EYECATCH_URL, PLUS_URL)
+    corpus.write_manifest("20251003")
+    return Corpus(tmp_path / "20251003").load()
+
+
+def test_recorder_saves_each_page_before_leaving(tmp_path):
+    corpus = Corpus(tmp_path / "day")
+    corpus.clear()
+    driver = MagicMock()
+    driver.execute_script.side_effect = ["<html>一覧</html>", "<html>詳細</html>"]
+    driver.current_url = "https://example.com/final"
+    original_get = driver.get
+
+    snapshot = install_recorder(driver, corpus)
+    driver.get(LIST_URL)
+    driver.get(EPISODE_URL)
+    snapshot()
+    snapshot()  # 保存済みなら何もしない
+    corpus.write_manifest("day")
+
+    assert original_get.call_count == 2
+    assert driver.execute_script.call_count == 2
+    assert corpus.page_html(LIST_URL) == "<html>一覧</html>"
+    assert corpus.page_html(EPISODE_URL) == "<html>詳細</html>"
+    assert corpus.pages[LIST_URL]["final_url"] == "https://example.com/final"
+
+
+def test_replay_server_serves_rewritten_pages_and_redirects(tmp_path):
+    corpus = _corpus(tmp_path)
+    with ReplayServer(corpus) as server:
+        response = requests.get(rewrite_url(LIST_URL, server.base_url), timeout=5)
+        assert response.status_code == 200
+        # ページ内のリンクもサーバーに向ける
+        assert f'href="{server.base_url}/https/www.web.nhk/tv/an/72hours/' in response.text
+        assert restore_text(response.text, server.base_url) == corpus.page_html(LIST_URL)
+
+        # アイキャッチのリダイレクトは HEAD でたどれる
+        resolver = UrlResolver(cache_path=None)
+        assert resolver.resolve(rewrite_url(EYECATCH_URL, server.base_url)) == rewrite_url(PLUS_URL, server.base_url)
+
+        missing = rewrite_url("https://www.web.nhk/unknown.css", server.base_url)
+        assert requests.get(missing, timeout=5).status_code == 404
+        assert server.missing == {"https://www.web.nhk/unknown.css"}
+        assert server.requests >= 4
+
+
+def test_rewrite_configs_keeps_paths_and_file_names(tmp_path):
+    rewrite_configs("ini", str(tmp_path), "http://127.0.0.1:9999")
+
+    programs = parse_programs_config(str(tmp_path / "nhk_config.ini"))
+    assert programs["ドキュメント72時間"]["url"] == rewrite_url(LIST_URL, "http://127.0.0.1:9999")
+    assert "https://" not in (tmp_path / "tvtokyo_config.ini").read_text(encoding="utf-8")
+    assert "/https/txbiz.tv-tokyo.co.jp/wbs/" in (tmp_path / "tvtokyo_config.ini").read_text(encoding="utf-8")
+
+
+def test_fake_driver_opens_recorded_pages_without_a_server(tmp_path):
+    corpus = _corpus(tmp_path)
+    with _fake_driver_manager(corpus)() as driver:
+        driver.get(LIST_URL)
+        assert driver.find_element(By.TAG_NAME, "a").get_attribute("href") == EPISODE_URL
+        driver.get(EPISODE_URL)
+        assert driver.find_element(By.CSS_SELECTOR, "div.eyecatch a").get_attribute("href") == EYECATCH_URL
+        # 記録にないページは空のページとして開く
+        driver.get(PLUS_URL)
+        assert driver.find_elements(By.TAG_NAME, "a") == []
+
+    resolver = _fake_resolver_factory(corpus)()
+    assert resolver.resolve(EYECATCH_URL) == PLUS_URL
+    assert resolver.resolve(LIST_URL) is None
@@ -0,0 +1,116 @@
+"""
+split_program (最適分割) のテスト
+"""
+import pytest
+from common.utils import count_tweet_length
+from split_text import pack_blocks, split_program, split_program_greedy, split_programs
+
+HEADER_LINE = "●ドキュメント72時間(NHK総合 22:45-23:15)"
+
+
+def _make_block(titles):
+    """タイトルのリストから番組ブロックを作る (URLは全て同じ長さ)"""
+    lines = [HEADER_LINE]
+    for i, title in enumerate(titles):
+        lines.append(f"・{title}")
+        lines.append(f"https://example.com/{i}")
+    return "\n".join(lines)
+
+
+def _items_of(tweets):
+    """分割後のツイートからアイテム行 (・で始まる行) を順に取り出す"""
+    return [line for t in tweets for line in t.split("\n") if line.startswith("・")]
+
+
+def test_split_never_separates_title_and_url():
+    """タイトルと URL は同じツイートに入る"""
+    block = _make_block([f"エピソード{i}" * 4 for i in range(10)])
+    tweets = split_program(block, max_length=200)
+    for tweet in tweets:
+        lines = tweet.split("\n")
+        for i, line in enumerate(lines):
+            if line.startswith("・"):
+                assert lines[i + 1].startswith("https://")
+
+
+def test_split_keeps_all_items_in_order():
+    """アイテムの欠落・順序の入れ替えがない"""
+    titles = [f"エピソード{i}" * (1 + i % 3) for i in range(12)]
+    tweets = split_program(_make_block(titles), max_length=200)
+    assert _items_of(tweets) == [f"・{t}" for t in titles]
+    assert tweets[0].startswith(HEADER_LINE)
+
+
+@pytest.mark.parametrize("header_length", [0, 50])
+def test_split_respects_limits_and_header(header_length):
+    """1件目はヘッダー分短い制限、2件目以降は max_length 以内"""
+    tweets = split_program(_make_block([f"エピソード{i}" * 3 for i in range(10)]),
+                           max_length=200, header_length=header_length)
+    assert count_tweet_length(tweets[0]) <= 200 - header_length
+    for tweet in tweets[1:]:
+        assert count_tweet_length(tweet) <= 200
+
+
+def test_split_avoids_lone_last_tweet():
+    """貪欲法では最後に1件だけ取り残されるケースで、均等に分割される"""
+    # 各アイテムは 1 + 2*6 + 1 + 23 = 37。ヘッダー行は 41。1件目には4件まで入る
+    block = _make_block(["あいうえおか"] * 5)
+    greedy = split_program_greedy(block, max_length=200)
+    optimal = split_program(block, max_length=200)
+
+    assert len(optimal) == len(greedy) == 2
+    assert len(_items_of(greedy[-1:])) == 1
+    lengths = [count_tweet_length(t) for t in optimal]
+    assert all(len(_items_of([t])) >= 2 for t in optimal)
+    assert max(lengths) - min(lengths) < 40
+
+
+def test_split_never_uses_more_tweets_than_greedy():
+    """ツイート数は貪欲法以下"""
+    for n in range(1, 20):
+        block = _make_block([f"タイトル{i}" * (1 + i % 4) for i in range(n)])
+        for header_length in (0, 60):
+            assert len(split_program(block, 200, header_length)) <= \
+                len(split_program_greedy(block, 200, header_length))
+
+
+def test_split_skips_oversized_item():
+    """単体で制限を超えるアイテムはスキップされる"""
+    block = _make_block(["短い", "あ" * 200, "短い2"])
+    tweets = split_program(block, max_length=200)
+    assert _items_of(tweets) == ["・短い", "・短い2"]
+
+
+def test_split_programs_only_splits_oversized_blocks():
+    """制限内のブロックはそのまま、ヘッダーは先頭ブロックにのみ考慮される"""
+    small = _make_block(["短い"])
+    large = _make_block([f"エピソード{i}" * 3 for i in range(10)])
+    tweets = split_programs([small, large], header_length=50, max_length=200)
+    assert tweets[0] == small
+    assert len(tweets) > 2
+
+
+def test_pack_blocks_merges_adjacent_short_blocks():
+    """隣り合う短いブロックは改行1つで結合され、順序は維持される"""
+    blocks = [_make_block([f"短い{i}"]) for i in range(3)]
+    packed = pack_blocks(blocks, header_length=0, max_length=280)
+    assert packed == ["\n".join(blocks)]
+
+
+def test_pack_blocks_respects_limits():
+    """結合後も制限内に収まり、1件目はヘッダー分短い制限になる"""
+    blocks = [_make_block([f"エピソード{i}"]) for i in range(8)]
+    packed = pack_blocks(blocks, header_length=60, max_length=200)
+    assert "\n".join(packed) == "\n".join(blocks)
+    assert count_tweet_length(packed[0]) <= 200 - 60
+    assert all(count_tweet_length(t) <= 200 for t in packed[1:])
+    assert 1 < len(packed) < len(blocks)
+
+
+def test_pack_blocks_keeps_oversized_block_alone():
+    """制限を超えるブロックは結合されずそのまま残る"""
+    long_block = _make_block(["あ" * 120])
+    blocks = [_make_block(["短い"]), long_block, _make_block(["短い2"])]
+    packed = pack_blocks(blocks, header_length=0, max_length=200)
+    assert long_block in packed
+    assert len(packed) == 3
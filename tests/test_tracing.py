@@ -0,0 +1,73 @@
+import argparse
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from common import tracing
+
+
+@pytest.fixture
+def trace_dir(tmp_path):
+    directory = tracing.enable_tracing(str(tmp_path / "trace"))
+    yield directory
+    tracing.disable_tracing()
+
+
+def _child_work():
+    with tracing.span("child", "test"):
+        pass
+
+
+def test_span_is_noop_when_disabled(tmp_path, monkeypatch):
+    monkeypatch.delenv(tracing.TRACE_DIR_ENV, raising=False)
+    with tracing.span("noop"):
+        pass
+    assert tracing.span("noop") is tracing.span("other")
+    assert not any(tmp_path.iterdir())
+
+
+def test_spans_from_all_processes_are_exported(trace_dir, tmp_path):
+    @tracing.traced("decorated", "test")
+    def work():
+        with tracing.span("inner", "test", program="番組A"):
+            pass
+
+    work()
+    process = multiprocessing.get_context("fork").Process(target=_child_work)
+    process.start()
+    process.join()
+    with pytest.raises(ValueError):
+        with tracing.span("failing", "test"):
+            raise ValueError("boom")
+
+    output = tmp_path / "trace.json"
+    count = tracing.export_trace(trace_dir, str(output))
+    events = json.loads(output.read_text(encoding="utf-8"))["traceEvents"]
+    assert count == len(events)
+
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert set(spans) == {"decorated", "inner", "child", "failing"}
+    assert spans["inner"]["args"] == {"program": "番組A"}
+    assert spans["failing"]["args"] == {"error": "ValueError"}
+    # 外側のスパンは内側のスパンを含む
+    assert spans["decorated"]["ts"] <= spans["inner"]["ts"]
+    assert spans["decorated"]["ts"] + spans["decorated"]["dur"] >= spans["inner"]["ts"] + spans["inner"]["dur"]
+    # 子プロセスは自分の PID で記録する
+    assert spans["child"]["pid"] == process.pid != os.getpid()
+    names = {e["pid"] for e in events if e["ph"] == "M" and e["name"] == "process_name"}
+    assert names == {os.getpid(), process.pid}
+
+
+def test_run_with_trace_writes_trace_file(tmp_path, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "run_command_for", lambda args, date: tracing.sleep(0, "step") or 0)
+
+    assert main.run_with_trace(argparse.Namespace(command="split"), "20250101") == 0
+    assert tracing.trace_dir() is None
+    events = json.loads((tmp_path / "20250101_trace.json").read_text(encoding="utf-8"))["traceEvents"]
+    assert {e["name"] for e in events if e["ph"] == "X"} == {"split", "step"}
+    assert sorted(os.listdir(tmp_path)) == ["20250101_trace.json"]
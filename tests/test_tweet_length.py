@@ -0,0 +1,72 @@
+"""
+count_tweet_length のテスト
+
+X (twitter-text v3) の重み付きカウントと同じ値になることを、
+期待値テーブル（フィクスチャ）で検証する。
+"""
+import pytest
+from common.utils import count_tweet_length, count_characters
+from common.constants import TWEET_MAX_LENGTH, get_header_length
+
+# (入力テキスト, 期待される重み付き文字数, 説明)
+TWEET_LENGTH_FIXTURES = [
+    ("", 0, "空文字列"),
+    ("abc", 3, "ASCII"),
+    ("a" * 280, 280, "ASCIIのみで上限ちょうど"),
+    ("あ" * 140, 280, "全角のみで上限ちょうど"),
+    ("ニュース", 8, "カタカナは重み2"),
+    ("・", 2, "中黒 (U+30FB) は重み2"),
+    ("●", 2, "黒丸 (U+25CF) は重み2"),
+    ("～", 2, "全角チルダは重み2"),
+    ("“革命”", 6, "曲引用符 (U+201C/U+201D) は重み1"),
+    ("―", 1, "ホリゾンタルバー (U+2015) は重み1"),
+    ("‘a’", 3, "シングル曲引用符は重み1"),
+    ("…", 2, "三点リーダ (U+2026) は範囲外なので重み2"),
+    ("Привет", 6, "キリル文字は重み1"),
+    ("é", 1, "ラテン拡張は重み1"),
+    ("cafe\u0301", 4, "結合文字はNFC正規化してから数える"),
+    ("👍", 2, "単独の絵文字"),
+    ("👍🏽", 2, "肌の色の修飾子付き絵文字"),
+    ("👨‍👩‍👧‍👦", 2, "ZWJ結合の家族絵文字"),
+    ("🇯🇵", 2, "国旗 (リージョナルインジケータ対)"),
+    ("❤️", 2, "異体字セレクタ付き絵文字"),
+    ("1️⃣", 2, "キーキャップ絵文字"),
+    ("⏳", 2, "砂時計"),
+    ("https://t.co/GzpxT6f8cR", 23, "t.co URL"),
+    ("https://plus.nhk.jp/watch/st/g1_2025031826391?e-param=38Q4M9N1ZP&cid=jp-8M689W8RVX", 23, "長いURLも23"),
+    ("http://example.com", 23, "http URL も23"),
+    ("見る https://t.co/abc", 28, "URL前のテキスト"),
+    ("https://example.com/a\nhttps://example.com/b", 47, "改行区切りの複数URL"),
+    (
+        "●アナザーストーリーズ(NHK BS 18:45-)\n・西城秀樹という“革命”～アイドル文化を変えた情熱～\nhttps://t.co/GzpxT6f8cR",
+        37 + 1 + 50 + 1 + 23,
+        "実際の番組ブロック",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [(text, expected) for text, expected, _ in TWEET_LENGTH_FIXTURES],
+    ids=[desc for _, _, desc in TWEET_LENGTH_FIXTURES],
+)
+def test_count_tweet_length_fixture_table(text, expected):
+    """期待値テーブルとの一致を検証"""
+    assert count_tweet_length(text) == expected
+
+
+def test_count_characters_matches_without_urls():
+    """URL を含まないテキストでは count_characters と一致する"""
+    text = "●視点・論点(NHK Eテレ 12:50-13:00)\n・海の魚に変化! 私たち消費者ができること"
+    assert count_characters(text) == count_tweet_length(text)
+
+
+def test_tweet_max_length_is_true_limit():
+    """重み付きカウントが正確になったので上限は X の 280 をそのまま使う"""
+    assert TWEET_MAX_LENGTH == 280
+
+
+def test_header_length_uses_weighted_count():
+    """ヘッダー長も count_tweet_length と同じ方法で数える"""
+    # "25/01/29(水)" = 12, "のニュース・ドキュメンタリー番組など" = 18文字 x 2, "\n\n" = 2
+    assert get_header_length("20250129") == 12 + 36 + 2
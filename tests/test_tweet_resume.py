@@ -0,0 +1,75 @@
+"""
+投稿済みジャーナル (YYYYMMDD_posted.json) と --resume のテスト
+"""
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+
+TWEETS = ["1つ目のツイートです。", "2つ目のツイートです。", "3つ目のツイートです。"]
+
+
+@pytest.fixture
+def tweet_module(monkeypatch):
+    # tweet.py はインポート時に環境変数をチェックするため、先に設定しておく
+    for key in ["API_KEY", "API_SECRET", "ACCESS_TOKEN", "ACCESS_SECRET", "BEARER_TOKEN"]:
+        monkeypatch.setenv(key, f"test_{key.lower()}")
+    import tweet
+    for key in ["API_KEY", "API_SECRET", "ACCESS_TOKEN", "ACCESS_SECRET", "BEARER_TOKEN"]:
+        monkeypatch.setattr(tweet, key, f"test_{key.lower()}")
+    with patch("tweepy.Client") as mock_client_class:
+        mock_client_class.return_value.get_me.return_value = MagicMock(data=MagicMock(username="testuser"))
+        yield tweet
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    (tmp_path / "20250129.txt").write_text("\n\n".join(TWEETS), encoding="utf-8")
+    return tmp_path
+
+
+def _journal(output_dir):
+    return json.loads((output_dir / "20250129_posted.json").read_text(encoding="utf-8"))
+
+
+def test_journal_records_each_posted_tweet(tweet_module, output_dir):
+    """投稿のたびに ID とハッシュが記録される"""
+    with patch.object(tweet_module, "post_tweet_with_retry", side_effect=["101", "102", "103"]):
+        assert tweet_module.main(date="20250129", output_dir=str(output_dir)) == 0
+
+    journal = _journal(output_dir)
+    assert journal["completed"] is True
+    assert [t["id"] for t in journal["tweets"]] == ["101", "102", "103"]
+    assert journal["tweets"][1]["sha256"] == tweet_module.content_hash(TWEETS[1])
+
+
+def test_resume_continues_from_last_posted_id(tweet_module, output_dir):
+    """途中で失敗した場合、--resume で続きから投稿し、投稿済みのものは再投稿しない"""
+    with patch.object(tweet_module, "post_tweet_with_retry", side_effect=["101", "102", None]):
+        assert tweet_module.main(date="20250129", output_dir=str(output_dir)) == 1
+    assert [t["id"] for t in _journal(output_dir)["tweets"]] == ["101", "102"]
+
+    # --resume なしでは再実行しない (ヘッダーツイートの重複投稿を防ぐ)
+    with patch.object(tweet_module, "post_tweet_with_retry") as mock_post:
+        assert tweet_module.main(date="20250129", output_dir=str(output_dir)) == 1
+        mock_post.assert_not_called()
+
+    with patch.object(tweet_module, "post_tweet_with_retry", return_value="103") as mock_post:
+        assert tweet_module.main(date="20250129", output_dir=str(output_dir), resume=True) == 0
+        assert mock_post.call_count == 1
+        assert mock_post.call_args.kwargs["text"] == TWEETS[2]
+        assert mock_post.call_args.kwargs["in_reply_to_tweet_id"] == "102"
+
+    journal = _journal(output_dir)
+    assert journal["completed"] is True
+    assert [t["id"] for t in journal["tweets"]] == ["101", "102", "103"]
+
+
+def test_resume_aborts_when_content_changed(tweet_module, output_dir):
+    """投稿済みのツイートの内容が変わっていたら再開しない"""
+    with patch.object(tweet_module, "post_tweet_with_retry", side_effect=["101", None]):
+        tweet_module.main(date="20250129", output_dir=str(output_dir))
+
+    (output_dir / "20250129.txt").write_text("\n\n".join(["変更後のツイート"] + TWEETS[1:]), encoding="utf-8")
+    with patch.object(tweet_module, "post_tweet_with_retry") as mock_post:
+        assert tweet_module.main(date="20250129", output_dir=str(output_dir), resume=True) == 1
+        mock_post.assert_not_called()
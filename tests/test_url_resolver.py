@@ -0,0 +1,114 @@
+"""
+common.url_resolver のテスト
+
+リダイレクトを返すローカルの HTTP サーバーに対して実際に調べる。
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from common.url_resolver import UrlResolver, is_short_url
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    """/short -> /final, /loop -> /loop, /nohead (HEAD は 405) -> /final, /missing は 404"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, with_body):
+        self.server.requests.append((self.command, self.path))
+        if self.path == "/short":
+            self.send_response(301)
+            self.send_header("Location", "/final")
+        elif self.path == "/loop":
+            self.send_response(302)
+            self.send_header("Location", "/loop")
+        elif self.path == "/nohead" and self.command == "HEAD":
+            self.send_response(405)
+        elif self.path == "/nohead":
+            self.send_response(302)
+            self.send_header("Location", "/final")
+        elif self.path == "/final":
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        body = b"x" * 1024
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond(with_body=False)
+
+    def do_GET(self):
+        self._respond(with_body=True)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RedirectHandler)
+    server.daemon_threads = True
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_resolve_follows_redirects_with_head(server, tmp_path):
+    resolver = UrlResolver(str(tmp_path / "cache.sqlite3"))
+    assert resolver.resolve(f"{server.url}/short") == f"{server.url}/final"
+    assert [method for method, _ in server.requests] == ["HEAD", "HEAD"]
+
+
+def test_resolve_falls_back_to_get_when_head_unsupported(server, tmp_path):
+    resolver = UrlResolver(str(tmp_path / "cache.sqlite3"))
+    assert resolver.resolve(f"{server.url}/nohead") == f"{server.url}/final"
+    assert ("GET", "/nohead") in server.requests
+
+
+def test_cache_is_persistent_across_instances(server, tmp_path):
+    """2回目以降は HTTP リクエストを送らない (別のインスタンス・プロセスでも共有)"""
+    cache_path = str(tmp_path / "cache.sqlite3")
+    UrlResolver(cache_path).resolve(f"{server.url}/short")
+    count = len(server.requests)
+
+    result = UrlResolver(cache_path).resolve_detail(f"{server.url}/short")
+    assert result["final_url"] == f"{server.url}/final"
+    assert result["cached"] is True
+    assert len(server.requests) == count
+
+
+def test_cache_expires_after_max_age(server, tmp_path):
+    now = [1000.0]
+    resolver = UrlResolver(str(tmp_path / "cache.sqlite3"), max_age=60, clock=lambda: now[0])
+    resolver.resolve(f"{server.url}/short")
+    now[0] += 61
+    assert resolver.cached(f"{server.url}/short") is None
+
+
+def test_failures_are_reported_and_not_cached(server, tmp_path):
+    resolver = UrlResolver(str(tmp_path / "cache.sqlite3"))
+    loop = resolver.resolve_detail(f"{server.url}/loop")
+    assert loop["error"] == "リダイレクトがループしています"
+    assert resolver.resolve(f"{server.url}/missing") is None
+    assert resolver.cached(f"{server.url}/missing") is None
+
+
+def test_resolve_many_deduplicates(server, tmp_path):
+    resolver = UrlResolver(str(tmp_path / "cache.sqlite3"), max_workers=4)
+    urls = [f"{server.url}/short", f"{server.url}/nohead", f"{server.url}/short", f"{server.url}/missing"]
+    assert resolver.resolve_many(urls) == {
+        f"{server.url}/short": f"{server.url}/final",
+        f"{server.url}/nohead": f"{server.url}/final",
+        f"{server.url}/missing": None,
+    }
+    assert sum(1 for _, path in server.requests if path == "/short") == 1
+
+
+def test_is_short_url():
+    assert is_short_url("https://t.co/GzpxT6f8cR")
+    assert not is_short_url("https://plus.nhk.jp/watch/st/g1_2025031826391")
@@ -0,0 +1,118 @@
+"""
+X API スタンドインサーバー (benchmarks/x_api_server.py) を使ったテスト
+
+tweepy.Client をモックせず、実際の HTTP リクエストで投稿・検索・レート制限処理を検証する。
+"""
+from datetime import datetime, timedelta, timezone
+import pytest
+import tweepy
+from benchmarks.x_api_server import XApiServer, XApiState
+from common.rate_limiter import TokenBucketPacer, RateLimitLedger, TWEET_ENDPOINT
+from common.x_api import create_client
+
+CREDENTIALS = {
+    "API_KEY": "test_api_key",
+    "API_SECRET": "test_api_secret",
+    "ACCESS_TOKEN": "test_access_token",
+    "ACCESS_SECRET": "test_access_secret",
+    "BEARER_TOKEN": "test_bearer_token",
+}
+
+
+def _start(state):
+    return XApiServer(state).start()
+
+
+@pytest.fixture
+def tweet_module(monkeypatch, tmp_path):
+    """スタンドインサーバー向けに設定した tweet モジュール (待機時間なし)"""
+    for key, value in CREDENTIALS.items():
+        monkeypatch.setenv(key, value)
+    import tweet
+    monkeypatch.setattr(tweet, "rate_limiter", TokenBucketPacer(min_interval=0, reset_margin=0))
+    monkeypatch.setattr(tweet, "rate_ledger", RateLimitLedger(str(tmp_path / "rate_limits.sqlite3"), reset_margin=0))
+    return tweet
+
+
+def _client(server, monkeypatch):
+    monkeypatch.setenv("X_API_BASE_URL", server.base_url)
+    return create_client(
+        bearer_token=CREDENTIALS["BEARER_TOKEN"],
+        consumer_key=CREDENTIALS["API_KEY"],
+        consumer_secret=CREDENTIALS["API_SECRET"],
+        access_token=CREDENTIALS["ACCESS_TOKEN"],
+        access_token_secret=CREDENTIALS["ACCESS_SECRET"],
+    )
+
+
+def test_create_client_redirects_to_stand_in(monkeypatch):
+    """X_API_BASE_URL を設定するとスタンドインサーバーにリクエストされる"""
+    server = _start(XApiState())
+    try:
+        client = _client(server, monkeypatch)
+        assert client.get_me(user_auth=True).data.username == "nhk_docudocu"
+        response = client.create_tweet(text="テスト投稿", user_auth=True)
+        assert server.state.tweets[0]["id"] == response.data["id"]
+    finally:
+        server.stop()
+
+
+def test_post_records_rate_limit_headers(tweet_module, monkeypatch):
+    """投稿レスポンスの x-rate-limit-* ヘッダーがペーサーと台帳に反映される"""
+    server = _start(XApiState(tweet_limit=50))
+    try:
+        client = _client(server, monkeypatch)
+        tweet_module.install_rate_limit_hook(client)
+        assert tweet_module.post_tweet_with_retry(client, "1件目")
+        assert tweet_module.rate_limiter.remaining == 49
+        assert tweet_module.rate_ledger.get(TWEET_ENDPOINT)["remaining"] == 49
+    finally:
+        server.stop()
+
+
+def test_post_retries_after_injected_429(tweet_module, monkeypatch):
+    """429 の後はリセット時刻まで待ってリトライする"""
+    server = _start(XApiState(window=1, fail_429={1}))
+    try:
+        client = _client(server, monkeypatch)
+        tweet_module.install_rate_limit_hook(client)
+        assert tweet_module.post_tweet_with_retry(client, "リトライされる投稿")
+        assert server.state.request_count == 2
+    finally:
+        server.stop()
+
+
+def test_duplicate_post_is_not_retried(tweet_module, monkeypatch):
+    """重複ツイートは 403 になり、リトライしない"""
+    server = _start(XApiState())
+    try:
+        client = _client(server, monkeypatch)
+        assert tweet_module.post_tweet_with_retry(client, "同じ内容")
+        assert tweet_module.post_tweet_with_retry(client, "同じ内容") is None
+        assert server.state.request_count == 2
+    finally:
+        server.stop()
+
+
+def test_search_filters_and_paginates(monkeypatch):
+    """検索はユーザー・キーワード・期間で絞り込み、next_token でページングする"""
+    state = XApiState()
+    base = datetime(2025, 1, 28, 3, 0, tzinfo=timezone.utc)
+    for i in range(15):
+        state.add_tweet(f"アナザーストーリーズ {i}", created_at=base + timedelta(minutes=i))
+    state.add_tweet("関係のないツイート", created_at=base)
+    state.add_tweet("アナザーストーリーズ 別アカウント", created_at=base, author="someone_else")
+    state.add_tweet("アナザーストーリーズ 期間外", created_at=base - timedelta(days=2))
+
+    server = _start(state)
+    try:
+        client = _client(server, monkeypatch)
+        params = dict(query="from:nhk_docudocu (アナザーストーリーズ OR 英雄たちの選択)", max_results=10,
+                      start_time="2025-01-27T15:00:00Z", end_time="2025-01-28T14:59:59Z")
+        first = client.search_recent_tweets(**params)
+        second = client.search_recent_tweets(**params, next_token=first.meta["next_token"])
+        assert len(first.data) == 10
+        assert len(second.data) == 5
+        assert "next_token" not in second.meta
+    finally:
+        server.stop()
@@ -1,12 +1,16 @@
-import tweepy
 import time
 import sys
 import os
+import json
+import hashlib
 from dotenv import load_dotenv
 from datetime import datetime
 import logging # logging をインポート
 from common.constants import TWEET_MAX_LENGTH, get_header_text
-from common.utils import count_tweet_length, setup_logger
+from common.utils import setup_logger
+from common.text_utils import count_tweet_length
+from common.rate_limiter import TokenBucketPacer, RateLimitLedger, TWEET_ENDPOINT, LEDGER_FILENAME
+from common import tracing
 
 # --- ロギング設定 ---
 def setup_logging():
@@ -46,51 +50,28 @@ ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
 ACCESS_SECRET = os.getenv("ACCESS_SECRET")
 BEARER_TOKEN = os.getenv("BEARER_TOKEN")
 
-# 環境変数チェック
-if not all([API_KEY, API_SECRET, ACCESS_TOKEN, ACCESS_SECRET, BEARER_TOKEN]):
-    print("❌ 必要な環境変数が正しく設定されていません。")
-    exit(1)
-
-# 認証
-client = tweepy.Client(
-    bearer_token=BEARER_TOKEN,
-    consumer_key=API_KEY,
-    consumer_secret=API_SECRET,
-    access_token=ACCESS_TOKEN,
-    access_token_secret=ACCESS_SECRET
-)
-
-# --- グローバル変数としてレート制限情報を保持 ---
-# これらは post_tweet_with_retry で更新される可能性があるため global 宣言が必要になる
-rate_limit_remaining = None
-rate_limit_reset = None
+# 環境変数のチェックと tweepy.Client の作成は main で行う
+# (インポートしただけで終了したり、API クライアントを作ったりしないようにするため)
+
+# --- レート制限に合わせて投稿間隔を調整するペーサー ---
+# x-rate-limit-* ヘッダーはセッションのレスポンスフック経由で反映される
+rate_limiter = TokenBucketPacer()
+# 実行をまたいで共有するレート制限の台帳 (main で出力ディレクトリに合わせて作り直す)
+rate_ledger = RateLimitLedger()
 
 def update_rate_limit_from_response(response):
     """レスポンスからレート制限情報を取得・更新する試み"""
-    global rate_limit_remaining, rate_limit_reset
     updated = False
     try:
-        # v1.1 互換ヘッダーを試す (response.resp.headers が最も可能性が高い)
-        if hasattr(response, 'resp') and hasattr(response.resp, 'headers'):
-            headers = response.resp.headers
-            remaining = headers.get('x-rate-limit-remaining')
-            reset = headers.get('x-rate-limit-reset')
-            limit = headers.get('x-rate-limit-limit') # limit もあれば取得
-
-            if remaining is not None and reset is not None:
-                rate_limit_remaining = int(remaining)
-                rate_limit_reset = int(reset)
-                rate_limit_limit_val = int(limit) if limit is not None else 'N/A'
-                logger.info(f"レート制限情報更新 (Header): 残り={rate_limit_remaining}, 上限={rate_limit_limit_val}, リセット={datetime.fromtimestamp(rate_limit_reset)}")
-                updated = True
-            else:
-                logger.debug("レスポンスヘッダーにレート制限情報 (x-rate-limit-*) が見つかりませんでした。")
+        # requests.Response (セッションのレスポンスフックから渡される)
+        if hasattr(response, 'headers') and hasattr(response, 'status_code'):
+            updated = rate_limiter.update_from_headers(response.headers)
+        # v1.1 互換ヘッダーを試す
+        elif hasattr(response, 'resp') and hasattr(response.resp, 'headers'):
+            updated = rate_limiter.update_from_headers(response.resp.headers)
         # v2 レスポンスの rate_limit 属性も念のため試す
         elif hasattr(response, 'rate_limit') and response.rate_limit is not None:
-            rate_limit_remaining = response.rate_limit.remaining
-            rate_limit_reset = response.rate_limit.reset
-            rate_limit_limit = response.rate_limit.limit
-            logger.info(f"レート制限情報更新 (v2 response): 残り={rate_limit_remaining}, 上限={rate_limit_limit}, リセット={datetime.fromtimestamp(rate_limit_reset)}")
+            rate_limiter.update(response.rate_limit.remaining, response.rate_limit.reset, response.rate_limit.limit)
             updated = True
         else:
             logger.debug("レスポンスオブジェクトからレート制限情報を取得できませんでした。")
@@ -99,64 +80,66 @@ def update_rate_limit_from_response(response):
     except Exception as e:
         logger.error(f"レート制限情報更新中に予期せぬエラー: {e}", exc_info=True)
 
-    # 更新できなかった場合、グローバル変数をNoneにしておく（任意）
-    # if not updated:
-    #     rate_limit_remaining = None
-    #     rate_limit_reset = None
-
     return updated
 
-def post_tweet_with_retry(client, text, in_reply_to_tweet_id=None, max_retries=3, base_delay=10):
-    """ツイート投稿関数 (リトライ、レート制限考慮)"""
-    global rate_limit_remaining, rate_limit_reset
-    # logger = logging.getLogger(__name__) # 関数内でロガーを取得
+def _rate_limit_hook(response, *args, **kwargs):
+    """ツイート投稿 (POST /2/tweets) のレスポンスヘッダーからレート制限情報を取り込む"""
+    request = getattr(response, 'request', None)
+    if request is not None and request.method == 'POST' and response.url.split('?')[0].rstrip('/').endswith('/2/tweets'):
+        update_rate_limit_from_response(response)
+        try:
+            rate_ledger.record_headers(TWEET_ENDPOINT, response.headers)
+        except Exception as e:
+            logger.warning(f"レート制限台帳の更新に失敗しました: {e}")
+    return response
+
+def install_rate_limit_hook(client):
+    """tweepy.Client のセッションにレート制限情報取得用のフックを登録する
+    (tweepy v2 の Response にはヘッダーが含まれないため)"""
+    hooks = client.session.hooks.setdefault('response', [])
+    if _rate_limit_hook not in hooks:
+        hooks.append(_rate_limit_hook)
+
+def post_tweet_with_retry(client, text, in_reply_to_tweet_id=None, max_retries=3, base_delay=10, pending=1):
+    """ツイート投稿関数 (リトライ、レート制限考慮)
+
+    Args:
+        pending: 今回の分を含む、このスレッドで今後投稿する予定の件数 (投稿間隔の調整に使う)
+    """
+    import tweepy  # 投稿するときだけ読み込む
+
+    # 文字数チェック
+    tweet_length = count_tweet_length(text)
+    if tweet_length > TWEET_MAX_LENGTH:
+        logger.error(f"エラー：ツイートが文字数制限 ({TWEET_MAX_LENGTH}) を超えています ({tweet_length}文字)。")
+        return None
+
+    # 前回までの実行で記録されたレート制限情報があれば、それを元に投稿間隔を計画する
+    if rate_limiter.remaining is None:
+        state = rate_ledger.get(TWEET_ENDPOINT)
+        if state and state["reset"] is not None and state["remaining"] is not None:
+            rate_limiter.update(state["remaining"], state["reset"], state["limit"])
 
     for attempt in range(max_retries):
         try:
-            # レートリミット事前チェック (前回情報があれば利用)
-            # (この部分は既存のままでも良いが、情報が更新されない可能性を考慮)
-            if rate_limit_remaining is not None and rate_limit_remaining <= 1:
-                logger.warning("前回のレートリミット情報に基づき、リセットまで待機する可能性があります。")
-                # (待機処理は既存のまま)
-                if rate_limit_reset is not None and rate_limit_reset > 0:
-                    reset_dt_naive = datetime.utcfromtimestamp(rate_limit_reset)
-                    now_dt_naive = datetime.utcnow()
-                    wait_time = reset_dt_naive - now_dt_naive
-                    wait_seconds = max(0, wait_time.total_seconds()) + 5 # 5秒のマージン
-                    if wait_seconds > 0:
-                        logger.info(f"リセットまで {wait_seconds:.1f} 秒待機します...")
-                        time.sleep(wait_seconds)
-                        rate_limit_remaining = None # 待機後は情報をクリア
-                        rate_limit_reset = None
-                    else:
-                        logger.info("リセット時間を過ぎているため、待機せずに続行します。")
-                        rate_limit_remaining = None
-                        rate_limit_reset = None
-                else:
-                    logger.warning(f"リセット時間が不明なため、{base_delay}秒待機します。")
-                    time.sleep(base_delay)
-                    rate_limit_remaining = None
-                    rate_limit_reset = None
-
-            # 文字数チェック (省略)
-            tweet_length = count_tweet_length(text)
+            # レート制限の残りに合わせて待機 (残りが十分なら最小間隔のみ)
+            rate_limiter.wait(pending)
+            # 他のプロセスと共有する台帳からも1回分を確保する (残りがなければリセットまで待つ)
+            rate_ledger.acquire(TWEET_ENDPOINT)
+
             logger.info(f"ツイート投稿試行 (試行 {attempt+1}/{max_retries}): 文字数={tweet_length}, 返信先={in_reply_to_tweet_id}")
-            if tweet_length > TWEET_MAX_LENGTH:
-                logger.error(f"エラー：ツイートが文字数制限 ({TWEET_MAX_LENGTH}) を超えています ({tweet_length}文字)。")
-                return None
 
             # 投稿実行
-            response = client.create_tweet(
-                text=text,
-                in_reply_to_tweet_id=in_reply_to_tweet_id,
-                user_auth=True
-            )
+            rate_limiter.record_request()
+            with tracing.span("create_tweet", "x_api", attempt=attempt + 1, length=tweet_length):
+                response = client.create_tweet(
+                    text=text,
+                    in_reply_to_tweet_id=in_reply_to_tweet_id,
+                    user_auth=True
+                )
             tweet_id = response.data["id"]
             logger.info(f"ツイート成功: ID={tweet_id}")
 
-            # ★★★ 投稿成功後にレスポンスからレート制限情報を更新 ★★★
-            update_rate_limit_from_response(response)
-
             return tweet_id
 
         except tweepy.errors.TooManyRequests as e:
@@ -167,61 +150,13 @@ def post_tweet_with_retry(client, text, in_reply_to_tweet_id=None, max_retries=3
                 if reset_header:
                     try:
                         reset_time = int(reset_header)
-                        rate_limit_reset = reset_time # グローバル変数も更新
-                        # タイムゾーンを考慮してローカル時間を表示する場合 (参考)
-                        # local_reset_time = datetime.fromtimestamp(reset_time)
-                        # logger.info(f"レートリミットリセット時刻 (ヘッダーより, UTC): {datetime.utcfromtimestamp(reset_time)}")
-                        # logger.info(f"レートリミットリセット時刻 (ヘッダーより, Local): {local_reset_time}")
-                        # 現在はUTCで表示
                         logger.info(f"レートリミットリセット時刻 (ヘッダーより): {datetime.fromtimestamp(reset_time)}")
                     except (ValueError, TypeError):
                         logger.warning("x-rate-limit-reset ヘッダーの解析に失敗。")
 
-            # 待機時間を計算
-            if reset_time:
-                reset_dt_naive = datetime.utcfromtimestamp(reset_time)
-                now_dt_naive = datetime.utcnow()
-                wait_time = reset_dt_naive - now_dt_naive
-                # ヘッダーの時間を使う場合はマージンを少し多めにとる (例: 5秒)
-                delay = max(1, wait_time.total_seconds()) + 5
-                logger.warning(f"リセット時刻に基づき、{delay:.1f} 秒待機します...")
-            else:
-                # ヘッダーが取れない場合は指数バックオフ
-                delay = base_delay * (2 ** attempt)
-                logger.warning(f"リセット時刻不明。{delay}秒待機します...")
-
-            # --- カウントダウン表示付き待機 ---
-            wait_start_time = time.monotonic() # より正確な時間計測のため
-            total_wait_seconds_int = int(delay) # 整数秒を取得
-
-            try:
-                for i in range(total_wait_seconds_int, 0, -1):
-                    # \r でカーソルを行頭に戻し、同じ行に残り時間を上書き表示
-                    # end='' で改行を防ぐ
-                    # 後ろのスペースは、秒数が減ったときに前の桁の数字が残らないようにするため
-                    print(f"\r⏳ 残り {i} 秒...          ", end='')
-                    time.sleep(1) # 1秒待機
-
-                # ループが終わったら表示をクリア
-                print("\r✅ 待機完了。                 ")
-
-                # 念のため、計算上の待機時間と実際の待機時間の差を調整
-                # (ループ処理や print のオーバーヘッドを考慮)
-                elapsed_time = time.monotonic() - wait_start_time
-                remaining_fractional_sleep = delay - elapsed_time
-                if remaining_fractional_sleep > 0:
-                    time.sleep(remaining_fractional_sleep)
-
-            except KeyboardInterrupt:
-                print("\n🚫 待機中に中断されました (Ctrl+C)。")
-                # 中断した場合、例外を再送出してスクリプトを停止させるか、
-                # 特定の処理を行うかを選択できます。
-                # ここでは再送出してプログラムを終了させます。
-                raise
-
-            # リトライ前にレート情報をリセット（次の試行で再取得を試みる or エラー待ち）
-            rate_limit_remaining = None
-            rate_limit_reset = None
+            # 次の試行の前に、ペーサーがリセット時刻 (不明な場合は指数バックオフ後) まで待機する
+            rate_limiter.on_rate_limited(reset_time, fallback_delay=base_delay * (2 ** attempt))
+            rate_ledger.on_rate_limited(TWEET_ENDPOINT, reset_time, fallback_delay=base_delay * (2 ** attempt))
 
         except tweepy.errors.Forbidden as e: # ★★★ Forbidden (403) エラーを個別に捕捉 ★★★
             logger.error(f"Twitter APIエラー (Forbidden - 403): {e}")
@@ -264,7 +199,7 @@ def post_tweet_with_retry(client, text, in_reply_to_tweet_id=None, max_retries=3
             logger.error(f"Tweepyエラー: {e}", exc_info=True)
             delay = base_delay * (2 ** attempt)
             logger.warning(f"Tweepyエラー発生、{delay}秒待機してリトライします...")
-            time.sleep(delay)
+            tracing.sleep(delay, "retry_backoff")
 
         except Exception as e: # 予期せぬエラー
             logger.error(f"予期せぬエラー: {e}", exc_info=True)
@@ -273,13 +208,46 @@ def post_tweet_with_retry(client, text, in_reply_to_tweet_id=None, max_retries=3
     logger.error("ツイート投稿のリトライ上限回数に達しました。")
     return None
 
-def main(date=None, output_dir="output"):
+def content_hash(text):
+    """ツイート本文の SHA-256 ハッシュ"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def load_journal(path):
+    """投稿済みジャーナルを読み込む。存在しない場合は None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_journal(path, journal):
+    """投稿済みジャーナルを一時ファイル経由で書き込む (途中で中断しても壊れないように)"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(journal, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def verify_journal(journal, texts):
+    """ジャーナルの投稿済みツイートが、これから投稿するテキストと一致するか確認する"""
+    posted = journal.get("tweets", [])
+    if len(posted) > len(texts):
+        logger.error(f"ジャーナルの投稿済み件数 ({len(posted)}) がツイート候補の件数 ({len(texts)}) を超えています。")
+        return False
+    for i, entry in enumerate(posted, 1):
+        if entry.get("index") != i or entry.get("sha256") != content_hash(texts[i - 1]):
+            logger.error(f"{i} 件目のツイート内容が投稿済みのもの (ID: {entry.get('id')}) と一致しません。")
+            return False
+    return True
+
+def main(date=None, output_dir="output", resume=False):
     """メイン処理を実行する関数
 
     Args:
         date (str, optional): 処理対象の日付 (YYYYMMDD形式)。
                              指定がない場合はコマンドライン引数から取得します。
         output_dir (str, optional): 出力ディレクトリのパス。デフォルトは"output"。
+        resume (bool, optional): {date}_posted.json に記録された投稿済みツイートの続きから再開する。
     """
     # --- Logger Setup ---
     global_logger = setup_logger(level=logging.INFO)
@@ -292,15 +260,18 @@ def main(date=None, output_dir="output"):
     else:
         global_logger.info("APIキー/トークン環境変数を読み込みました。")
 
-    # 認証クライアント作成
+    # 認証クライアント作成 (tweepy は投稿するときだけ読み込む)
+    import tweepy
+    from common.x_api import create_client
     try:
-        client = tweepy.Client(
+        client = create_client(
             bearer_token=BEARER_TOKEN, # search など読み取り系API用
             consumer_key=API_KEY,      # 以下は投稿など書き込み系API用
             consumer_secret=API_SECRET,
             access_token=ACCESS_TOKEN,
             access_token_secret=ACCESS_SECRET
         )
+        install_rate_limit_hook(client)
         # 認証チェック (自分の情報を取得してみる)
         user_info = client.get_me(user_auth=True) # ユーザー認証が必要なエンドポイント
         global_logger.info(f"✅ Twitter API認証成功: @{user_info.data.username}")
@@ -316,9 +287,10 @@ def main(date=None, output_dir="output"):
         # コマンドライン引数から日付を取得
         if len(sys.argv) < 2:
             global_logger.error("日付引数がありません。")
-            print("使用方法: python tweet.py <日付 (例: 20250115)>")
+            print("使用方法: python tweet.py <日付 (例: 20250115)> [--resume]")
             return 1
         date = sys.argv[1]
+        resume = resume or "--resume" in sys.argv[2:]
     global_logger.info("=== tweet 処理開始 ===")
     global_logger.info(f"対象日付: {date}")
 
@@ -326,6 +298,10 @@ def main(date=None, output_dir="output"):
     os.makedirs(output_dir, exist_ok=True)
     file_path = os.path.join(output_dir, f"{date}.txt")
 
+    # レート制限の台帳は出力ディレクトリに置く (get_tweet.py と共有)
+    global rate_ledger
+    rate_ledger = RateLimitLedger(os.path.join(output_dir, LEDGER_FILENAME))
+
     try:
         with open(file_path, "r", encoding="utf-8") as file:
             # ファイル内容を読み込み、空行で分割し、各要素の前後の空白を除去
@@ -352,48 +328,69 @@ def main(date=None, output_dir="output"):
         # 最初のツイートにヘッダーを追加
         first_tweet_text = header_text + tweets_to_post[0]
 
-    # 最初のツイートを投稿
-    global_logger.info("=" * 50)
-    global_logger.info("📢 ツイートを開始します")
-    global_logger.info("-" * 50)
-    global_logger.info(f"📝 1/{len(tweets_to_post)} 件目のツイート内容:")
-    global_logger.info(first_tweet_text)
-    global_logger.info("-" * 50)
-
-    thread_start_id = post_tweet_with_retry(client, text=first_tweet_text)
+    texts = [first_tweet_text] + tweets_to_post[1:]
+    total = len(texts)
 
-    if not thread_start_id:
-        global_logger.error("❌ 最初のツイート投稿に失敗したため、処理を終了します。")
+    # 投稿済みジャーナルの確認
+    journal_path = os.path.join(output_dir, f"{date}_posted.json")
+    journal = load_journal(journal_path)
+    if journal is not None and not resume:
+        global_logger.error(f"❌ 投稿済みジャーナル {journal_path} が存在します。"
+                            f"途中から再開する場合は --resume を指定してください。")
+        return 1
+    if journal is None:
+        journal = {"date": date, "source": file_path, "tweets": [], "completed": False}
+    elif not verify_journal(journal, texts):
+        global_logger.error(f"❌ {file_path} の内容が投稿済みジャーナルと一致しないため、再開できません。")
         return 1
-    else:
-        global_logger.info(f"✅ 1/{len(tweets_to_post)} 件目のツイートを投稿しました (ID: {thread_start_id})")
 
-    # 2つ目以降のツイートをスレッドとして投稿
-    last_tweet_id = thread_start_id
-    post_count = 1  # 最初のツイートをカウント
-    for i, text in enumerate(tweets_to_post[1:], 2):
-        # 投稿間に適切な待機時間を設ける (APIルール遵守とアカウント保護のため)
-        wait_seconds = 5  # 基本待機時間 (定数化推奨)
-        global_logger.info(f"⏳ 次のツイートまで {wait_seconds} 秒待機します...")
-        time.sleep(wait_seconds)
+    posted = journal["tweets"]
+    if posted:
+        global_logger.info(f"🔁 投稿済みジャーナルから再開します ({len(posted)}/{total} 件投稿済み, 最終ID: {posted[-1]['id']})")
+    if len(posted) >= total:
+        global_logger.info("すべてのツイートが投稿済みです。")
+        journal["completed"] = True
+        save_journal(journal_path, journal)
+        return 0
 
+    global_logger.info("=" * 50)
+    global_logger.info("📢 ツイートを開始します")
+
+    thread_start_time = time.monotonic()
+    last_tweet_id = posted[-1]["id"] if posted else None
+    post_count = 0
+    for i in range(len(posted) + 1, total + 1):
+        text = texts[i - 1]
         global_logger.info("-" * 50)
-        global_logger.info(f"📝 {i}/{len(tweets_to_post)} 件目のツイート内容 (返信先: {last_tweet_id}):")
+        if last_tweet_id:
+            global_logger.info(f"📝 {i}/{total} 件目のツイート内容 (返信先: {last_tweet_id}):")
+        else:
+            global_logger.info(f"📝 {i}/{total} 件目のツイート内容:")
         global_logger.info(text)
         global_logger.info("-" * 50)
 
-        new_tweet_id = post_tweet_with_retry(client, text=text, in_reply_to_tweet_id=last_tweet_id)
+        # 投稿間隔はレート制限の残りに合わせて post_tweet_with_retry 内で調整される
+        new_tweet_id = post_tweet_with_retry(client, text=text, in_reply_to_tweet_id=last_tweet_id,
+                                             pending=total - i + 1)
 
-        if new_tweet_id:
-            last_tweet_id = new_tweet_id  # 次の返信先を更新
-            post_count += 1
-            global_logger.info(f"✅ {i}/{len(tweets_to_post)} 件目のツイートを投稿しました (ID: {new_tweet_id})")
-        else:
-            global_logger.error(f"❌ {i}/{len(tweets_to_post)} 件目のツイート投稿に失敗しました。以降の投稿を中止します。")
+        if not new_tweet_id:
+            global_logger.error(f"❌ {i}/{total} 件目のツイート投稿に失敗しました。以降の投稿を中止します。")
+            global_logger.error(f"python main.py tweet {date} --resume で {i} 件目から再開できます。")
             break  # 失敗したらループを抜ける
 
-    global_logger.info(f"=== tweet 処理終了 ({post_count}/{len(tweets_to_post)} 件投稿) ===")
-    return 0
+        # 投稿のたびにジャーナルへ記録する (中断しても再開できるように)
+        posted.append({"index": i, "id": str(new_tweet_id), "sha256": content_hash(text)})
+        journal["completed"] = len(posted) == total
+        save_journal(journal_path, journal)
+
+        last_tweet_id = new_tweet_id  # 次の返信先を更新
+        post_count += 1
+        global_logger.info(f"✅ {i}/{total} 件目のツイートを投稿しました (ID: {new_tweet_id})")
+
+    elapsed = time.monotonic() - thread_start_time
+    global_logger.info(f"⏱ スレッド投稿時間: {elapsed:.1f} 秒 ({post_count} 件)")
+    global_logger.info(f"=== tweet 処理終了 ({len(posted)}/{total} 件投稿) ===")
+    return 0 if journal["completed"] else 1
 
 if __name__ == "__main__":
     sys.exit(main())